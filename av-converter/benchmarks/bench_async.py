@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark the asyncio API with hundreds of concurrent conversions.
+Converts many short WAV clips to MP3 at once through async_av_converter,
+compares the wall time with the synchronous converter called in a loop,
+and checks that timeouts and cancellation kill FFmpeg.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import tempfile
+import subprocess
+import contextlib
+import io
+from pathlib import Path
+import argparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+import async_av_converter  # noqa: E402
+from universal_av_converter import convert_file  # noqa: E402
+
+
+def make_sources(work_dir: Path) -> tuple:
+    """Create a 1-second tone and a 20-second clip that is slow to encode as VP9."""
+    tone = work_dir / 'tone.wav'
+    clip = work_dir / 'clip.mkv'
+    subprocess.run(['ffmpeg', '-f', 'lavfi', '-i', 'sine=frequency=440:duration=1', '-y', str(tone)],
+                   capture_output=True, check=True)
+    subprocess.run(['ffmpeg', '-f', 'lavfi', '-i', 'testsrc2=size=640x360:rate=30:duration=20',
+                    '-c:v', 'libx264', '-preset', 'ultrafast', '-y', str(clip)],
+                   capture_output=True, check=True)
+    return tone, clip
+
+
+def child_processes() -> list:
+    """PIDs of this process's children (Linux /proc; empty elsewhere)."""
+    children = []
+    for entry in Path('/proc').glob('[0-9]*'):
+        try:
+            fields = (entry / 'stat').read_text().rpartition(')')[2].split()
+        except OSError:
+            continue
+        if int(fields[1]) == os.getpid():
+            children.append(int(entry.name))
+    return children
+
+
+async def run_concurrent(jobs: list) -> tuple:
+    start = time.perf_counter()
+    results = await async_av_converter.convert_many(jobs, audio_backend='ffmpeg')
+    failed = [error for _, _, error in results if error is not None]
+    return time.perf_counter() - start, failed
+
+
+async def check_abort(clip: Path, work_dir: Path) -> list:
+    """Start slow VP9 encodes, time one out and cancel another; return leftover child PIDs."""
+    try:
+        await async_av_converter.convert_video(str(clip), str(work_dir / 'timeout.webm'), timeout=0.5)
+        raise RuntimeError('expected the VP9 encode to time out')
+    except TimeoutError:
+        pass
+    
+    task = asyncio.ensure_future(async_av_converter.convert_video(str(clip), str(work_dir / 'cancel.webm')))
+    await asyncio.sleep(0.5)
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
+    return child_processes()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Run hundreds of concurrent conversions through the asyncio API'
+    )
+    parser.add_argument('--jobs', type=int, default=300, help='Number of conversions (default: 300)')
+    parser.add_argument('--ffmpeg-jobs', type=int,
+                       help='Concurrent FFmpeg processes (default: CPU count)')
+    parser.add_argument('--skip-sync', action='store_true',
+                       help='Do not time the synchronous converter for comparison')
+    
+    args = parser.parse_args()
+    
+    if args.ffmpeg_jobs:
+        async_av_converter.set_limits(ffmpeg=args.ffmpeg_jobs)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        tone, clip = make_sources(work_dir)
+        jobs = [(tone, work_dir / f'async_{i}.mp3') for i in range(args.jobs)]
+        
+        seconds, failed = asyncio.run(run_concurrent(jobs))
+        produced = sum(1 for _, output_file in jobs if output_file.exists())
+        print(f"{'async':<6} jobs={args.jobs:<5} limit={async_av_converter.BACKEND_LIMITS['ffmpeg']:<3} "
+              f"{seconds:7.2f}s  {args.jobs / seconds:7.1f} jobs/s  outputs={produced}  failed={len(failed)}")
+        
+        if not args.skip_sync:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                for i in range(args.jobs):
+                    convert_file(str(tone), str(work_dir / f'sync_{i}.mp3'), audio_backend='ffmpeg')
+            seconds = time.perf_counter() - start
+            print(f"{'sync':<6} jobs={args.jobs:<5} {'':<9} {seconds:7.2f}s  {args.jobs / seconds:7.1f} jobs/s")
+        
+        leftovers = asyncio.run(check_abort(clip, work_dir))
+        print(f"timeout and cancellation: {len(leftovers)} child processes left")
+        
+        if failed or produced != args.jobs or leftovers:
+            print(f"✗ {len(failed)} failures, {args.jobs - produced} missing outputs, "
+                  f"{len(leftovers)} leftover processes", file=sys.stderr)
+            sys.exit(1)
+        print("✓ All conversions succeeded; aborted jobs left no FFmpeg processes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-file latency of in-process vs subprocess dispatch.
+Generates short FFmpeg test clips and converts them through universal_av_converter.
+"""
+
+import sys
+import time
+import tempfile
+import statistics
+import subprocess
+import contextlib
+import io
+from pathlib import Path
+import argparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+from universal_av_converter import convert_file  # noqa: E402
+
+
+def make_corpus(work_dir: Path, count: int) -> list:
+    """Create short WAV and MP4 clips and return (input, output) pairs."""
+    jobs = []
+    for i in range(count):
+        wav = work_dir / f'tone_{i}.wav'
+        subprocess.run(['ffmpeg', '-f', 'lavfi', '-i', f'sine=frequency={220 + i}:duration=1',
+                        '-y', str(wav)], capture_output=True, check=True)
+        jobs.append((wav, work_dir / f'tone_{i}.mp3'))
+        
+        mp4 = work_dir / f'clip_{i}.mp4'
+        subprocess.run(['ffmpeg', '-f', 'lavfi', '-i', 'testsrc=size=160x120:rate=10:duration=1',
+                        '-f', 'lavfi', '-i', 'sine=duration=1', '-shortest',
+                        '-y', str(mp4)], capture_output=True, check=True)
+        jobs.append((mp4, work_dir / f'clip_{i}.m4a'))
+    return jobs
+
+
+def time_jobs(jobs: list, isolate: bool) -> list:
+    """Convert every job and return per-file latencies in milliseconds."""
+    latencies = []
+    for input_file, output_file in jobs:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            # Pin FFmpeg so both modes run the same converter
+            convert_file(str(input_file), str(output_file), isolate=isolate, audio_backend='ffmpeg')
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(label: str, latencies: list) -> None:
+    print(f"{label:<12} files={len(latencies):<5} "
+          f"mean={statistics.mean(latencies):8.2f}ms  "
+          f"median={statistics.median(latencies):8.2f}ms  "
+          f"max={max(latencies):8.2f}ms  "
+          f"total={sum(latencies) / 1000:6.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare per-file latency of in-process and subprocess dispatch'
+    )
+    parser.add_argument('--files', type=int, default=10,
+                       help='Number of audio and video inputs each (default: 10)')
+    
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        jobs = make_corpus(Path(tmp), args.files)
+        report('subprocess', time_jobs(jobs, isolate=True))
+        report('in-process', time_jobs(jobs, isolate=False))
+
+
+if __name__ == '__main__':
+    main()
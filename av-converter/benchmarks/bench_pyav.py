@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark short-clip audio throughput of the ffmpeg and PyAV backends.
+Writes short 16 kHz mono WAV clips of a synthetic voice-band signal (with
+Python's wave module, so runs of the PyAV backends alone need no ffmpeg)
+and converts them to each output format with:
+
+- ffmpeg: convert_batch with one ffmpeg process per clip
+- pyav: convert_batch with the in-process PyAV backend (worker threads)
+- pool: PyAvPool, clips handed in chunks to warm worker processes
+
+and reports clips per second and the speedup over the ffmpeg backend.
+"""
+
+import os
+import sys
+import math
+import time
+import wave
+import tempfile
+from array import array
+from pathlib import Path
+import argparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+from conversion_graph import installed  # noqa: E402
+from universal_av_converter import convert_batch  # noqa: E402
+from pyav_audio import PyAvPool, pyav_available, supports  # noqa: E402
+
+BACKENDS = ['ffmpeg', 'pyav', 'pool']
+
+SAMPLE_RATE = 16000
+
+# Seconds of signal the clips are cut from at different offsets
+SPREAD = 5.0
+
+
+def voice_band_pcm(seconds: float) -> bytes:
+    """16-bit mono PCM of two detuned tones with a slow tremolo: voice-band content, not silence."""
+    samples = array('h')
+    for index in range(int(seconds * SAMPLE_RATE)):
+        t = index / SAMPLE_RATE
+        value = (0.4 * math.sin(2 * math.pi * (180 + 40 * math.sin(2 * math.pi * 0.7 * t)) * t)
+                 * (0.6 + 0.4 * math.sin(2 * math.pi * 3 * t)) + 0.2 * math.sin(2 * math.pi * 1200 * t))
+        samples.append(int(value * 32767))
+    if sys.byteorder == 'big':
+        samples.byteswap()  # WAV samples are little-endian
+    return samples.tobytes()
+
+
+def make_clips(directory: Path, count: int, duration: float) -> list:
+    """Write count WAV clips of duration seconds, each from a different offset of one signal."""
+    directory.mkdir(parents=True)
+    pcm = voice_band_pcm(duration + SPREAD)
+    frames = int(duration * SAMPLE_RATE)
+    clips = []
+    for index in range(count):
+        offset = int(index * 0.37 % SPREAD * SAMPLE_RATE) * 2
+        path = directory / f"clip{index:05d}.wav"
+        with wave.open(str(path), 'wb') as clip:
+            clip.setnchannels(1)
+            clip.setsampwidth(2)
+            clip.setframerate(SAMPLE_RATE)
+            clip.writeframes(pcm[offset:offset + frames * 2])
+        clips.append(path)
+    return clips
+
+
+def run_backend(backend: str, jobs: list, workers: int, bitrate: str, chunk_size: int) -> list:
+    """Convert jobs with a backend; return (input, output, error) tuples."""
+    if backend == 'pool':
+        with PyAvPool(workers, chunk_size) as pool:
+            return pool.convert_many(jobs, bitrate)
+    return convert_batch(jobs, workers=workers, bitrate=bitrate, audio_backend=backend)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare short-clip audio throughput of the ffmpeg and PyAV backends'
+    )
+    parser.add_argument('--clips', type=int, default=200,
+                       help='Number of clips (default: 200)')
+    parser.add_argument('--duration', type=float, default=3.0,
+                       help='Seconds per clip (default: 3)')
+    parser.add_argument('--formats', nargs='+', default=['mp3', 'm4a', 'opus', 'flac'],
+                       help='Output formats (default: mp3 m4a opus flac)')
+    parser.add_argument('--bitrate', default='64k', help='Bitrate for lossy formats (default: 64k)')
+    parser.add_argument('--workers', type=int,
+                       help='Concurrent conversions / pool processes (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=16,
+                       help='Clips handed to a pool worker at a time (default: 16)')
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=BACKENDS,
+                       help='Backends to run (default: all)')
+    
+    args = parser.parse_args()
+    
+    if 'ffmpeg' in args.backends and not installed('ffmpeg'):
+        print("✗ Error: ffmpeg is not installed (or run only --backends pyav pool)", file=sys.stderr)
+        sys.exit(1)
+    
+    workers = args.workers or os.cpu_count() or 1
+    
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        clips = make_clips(work_dir / 'in', args.clips, args.duration)
+        
+        print(f"{len(clips)} clips of {args.duration:g}s, {workers} workers")
+        print(f"{'format':<6} {'backend':<8} {'clips':>5} {'seconds':>8} {'clips/s':>8} {'speedup':>8}")
+        for output_format in args.formats:
+            baseline = None
+            for backend in args.backends:
+                if backend != 'ffmpeg' and not pyav_available():
+                    print(f"{output_format:<6} {backend:<8} skipped: PyAV not installed (pip install av)")
+                    continue
+                if backend != 'ffmpeg' and not supports(output_format):
+                    print(f"{output_format:<6} {backend:<8} skipped: PyAV cannot write {output_format} here")
+                    continue
+                output_dir = work_dir / 'out' / f"{output_format}_{backend}"
+                output_dir.mkdir(parents=True)
+                jobs = [(clip, output_dir / f"{clip.stem}.{output_format}") for clip in clips]
+                
+                start = time.perf_counter()
+                results = run_backend(backend, jobs, workers, args.bitrate, args.chunk_size)
+                seconds = time.perf_counter() - start
+                
+                errors = [error for _, _, error in results if error is not None]
+                if errors:
+                    print(f"{output_format:<6} {backend:<8} failed: {len(errors)} errors, first: "
+                          f"{errors[0].splitlines()[0]}")
+                    failed = True
+                    continue
+                if backend == 'ffmpeg':
+                    baseline = seconds
+                speedup = f"{baseline / seconds:7.1f}x" if baseline else '-'
+                print(f"{output_format:<6} {backend:<8} {len(jobs):>5} {seconds:>8.2f} "
+                      f"{len(jobs) / seconds:>8.1f} {speedup:>8}")
+    
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
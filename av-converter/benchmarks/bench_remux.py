@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark stream-copy (remux) vs full transcode in convert_video.
+Generates an H.264/AAC MKV and MOV and converts them to MP4 both ways.
+"""
+
+import sys
+import time
+import tempfile
+import subprocess
+import contextlib
+import io
+from pathlib import Path
+import argparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+from convert_video import convert_video  # noqa: E402
+
+
+def make_source(path: Path, duration: int, size: str) -> None:
+    """Encode a synthetic H.264/AAC clip into the container given by path's extension."""
+    subprocess.run(['ffmpeg', '-f', 'lavfi', '-i', f'testsrc2=size={size}:rate=30:duration={duration}',
+                    '-f', 'lavfi', '-i', f'sine=frequency=440:duration={duration}',
+                    '-c:v', 'libx264', '-preset', 'veryfast', '-c:a', 'aac', '-shortest',
+                    '-y', str(path)], capture_output=True, check=True)
+
+
+def time_conversion(input_file: Path, output_file: Path, force_transcode: bool) -> tuple:
+    """Convert once; return (seconds, stream plan)."""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        plan = convert_video(str(input_file), str(output_file), force_transcode=force_transcode)
+    return time.perf_counter() - start, plan
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare wall time of remuxing and transcoding to MP4'
+    )
+    parser.add_argument('--duration', type=int, default=30,
+                       help='Length of the synthetic clips in seconds (default: 30)')
+    parser.add_argument('--size', default='1280x720',
+                       help='Frame size of the synthetic clips (default: 1280x720)')
+    
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        print(f"{'case':<12} {'path':<10} {'seconds':>9} {'speedup':>8}")
+        for source_format in ('mkv', 'mov'):
+            source = work_dir / f'source.{source_format}'
+            make_source(source, args.duration, args.size)
+            
+            transcode_seconds, _ = time_conversion(source, work_dir / 'transcoded.mp4', True)
+            remux_seconds, plan = time_conversion(source, work_dir / 'remuxed.mp4', False)
+            
+            label = f'{source_format} → mp4'
+            print(f"{label:<12} {'transcode':<10} {transcode_seconds:>9.2f} {1:>7.1f}x")
+            print(f"{label:<12} {'remux' if plan['video'] == 'copy' else 'n/a':<10} {remux_seconds:>9.2f} "
+                  f"{transcode_seconds / remux_seconds:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
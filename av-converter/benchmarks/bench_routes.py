@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Calibrate the conversion planner's step costs on this machine.
+Generates a short WAV and an H.264/AAC MP4 clip, times the conversion to
+every output format from them (universal_av_converter.build_graph) and
+saves the median seconds per step, which plan_route() then uses instead of
+its built-in estimates. Steps from other input formats take the median of
+the measured steps with the same output format.
+
+    python benchmarks/bench_routes.py                 # measure and save
+    python scripts/universal_av_converter.py talk.mkv talk.mp3 --explain
+"""
+
+import sys
+import time
+import statistics
+import tempfile
+import subprocess
+import contextlib
+import io
+from pathlib import Path
+import argparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+from conversion_graph import installed, save_costs  # noqa: E402
+from universal_av_converter import build_graph, step_options, run_route, COSTS_FILE  # noqa: E402
+
+
+def make_sources(work_dir: Path, duration: int, size: str) -> dict:
+    """Encode a sine-tone WAV and a test-pattern MP4; return {format: path}."""
+    wav, mp4 = work_dir / 'source.wav', work_dir / 'source.mp4'
+    subprocess.run(['ffmpeg', '-f', 'lavfi', '-i', f'sine=frequency=440:duration={duration}',
+                    '-y', str(wav)], capture_output=True, check=True)
+    subprocess.run(['ffmpeg', '-f', 'lavfi', '-i', f'testsrc2=size={size}:rate=30:duration={duration}',
+                    '-f', 'lavfi', '-i', f'sine=frequency=440:duration={duration}',
+                    '-c:v', 'libx264', '-preset', 'veryfast', '-c:a', 'aac', '-shortest',
+                    '-y', str(mp4)], capture_output=True, check=True)
+    return {'wav': wav, 'mp4': mp4}
+
+
+def time_step(step, input_file: Path, output_file: Path, repeat: int) -> float:
+    """Median seconds of one step."""
+    steps = [(step, step_options(step, {}))]
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_route(steps, input_file, output_file)
+        seconds.append(time.perf_counter() - start)
+    return statistics.median(seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure conversion steps and save the costs used by the route planner"
+    )
+    parser.add_argument('--duration', type=int, default=5,
+                       help='Length of the synthetic clips in seconds (default: 5)')
+    parser.add_argument('--size', default='640x360',
+                       help='Frame size of the synthetic video (default: 640x360)')
+    parser.add_argument('--repeat', type=int, default=3,
+                       help='Runs per step; the median is kept (default: 3)')
+    parser.add_argument('--only', action='append', metavar='TEXT',
+                       help="Only measure steps whose key (e.g. 'ffmpeg:wav>mp3') contains TEXT (repeatable)")
+    parser.add_argument('--save', metavar='PATH', default=str(COSTS_FILE),
+                       help=f'Where to write the costs (default: {COSTS_FILE})')
+    parser.add_argument('--no-save', action='store_true', help='Only print the measurements')
+    
+    args = parser.parse_args()
+    
+    if not installed('ffmpeg'):
+        print("✗ Error: ffmpeg is not installed", file=sys.stderr)
+        sys.exit(1)
+    
+    costs = {}
+    failed = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        sources = make_sources(work_dir, args.duration, args.size)
+        
+        print(f"{'step':<24} {'converter':<15} {'default':>9} {'measured':>9}")
+        for step in sorted(build_graph().steps(), key=lambda step: step.key):
+            if step.source not in sources or (args.only and not any(text in step.key for text in args.only)):
+                continue
+            output_file = work_dir / 'out' / step.converter / f'output.{step.target}'
+            output_file.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                costs[step.key] = time_step(step, sources[step.source], output_file, args.repeat)
+            except Exception as e:
+                failed += 1
+                lines = str(e).strip().splitlines()
+                print(f"{step.key:<24} {step.converter:<15} failed: {lines[-1] if lines else type(e).__name__}")
+                continue
+            print(f"{step.key:<24} {step.converter:<15} {step.cost:>8.3f}s {costs[step.key]:>8.3f}s")
+    
+    print(f"Measured {len(costs)} steps, {failed} failed")
+    if costs and not args.no_save:
+        save_costs(Path(args.save), costs)
+        print(f"✓ Saved step costs: {args.save}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark segment-parallel vs single-process video transcoding.
+Generates a long low-resolution H.264/AAC clip, transcodes it both ways and
+checks that the segmented output keeps the source's duration and frame count.
+"""
+
+import os
+import sys
+import time
+import tempfile
+import subprocess
+import contextlib
+import io
+from pathlib import Path
+import argparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+from convert_video import convert_video  # noqa: E402
+from media_probe import probe, media_duration, count_frames  # noqa: E402
+
+
+def make_source(path: Path, duration: int, size: str) -> None:
+    """Encode a synthetic clip with a keyframe every 2 seconds."""
+    subprocess.run(['ffmpeg', '-f', 'lavfi', '-i', f'testsrc2=size={size}:rate=30:duration={duration}',
+                    '-f', 'lavfi', '-i', f'sine=frequency=440:duration={duration}',
+                    '-c:v', 'libx264', '-preset', 'ultrafast', '-g', '60', '-c:a', 'aac', '-shortest',
+                    '-y', str(path)], capture_output=True, check=True)
+
+
+def time_conversion(source: Path, output_file: Path, segments: int = None,
+                    workers: int = None) -> float:
+    """Transcode once with libx264; return wall time in seconds."""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        convert_video(str(source), str(output_file), codec='libx264', force_transcode=True,
+                      segments=segments, workers=workers)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare segment-parallel and single-process transcoding'
+    )
+    parser.add_argument('--duration', type=int, default=300,
+                       help='Length of the synthetic clip in seconds (default: 300)')
+    parser.add_argument('--size', default='640x360',
+                       help='Frame size of the synthetic clip (default: 640x360)')
+    parser.add_argument('--segments', type=int, default=os.cpu_count() or 1,
+                       help='Segments for the parallel run (default: CPU count)')
+    parser.add_argument('--workers', type=int,
+                       help='Concurrent FFmpeg processes (default: min(segments, CPU count))')
+    
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        source = work_dir / 'source.mkv'
+        make_source(source, args.duration, args.size)
+        
+        outputs = {
+            'single': (work_dir / 'single.mp4', None),
+            f'{args.segments} segments': (work_dir / 'segmented.mp4', args.segments),
+        }
+        source_duration = media_duration(probe(source))
+        source_frames = count_frames(source)
+        print(f"{'mode':<14} {'seconds':>9} {'duration':>10} {'frames':>8}")
+        print(f"{'source':<14} {'':>9} {source_duration:>9.2f}s {source_frames:>8}")
+        for label, (output_file, segments) in outputs.items():
+            seconds = time_conversion(source, output_file, segments, args.workers)
+            duration = media_duration(probe(output_file))
+            frames = count_frames(output_file)
+            print(f"{label:<14} {seconds:>9.2f} {duration:>9.2f}s {frames:>8}")
+        
+        # duration and frames now hold the segmented run; allow one frame of drift
+        if frames != source_frames or abs(duration - source_duration) > 1 / 30:
+            print(f"✗ Mismatch: {frames} frames / {duration:.3f}s vs source "
+                  f"{source_frames} frames / {source_duration:.3f}s", file=sys.stderr)
+            sys.exit(1)
+        print("✓ Duration and frame count match the source")
+
+
+if __name__ == '__main__':
+    main()
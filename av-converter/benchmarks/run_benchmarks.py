@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite covering the conversion routes of references/conversion_matrix.md.
+Generates a reproducible synthetic corpus with FFmpeg's lavfi test sources
+(tones, test-pattern video), runs every route through universal_av_converter
+in a fresh process and reports latency, throughput and peak memory
+(including FFmpeg's).
+
+Save a run as a baseline and compare later runs against it:
+    python benchmarks/run_benchmarks.py --save baseline.json
+    python benchmarks/run_benchmarks.py --baseline baseline.json --threshold 0.15
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import statistics
+import subprocess
+import contextlib
+import io
+import importlib.util
+from datetime import datetime, timezone
+from pathlib import Path
+import argparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+from metrics import peak_rss_mb  # noqa: E402
+
+# Bump when the generated corpus changes; baselines of another version are not comparable
+CORPUS_VERSION = 1
+
+# Slowdowns smaller than this are noise, whatever the ratio
+LATENCY_FLOOR_SECONDS = 0.005
+MEMORY_FLOOR_MB = 5.0
+
+
+def scaled(value: int, scale: float) -> int:
+    return max(1, int(value * scale))
+
+
+def ffmpeg(*args: str) -> None:
+    """Run FFmpeg quietly, raising on failure."""
+    result = subprocess.run(['ffmpeg', '-v', 'error', *args, '-y'], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"FFmpeg failed while generating the corpus: {result.stderr}")
+
+
+def make_corpus(corpus_dir: Path, scale: float = 1.0) -> None:
+    """Generate every corpus file that does not exist yet."""
+    corpus_dir.mkdir(parents=True, exist_ok=True)
+    
+    def needed(name):
+        return not (corpus_dir / name).exists()
+    
+    # Stereo two-tone signal; lavfi sources are deterministic
+    seconds = scaled(60, scale)
+    tone = f"aevalsrc=0.5*sin(440*2*PI*t)|0.5*sin(660*2*PI*t):s=48000:d={seconds}"
+    if needed('tone.wav'):
+        ffmpeg('-f', 'lavfi', '-i', tone, str(corpus_dir / 'tone.wav'))
+    if needed('tone.flac'):
+        ffmpeg('-i', str(corpus_dir / 'tone.wav'), str(corpus_dir / 'tone.flac'))
+    if needed('tone.mp3'):
+        ffmpeg('-i', str(corpus_dir / 'tone.wav'), '-b:a', '192k', str(corpus_dir / 'tone.mp3'))
+    
+    # H.264/AAC test pattern with a keyframe every 2 seconds
+    for name, size, duration in [('clip_360p.mkv', '640x360', 20), ('clip_720p.mkv', '1280x720', 10)]:
+        if needed(name):
+            duration = scaled(duration, scale)
+            ffmpeg('-f', 'lavfi', '-i', f'testsrc2=size={size}:rate=30:duration={duration}',
+                   '-f', 'lavfi', '-i', f'sine=frequency=440:duration={duration}',
+                   '-c:v', 'libx264', '-preset', 'veryfast', '-g', '60', '-c:a', 'aac', '-shortest',
+                   str(corpus_dir / name))
+    if needed('clip_360p.mp4'):
+        ffmpeg('-i', str(corpus_dir / 'clip_360p.mkv'), '-c', 'copy', str(corpus_dir / 'clip_360p.mp4'))
+
+
+def define_cases(corpus_dir: Path) -> list:
+    """
+    Benchmark cases: one per conversion route.
+    
+    Returns:
+        Dicts with 'name', 'input', 'output', 'options' (convert_file keywords)
+        and 'requires' (executables or Python modules that must be available)
+    """
+    out = corpus_dir / 'out'
+    cases = []
+    
+    def case(name, input_name, output_name, requires=('ffmpeg',), **options):
+        cases.append({'name': name, 'input': corpus_dir / input_name, 'output': out / output_name,
+                      'options': options, 'requires': requires})
+    
+    case('audio:wav-mp3', 'tone.wav', 'tone.mp3', audio_backend='ffmpeg')
+    case('audio:wav-flac', 'tone.wav', 'tone.flac', audio_backend='ffmpeg')
+    case('audio:wav-opus', 'tone.wav', 'tone.opus', bitrate='96k', audio_backend='ffmpeg')
+    case('audio:flac-m4a', 'tone.flac', 'tone.m4a', audio_backend='ffmpeg')
+    case('audio:mp3-ogg', 'tone.mp3', 'tone.ogg', audio_backend='ffmpeg')
+    case('audio:mp3-wav:resample', 'tone.mp3', 'tone_44k.wav', sample_rate=44100, audio_backend='ffmpeg')
+    case('audio:wav-mp3:pyav', 'tone.wav', 'tone_pyav.mp3', requires=('av',), audio_backend='pyav')
+    case('audio:flac-m4a:pyav', 'tone.flac', 'tone_pyav.m4a', requires=('av',), audio_backend='pyav')
+    
+    case('video:mkv-mp4:remux', 'clip_360p.mkv', 'clip_360p.mp4')
+    case('video:mkv-mp4:transcode-360p', 'clip_360p.mkv', 'clip_360p_x264.mp4', force_transcode=True)
+    case('video:mkv-mp4:downscale-720p', 'clip_720p.mkv', 'clip_480p.mp4', resolution='854x480')
+    case('video:mp4-avi:transcode', 'clip_360p.mp4', 'clip_360p.avi')
+    case('video:mp4-webm:transcode', 'clip_360p.mp4', 'clip_360p.webm')
+    case('video:mkv-mov:remux', 'clip_720p.mkv', 'clip_720p.mov')
+    
+    case('extract:mp4-m4a:copy', 'clip_360p.mp4', 'clip_360p.m4a')
+    case('extract:mkv-mp3:transcode', 'clip_360p.mkv', 'clip_360p.mp3')
+    case('extract:mkv-wav', 'clip_720p.mkv', 'clip_720p.wav')
+    return cases
+
+
+def missing_requirements(case: dict) -> list:
+    """Executables or modules a case needs that are not installed."""
+    return [name for name in case['requires']
+            if not shutil.which(name) and not importlib.util.find_spec(name)]
+
+
+def run_child(case: dict, repeat: int) -> None:
+    """Run one case `repeat` times in this process and print its measurements as JSON."""
+    from universal_av_converter import convert_file
+    
+    case['output'].parent.mkdir(parents=True, exist_ok=True)
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            convert_file(str(case['input']), str(case['output']), **case['options'])
+        seconds.append(time.perf_counter() - start)
+    print(json.dumps({'seconds': seconds, 'peak_rss_mb': peak_rss_mb(),
+                      'tool_peak_rss_mb': peak_rss_mb(children=True)}))
+
+
+def run_case(case: dict, corpus_dir: Path, repeat: int) -> dict:
+    """
+    Measure one case in a fresh interpreter, so peak memory is its own.
+    
+    Returns:
+        {'status': 'ok', 'median', 'first', 'mb_per_s', 'peak_mb', ...},
+        or {'status': 'skipped'|'error', 'reason'}
+    """
+    missing = missing_requirements(case)
+    if missing:
+        return {'status': 'skipped', 'reason': f"missing {', '.join(missing)}"}
+    
+    cmd = [sys.executable, str(Path(__file__).resolve()), '--child', case['name'],
+           '--corpus', str(corpus_dir), '--repeat', str(repeat)]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        return {'status': 'error', 'reason': lines[-1] if lines else f"exit code {result.returncode}"}
+    
+    measured = json.loads(result.stdout.strip().splitlines()[-1])
+    seconds = measured['seconds']
+    median = statistics.median(seconds)
+    input_mb = case['input'].stat().st_size / 1024 ** 2
+    return {
+        'status': 'ok',
+        'median': median,
+        'first': seconds[0],
+        'mb_per_s': input_mb / median if median else None,
+        'peak_mb': max(measured['peak_rss_mb'] or 0, measured['tool_peak_rss_mb'] or 0),
+        'python_peak_rss_mb': measured['peak_rss_mb'],
+        'tool_peak_rss_mb': measured['tool_peak_rss_mb'],
+        'input_bytes': case['input'].stat().st_size,
+        'output_bytes': case['output'].stat().st_size if case['output'].exists() else None,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> dict:
+    """
+    Compare results against a baseline run.
+    
+    Returns:
+        {case name: {'latency': ratio, 'memory': ratio, 'regressed': bool}}
+        for cases measured in both runs
+    """
+    comparison = {}
+    for name, current in results.items():
+        previous = baseline['results'].get(name)
+        if current['status'] != 'ok' or not previous or previous['status'] != 'ok':
+            continue
+        latency = current['median'] / previous['median'] if previous['median'] else 1.0
+        memory = current['peak_mb'] / previous['peak_mb'] if previous['peak_mb'] else 1.0
+        slower = (latency > 1 + threshold
+                  and current['median'] - previous['median'] > LATENCY_FLOOR_SECONDS)
+        bigger = (memory > 1 + threshold
+                  and current['peak_mb'] - previous['peak_mb'] > MEMORY_FLOOR_MB)
+        comparison[name] = {'latency': latency, 'memory': memory, 'regressed': slower or bigger}
+    return comparison
+
+
+def format_row(name: str, result: dict, change: dict = None) -> str:
+    if result['status'] != 'ok':
+        return f"{name:<34} {result['status']}: {result['reason']}"
+    throughput = f"{result['mb_per_s']:.1f}" if result['mb_per_s'] is not None else '-'
+    row = (f"{name:<34} {result['median'] * 1000:>9.1f}ms {result['first'] * 1000:>9.1f}ms "
+           f"{throughput:>8} {result['peak_mb']:>8.0f}MB")
+    if change:
+        flag = '  ✗ REGRESSION' if change['regressed'] else ''
+        row += f"  {(change['latency'] - 1) * 100:+6.1f}% {(change['memory'] - 1) * 100:+6.1f}%{flag}"
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark every conversion route on a synthetic corpus'
+    )
+    parser.add_argument('--corpus', metavar='DIR',
+                       help='Keep the generated corpus here and reuse it (default: temporary)')
+    parser.add_argument('--scale', type=float, default=1.0,
+                       help='Corpus size factor: clip durations (default: 1.0)')
+    parser.add_argument('--repeat', type=int, default=3,
+                       help='Runs per case; the median is reported (default: 3)')
+    parser.add_argument('--only', action='append', metavar='TEXT',
+                       help='Only run cases whose name contains TEXT (repeatable)')
+    parser.add_argument('--save', metavar='PATH', help='Write the results as JSON (e.g. a new baseline)')
+    parser.add_argument('--baseline', metavar='PATH', help='Compare against results saved with --save')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                       help='Relative slowdown or memory growth counted as a regression (default: 0.2)')
+    parser.add_argument('--child', metavar='CASE', help=argparse.SUPPRESS)
+    
+    args = parser.parse_args()
+    
+    try:
+        if args.child:
+            cases = {case['name']: case for case in define_cases(Path(args.corpus))}
+            run_child(cases[args.child], args.repeat)
+            return
+        
+        baseline = None
+        if args.baseline:
+            baseline = json.loads(Path(args.baseline).read_text())
+            if baseline['corpus_version'] != CORPUS_VERSION or baseline['scale'] != args.scale:
+                raise ValueError(f"Baseline was recorded with corpus version {baseline['corpus_version']} "
+                                 f"at --scale {baseline['scale']}; rerun with the same scale "
+                                 f"or save a new baseline")
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            corpus_dir = Path(args.corpus or tmp).resolve()
+            start = time.perf_counter()
+            make_corpus(corpus_dir, args.scale)
+            print(f"Corpus ready in {time.perf_counter() - start:.1f}s: {corpus_dir}")
+            
+            cases = [case for case in define_cases(corpus_dir)
+                     if not args.only or any(text in case['name'] for text in args.only)]
+            header = f"{'case':<34} {'median':>11} {'first':>11} {'MB/s':>8} {'peak':>10}"
+            print(header + ('  latency  memory' if baseline else ''))
+            
+            results = {}
+            comparison = {}
+            for case in cases:
+                results[case['name']] = run_case(case, corpus_dir, args.repeat)
+                if baseline:
+                    comparison.update(compare({case['name']: results[case['name']]}, baseline, args.threshold))
+                print(format_row(case['name'], results[case['name']], comparison.get(case['name'])))
+        
+        if args.save:
+            Path(args.save).write_text(json.dumps({
+                'corpus_version': CORPUS_VERSION,
+                'scale': args.scale,
+                'repeat': args.repeat,
+                'created': datetime.now(timezone.utc).isoformat(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpus': os.cpu_count(),
+                'results': results,
+            }, indent=2))
+            print(f"✓ Saved results: {args.save}")
+        
+        regressions = [name for name, change in comparison.items() if change['regressed']]
+        if regressions:
+            print(f"✗ {len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}",
+                  file=sys.stderr)
+            sys.exit(1)
+        if baseline:
+            print(f"✓ No regressions beyond {args.threshold:.0%} ({len(comparison)} cases compared)")
+    except Exception as e:
+        print(f"✗ Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
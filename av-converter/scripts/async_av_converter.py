@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Asyncio API for the audio/video converters.
+Coroutine versions of convert_audio, convert_video, extract_audio and the
+universal convert_file for embedding in an asyncio service. FFmpeg and
+FFprobe run through asyncio.create_subprocess_exec, so no thread is held
+while they work; the PyAV audio backend runs in a worker thread (PyAV
+releases the GIL while it decodes and encodes).
+
+- timeout=: seconds a job may run once it has a slot (time spent waiting
+  for a slot does not count); FFmpeg is then killed and TimeoutError raised
+- Cancelling the awaiting task kills FFmpeg before CancelledError propagates
+- Concurrent FFmpeg and PyAV jobs are limited by a semaphore per backend
+  (BACKEND_LIMITS, or set_limits() at runtime)
+
+Unlike the synchronous converters, these functions print nothing.
+Segmented transcoding (convert_video --segments) is not offered here.
+"""
+
+import os
+import sys
+import asyncio
+import json
+import weakref
+from pathlib import Path
+import argparse
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import metrics  # noqa: E402
+from metrics import instrument, annotate  # noqa: E402
+from ffmpeg_runner import run_ffmpeg_async, kill_process_group, emit_summary  # noqa: E402
+from media_probe import probe_command, streams_of_type  # noqa: E402
+from convert_audio import audio_command, BACKENDS  # noqa: E402
+from convert_video import plan_streams, describe_plan, video_command  # noqa: E402
+from extract_audio import plan_outputs, extract_command  # noqa: E402
+from universal_av_converter import plan_route, step_options, CONVERTERS  # noqa: E402
+from conversion_graph import scratch_dir  # noqa: E402
+import pyav_audio  # noqa: E402
+
+
+# Maximum concurrent jobs per backend
+BACKEND_LIMITS = {
+    'ffmpeg': os.cpu_count() or 1,
+    'pyav': os.cpu_count() or 1,
+}
+
+# Event loop -> {backend: semaphore}; semaphores cannot be shared between loops
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def set_limits(**limits: int) -> None:
+    """Change backend limits (e.g. ffmpeg=8); jobs started afterwards use them."""
+    for backend, limit in limits.items():
+        if backend not in BACKEND_LIMITS:
+            raise ValueError(f"Unknown backend: {backend} (choose from {', '.join(BACKEND_LIMITS)})")
+        BACKEND_LIMITS[backend] = limit
+    _semaphores.clear()
+
+
+def backend_slot(backend: str) -> asyncio.Semaphore:
+    """Return the semaphore limiting a backend on the running event loop."""
+    semaphores = _semaphores.setdefault(asyncio.get_running_loop(), {})
+    if backend not in semaphores:
+        semaphores[backend] = asyncio.Semaphore(BACKEND_LIMITS[backend])
+    return semaphores[backend]
+
+
+async def run_process(cmd: list, timeout: float = None, error: str = 'Command failed') -> str:
+    """
+    Run a command without blocking the event loop and return its stdout.
+    
+    The child runs in its own process group, which is killed on timeout
+    (TimeoutError) or cancellation.
+    """
+    process = await asyncio.create_subprocess_exec(
+        *cmd, stdin=asyncio.subprocess.DEVNULL, stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE, start_new_session=True)
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        kill_process_group(process)
+        await process.wait()
+        raise TimeoutError(f"{error}: timed out after {timeout:g}s")
+    except asyncio.CancelledError:
+        kill_process_group(process)
+        await process.wait()
+        raise
+    
+    if process.returncode != 0:
+        raise RuntimeError(f"{error}: {stderr.decode(errors='replace')}")
+    return stdout.decode(errors='replace')
+
+
+async def probe(input_path: str, timeout: float = None) -> dict:
+    """Coroutine version of media_probe.probe."""
+    return json.loads(await run_process(probe_command(input_path), timeout, 'FFprobe failed'))
+
+
+async def probe_or_none(input_file: Path, timeout: float = None) -> dict:
+    """Probe, or None when ffprobe is missing or cannot read the file (callers then re-encode)."""
+    try:
+        return await probe(input_file, timeout)
+    except (OSError, RuntimeError):
+        return None
+
+
+def check_input(input_path: str) -> Path:
+    input_file = Path(input_path)
+    if not input_file.exists():
+        raise FileNotFoundError(f"Input file not found: {input_path}")
+    return input_file
+
+
+@instrument('async_av_converter', tool='ffmpeg')
+async def convert_audio(input_path: str, output_path: str, bitrate: str = '192k',
+                        sample_rate: int = None, progress=None, timeout: float = None,
+                        backend: str = 'ffmpeg') -> dict:
+    """
+    Convert audio from one format to another (see convert_audio.convert_audio).
+    
+    Args:
+        input_path: Path to input audio file
+        output_path: Path to output audio file
+        bitrate: Audio bitrate (e.g., '128k', '192k', '320k')
+        sample_rate: Sample rate in Hz (e.g., 44100, 48000)
+        progress: Callback receiving progress events and the summary record
+        timeout: Seconds the job may run before FFmpeg is killed; a PyAV
+            job cannot be interrupted, so it finishes in the background
+        backend: 'ffmpeg' or 'pyav' (see convert_audio.BACKENDS)
+    
+    Returns:
+        The job summary record
+    """
+    input_file = check_input(input_path)
+    output_file = Path(output_path)
+    
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend} (choose from {', '.join(BACKENDS)})")
+    
+    if backend == 'pyav' and pyav_audio.supports(output_file.suffix.lower().lstrip('.')):
+        slot = backend_slot('pyav')
+        await slot.acquire()
+        try:
+            task = asyncio.ensure_future(asyncio.to_thread(
+                pyav_audio.get_transcoder().transcode, input_file, output_file, bitrate,
+                sample_rate, progress))
+        except BaseException:
+            slot.release()
+            raise
+        # The thread cannot be interrupted, so its slot is freed when it actually finishes
+        task.add_done_callback(lambda _: slot.release())
+        try:
+            last = await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"PyAV conversion failed: timed out after {timeout:g}s "
+                               "(the worker thread finishes it in the background)") from None
+        except pyav_audio.UnsupportedConversion:
+            last = None
+        if last is not None:
+            annotate(tool='pyav')
+            return emit_summary(progress, last, input_file, [output_file])
+    
+    async with backend_slot('ffmpeg'):
+        last = await run_ffmpeg_async(audio_command(input_file, output_file, bitrate, sample_rate),
+                                      progress, timeout=timeout)
+    return emit_summary(progress, last, input_file, [output_file])
+
+
+@instrument('async_av_converter', tool='ffmpeg')
+async def convert_video(input_path: str, output_path: str, codec: str = None,
+                        resolution: str = None, fps: int = None, bitrate: str = None,
+                        force_transcode: bool = False, progress=None, timeout: float = None) -> dict:
+    """
+    Convert video from one format to another (see convert_video.convert_video).
+    
+    Streams are copied when the output container accepts them, unless
+    force_transcode is set or a setting requires re-encoding.
+    
+    Args:
+        input_path: Path to input video file
+        output_path: Path to output video file
+        codec: Video codec (default: copy when possible, else libx264, or libvpx-vp9 for WebM)
+        resolution: Resolution (e.g., '1920x1080', '1280x720')
+        fps: Frames per second
+        bitrate: Video bitrate (e.g., '2M', '5M')
+        force_transcode: Re-encode every stream even if it could be copied
+        progress: Callback receiving progress events and the summary record
+        timeout: Seconds the job may run (probe included) before FFmpeg is killed
+    
+    Returns:
+        The stream plan that was used (see convert_video.plan_streams)
+    """
+    input_file = check_input(input_path)
+    output_file = Path(output_path)
+    output_format = output_file.suffix.lower().lstrip('.')
+    
+    async with backend_slot('ffmpeg'):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout else None
+        info = None if force_transcode else await probe_or_none(input_file, timeout)
+        plan = plan_streams(info, output_format, codec, resolution, fps, bitrate)
+        annotate(plan=describe_plan(plan))
+        remaining = max(0.0, deadline - loop.time()) if deadline else None
+        last = await run_ffmpeg_async(video_command(input_file, output_file, plan, resolution, fps, bitrate),
+                                      progress, timeout=remaining)
+    emit_summary(progress, last, input_file, [output_file])
+    return plan
+
+
+@instrument('async_av_converter', tool='ffmpeg')
+async def extract_audio(input_path: str, output_path: str, bitrate: str = None,
+                        track: int = None, progress=None, timeout: float = None) -> str:
+    """
+    Extract an audio track from a video file (see extract_audio.extract_audio).
+    
+    Args:
+        input_path: Path to input video file
+        output_path: Path to output audio file
+        bitrate: Audio bitrate; setting it disables stream copy
+        track: 0-based audio track number (default: the input's default track)
+        progress: Callback receiving progress events and the summary record
+        timeout: Seconds the job may run (probe included) before FFmpeg is killed
+    
+    Returns:
+        'copy' or 'transcode'
+    """
+    input_file = check_input(input_path)
+    
+    async with backend_slot('ffmpeg'):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout else None
+        info = await probe_or_none(input_file, timeout)
+        if info is not None and not streams_of_type(info, 'audio'):
+            raise ValueError("Input has no audio track")
+        plan = plan_outputs(info, [(output_path, track)], bitrate)
+        remaining = max(0.0, deadline - loop.time()) if deadline else None
+        last = await run_ffmpeg_async(extract_command(input_file, plan, bitrate), progress,
+                                      error='FFmpeg extraction failed', timeout=remaining)
+    emit_summary(progress, last, input_file, [output_path])
+    return plan[0][2]
+
+
+ASYNC_CONVERTERS = {
+    'convert_audio': convert_audio,
+    'convert_video': convert_video,
+    'extract_audio': extract_audio,
+}
+
+
+@instrument('async_av_converter')
+async def convert_file(input_path: str, output_path: str, timeout: float = None,
+                       progress=None, **kwargs):
+    """
+    Convert any supported audio/video file, choosing the converter from the extensions.
+    
+    Args:
+        input_path: Path to input file
+        output_path: Path to output file
+        timeout: Seconds the job may run before FFmpeg is killed
+        progress: Callback receiving progress events and the summary record
+        **kwargs: Options as for universal_av_converter.convert_file (bitrate,
+            sample_rate, codec, resolution, fps, force_transcode, track,
+            audio_backend);
+            options the chosen converter does not take are ignored
+    
+    Returns:
+        What the chosen converter returns
+    """
+    input_format = Path(input_path).suffix.lower().lstrip('.')
+    output_format = Path(output_path).suffix.lower().lstrip('.')
+    route = plan_route(input_format, output_format, kwargs)
+    annotate(converter='+'.join(step.converter for step in route))
+    
+    async def run_step(step, source, target):
+        # Same option filtering as the synchronous convert_file (0 is a real value)
+        keywords = CONVERTERS[step.converter]
+        options = {keywords[option]: value for option, value in step_options(step, kwargs).items()
+                   if option != 'segments'}
+        return await ASYNC_CONVERTERS[step.converter](source, target, progress=progress,
+                                                      timeout=timeout, **options)
+    
+    if len(route) == 1:
+        return await run_step(route[0], input_path, output_path)
+    with scratch_dir() as scratch:
+        source = input_path
+        for index, step in enumerate(route):
+            last = index == len(route) - 1
+            target = output_path if last else str(scratch / f"{Path(input_path).stem}.{step.target}")
+            result = await run_step(step, source, target)
+            source = target
+    return result
+
+
+async def convert_many(jobs: list, timeout: float = None, **kwargs) -> list:
+    """
+    Convert (input, output) pairs concurrently within the backend limits.
+    
+    Returns:
+        (input_path, output_path, error) tuples in job order; error is None on success
+    """
+    results = await asyncio.gather(*(convert_file(str(input_path), str(output_path), timeout, **kwargs)
+                                     for input_path, output_path in jobs), return_exceptions=True)
+    return [(input_path, output_path, str(result).strip() if isinstance(result, BaseException) else None)
+            for (input_path, output_path), result in zip(jobs, results)]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Convert many audio/video files concurrently with the asyncio API'
+    )
+    parser.add_argument('inputs', nargs='+', help='Input files')
+    parser.add_argument('--to', required=True, metavar='EXT', help='Output format (e.g., mp3, mp4)')
+    parser.add_argument('--output-dir', help='Output directory (default: next to each input)')
+    parser.add_argument('--timeout', type=float, help='Seconds each job may run')
+    parser.add_argument('--ffmpeg-jobs', type=int,
+                       help=f"Concurrent FFmpeg processes (default: {BACKEND_LIMITS['ffmpeg']})")
+    parser.add_argument('--pyav-jobs', type=int,
+                       help=f"Concurrent PyAV conversions (default: {BACKEND_LIMITS['pyav']})")
+    parser.add_argument('--audio-backend', choices=BACKENDS,
+                       help="Audio conversions: 'ffmpeg' or 'pyav' (default: the cheaper route)")
+    parser.add_argument('--metrics', metavar='PATH',
+                       help="Append per-stage timing records as JSON lines to PATH ('-' for stdout)")
+    
+    args = parser.parse_args()
+    
+    try:
+        metrics.configure(args.metrics)
+        if args.ffmpeg_jobs:
+            set_limits(ffmpeg=args.ffmpeg_jobs)
+        if args.pyav_jobs:
+            set_limits(pyav=args.pyav_jobs)
+        target = args.to.lower().lstrip('.')
+        if args.output_dir:
+            Path(args.output_dir).mkdir(parents=True, exist_ok=True)
+        jobs = [(Path(path), Path(args.output_dir or Path(path).parent) / f"{Path(path).stem}.{target}")
+                for path in args.inputs]
+        
+        failed = 0
+        for input_file, output_file, error in asyncio.run(convert_many(jobs, args.timeout, audio_backend=args.audio_backend)):
+            if error is None:
+                print(f"✓ Converted: {input_file} → {output_file}")
+            else:
+                failed += 1
+                print(f"✗ Failed: {input_file} → {output_file}: {error}", file=sys.stderr)
+        print(f"Batch complete: {len(jobs) - failed} succeeded, {failed} failed")
+        if failed:
+            sys.exit(1)
+    except Exception as e:
+        print(f"✗ Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Batch job helpers shared by the universal converters.
+Checks planned (input, output) pairs before anything is written, so a
+batch never converts a file onto itself, onto another input, or two
+inputs onto the same output, and captures what each job prints without
+mixing up the output of jobs running in other threads.
+"""
+
+import io
+import os
+import sys
+import threading
+import contextlib
+
+
+def path_key(path) -> str:
+    """Compare paths by where they point: absolute, symlinks resolved, case folded where the OS does."""
+    return os.path.normcase(os.path.realpath(path))
+
+
+def find_conflicts(jobs: list) -> dict:
+    """
+    Find batch jobs whose output would overwrite an input or another job's output.
+    
+    Args:
+        jobs: (input_path, output_path) pairs, e.g. from plan_batch()
+    
+    Returns:
+        {job index: error message} for the jobs that must not run
+    """
+    inputs = {path_key(input_path): input_path for input_path, _ in jobs}
+    writers = {}
+    for index, (_, output_path) in enumerate(jobs):
+        writers.setdefault(path_key(output_path), []).append(index)
+    
+    conflicts = {}
+    for index, (input_path, output_path) in enumerate(jobs):
+        target = path_key(output_path)
+        if target == path_key(input_path):
+            conflicts[index] = "Output is the input file (already in the target format?); not overwriting it"
+        elif target in inputs:
+            conflicts[index] = f"Output would overwrite input {inputs[target]}"
+        elif len(writers[target]) > 1:
+            others = ', '.join(str(jobs[other][0]) for other in writers[target] if other != index)
+            conflicts[index] = f"Output {output_path} is also the output of {others}"
+    return conflicts
+
+
+class ThreadOutput(io.TextIOBase):
+    """
+    sys.stdout stand-in that sends each thread's output to its own buffer.
+    
+    contextlib.redirect_stdout swaps the process-wide sys.stdout, so threads
+    capturing concurrently would restore each other's buffers; this routes
+    writes per thread instead, and to the real stdout outside capture_output().
+    """
+    
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+    
+    def write(self, text: str) -> int:
+        return (getattr(self.local, 'buffer', None) or self.stream).write(text)
+    
+    def flush(self) -> None:
+        (getattr(self.local, 'buffer', None) or self.stream).flush()
+    
+    @property
+    def encoding(self) -> str:
+        return self.stream.encoding
+    
+    def fileno(self) -> int:
+        return self.stream.fileno()
+    
+    def isatty(self) -> bool:
+        return self.stream.isatty()
+
+
+_output_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def capture_output():
+    """Capture what the current thread prints, leaving other threads' output alone."""
+    with _output_lock:
+        if not isinstance(sys.stdout, ThreadOutput):
+            sys.stdout = ThreadOutput(sys.stdout)
+        output = sys.stdout
+    previous = getattr(output.local, 'buffer', None)
+    output.local.buffer = captured = io.StringIO()
+    try:
+        yield captured
+    finally:
+        output.local.buffer = previous
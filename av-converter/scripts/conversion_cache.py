@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Content-addressed conversion cache.
+Reuses earlier outputs when the same input bytes are converted with the same parameters.
+
+Entries are keyed on a streaming SHA-256 of the input file plus the target
+format, converter, options and tool version. Hits are materialised with a
+reflink (copy-on-write clone) where the filesystem supports it, otherwise a
+hardlink (entries are read-only, so hardlinked outputs are too), otherwise a
+plain copy. The cache is bounded in size and evicts least-recently-used
+entries.
+"""
+
+import os
+import sys
+import json
+import shutil
+import hashlib
+import tempfile
+from pathlib import Path
+import argparse
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+DEFAULT_CACHE_DIR = Path.home() / '.cache' / 'av-converter'
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+# Linux FICLONE ioctl: clone file extents (btrfs, XFS, bcachefs)
+FICLONE = 0x40049409
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def hash_file(path: Path) -> str:
+    """Return the SHA-256 of a file, read in fixed-size blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _reflink(source: Path, target: Path) -> bool:
+    """Clone source into target with FICLONE; return False if unsupported."""
+    if fcntl is None:
+        return False
+    try:
+        with open(source, 'rb') as src, open(target, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return True
+    except OSError:
+        target.unlink(missing_ok=True)
+        return False
+
+
+class ConversionCache:
+    """
+    On-disk cache of conversion outputs.
+    
+    Args:
+        cache_dir: Directory holding cache entries (default: ~/.cache/av-converter)
+        max_bytes: Total entry size before least-recently-used entries are evicted
+    """
+    
+    def __init__(self, cache_dir: str = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.objects_dir = self.cache_dir / 'objects'
+        self.stats_file = self.cache_dir / 'stats.json'
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+    
+    def make_key(self, input_file: Path, output_format: str, converter: str,
+                 options: dict, tool_version: str, extra_files: tuple = ()) -> str:
+        """
+        Build the cache key for one conversion.
+        
+        extra_files are other files the output depends on (e.g. stylesheets);
+        their contents are part of the key, so editing one misses the cache.
+        """
+        params = {
+            'output_format': output_format,
+            'converter': converter,
+            'options': options,
+            'tool_version': tool_version,
+        }
+        if extra_files:
+            params['extra_files'] = [hash_file(Path(path)) for path in extra_files]
+        params = json.dumps(params, sort_keys=True, default=str)
+        return hashlib.sha256(f"{hash_file(input_file)}\n{params}".encode()).hexdigest()
+    
+    def _entry(self, key: str) -> Path:
+        return self.objects_dir / key[:2] / key
+    
+    def fetch(self, key: str, output_file: Path) -> bool:
+        """
+        Materialise a cached output at output_file.
+        
+        Returns:
+            True on a cache hit, False on a miss
+        """
+        entry = self._entry(key)
+        if not entry.exists():
+            self._count('misses')
+            return False
+        
+        output_file.unlink(missing_ok=True)
+        if not _reflink(entry, output_file):
+            try:
+                os.link(entry, output_file)
+            except OSError:
+                shutil.copyfile(entry, output_file)
+        
+        # Entry mtime doubles as the LRU timestamp
+        os.utime(entry)
+        self._count('hits')
+        return True
+    
+    def store(self, key: str, output_file: Path) -> None:
+        """Add a freshly converted output to the cache, then enforce the size bound."""
+        entry = self._entry(key)
+        entry.parent.mkdir(exist_ok=True)
+        
+        # Write to a temporary name and rename so concurrent readers never
+        # see a partial entry
+        fd, temp_name = tempfile.mkstemp(dir=entry.parent, prefix='.tmp_')
+        os.close(fd)
+        temp_path = Path(temp_name)
+        try:
+            if not _reflink(output_file, temp_path):
+                shutil.copyfile(output_file, temp_path)
+            # Read-only: a hit may hardlink the entry, and editing that
+            # output in place would change the entry too
+            os.chmod(temp_path, 0o444)
+            os.replace(temp_path, entry)
+        finally:
+            temp_path.unlink(missing_ok=True)
+        
+        self.evict()
+    
+    def entries(self) -> list:
+        """Return (path, size, last_used) for every cache entry."""
+        found = []
+        for entry in self.objects_dir.glob('*/*'):
+            if entry.name.startswith('.tmp_'):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            found.append((entry, stat.st_size, stat.st_mtime))
+        return found
+    
+    def evict(self) -> int:
+        """
+        Remove least-recently-used entries until the cache fits max_bytes.
+        
+        Returns:
+            Number of entries removed
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for entry, size, _ in sorted(entries, key=lambda item: item[2]):
+            if total <= self.max_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        if removed:
+            self._count('evictions', removed)
+        return removed
+    
+    def _count(self, field: str, amount: int = 1) -> None:
+        """Increment a persistent counter; safe across concurrent processes."""
+        with open(self.stats_file, 'a+') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            try:
+                counters = json.loads(f.read() or '{}')
+            except ValueError:
+                counters = {}
+            counters[field] = counters.get(field, 0) + amount
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps(counters))
+    
+    def stats(self) -> dict:
+        """Return hit/miss/eviction counters and current cache size."""
+        try:
+            counters = json.loads(self.stats_file.read_text() or '{}')
+        except (FileNotFoundError, ValueError):
+            counters = {}
+        entries = self.entries()
+        hits = counters.get('hits', 0)
+        misses = counters.get('misses', 0)
+        return {
+            'hits': hits,
+            'misses': misses,
+            'evictions': counters.get('evictions', 0),
+            'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes,
+        }
+    
+    def clear(self) -> None:
+        """Remove every entry and reset the counters."""
+        shutil.rmtree(self.objects_dir, ignore_errors=True)
+        self.stats_file.unlink(missing_ok=True)
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Inspect or clear the conversion cache'
+    )
+    parser.add_argument('--cache-dir', help=f'Cache directory (default: {DEFAULT_CACHE_DIR})')
+    parser.add_argument('--clear', action='store_true', help='Remove all cache entries')
+    
+    args = parser.parse_args()
+    
+    try:
+        cache = ConversionCache(args.cache_dir)
+        if args.clear:
+            cache.clear()
+            print(f"✓ Cleared cache: {cache.cache_dir}")
+        else:
+            print(json.dumps(cache.stats(), indent=2))
+    except Exception as e:
+        print(f"✗ Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
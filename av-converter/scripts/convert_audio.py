@@ -5,13 +5,41 @@ Supports: MP3, WAV, FLAC, AAC, OGG, M4A, WMA, AIFF, OPUS, AC3, ALAC, and more.
 """
 
 import sys
-import subprocess
 from pathlib import Path
 import argparse
 
+from metrics import instrument, stage, annotate, outputs, configure as configure_metrics
+from ffmpeg_runner import run_ffmpeg, emit_summary, ProgressPrinter
+from renditions import parse_rendition
 
+
+# ffmpeg: one ffmpeg process per file
+# pyav: in-process with PyAV (pyav_audio.py); ffmpeg for outputs PyAV cannot write
+BACKENDS = ('ffmpeg', 'pyav')
+
+
+def audio_command(input_file: Path, output_file: Path, bitrate: str = '192k',
+                  sample_rate: int = None) -> list:
+    """Build the FFmpeg command for convert_audio."""
+    cmd = [
+        'ffmpeg',
+        '-i', str(input_file),
+        '-b:a', bitrate,
+        '-y'  # Overwrite output file
+    ]
+    
+    # Add sample rate if specified
+    if sample_rate:
+        cmd.extend(['-ar', str(sample_rate)])
+    
+    # Add output file
+    cmd.append(str(output_file))
+    return cmd
+
+
+@instrument('convert_audio', tool='ffmpeg')
 def convert_audio(input_path: str, output_path: str, bitrate: str = '192k', 
-                 sample_rate: int = None) -> None:
+                 sample_rate: int = None, progress=None, backend: str = 'ffmpeg') -> dict:
     """
     Convert audio from one format to another using FFmpeg.
     
@@ -20,6 +48,13 @@ def convert_audio(input_path: str, output_path: str, bitrate: str = '192k',
         output_path: Path to output audio file
         bitrate: Audio bitrate (e.g., '128k', '192k', '320k')
         sample_rate: Sample rate in Hz (e.g., 44100, 48000)
+        progress: Callback receiving progress events and the summary record
+            (see ffmpeg_runner)
+        backend: 'ffmpeg' (a process per file) or 'pyav' (in-process, for
+            short clips); see BACKENDS
+    
+    Returns:
+        The job summary record
     """
     input_file = Path(input_path)
     output_file = Path(output_path)
@@ -27,28 +62,78 @@ def convert_audio(input_path: str, output_path: str, bitrate: str = '192k',
     if not input_file.exists():
         raise FileNotFoundError(f"Input file not found: {input_path}")
     
-    # Build FFmpeg command
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend} (choose from {', '.join(BACKENDS)})")
+    
+    if backend == 'pyav':
+        import pyav_audio
+        if pyav_audio.supports(output_file.suffix.lower().lstrip('.')):
+            try:
+                with stage('encode'):
+                    last = pyav_audio.get_transcoder().transcode(input_file, output_file, bitrate,
+                                                                 sample_rate, progress)
+            except pyav_audio.UnsupportedConversion:
+                pass
+            else:
+                annotate(tool='pyav')
+                print(f"✓ Converted: {input_file.name} → {output_file.name}")
+                return emit_summary(progress, last, input_file, [output_file])
+    
+    cmd = audio_command(input_file, output_file, bitrate, sample_rate)
+    
+    # Execute conversion
+    with stage('encode'):
+        last = run_ffmpeg(cmd, progress)
+    
+    print(f"✓ Converted: {input_file.name} → {output_file.name}")
+    return emit_summary(progress, last, input_file, [output_file])
+
+
+@instrument('convert_audio', tool='ffmpeg')
+def convert_renditions(input_path: str, renditions: list, progress=None) -> dict:
+    """
+    Encode several outputs from a single decode of the input.
+    
+    FFmpeg decodes the audio stream once and feeds every output's encoder
+    from it, so a 128k/320k MP3 + Opus ladder costs one decode, not three.
+    
+    Args:
+        input_path: Path to input audio file
+        renditions: Dicts with 'path' and optional 'codec' (encoder, default:
+            chosen from the extension), 'bitrate' (default 192k) and 'sample_rate'
+        progress: Callback receiving progress events and the summary record
+    
+    Returns:
+        The job summary record
+    """
+    input_file = Path(input_path)
+    
+    if not input_file.exists():
+        raise FileNotFoundError(f"Input file not found: {input_path}")
+    
+    # Build FFmpeg command; options before each output file apply to that output only
     cmd = [
         'ffmpeg',
         '-i', str(input_file),
-        '-b:a', bitrate,
-        '-y'  # Overwrite output file
+        '-y'  # Overwrite output files
     ]
-    
-    # Add sample rate if specified
-    if sample_rate:
-        cmd.extend(['-ar', str(sample_rate)])
-    
-    # Add output file
-    cmd.append(str(output_file))
+    for rendition in renditions:
+        cmd.extend(['-map', '0:a:0'])
+        if rendition.get('codec'):
+            cmd.extend(['-c:a', rendition['codec']])
+        cmd.extend(['-b:a', rendition.get('bitrate') or '192k'])
+        if rendition.get('sample_rate'):
+            cmd.extend(['-ar', str(rendition['sample_rate'])])
+        cmd.append(str(rendition['path']))
     
     # Execute conversion
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    
-    if result.returncode != 0:
-        raise RuntimeError(f"FFmpeg conversion failed: {result.stderr}")
+    outputs([rendition['path'] for rendition in renditions])
+    with stage('encode'):
+        last = run_ffmpeg(cmd, progress)
     
-    print(f"✓ Converted: {input_file.name} → {output_file.name}")
+    for rendition in renditions:
+        print(f"✓ Converted: {input_file.name} → {Path(rendition['path']).name}")
+    return emit_summary(progress, last, input_file, [rendition['path'] for rendition in renditions])
 
 
 def main():
@@ -56,16 +141,40 @@ def main():
         description='Convert audio between formats (MP3, WAV, FLAC, AAC, OGG, M4A, etc.)'
     )
     parser.add_argument('input', help='Input audio file')
-    parser.add_argument('output', help='Output audio file')
+    parser.add_argument('output', nargs='?', help='Output audio file')
     parser.add_argument('--bitrate', default='192k',
                        help='Audio bitrate (default: 192k)')
     parser.add_argument('--sample-rate', type=int,
                        help='Sample rate in Hz (e.g., 44100, 48000)')
+    parser.add_argument('--rendition', action='append', metavar='PATH[:KEY=VALUE,...]',
+                       help='Extra output encoded from the same decode (repeatable; '
+                            'keys: codec, bitrate, sample_rate)')
+    parser.add_argument('--backend', '--audio-backend', choices=BACKENDS, default='ffmpeg',
+                       help="'pyav': convert in-process, falling back to ffmpeg for formats "
+                            "PyAV cannot write (default: ffmpeg)")
+    parser.add_argument('--progress', action='store_true',
+                       help='Show a live progress line and print a JSON summary to stderr')
+    
+    parser.add_argument('--metrics', metavar='PATH',
+                       help="Append per-stage timing records as JSON lines to PATH ('-' for stdout)")
     
     args = parser.parse_args()
     
+    if not args.output and not args.rendition:
+        parser.error('output is required unless --rendition is given')
+    
+    progress = ProgressPrinter() if args.progress else None
+    configure_metrics(args.metrics)
+    
     try:
-        convert_audio(args.input, args.output, args.bitrate, args.sample_rate)
+        if args.rendition:
+            renditions = [parse_rendition(spec) for spec in args.rendition]
+            if args.output:
+                renditions.insert(0, {'path': args.output, 'bitrate': args.bitrate,
+                                      'sample_rate': args.sample_rate})
+            convert_renditions(args.input, renditions, progress)
+        else:
+            convert_audio(args.input, args.output, args.bitrate, args.sample_rate, progress, args.backend)
     except Exception as e:
         print(f"✗ Error: {e}", file=sys.stderr)
         sys.exit(1)
@@ -2,26 +2,291 @@
 """
 Video format converter using FFmpeg.
 Supports: MP4, AVI, MKV, MOV, WMV, FLV, WebM, MPEG, 3GP, and more.
+
+Streams that are already compatible with the target container and settings
+are stream-copied (remuxed) instead of re-encoded.
 """
 
+import os
 import sys
-import subprocess
+import time
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import argparse
 
+from metrics import instrument, stage, annotate, outputs, configure as configure_metrics
+from ffmpeg_runner import run_ffmpeg, progress_event, emit_summary, ProgressPrinter
+from media_probe import (probe, streams_of_type, frame_rate, can_copy, media_duration, count_frames,
+                         ENCODER_CODECS)
+from renditions import parse_rendition
+
+
+# Encoders used when a stream has to be re-encoded: container -> (video, audio)
+DEFAULT_ENCODERS = {
+    'webm': ('libvpx-vp9', 'libopus'),
+}
+FALLBACK_ENCODERS = ('libx264', 'aac')
+
+# Segmented transcoding never cuts segments shorter than this
+MIN_SEGMENT_SECONDS = 10
 
-def convert_video(input_path: str, output_path: str, codec: str = 'libx264',
-                 resolution: str = None, fps: int = None, bitrate: str = None) -> None:
+# Duration difference between a segmented output and its source that is
+# still a match, on top of one frame (audio encoder padding)
+SEGMENT_DRIFT_SECONDS = 0.1
+
+
+def plan_streams(info: dict, output_format: str, codec: str = None, resolution: str = None,
+                 fps: int = None, bitrate: str = None) -> dict:
+    """
+    Decide, per stream type, whether to copy the input streams or re-encode them.
+    
+    A video stream is copied when the container accepts its codec and no
+    requested codec, resolution, frame rate or bitrate differs from the
+    source. An audio stream is copied when the container accepts its codec.
+    
+    Args:
+        info: ffprobe output for the input (None: probing unavailable, re-encode everything)
+        output_format: Target container extension
+        codec: Requested video encoder (None: keep the source codec if possible)
+        resolution: Requested resolution (e.g., '1280x720')
+        fps: Requested frames per second
+        bitrate: Requested video bitrate
+    
+    Returns:
+        {'video': ..., 'audio': ...} with 'copy', an encoder name, or None
+        when the input has no stream of that type
+    """
+    video_encoder, audio_encoder = DEFAULT_ENCODERS.get(output_format, FALLBACK_ENCODERS)
+    plan = {'video': codec or video_encoder, 'audio': audio_encoder}
+    if info is None:
+        return plan
+    
+    video_streams = streams_of_type(info, 'video')
+    audio_streams = streams_of_type(info, 'audio')
+    
+    if not video_streams:
+        plan['video'] = None
+    elif not bitrate and all(
+        can_copy(stream.get('codec_name'), output_format, 'video')
+        and (not codec or ENCODER_CODECS.get(codec, codec) == stream.get('codec_name'))
+        and (not resolution or resolution == f"{stream.get('width')}x{stream.get('height')}")
+        and (not fps or frame_rate(stream) == fps)
+        for stream in video_streams
+    ):
+        plan['video'] = 'copy'
+    
+    if not audio_streams:
+        plan['audio'] = None
+    elif all(can_copy(stream.get('codec_name'), output_format, 'audio') for stream in audio_streams):
+        plan['audio'] = 'copy'
+    
+    return plan
+
+
+def describe_plan(plan: dict) -> str:
+    """Summarise a stream plan, e.g. 'remux' or 'video copied, audio transcoded'."""
+    actions = {kind: action for kind, action in plan.items() if action}
+    if all(action == 'copy' for action in actions.values()):
+        return 'remux'
+    if all(action != 'copy' for action in actions.values()):
+        return 'transcode'
+    return ', '.join(f"{kind} {'copied' if action == 'copy' else 'transcoded'}"
+                     for kind, action in actions.items())
+
+
+def video_options(resolution: str = None, fps: int = None, bitrate: str = None) -> list:
+    """FFmpeg output options for a re-encoded video stream."""
+    options = []
+    if resolution:
+        width, height = resolution.split('x')
+        options.extend(['-s', f'{width}x{height}'])
+    
+    if fps:
+        options.extend(['-r', str(fps)])
+    
+    if bitrate:
+        options.extend(['-b:v', bitrate])
+    return options
+
+
+def video_command(input_file: Path, output_file: Path, plan: dict, resolution: str = None,
+                  fps: int = None, bitrate: str = None) -> list:
+    """Build the single-process FFmpeg command for a stream plan (see plan_streams)."""
+    cmd = [
+        'ffmpeg',
+        '-i', str(input_file),
+        '-c:v', plan['video'] or 'copy',
+        '-c:a', plan['audio'] or 'copy',
+        '-y'  # Overwrite output file
+    ]
+    
+    # Add optional parameters (they only apply when the video is re-encoded)
+    if plan['video'] != 'copy':
+        cmd.extend(video_options(resolution, fps, bitrate))
+    
+    # Add output file
+    cmd.append(str(output_file))
+    return cmd
+
+
+def transcode_segmented(input_file: Path, output_file: Path, plan: dict, duration: float,
+                        segments: int, workers: int = None, resolution: str = None,
+                        fps: int = None, bitrate: str = None, progress=None) -> dict:
+    """
+    Re-encode the video in keyframe-aligned segments running concurrently.
+    
+    The video stream is cut into segments without re-encoding (cuts land
+    on the first keyframe after each split point), the segments are encoded
+    by parallel FFmpeg processes, and the results are joined with the concat
+    demuxer. Audio is encoded in one piece alongside the segments, so
+    segment boundaries never introduce audio gaps. Only the first video and
+    audio streams are kept.
+    
+    Args:
+        input_file: Input video
+        output_file: Output video
+        plan: Stream plan from plan_streams (video must be re-encoded)
+        duration: Input duration in seconds
+        segments: Number of segments to cut
+        workers: Concurrent FFmpeg processes (default: min(segments, CPU count))
+        resolution: Resolution (e.g., '1280x720')
+        fps: Frames per second
+        bitrate: Video bitrate
+        progress: Callback receiving progress events combined over all segments
+    
+    Returns:
+        The final combined progress event
+    """
+    start = time.monotonic()
+    cpus = os.cpu_count() or 1
+    workers = workers or min(segments, cpus)
+    # Share the cores between concurrent encoders instead of oversubscribing them
+    threads = str(max(1, cpus // workers))
+    
+    with tempfile.TemporaryDirectory(prefix='.segments_', dir=output_file.parent) as tmp:
+        work_dir = Path(tmp)
+        
+        cuts = ','.join(f'{duration * i / segments:.3f}' for i in range(1, segments))
+        with stage('split'):
+            run_ffmpeg([
+                'ffmpeg', '-i', str(input_file),
+                '-map', '0:v:0', '-c', 'copy',
+                '-f', 'segment', '-segment_times', cuts, '-reset_timestamps', '1',
+                '-y', str(work_dir / 'source_%04d.mkv')
+            ])
+        sources = sorted(work_dir.glob('source_*.mkv'))
+        
+        # Media seconds and frames encoded so far, per segment
+        done = {}
+        done_lock = threading.Lock()
+        
+        def combined_event() -> dict:
+            with done_lock:
+                out_time = sum(seconds for seconds, _ in done.values())
+                frames = sum(frame or 0 for _, frame in done.values())
+            return progress_event(out_time, duration, time.monotonic() - start, frames)
+        
+        # The fps filter rather than -r, which pads the end of every segment
+        # with repeated frames that add up over the joins
+        options = video_options(resolution, None, bitrate) + (['-vf', f'fps={fps}'] if fps else [])
+        
+        def encode_segment(source: Path) -> Path:
+            def report(event):
+                with done_lock:
+                    done[source] = (event['out_time'], event['frame'])
+                if progress is not None:
+                    progress(combined_event())
+            
+            target = work_dir / source.name.replace('source_', 'encoded_')
+            run_ffmpeg(['ffmpeg', '-i', str(source), '-an', '-c:v', plan['video'], '-threads', threads]
+                       + options + ['-y', str(target)], report)
+            return target
+        
+        def encode_audio() -> Path:
+            target = work_dir / 'audio.mka'
+            run_ffmpeg(['ffmpeg', '-i', str(input_file), '-map', '0:a:0', '-vn',
+                        '-c:a', plan['audio'], '-y', str(target)])
+            return target
+        
+        with stage('encode'), ThreadPoolExecutor(max_workers=workers) as pool:
+            audio = pool.submit(encode_audio) if plan['audio'] else None
+            encoded = list(pool.map(encode_segment, sources))
+            audio_file = audio.result() if audio else None
+        
+        # Concat demuxer playlist; relative names resolve against the playlist's directory
+        playlist = work_dir / 'segments.txt'
+        playlist.write_text(''.join(f"file '{path.name}'\n" for path in encoded))
+        
+        cmd = ['ffmpeg', '-f', 'concat', '-safe', '0', '-i', str(playlist)]
+        if audio_file:
+            cmd.extend(['-i', str(audio_file), '-map', '0:v', '-map', '1:a'])
+        cmd.extend(['-c', 'copy', '-y', str(output_file)])
+        with stage('concat'):
+            run_ffmpeg(cmd)
+    
+    return combined_event()
+
+
+def verify_segmented(input_file: Path, output_file: Path, info: dict, segments: int, fps: int = None) -> None:
+    """
+    Check that a segmented transcode kept the source's frame count and duration.
+    
+    Frames lost or repeated where the segments were cut or joined show up
+    as a frame count mismatch. When fps changes the frame rate, the count
+    is scaled and may be off by one frame per segment.
+    
+    Raises:
+        RuntimeError: The output does not match the source (it is removed)
+    """
+    rate = frame_rate(streams_of_type(info, 'video')[0])
+    source_duration = media_duration(info)
+    output_duration = media_duration(probe(output_file))
+    
+    problems = []
+    if rate or not fps:
+        source_frames, output_frames = count_frames(input_file), count_frames(output_file)
+        expected = round(source_frames * fps / rate) if fps else source_frames
+        if abs(output_frames - expected) > (segments if fps else 0):
+            problems.append(f"{output_frames} frames, expected {expected}")
+    if abs(output_duration - source_duration) > SEGMENT_DRIFT_SECONDS + 1 / (fps or rate or 25):
+        problems.append(f"{output_duration:.3f}s long, source is {source_duration:.3f}s")
+    if problems:
+        output_file.unlink(missing_ok=True)
+        raise RuntimeError(f"Segmented output does not match the source ({'; '.join(problems)}); "
+                           f"convert without segments")
+
+
+@instrument('convert_video', tool='ffmpeg')
+def convert_video(input_path: str, output_path: str, codec: str = None,
+                 resolution: str = None, fps: int = None, bitrate: str = None,
+                 force_transcode: bool = False, segments: int = None,
+                 workers: int = None, progress=None) -> dict:
     """
     Convert video from one format to another using FFmpeg.
     
     Args:
         input_path: Path to input video file
         output_path: Path to output video file
-        codec: Video codec (libx264, libx265, libvpx-vp9, etc.)
+        codec: Video codec (libx264, libx265, libvpx-vp9, etc.; default:
+            keep the source codec if the container accepts it, else libx264,
+            or libvpx-vp9 for WebM)
         resolution: Resolution (e.g., '1920x1080', '1280x720')
         fps: Frames per second
         bitrate: Video bitrate (e.g., '2M', '5M')
+        force_transcode: Re-encode every stream even if it could be copied
+        segments: Re-encode the video as this many keyframe-aligned segments
+            in parallel (segments are at least 10 seconds; short inputs use
+            the single-process path); the joined output must keep the
+            source's frame count and duration
+        workers: Concurrent FFmpeg processes for segmented mode
+            (default: min(segments, CPU count))
+        progress: Callback receiving progress events and the summary record
+            (see ffmpeg_runner)
+    
+    Returns:
+        The stream plan that was used (see plan_streams)
     """
     input_file = Path(input_path)
     output_file = Path(output_path)
@@ -29,36 +294,158 @@ def convert_video(input_path: str, output_path: str, codec: str = 'libx264',
     if not input_file.exists():
         raise FileNotFoundError(f"Input file not found: {input_path}")
     
-    # Build FFmpeg command
-    cmd = [
-        'ffmpeg',
-        '-i', str(input_file),
-        '-c:v', codec,
-        '-c:a', 'aac',  # Standard audio codec
-        '-y'  # Overwrite output file
-    ]
+    output_format = output_file.suffix.lower().lstrip('.')
     
-    # Add optional parameters
-    if resolution:
-        width, height = resolution.split('x')
-        cmd.extend(['-s', f'{width}x{height}'])
-    
-    if fps:
-        cmd.extend(['-r', str(fps)])
+    info = None
+    if not force_transcode or segments:
+        try:
+            with stage('probe'):
+                info = probe(input_file)
+        except (OSError, RuntimeError):
+            # No ffprobe, or a file it cannot read: fall back to re-encoding
+            info = None
+    plan = plan_streams(None if force_transcode else info, output_format,
+                        codec, resolution, fps, bitrate)
+    annotate(plan=describe_plan(plan))
     
-    if bitrate:
-        cmd.extend(['-b:v', bitrate])
+    if segments and info is not None and plan['video'] not in (None, 'copy'):
+        segments = min(segments, int(media_duration(info) // MIN_SEGMENT_SECONDS))
+        if segments > 1:
+            if not streams_of_type(info, 'audio'):
+                plan['audio'] = None
+            annotate(segments=segments)
+            last = transcode_segmented(input_file, output_file, plan, media_duration(info), segments,
+                                       workers, resolution, fps, bitrate, progress)
+            with stage('verify'):
+                verify_segmented(input_file, output_file, info, segments, fps)
+            print(f"✓ Converted ({describe_plan(plan)}, {segments} segments): "
+                  f"{input_file.name} → {output_file.name}")
+            emit_summary(progress, last, input_file, [output_file])
+            return plan
     
-    # Add output file
-    cmd.append(str(output_file))
+    cmd = video_command(input_file, output_file, plan, resolution, fps, bitrate)
     
     # Execute conversion
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    with stage('encode'):
+        last = run_ffmpeg(cmd, progress)
+    
+    print(f"✓ Converted ({describe_plan(plan)}): {input_file.name} → {output_file.name}")
+    emit_summary(progress, last, input_file, [output_file])
+    return plan
+
+
+def build_ladder_graph(renditions: list, plans: list) -> tuple:
+    """
+    Build the filter graph that feeds every re-encoded rendition from one decode.
+    
+    The first video stream is decoded once, split into one branch per
+    re-encoded rendition, and each branch is scaled / frame-rate converted
+    on its own.
+    
+    Returns:
+        (filter_complex string or None, {rendition index: stream to -map})
+    """
+    encoded = [i for i, plan in enumerate(plans) if plan['video'] not in (None, 'copy')]
+    if len(encoded) > 1:
+        sources = [f'[s{branch}]' for branch in range(len(encoded))]
+        graph = [f"[0:v:0]split={len(encoded)}{''.join(sources)}"]
+    else:
+        sources = ['[0:v:0]']
+        graph = []
     
-    if result.returncode != 0:
-        raise RuntimeError(f"FFmpeg conversion failed: {result.stderr}")
+    streams = {}
+    for branch, i in enumerate(encoded):
+        filters = []
+        if renditions[i].get('resolution'):
+            width, height = renditions[i]['resolution'].split('x')
+            filters.append(f'scale={width}:{height}')
+        if renditions[i].get('fps'):
+            filters.append(f"fps={renditions[i]['fps']}")
+        
+        if filters:
+            graph.append(f"{sources[branch]}{','.join(filters)}[v{branch}]")
+            streams[i] = f'[v{branch}]'
+        elif len(encoded) > 1:
+            streams[i] = sources[branch]
+        else:
+            streams[i] = '0:v:0'
     
-    print(f"✓ Converted: {input_file.name} → {output_file.name}")
+    return (';'.join(graph) or None), streams
+
+
+@instrument('convert_video', tool='ffmpeg')
+def convert_renditions(input_path: str, renditions: list, force_transcode: bool = False,
+                       progress=None) -> list:
+    """
+    Encode several renditions (e.g. 1080p/720p/480p) from a single decode of the input.
+    
+    Renditions whose video can be stream-copied are copied, as in
+    convert_video; all others share one decoded video stream.
+    
+    Args:
+        input_path: Path to input video file
+        renditions: Dicts with 'path' and optional 'codec', 'bitrate',
+            'resolution', 'fps' and 'sample_rate' (audio)
+        force_transcode: Re-encode every stream even if it could be copied
+        progress: Callback receiving progress events and the summary record
+    
+    Returns:
+        The stream plan used for each rendition (see plan_streams)
+    """
+    input_file = Path(input_path)
+    
+    if not input_file.exists():
+        raise FileNotFoundError(f"Input file not found: {input_path}")
+    
+    info = None
+    if not force_transcode:
+        try:
+            with stage('probe'):
+                info = probe(input_file)
+        except (OSError, RuntimeError):
+            info = None
+    
+    plans = []
+    for rendition in renditions:
+        output_format = Path(rendition['path']).suffix.lower().lstrip('.')
+        plan = plan_streams(info, output_format, rendition.get('codec'), rendition.get('resolution'),
+                            rendition.get('fps'), rendition.get('bitrate'))
+        if plan['audio'] == 'copy' and rendition.get('sample_rate'):
+            plan['audio'] = DEFAULT_ENCODERS.get(output_format, FALLBACK_ENCODERS)[1]
+        plans.append(plan)
+    
+    graph, video_streams = build_ladder_graph(renditions, plans)
+    
+    # Build FFmpeg command; options before each output file apply to that output only
+    cmd = ['ffmpeg', '-i', str(input_file)]
+    if graph:
+        cmd.extend(['-filter_complex', graph])
+    cmd.append('-y')  # Overwrite output files
+    
+    for i, (rendition, plan) in enumerate(zip(renditions, plans)):
+        if plan['video'] == 'copy':
+            cmd.extend(['-map', '0:v:0', '-c:v', 'copy'])
+        elif plan['video']:
+            cmd.extend(['-map', video_streams[i], '-c:v', plan['video']])
+            if rendition.get('bitrate'):
+                cmd.extend(['-b:v', rendition['bitrate']])
+        
+        if plan['audio']:
+            cmd.extend(['-map', '0:a:0?', '-c:a', plan['audio']])
+            if rendition.get('sample_rate') and plan['audio'] != 'copy':
+                cmd.extend(['-ar', str(rendition['sample_rate'])])
+        
+        cmd.append(str(rendition['path']))
+    
+    # Execute conversion
+    outputs([rendition['path'] for rendition in renditions])
+    with stage('encode'):
+        last = run_ffmpeg(cmd, progress)
+    
+    for rendition, plan in zip(renditions, plans):
+        print(f"✓ Converted ({describe_plan(plan)}): {input_file.name} → {Path(rendition['path']).name}")
+    emit_summary(progress, last, input_file, [rendition['path'] for rendition in renditions])
+    return plans
 
 
 def main():
@@ -66,21 +453,50 @@ def main():
         description='Convert video between formats (MP4, AVI, MKV, MOV, WebM, etc.)'
     )
     parser.add_argument('input', help='Input video file')
-    parser.add_argument('output', help='Output video file')
-    parser.add_argument('--codec', default='libx264',
-                       help='Video codec (default: libx264)')
+    parser.add_argument('output', nargs='?', help='Output video file')
+    parser.add_argument('--codec',
+                       help='Video codec (default: copy the source stream when possible, else libx264)')
     parser.add_argument('--resolution',
                        help='Resolution (e.g., 1920x1080, 1280x720)')
     parser.add_argument('--fps', type=int,
                        help='Frames per second')
     parser.add_argument('--bitrate',
                        help='Video bitrate (e.g., 2M, 5M)')
+    parser.add_argument('--force-transcode', action='store_true',
+                       help='Re-encode all streams even when they could be copied')
+    parser.add_argument('--segments', type=int,
+                       help='Transcode in N keyframe-aligned segments in parallel (long inputs)')
+    parser.add_argument('--workers', type=int,
+                       help='Concurrent FFmpeg processes for --segments (default: CPU count)')
+    parser.add_argument('--rendition', action='append', metavar='PATH[:KEY=VALUE,...]',
+                       help='Extra output encoded from the same decode (repeatable; '
+                            'keys: codec, bitrate, resolution, fps, sample_rate)')
+    parser.add_argument('--progress', action='store_true',
+                       help='Show a live progress line and print a JSON summary to stderr')
+    
+    parser.add_argument('--metrics', metavar='PATH',
+                       help="Append per-stage timing records as JSON lines to PATH ('-' for stdout)")
     
     args = parser.parse_args()
     
+    if not args.output and not args.rendition:
+        parser.error('output is required unless --rendition is given')
+    
+    progress = ProgressPrinter() if args.progress else None
+    configure_metrics(args.metrics)
+    
     try:
-        convert_video(args.input, args.output, args.codec,
-                     args.resolution, args.fps, args.bitrate)
+        if args.rendition:
+            renditions = [parse_rendition(spec) for spec in args.rendition]
+            if args.output:
+                renditions.insert(0, {'path': args.output, 'codec': args.codec,
+                                      'resolution': args.resolution, 'fps': args.fps,
+                                      'bitrate': args.bitrate})
+            convert_renditions(args.input, renditions, args.force_transcode, progress)
+        else:
+            convert_video(args.input, args.output, args.codec,
+                         args.resolution, args.fps, args.bitrate, args.force_transcode,
+                         args.segments, args.workers, progress)
     except Exception as e:
         print(f"✗ Error: {e}", file=sys.stderr)
         sys.exit(1)
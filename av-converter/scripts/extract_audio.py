@@ -2,48 +2,151 @@
 """
 Extract audio from video files using FFmpeg.
 Converts video to audio-only formats.
+
+The audio stream is copied without re-encoding when the output container
+accepts its codec (e.g. AAC from MP4 into .m4a, Opus from WebM into .opus).
 """
 
 import sys
-import subprocess
 from pathlib import Path
 import argparse
 
+from metrics import instrument, stage, outputs as job_outputs, configure as configure_metrics
+from ffmpeg_runner import run_ffmpeg, emit_summary, ProgressPrinter
+from media_probe import probe, streams_of_type, default_stream, can_copy
+
+
+DEFAULT_BITRATE = '192k'
 
-def extract_audio(input_path: str, output_path: str, bitrate: str = '192k') -> None:
+
+def plan_outputs(info: dict, outputs: list, bitrate: str = None) -> list:
     """
-    Extract audio track from video file.
+    Decide for each output which audio track it takes and whether it is copied.
+    
+    Args:
+        info: ffprobe output for the input (None: probing unavailable)
+        outputs: (output_path, track) pairs; track is the 0-based audio
+            track number or None for the default track
+        bitrate: Requested bitrate (forces re-encoding when set)
+    
+    Returns:
+        (output_file, track, action) tuples; action is 'copy' or 'transcode'
+    """
+    audio_streams = streams_of_type(info, 'audio') if info is not None else None
+    if audio_streams is not None and not audio_streams:
+        raise ValueError("Input has no audio track")
+    
+    plan = []
+    for output_path, track in outputs:
+        output_file = Path(output_path)
+        action = 'transcode'
+        if audio_streams is not None:
+            if track is None:
+                stream = default_stream(audio_streams)
+                track = audio_streams.index(stream)
+            elif not 0 <= track < len(audio_streams):
+                raise ValueError(f"Audio track {track} not found "
+                                 f"(input has {len(audio_streams)} audio tracks)")
+            output_format = output_file.suffix.lower().lstrip('.')
+            if not bitrate and can_copy(audio_streams[track].get('codec_name'), output_format, 'audio'):
+                action = 'copy'
+        plan.append((output_file, track, action))
+    return plan
+
+
+def extract_command(input_file: Path, plan: list, bitrate: str = None) -> list:
+    """Build the FFmpeg command writing every output of a plan (see plan_outputs)."""
+    # Options before each output file apply to that output only
+    cmd = [
+        'ffmpeg',
+        '-i', str(input_file),
+        '-y'  # Overwrite output files
+    ]
+    for output_file, track, action in plan:
+        if track is not None:
+            cmd.extend(['-map', f'0:a:{track}'])
+        cmd.extend(['-vn', '-sn', '-dn'])  # Audio only
+        if action == 'copy':
+            cmd.extend(['-c:a', 'copy'])
+        else:
+            cmd.extend(['-b:a', bitrate or DEFAULT_BITRATE])
+        cmd.append(str(output_file))
+    return cmd
+
+
+@instrument('extract_audio', tool='ffmpeg')
+def extract_tracks(input_path: str, outputs: list, bitrate: str = None, progress=None) -> list:
+    """
+    Extract one or more audio outputs in a single FFmpeg run.
+    
+    The input is demuxed once and every output is written from that pass,
+    each with its own track selection and codec.
     
     Args:
         input_path: Path to input video file
-        output_path: Path to output audio file
-        bitrate: Audio bitrate (e.g., '128k', '192k', '320k')
+        outputs: (output_path, track) pairs; track is the 0-based audio
+            track number or None for the default track
+        bitrate: Audio bitrate for re-encoded outputs (e.g., '128k', '192k',
+            '320k'); setting it disables stream copy. Default: copy when
+            possible, otherwise 192k
+        progress: Callback receiving progress events and the summary record
+            (see ffmpeg_runner)
+    
+    Returns:
+        (output_file, track, action) tuples; action is 'copy' or 'transcode'
     """
     input_file = Path(input_path)
-    output_file = Path(output_path)
     
     if not input_file.exists():
         raise FileNotFoundError(f"Input file not found: {input_path}")
     
-    # Build FFmpeg command
-    cmd = [
-        'ffmpeg',
-        '-i', str(input_file),
-        '-vn',  # Disable video
-        '-b:a', bitrate,
-        '-y'  # Overwrite output file
-    ]
+    try:
+        with stage('probe'):
+            info = probe(input_file)
+    except (OSError, RuntimeError):
+        # No ffprobe, or a file it cannot read: let FFmpeg pick and re-encode
+        info = None
+    plan = plan_outputs(info, outputs, bitrate)
+    job_outputs([output_file for output_file, _, _ in plan])
     
-    # Add output file
-    cmd.append(str(output_file))
+    cmd = extract_command(input_file, plan, bitrate)
     
     # Execute extraction
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    with stage('extract'):
+        last = run_ffmpeg(cmd, progress, error='FFmpeg extraction failed')
+    
+    for output_file, _, action in plan:
+        label = 'stream copy' if action == 'copy' else 'transcode'
+        print(f"✓ Extracted audio ({label}): {input_file.name} → {output_file.name}")
+    emit_summary(progress, last, input_file, [output_file for output_file, _, _ in plan])
+    return plan
+
+
+def extract_audio(input_path: str, output_path: str, bitrate: str = None,
+                  track: int = None, progress=None) -> str:
+    """
+    Extract audio track from video file.
     
-    if result.returncode != 0:
-        raise RuntimeError(f"FFmpeg extraction failed: {result.stderr}")
+    Args:
+        input_path: Path to input video file
+        output_path: Path to output audio file
+        bitrate: Audio bitrate (e.g., '128k', '192k', '320k'); setting it
+            disables stream copy. Default: copy when possible, otherwise 192k
+        track: 0-based audio track number (default: the input's default track)
+        progress: Callback receiving progress events and the summary record
     
-    print(f"✓ Extracted audio: {input_file.name} → {output_file.name}")
+    Returns:
+        'copy' or 'transcode'
+    """
+    return extract_tracks(input_path, [(output_path, track)], bitrate, progress)[0][2]
+
+
+def parse_output(spec: str) -> tuple:
+    """Parse 'PATH[:TRACK]' into (path, track)."""
+    path, _, track = spec.rpartition(':')
+    if not path or not track.isdigit():
+        return spec, None
+    return path, int(track)
 
 
 def main():
@@ -51,14 +154,33 @@ def main():
         description='Extract audio from video files'
     )
     parser.add_argument('input', help='Input video file')
-    parser.add_argument('output', help='Output audio file')
-    parser.add_argument('--bitrate', default='192k',
-                       help='Audio bitrate (default: 192k)')
+    parser.add_argument('output', nargs='?', help='Output audio file')
+    parser.add_argument('--bitrate',
+                       help=f'Audio bitrate; forces re-encoding (default: copy when possible, '
+                            f'else {DEFAULT_BITRATE})')
+    parser.add_argument('--track', type=int,
+                       help='Audio track number, starting at 0 (default: the default track)')
+    parser.add_argument('--extract', action='append', metavar='PATH[:TRACK]',
+                       help='Extra output written in the same FFmpeg run (repeatable)')
+    parser.add_argument('--progress', action='store_true',
+                       help='Show a live progress line and print a JSON summary to stderr')
+    
+    parser.add_argument('--metrics', metavar='PATH',
+                       help="Append per-stage timing records as JSON lines to PATH ('-' for stdout)")
     
     args = parser.parse_args()
     
+    if not args.output and not args.extract:
+        parser.error('output is required unless --extract is given')
+    
+    progress = ProgressPrinter() if args.progress else None
+    configure_metrics(args.metrics)
+    
     try:
-        extract_audio(args.input, args.output, args.bitrate)
+        outputs = [parse_output(spec) for spec in args.extract or []]
+        if args.output:
+            outputs.insert(0, (args.output, args.track))
+        extract_tracks(args.input, outputs, args.bitrate, progress)
     except Exception as e:
         print(f"✗ Error: {e}", file=sys.stderr)
         sys.exit(1)
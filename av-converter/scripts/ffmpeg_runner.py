@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+FFmpeg job runner with live progress.
+Runs FFmpeg with -progress pipe:1 and parses the progress stream as it arrives.
+
+Progress is delivered to a callback as event dicts:
+    {'event': 'progress', 'out_time', 'duration', 'percent', 'eta', 'frame',
+     'fps', 'speed', 'total_size', 'elapsed'}
+and, once a job finishes, a summary record:
+    {'event': 'summary', 'input', 'outputs', 'duration', 'elapsed',
+     'realtime_factor', 'frames', 'bytes_in', 'bytes_out'}
+Fields that FFmpeg does not report (e.g. percent without a known duration)
+are None.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import signal
+import threading
+import subprocess
+from collections import deque
+from pathlib import Path
+
+
+# stderr lines kept for error messages (the rest is discarded as it streams)
+STDERR_TAIL_LINES = 40
+
+DURATION_PATTERN = re.compile(r'Duration: (\d+):(\d+):(\d+(?:\.\d+)?)')
+
+
+def _number(value: str, kind=float):
+    """Parse a progress value, returning None for 'N/A' or missing values."""
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def progress_event(out_time: float, duration: float, elapsed: float, frame: int = None,
+                   fps: float = None, speed: float = None, total_size: int = None) -> dict:
+    """
+    Build a progress event, deriving percent done and ETA.
+    
+    Args:
+        out_time: Seconds of media written so far
+        duration: Total media seconds (None if unknown)
+        elapsed: Wall-clock seconds since the job started
+        frame: Frames written
+        fps: Frames encoded per second
+        speed: Media seconds per wall-clock second (default: out_time / elapsed)
+        total_size: Bytes written
+    """
+    if speed is None and elapsed > 0:
+        speed = out_time / elapsed
+    percent = eta = None
+    if duration:
+        percent = min(100.0, 100.0 * out_time / duration)
+        if speed:
+            eta = max(0.0, (duration - out_time) / speed)
+    return {
+        'event': 'progress',
+        'out_time': out_time,
+        'duration': duration,
+        'percent': percent,
+        'eta': eta,
+        'frame': frame,
+        'fps': fps,
+        'speed': speed,
+        'total_size': total_size,
+        'elapsed': elapsed,
+    }
+
+
+class ProgressParser:
+    """
+    Turns FFmpeg's -progress output into progress events.
+    
+    Feed it stdout lines (key=value blocks) and stderr lines; stderr is only
+    used for the input duration and a short tail for error messages.
+    
+    Args:
+        duration: Total media seconds (default: read from FFmpeg's stderr)
+    """
+    
+    def __init__(self, duration: float = None):
+        self.start = time.monotonic()
+        self.duration = duration
+        self.stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+        self.fields = {}
+        self.last = progress_event(0.0, duration, 0.0)
+    
+    def stderr_line(self, line: str) -> None:
+        """Consume one stderr line: keep it for errors and look for the input duration."""
+        self.stderr_tail.append(line)
+        if self.duration is None:
+            match = DURATION_PATTERN.search(line)
+            if match:
+                hours, minutes, seconds = match.groups()
+                self.duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    
+    def stdout_line(self, line: str) -> dict:
+        """Consume one progress line; return an event when a block is complete, else None."""
+        key, _, value = line.strip().partition('=')
+        self.fields[key] = value
+        if key != 'progress':
+            return None
+        fields, self.fields = self.fields, {}
+        # out_time_ms is in microseconds too (a long-standing FFmpeg quirk)
+        out_time_us = _number(fields.get('out_time_us'), int) or _number(fields.get('out_time_ms'), int)
+        speed = fields.get('speed', '').rstrip('x')
+        self.last = progress_event(max(0, out_time_us or 0) / 1e6, self.duration, time.monotonic() - self.start,
+                                   _number(fields.get('frame'), int), _number(fields.get('fps')),
+                                   _number(speed), _number(fields.get('total_size'), int))
+        return self.last
+    
+    def error(self, prefix: str) -> RuntimeError:
+        """The exception for a failed run, carrying the end of FFmpeg's log."""
+        return RuntimeError(f"{prefix}: {''.join(self.stderr_tail)}")
+
+
+def progress_command(cmd: list) -> list:
+    """Insert the options that make FFmpeg report progress on stdout."""
+    return [cmd[0], '-progress', 'pipe:1', '-nostats', *cmd[1:]]
+
+
+def run_ffmpeg(cmd: list, progress=None, duration: float = None,
+               error: str = 'FFmpeg conversion failed') -> dict:
+    """
+    Run an FFmpeg command, streaming its progress.
+    
+    stderr is drained on a background thread; only the last lines are kept
+    for the error message, so long jobs do not accumulate their log in memory.
+    
+    Args:
+        cmd: FFmpeg command line (starting with the ffmpeg executable)
+        progress: Callback receiving progress events (optional)
+        duration: Total media seconds for percent/ETA (default: the first
+            input's duration as reported by FFmpeg)
+        error: Prefix of the RuntimeError raised on failure
+    
+    Returns:
+        The last progress event
+    """
+    parser = ProgressParser(duration)
+    process = subprocess.Popen(progress_command(cmd), stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE, text=True)
+    
+    def drain_stderr():
+        for line in process.stderr:
+            parser.stderr_line(line)
+    
+    reader = threading.Thread(target=drain_stderr, daemon=True)
+    reader.start()
+    
+    for line in process.stdout:
+        event = parser.stdout_line(line)
+        if event is not None and progress is not None:
+            progress(event)
+    
+    process.wait()
+    reader.join()
+    
+    if process.returncode != 0:
+        raise parser.error(error)
+    
+    return parser.last
+
+
+def kill_process_group(process) -> None:
+    """Kill a child started in its own session, including anything it spawned."""
+    try:
+        if hasattr(os, 'killpg'):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except ProcessLookupError:
+        pass
+
+
+async def run_ffmpeg_async(cmd: list, progress=None, duration: float = None,
+                           error: str = 'FFmpeg conversion failed', timeout: float = None) -> dict:
+    """
+    Coroutine version of run_ffmpeg built on asyncio.create_subprocess_exec.
+    
+    Cancelling the awaiting task, or exceeding the timeout, kills FFmpeg
+    (it runs in its own process group) before the exception propagates.
+    
+    Args:
+        cmd: FFmpeg command line (starting with the ffmpeg executable)
+        progress: Callback receiving progress events (optional)
+        duration: Total media seconds for percent/ETA
+        error: Prefix of the RuntimeError raised on failure
+        timeout: Seconds after which FFmpeg is killed and TimeoutError raised
+    
+    Returns:
+        The last progress event
+    """
+    import asyncio  # only the async API needs it; keeps CLI startup lean
+    
+    parser = ProgressParser(duration)
+    process = await asyncio.create_subprocess_exec(
+        *progress_command(cmd), stdin=asyncio.subprocess.DEVNULL, stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE, start_new_session=True)
+    
+    async def drain_stderr():
+        async for line in process.stderr:
+            parser.stderr_line(line.decode(errors='replace'))
+    
+    async def read_progress():
+        async for line in process.stdout:
+            event = parser.stdout_line(line.decode(errors='replace'))
+            if event is not None and progress is not None:
+                progress(event)
+        await process.wait()
+    
+    stderr_task = asyncio.ensure_future(drain_stderr())
+    try:
+        await asyncio.wait_for(read_progress(), timeout)
+    except asyncio.TimeoutError:
+        kill_process_group(process)
+        await process.wait()
+        raise TimeoutError(f"{error}: timed out after {timeout:g}s")
+    except asyncio.CancelledError:
+        kill_process_group(process)
+        await process.wait()
+        raise
+    finally:
+        stderr_task.cancel()
+    
+    if process.returncode != 0:
+        raise parser.error(error)
+    
+    return parser.last
+
+
+def emit_summary(progress, last: dict, input_file: Path, outputs: list) -> dict:
+    """
+    Build the summary record of a finished job and pass it to the callback.
+    
+    Args:
+        progress: Callback receiving the summary (optional)
+        last: Last progress event of the job
+        input_file: Job input
+        outputs: Output files written by the job
+    
+    Returns:
+        The summary record
+    """
+    outputs = [Path(path) for path in outputs]
+    elapsed = last['elapsed']
+    summary = {
+        'event': 'summary',
+        'input': str(input_file),
+        'outputs': [str(path) for path in outputs],
+        'duration': last['out_time'],
+        'elapsed': elapsed,
+        'realtime_factor': last['out_time'] / elapsed if elapsed else None,
+        'frames': last['frame'],
+        'bytes_in': Path(input_file).stat().st_size,
+        'bytes_out': sum(path.stat().st_size for path in outputs if path.exists()),
+    }
+    if progress is not None:
+        progress(summary)
+    return summary
+
+
+def format_seconds(seconds: float) -> str:
+    """Format seconds as H:MM:SS."""
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+class ProgressPrinter:
+    """
+    Progress callback that redraws a single status line and prints the
+    summary record as a JSON line when the job finishes. Safe to call from
+    several threads (e.g. segmented transcoding).
+    
+    Args:
+        stream: Where to write (default: stderr, keeping stdout for results)
+    """
+    
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stderr
+        self.width = 0
+        self.lock = threading.Lock()
+    
+    def __call__(self, event: dict) -> None:
+        with self.lock:
+            self._write(event)
+    
+    def _write(self, event: dict) -> None:
+        if event['event'] == 'summary':
+            self.stream.write('\r' + ' ' * self.width + '\r')
+            self.stream.write(json.dumps(event) + '\n')
+            self.stream.flush()
+            self.width = 0
+            return
+        
+        parts = []
+        if event['percent'] is not None:
+            parts.append(f"{event['percent']:5.1f}%")
+        parts.append(f"time={format_seconds(event['out_time'])}")
+        if event['frame']:
+            parts.append(f"frame={event['frame']}")
+        if event['fps']:
+            parts.append(f"fps={event['fps']:.0f}")
+        if event['speed']:
+            parts.append(f"speed={event['speed']:.2f}x")
+        if event['eta'] is not None:
+            parts.append(f"ETA {format_seconds(event['eta'])}")
+        
+        line = '  '.join(parts)
+        self.stream.write('\r' + line.ljust(self.width))
+        self.stream.flush()
+        self.width = len(line)
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Media stream inspection using FFprobe.
+Reports the codecs, dimensions and frame rates of a file's streams and
+which codecs each container can hold without re-encoding.
+"""
+
+import sys
+import json
+import subprocess
+from fractions import Fraction
+from pathlib import Path
+import argparse
+
+
+# Codecs each container accepts as-is (ffprobe codec_name values).
+# Containers not listed here are treated as unknown: never stream-copied.
+CONTAINER_CODECS = {
+    'mp4': {'video': {'h264', 'hevc', 'mpeg4', 'av1', 'vp9'},
+            'audio': {'aac', 'mp3', 'ac3', 'eac3', 'alac', 'opus', 'flac'}},
+    'm4v': {'video': {'h264', 'hevc', 'mpeg4'},
+            'audio': {'aac', 'ac3', 'alac'}},
+    'mov': {'video': {'h264', 'hevc', 'mpeg4', 'prores', 'mjpeg'},
+            'audio': {'aac', 'mp3', 'ac3', 'alac', 'pcm_s16le', 'pcm_s24le'}},
+    'mkv': {'video': {'h264', 'hevc', 'mpeg4', 'av1', 'vp8', 'vp9', 'mpeg2video', 'theora'},
+            'audio': {'aac', 'mp3', 'ac3', 'eac3', 'dts', 'flac', 'opus', 'vorbis',
+                      'pcm_s16le', 'pcm_s24le', 'alac'}},
+    'webm': {'video': {'vp8', 'vp9', 'av1'},
+             'audio': {'opus', 'vorbis'}},
+    # H.264 from MP4/MKV would need h264_mp4toannexb, which the AVI muxer does not insert
+    'avi': {'video': {'mpeg4', 'mjpeg', 'msmpeg4v3'},
+            'audio': {'mp3', 'ac3', 'pcm_s16le'}},
+    'flv': {'video': {'h264', 'flv1'},
+            'audio': {'aac', 'mp3'}},
+    'ts': {'video': {'h264', 'hevc', 'mpeg2video'},
+           'audio': {'aac', 'mp3', 'ac3', 'eac3', 'mp2'}},
+    # Audio-only containers
+    'm4a': {'audio': {'aac', 'alac'}},
+    'aac': {'audio': {'aac'}},
+    'mp3': {'audio': {'mp3'}},
+    'opus': {'audio': {'opus'}},
+    'ogg': {'audio': {'vorbis', 'opus', 'flac'}},
+    'flac': {'audio': {'flac'}},
+    'wav': {'audio': {'pcm_s16le', 'pcm_s24le', 'pcm_s32le', 'pcm_f32le', 'pcm_u8'}},
+    'ac3': {'audio': {'ac3'}},
+}
+CONTAINER_CODECS['mts'] = CONTAINER_CODECS['m2ts'] = CONTAINER_CODECS['ts']
+
+# FFmpeg encoder -> codec it produces
+ENCODER_CODECS = {
+    'libx264': 'h264',
+    'libx265': 'hevc',
+    'libvpx': 'vp8',
+    'libvpx-vp9': 'vp9',
+    'libaom-av1': 'av1',
+    'libsvtav1': 'av1',
+    'mpeg4': 'mpeg4',
+    'aac': 'aac',
+    'libmp3lame': 'mp3',
+    'libopus': 'opus',
+    'libvorbis': 'vorbis',
+    'flac': 'flac',
+}
+
+
+def probe_command(input_path: str) -> list:
+    """Build the ffprobe command printing a file's streams and format as JSON."""
+    return [
+        'ffprobe',
+        '-v', 'error',
+        '-print_format', 'json',
+        '-show_streams',
+        '-show_format',
+        str(input_path)
+    ]
+
+
+def probe(input_path: str) -> dict:
+    """
+    Read stream and container information with ffprobe.
+    
+    Args:
+        input_path: Path to a media file
+    
+    Returns:
+        ffprobe's JSON output: 'streams' and 'format'
+    """
+    result = subprocess.run(probe_command(input_path), capture_output=True, text=True)
+    
+    if result.returncode != 0:
+        raise RuntimeError(f"FFprobe failed: {result.stderr}")
+    
+    return json.loads(result.stdout)
+
+
+def streams_of_type(info: dict, codec_type: str) -> list:
+    """Return the streams of one type ('video', 'audio', 'subtitle') in file order."""
+    streams = [s for s in info.get('streams', []) if s.get('codec_type') == codec_type]
+    if codec_type == 'video':
+        # Cover art is stored as a single-frame video stream
+        streams = [s for s in streams if not s.get('disposition', {}).get('attached_pic')]
+    return streams
+
+
+def frame_rate(stream: dict) -> Fraction:
+    """Return a stream's frame rate, or None if ffprobe did not report one."""
+    rate = stream.get('avg_frame_rate') or stream.get('r_frame_rate') or '0/0'
+    numerator, _, denominator = rate.partition('/')
+    if not int(denominator or 1):
+        return None
+    return Fraction(int(numerator), int(denominator or 1))
+
+
+def media_duration(info: dict) -> float:
+    """Return the container duration in seconds (0.0 if unknown)."""
+    return float(info.get('format', {}).get('duration') or 0)
+
+
+def count_frames(input_path: str) -> int:
+    """Count the frames of the first video stream by reading packets (no decoding)."""
+    cmd = [
+        'ffprobe',
+        '-v', 'error',
+        '-select_streams', 'v:0',
+        '-count_packets',
+        '-show_entries', 'stream=nb_read_packets',
+        '-of', 'csv=p=0',
+        str(input_path)
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    
+    if result.returncode != 0:
+        raise RuntimeError(f"FFprobe failed: {result.stderr}")
+    
+    return int(result.stdout.strip().rstrip(',') or 0)
+
+
+def default_stream(streams: list) -> dict:
+    """Return the stream flagged as default, else the first one (None if empty)."""
+    for stream in streams:
+        if stream.get('disposition', {}).get('default'):
+            return stream
+    return streams[0] if streams else None
+
+
+def can_copy(codec_name: str, container: str, codec_type: str) -> bool:
+    """Whether a stream with this codec can be stored in the container unchanged."""
+    return codec_name in CONTAINER_CODECS.get(container, {}).get(codec_type, ())
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Show the streams of a media file'
+    )
+    parser.add_argument('input', help='Input media file')
+    
+    args = parser.parse_args()
+    
+    try:
+        if not Path(args.input).exists():
+            raise FileNotFoundError(f"Input file not found: {args.input}")
+        info = probe(args.input)
+        for stream in info.get('streams', []):
+            details = [stream.get('codec_type', '?'), stream.get('codec_name', '?')]
+            if stream.get('codec_type') == 'video':
+                details.append(f"{stream.get('width')}x{stream.get('height')}")
+                rate = frame_rate(stream)
+                if rate:
+                    details.append(f"{float(rate):g} fps")
+            elif stream.get('codec_type') == 'audio':
+                details.append(f"{stream.get('sample_rate')} Hz")
+                details.append(f"{stream.get('channels')} ch")
+            print(f"#{stream.get('index')}: {', '.join(details)}")
+    except Exception as e:
+        print(f"✗ Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Conversion metrics.
+Records per-stage timings, file sizes, peak RSS and the external tool of each
+conversion and writes them as JSON lines.
+
+Converter functions are wrapped with @instrument and mark their stages with
+``with stage('decode'):``. Records are written only when a destination is
+configured: --metrics PATH (or '-' for stdout) on any converter CLI, or the
+CONVERTER_METRICS environment variable, which child processes inherit.
+
+The first conversion in a process also reports 'startup' (interpreter start
+until this module was imported) and 'imports' (from then until the
+conversion began), so converters import this module before their
+third-party libraries. In a forked pool worker, 'imports' runs from the
+fork and there is no 'startup'.
+
+Summarise a metrics file with:
+    python metrics.py report metrics.jsonl
+"""
+
+import os
+import sys
+import json
+import time
+import inspect
+import functools
+import contextlib
+import contextvars
+from datetime import datetime, timezone
+from pathlib import Path
+import argparse
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+METRICS_ENV = 'CONVERTER_METRICS'
+
+IMPORTED_AT = time.time()
+
+_current_job = contextvars.ContextVar('current_job', default=None)
+_first_job_started = False
+_forked = False
+
+
+def _reset_after_fork() -> None:
+    """In a forked worker, time imports from the fork; startup was the parent's, not this process's."""
+    global IMPORTED_AT, _first_job_started, _forked
+    IMPORTED_AT = time.time()
+    _first_job_started = False
+    _forked = True
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def process_start_time() -> float:
+    """Return the epoch time this process started, or None if unavailable (non-Linux)."""
+    try:
+        with open('/proc/self/stat') as f:
+            # Fields after the parenthesised command name; starttime is field 22
+            start_ticks = int(f.read().rpartition(')')[2].split()[19])
+        with open('/proc/stat') as f:
+            boot_time = next(int(line.split()[1]) for line in f if line.startswith('btime'))
+        return boot_time + start_ticks / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError, StopIteration):
+        return None
+
+
+def peak_rss_mb(children: bool = False) -> float:
+    """Peak RSS of this process, or of its largest waited-for child process (None on Windows)."""
+    if not children:
+        # VmHWM starts afresh at exec; ru_maxrss keeps the peak of the process that forked us
+        try:
+            with open('/proc/self/status') as f:
+                kilobytes = next(int(line.split()[1]) for line in f if line.startswith('VmHWM:'))
+            return round(kilobytes / 1024, 1)
+        except (OSError, ValueError, StopIteration):
+            pass
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    divisor = 1024 ** 2 if sys.platform == 'darwin' else 1024
+    return round(usage.ru_maxrss / divisor, 1)
+
+
+def configure(destination: str) -> None:
+    """
+    Send metrics records to a JSON-lines file, or stdout for '-'.
+    
+    Records for '-' go to the process's real stdout, never to output a
+    batch job or watcher is capturing. The setting is stored in the
+    environment so that converters running in child processes (isolated or
+    batch conversions) report to the same place.
+    """
+    if destination:
+        os.environ[METRICS_ENV] = destination
+
+
+def emit(record: dict) -> None:
+    """Write one record to the configured destination, if any."""
+    destination = os.environ.get(METRICS_ENV)
+    if not destination:
+        return
+    line = json.dumps(record, default=str) + '\n'
+    if destination == '-':
+        # Batch and watch jobs capture sys.stdout; records bypass that
+        stream = sys.__stdout__ or sys.stdout
+        stream.write(line)
+        stream.flush()
+    else:
+        # One write per record in append mode keeps lines from concurrent processes intact
+        with open(destination, 'a') as f:
+            f.write(line)
+
+
+class Job:
+    """Metrics of one conversion: stage timings, annotations and outputs."""
+    
+    def __init__(self, script: str, function: str, input_path, tool: str = None):
+        global _first_job_started
+        self.started = time.time()
+        self.script = script
+        self.function = function
+        self.input = Path(input_path) if input_path is not None else None
+        self.outputs = []
+        self.stages = {}
+        self.fields = {'tool': tool} if tool else {}
+        
+        if not _first_job_started:
+            _first_job_started = True
+            process_start = None if _forked else process_start_time()
+            if process_start is not None:
+                self.stages['startup'] = max(0.0, IMPORTED_AT - process_start)
+            self.stages['imports'] = self.started - IMPORTED_AT
+    
+    def record(self, status: str, error: str = None) -> dict:
+        """Build the JSON record for this job."""
+        outputs = [path for path in self.outputs if path.exists()]
+        record = {
+            'timestamp': datetime.fromtimestamp(self.started, timezone.utc).isoformat(),
+            'script': self.script,
+            'function': self.function,
+            'status': status,
+            'input': str(self.input) if self.input else None,
+            'outputs': [str(path) for path in self.outputs],
+            'input_bytes': self.input.stat().st_size if self.input and self.input.is_file() else None,
+            'output_bytes': sum(path.stat().st_size for path in outputs if path.is_file()),
+            'stages': self.stages,
+            'total': time.time() - self.started,
+            'peak_rss_mb': peak_rss_mb(),
+            'children_peak_rss_mb': peak_rss_mb(children=True),
+            'pid': os.getpid(),
+        }
+        record.update(self.fields)
+        if error:
+            record['error'] = error
+        return record
+
+
+def instrument(script: str, tool=None):
+    """
+    Decorator recording one metrics job per call of a converter function.
+    
+    The first argument is taken as the input path and the second, if it is a
+    path, as the output; call outputs() from inside for other outputs.
+    Coroutine functions are supported; each task tracks its own job.
+    
+    Args:
+        script: Script name reported in the record
+        tool: External tool or library, or a callable returning it
+    """
+    def decorator(func):
+        def start_job(args):
+            input_path = args[0] if args else None
+            job = Job(script, func.__name__, input_path, tool() if callable(tool) else tool)
+            if len(args) > 1 and isinstance(args[1], (str, Path)):
+                job.outputs.append(Path(args[1]))
+            return job
+        
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                import asyncio  # already loaded when a coroutine runs; not imported by sync converters
+                job = start_job(args)
+                token = _current_job.set(job)
+                try:
+                    result = await func(*args, **kwargs)
+                except BaseException as e:
+                    # Includes cancellation, which async callers use to abort jobs
+                    emit(job.record('cancelled' if isinstance(e, asyncio.CancelledError) else 'error',
+                                    str(e) or type(e).__name__))
+                    raise
+                finally:
+                    _current_job.reset(token)
+                emit(job.record('ok'))
+                return result
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            job = start_job(args)
+            token = _current_job.set(job)
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                emit(job.record('error', str(e)))
+                raise
+            finally:
+                _current_job.reset(token)
+            emit(job.record('ok'))
+            return result
+        return wrapper
+    return decorator
+
+
+@contextlib.contextmanager
+def stage(name: str):
+    """Time a stage of the current job (repeated stages accumulate)."""
+    job = _current_job.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if job is not None:
+            job.stages[name] = job.stages.get(name, 0.0) + time.perf_counter() - start
+
+
+def annotate(**fields) -> None:
+    """Add fields (e.g. tool='pandoc', path='remux') to the current job's record."""
+    job = _current_job.get()
+    if job is not None:
+        job.fields.update(fields)
+
+
+def outputs(paths: list) -> None:
+    """Set the output files of the current job."""
+    job = _current_job.get()
+    if job is not None:
+        job.outputs = [Path(path) for path in paths]
+
+
+def percentile(values: list, fraction: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def aggregate(records: list) -> dict:
+    """
+    Summarise records per script and function.
+    
+    Returns:
+        {'script.function': {jobs, errors, total_seconds, mean, p50, p95,
+         stages (mean seconds per job running the stage), input_mb_per_s,
+         max_peak_rss_mb}}
+    """
+    groups = {}
+    for record in records:
+        groups.setdefault(f"{record['script']}.{record['function']}", []).append(record)
+    
+    report = {}
+    for name, group in sorted(groups.items()):
+        ok = [record for record in group if record['status'] == 'ok']
+        totals = [record['total'] for record in ok] or [0.0]
+        stage_names = sorted({stage for record in ok for stage in record['stages']})
+        input_bytes = sum(record.get('input_bytes') or 0 for record in ok)
+        report[name] = {
+            'jobs': len(group),
+            'errors': len(group) - len(ok),
+            'total_seconds': sum(totals),
+            'mean': sum(totals) / len(totals),
+            'p50': percentile(totals, 0.5),
+            'p95': percentile(totals, 0.95),
+            # Averaged over the jobs that ran the stage (e.g. startup is first-job only)
+            'stages': {stage: sum(timings) / len(timings) for stage, timings in
+                       ((stage, [record['stages'][stage] for record in ok if stage in record['stages']])
+                        for stage in stage_names)},
+            'input_mb_per_s': input_bytes / 1024 ** 2 / sum(totals) if sum(totals) else None,
+            'max_peak_rss_mb': max((record['peak_rss_mb'] or 0 for record in group), default=None),
+        }
+    return report
+
+
+def read_records(paths: list, since: str = None) -> list:
+    """
+    Load records from JSON-lines files, skipping lines that are not records.
+    
+    Args:
+        paths: Metrics files
+        since: Only keep records with an ISO timestamp at or after this one
+    """
+    records = []
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if not isinstance(record, dict) or 'script' not in record:
+                    continue
+                if since is None or record['timestamp'] >= since:
+                    records.append(record)
+    return records
+
+
+def format_report(report: dict) -> str:
+    """Render an aggregate() report as a table, with mean stage times under each row."""
+    lines = [f"{'converter':<40} {'jobs':>5} {'err':>4} {'mean':>8} {'p50':>8} {'p95':>8} "
+             f"{'MB/s':>8} {'peak RSS':>9}"]
+    for name, row in report.items():
+        throughput = f"{row['input_mb_per_s']:.1f}" if row['input_mb_per_s'] is not None else '-'
+        lines.append(f"{name:<40} {row['jobs']:>5} {row['errors']:>4} {row['mean']:>7.3f}s "
+                     f"{row['p50']:>7.3f}s {row['p95']:>7.3f}s {throughput:>8} "
+                     f"{row['max_peak_rss_mb'] or 0:>7.0f}MB")
+        stages = '  '.join(f"{stage}={seconds:.3f}s" for stage, seconds in row['stages'].items())
+        if stages:
+            lines.append(f"    {stages}")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Summarise conversion metrics recorded with --metrics'
+    )
+    parser.add_argument('command', choices=['report'], help='report: aggregate per converter')
+    parser.add_argument('files', nargs='+', help='JSON-lines metrics files')
+    parser.add_argument('--since', metavar='ISO_TIME',
+                       help='Only include records from this time on (e.g. 2026-10-18T09:00)')
+    parser.add_argument('--json', action='store_true', help='Print the aggregate as JSON')
+    
+    args = parser.parse_args()
+    
+    try:
+        report = aggregate(read_records(args.files, args.since))
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            print(format_report(report))
+    except Exception as e:
+        print(f"✗ Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
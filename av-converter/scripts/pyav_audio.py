@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+In-process audio transcoding with PyAV.
+For short clips, starting ffmpeg costs more than the encode itself. A
+PyAvTranscoder decodes, resamples and encodes in the current process with
+the FFmpeg libraries PyAV links against, and PyAvPool keeps one transcoder
+per worker process and hands it clips in chunks, so a batch of thousands of
+voice clips pays interpreter and library startup once per worker.
+
+Each transcoder keeps the encoder settings it resolved per output format
+and input layout. Encoders and resamplers themselves are set up per clip:
+a drained libav audio encoder cannot be restarted (none of them has
+AV_CODEC_CAP_ENCODER_FLUSH), and neither can a flushed resampler, and
+opening them takes well under the cost of one ffmpeg start.
+
+Output formats are written with the same encoders the ffmpeg command line
+picks (OUTPUT_CODECS). When PyAV's build lacks one, or the encoder rejects
+the input's channel layout, UnsupportedConversion is raised before any
+audio is written and convert_audio falls back to the ffmpeg command line.
+
+Requires PyAV:
+    pip install av
+"""
+
+import os
+import sys
+import time
+import functools
+import threading
+import importlib.util
+from fractions import Fraction
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import argparse
+
+from ffmpeg_runner import progress_event
+from batch_jobs import capture_output
+
+
+# Output extension -> (muxer, encoder), matching the ffmpeg command line's defaults
+OUTPUT_CODECS = {
+    'mp3': ('mp3', 'libmp3lame'),
+    'wav': ('wav', 'pcm_s16le'),
+    'flac': ('flac', 'flac'),
+    'aac': ('adts', 'aac'),
+    'm4a': ('ipod', 'aac'),
+    'ogg': ('ogg', 'libvorbis'),
+    'opus': ('opus', 'libopus'),
+    'wma': ('asf', 'wmav2'),
+    'aiff': ('aiff', 'pcm_s16be'),
+    'ac3': ('ac3', 'ac3'),
+    'amr': ('amr', 'libopencore_amrnb'),
+}
+
+# Named layouts for inputs (e.g. WAV) that only give a channel count
+DEFAULT_LAYOUTS = {1: 'mono', 2: 'stereo'}
+
+# Seconds between progress events
+PROGRESS_INTERVAL = 0.5
+
+
+class UnsupportedConversion(ValueError):
+    """PyAV cannot write this output here; convert it with the ffmpeg command line instead."""
+
+
+def pyav_available() -> bool:
+    return importlib.util.find_spec('av') is not None
+
+
+@functools.lru_cache(maxsize=None)
+def encoder_available(name: str) -> bool:
+    """Whether PyAV's FFmpeg build has this encoder."""
+    import av
+    try:
+        av.Codec(name, 'w')
+    except (av.codec.codec.UnknownCodecError, ValueError):
+        return False
+    return True
+
+
+def supports(output_format: str) -> bool:
+    """Whether PyAV can write this output format here."""
+    return (output_format in OUTPUT_CODECS and pyav_available()
+            and encoder_available(OUTPUT_CODECS[output_format][1]))
+
+
+def parse_bitrate(bitrate: str) -> int:
+    """Parse an FFmpeg-style bitrate ('192k', '1.5M', '64000') into bits per second."""
+    text = str(bitrate).strip()
+    scale = {'k': 1000, 'm': 1000 ** 2}.get(text[-1:].lower(), 1)
+    try:
+        return int(float(text[:-1] if scale > 1 else text) * scale)
+    except ValueError:
+        raise ValueError(f"Invalid bitrate: {bitrate}") from None
+
+
+@functools.lru_cache(maxsize=256)
+def encoder_settings(output_format: str, sample_format: str, layout: str, rate: int,
+                     sample_rate: int = None) -> tuple:
+    """
+    Resolve (muxer, encoder, sample format, layout, rate) for an input, like ffmpeg does.
+    
+    The input's sample format and rate are kept when the encoder accepts
+    them; otherwise the closest supported ones are used.
+    """
+    import av
+    muxer, encoder = OUTPUT_CODECS[output_format]
+    codec = av.Codec(encoder, 'w')
+    
+    formats = [fmt.name for fmt in codec.audio_formats or ()]
+    source = av.AudioFormat(sample_format)
+    if not formats or sample_format in formats:
+        chosen_format = sample_format
+    elif source.packed.name in formats or source.planar.name in formats:
+        chosen_format = source.planar.name if source.planar.name in formats else source.packed.name
+    else:
+        # Prefer a format at least as precise as the input's, then the encoder's first choice
+        wider = [name for name in formats if av.AudioFormat(name).bits >= source.bits]
+        chosen_format = (wider or formats)[0]
+    
+    rate = sample_rate or rate
+    rates = codec.audio_rates
+    if rates and rate not in rates:
+        rate = min(rates, key=lambda candidate: (abs(candidate - rate), -candidate))
+    return muxer, encoder, chosen_format, layout, rate
+
+
+class PyAvTranscoder:
+    """
+    Transcodes audio files in-process. Safe to use from multiple threads;
+    PyAV releases the GIL while FFmpeg decodes and encodes.
+    """
+    
+    def __init__(self):
+        import av
+        self.av = av
+        self.clips = 0
+    
+    def transcode(self, input_path: str, output_path: str, bitrate: str = '192k',
+                  sample_rate: int = None, progress=None) -> dict:
+        """
+        Convert one audio file.
+        
+        Args:
+            input_path: Path to input audio file
+            output_path: Path to output audio file; the extension selects the encoder
+            bitrate: Audio bitrate for lossy encoders (e.g., '128k', '192k')
+            sample_rate: Sample rate in Hz (default: the input's, if the encoder takes it)
+            progress: Callback receiving progress events (see ffmpeg_runner)
+        
+        Returns:
+            The last progress event of the job (for ffmpeg_runner.emit_summary)
+        
+        Raises:
+            UnsupportedConversion: Before writing anything, when PyAV cannot
+                produce this output (use the ffmpeg command line)
+        """
+        av = self.av
+        input_file = Path(input_path)
+        output_file = Path(output_path)
+        output_format = output_file.suffix.lower().lstrip('.')
+        
+        if not input_file.exists():
+            raise FileNotFoundError(f"Input file not found: {input_path}")
+        if not supports(output_format):
+            raise UnsupportedConversion(f"PyAV cannot write {output_format.upper()} here")
+        
+        start = time.perf_counter()
+        with av.open(str(input_file)) as source:
+            if not source.streams.audio:
+                raise ValueError("Input has no audio track")
+            stream = source.streams.audio[0]
+            decoder = stream.codec_context
+            layout = decoder.layout.name
+            if layout.endswith('channels'):
+                layout = DEFAULT_LAYOUTS.get(decoder.channels, layout)
+            muxer, encoder, sample_format, layout, rate = encoder_settings(
+                output_format, decoder.format.name, layout, decoder.sample_rate, sample_rate)
+            duration = (float(stream.duration * stream.time_base) if stream.duration
+                        else source.duration / av.time_base if source.duration else None)
+            
+            with av.open(str(output_file), 'w', format=muxer) as target:
+                target.metadata.update(source.metadata)
+                output = target.add_stream(encoder, rate=rate)
+                output.format = sample_format
+                output.layout = layout
+                output.bit_rate = parse_bitrate(bitrate)
+                try:
+                    output.codec_context.open()
+                except av.error.FFmpegError as e:
+                    raise UnsupportedConversion(f"{encoder} rejected the input ({e})") from None
+                resampler = av.AudioResampler(format=sample_format, layout=layout, rate=rate,
+                                              frame_size=output.codec_context.frame_size or None)
+                
+                samples = 0
+                reported = start
+                
+                def encode(frames):
+                    # Timestamps count samples from zero, like ffmpeg's output
+                    # (the input may start later, e.g. after MP3 encoder delay)
+                    nonlocal samples
+                    for resampled in frames:
+                        resampled.pts = samples
+                        resampled.time_base = Fraction(1, rate)
+                        target.mux(output.encode(resampled))
+                        samples += resampled.samples
+                
+                for packet in source.demux(stream):
+                    try:
+                        frames = packet.decode()
+                    except av.error.InvalidDataError:
+                        # Like ffmpeg, skip a corrupt packet rather than failing the file
+                        continue
+                    for frame in frames:
+                        encode(resampler.resample(frame))
+                    if progress is not None and time.perf_counter() - reported >= PROGRESS_INTERVAL:
+                        reported = time.perf_counter()
+                        progress(progress_event(samples / rate, duration, reported - start))
+                encode(resampler.resample(None))
+                target.mux(output.encode(None))
+        
+        self.clips += 1
+        last = progress_event(samples / rate, duration, time.perf_counter() - start,
+                              total_size=output_file.stat().st_size)
+        if progress is not None:
+            progress(last)
+        return last
+
+
+_transcoder = None
+_transcoder_lock = threading.Lock()
+
+
+def get_transcoder() -> PyAvTranscoder:
+    """Return this process's transcoder, creating it on first use."""
+    global _transcoder
+    with _transcoder_lock:
+        if _transcoder is None:
+            _transcoder = PyAvTranscoder()
+        return _transcoder
+
+
+def _warm_up() -> None:
+    """Pool initializer: load PyAV and FFmpeg's libraries before the first clip."""
+    try:
+        get_transcoder()
+    except ImportError:
+        # A failing initializer breaks the whole pool; let each job report the error instead
+        pass
+
+
+def _convert_job(job: tuple) -> str:
+    """Pool worker: convert one (input, output, bitrate, sample_rate) clip; return the error or None."""
+    from convert_audio import convert_audio
+    input_path, output_path, bitrate, sample_rate = job
+    try:
+        # convert_audio falls back to the ffmpeg command line for formats PyAV cannot write
+        with capture_output():
+            convert_audio(input_path, output_path, bitrate, sample_rate, backend='pyav')
+    except Exception as e:
+        return str(e).strip() or type(e).__name__
+    return None
+
+
+class PyAvPool:
+    """
+    Pool of worker processes, each converting clips with a warm PyAvTranscoder.
+    
+    Args:
+        size: Number of worker processes
+        chunk_size: Clips handed to a worker at a time by convert_many()
+    """
+    
+    def __init__(self, size: int = 2, chunk_size: int = 16):
+        self.chunk_size = chunk_size
+        self.executor = ProcessPoolExecutor(max_workers=size, initializer=_warm_up)
+    
+    def convert_many(self, jobs: list, bitrate: str = '192k', sample_rate: int = None) -> list:
+        """
+        Convert (input, output) pairs, chunk_size clips per worker task.
+        
+        Returns:
+            List of (input_path, output_path, error) tuples in job order;
+            error is None for successful conversions.
+        """
+        errors = self.executor.map(_convert_job, [(str(input_path), str(output_path), bitrate, sample_rate)
+                                                  for input_path, output_path in jobs],
+                                   chunksize=max(1, self.chunk_size))
+        return [(input_path, output_path, error) for (input_path, output_path), error in zip(jobs, errors)]
+    
+    def close(self) -> None:
+        self.executor.shutdown()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Convert many short audio clips in-process with PyAV worker processes'
+    )
+    parser.add_argument('inputs', nargs='+', help='Input audio files')
+    parser.add_argument('--to', required=True, metavar='EXT', help='Output format (e.g., mp3, opus, wav)')
+    parser.add_argument('--output-dir', help='Output directory (default: next to each input)')
+    parser.add_argument('--bitrate', default='192k', help='Audio bitrate (default: 192k)')
+    parser.add_argument('--sample-rate', type=int, help='Sample rate in Hz (e.g., 16000, 48000)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                       help='Number of worker processes (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=16,
+                       help='Clips handed to a worker at a time (default: 16)')
+    
+    args = parser.parse_args()
+    
+    try:
+        if not pyav_available():
+            raise RuntimeError("PyAV is not installed (pip install av)")
+        target = args.to.lower().lstrip('.')
+        if args.output_dir:
+            Path(args.output_dir).mkdir(parents=True, exist_ok=True)
+        jobs = [(Path(path), Path(args.output_dir or Path(path).parent) / f"{Path(path).stem}.{target}")
+                for path in args.inputs]
+        
+        with PyAvPool(args.workers, args.chunk_size) as pool:
+            results = pool.convert_many(jobs, args.bitrate, args.sample_rate)
+    except Exception as e:
+        print(f"✗ Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    
+    failed = False
+    for input_file, output_file, error in results:
+        if error is None:
+            print(f"✓ Converted: {input_file.name} → {output_file.name}")
+        else:
+            failed = True
+            print(f"✗ Error: {input_file}: {error}", file=sys.stderr)
+    
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
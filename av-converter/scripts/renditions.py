@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Output specs for multi-output (ladder) encoding.
+Parses 'PATH[:KEY=VALUE,...]' into the path and options of one rendition.
+"""
+
+# Options a rendition may set, with their types
+RENDITION_OPTIONS = {
+    'codec': str,
+    'bitrate': str,
+    'resolution': str,
+    'fps': int,
+    'sample_rate': int,
+}
+
+
+def parse_rendition(spec: str) -> dict:
+    """
+    Parse a rendition spec.
+    
+    Examples: 'low.mp3:bitrate=128k', 'out_720.mp4:resolution=1280x720,bitrate=3M',
+    'voice.opus:codec=libopus,bitrate=64k,sample_rate=48000'
+    
+    Returns:
+        {'path': ..., option: value, ...}
+    """
+    path, _, options = spec.rpartition(':')
+    if not path or '=' not in options:
+        return {'path': spec}
+    
+    rendition = {'path': path}
+    for item in options.split(','):
+        key, _, value = item.partition('=')
+        key = key.strip().replace('-', '_')
+        if key not in RENDITION_OPTIONS or not value:
+            raise ValueError(f"Invalid rendition option '{item}' "
+                             f"(choose from {', '.join(RENDITION_OPTIONS)})")
+        rendition[key] = RENDITION_OPTIONS[key](value)
+    return rendition
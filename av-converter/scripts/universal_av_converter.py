@@ -6,7 +6,23 @@ Universal audio/video converter - automatically detects and converts.
 import sys
 from pathlib import Path
 import argparse
+import functools
+import glob
+import importlib
+import json
+import os
 import subprocess
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from conversion_cache import ConversionCache, DEFAULT_MAX_BYTES, DEFAULT_CACHE_DIR  # noqa: E402
+from conversion_graph import ConversionGraph, Step, load_costs, scratch_dir  # noqa: E402
+from batch_jobs import find_conflicts, capture_output  # noqa: E402
+from pyav_audio import OUTPUT_CODECS as PYAV_OUTPUT_CODECS  # noqa: E402
+import metrics  # noqa: E402
+from metrics import instrument, stage, annotate  # noqa: E402
 
 
 # Format categories
@@ -14,27 +30,156 @@ AUDIO_FORMATS = {'mp3', 'wav', 'flac', 'aac', 'ogg', 'm4a', 'wma', 'aiff', 'opus
 VIDEO_FORMATS = {'mp4', 'avi', 'mkv', 'mov', 'wmv', 'flv', 'webm', 'mpeg', 'mpg', '3gp', 'm4v', 'vob', 'ts', 'mts', 'm2ts', 'divx', 'ogv'}
 
 
-def get_converter_script(input_format: str, output_format: str) -> str:
-    """Determine which converter script to use."""
-    script_dir = Path(__file__).parent
+# Converter registry: module name -> {convert_file option: converter keyword}.
+# Each module exposes a function with the same name as the module.
+CONVERTERS = {
+    'convert_audio': {'bitrate': 'bitrate', 'sample_rate': 'sample_rate', 'audio_backend': 'backend'},
+    'convert_video': {'codec': 'codec', 'resolution': 'resolution', 'fps': 'fps', 'bitrate': 'bitrate',
+                      'force_transcode': 'force_transcode', 'segments': 'segments'},
+    'extract_audio': {'bitrate': 'bitrate', 'track': 'track'},
+}
+
+# Formats a multi-step route may pass through: lossless, so chaining
+# conversions never degrades the result
+INTERMEDIATE_FORMATS = {'wav', 'flac', 'mkv'}
+
+# Measured step costs written by benchmarks/bench_routes.py
+COSTS_FILE = DEFAULT_CACHE_DIR / 'route_costs.json'
+
+SCRIPT_DIR = Path(__file__).parent
+
+
+def build_graph() -> ConversionGraph:
+    """
+    Describe what every converter can do as a conversion graph.
     
-    if input_format in AUDIO_FORMATS and output_format in AUDIO_FORMATS:
-        return str(script_dir / 'convert_audio.py')
-    elif input_format in VIDEO_FORMATS and output_format in AUDIO_FORMATS:
-        return str(script_dir / 'extract_audio.py')
-    elif input_format in VIDEO_FORMATS or output_format in VIDEO_FORMATS:
-        return str(script_dir / 'convert_video.py')
-    else:
-        raise ValueError(f"Unsupported conversion: {input_format} → {output_format}")
+    Default costs are rough seconds per short clip; they only need to rank
+    the alternatives until calibrated.
+    """
+    graph = ConversionGraph(INTERMEDIATE_FORMATS)
+    graph.add('convert_audio', 'ffmpeg', AUDIO_FORMATS, AUDIO_FORMATS, 0.5, requires=('ffmpeg',))
+    # In-process: no FFmpeg start per clip, but slower encoders for some
+    # formats (mp3) and long files; only used with --audio-backend pyav.
+    # convert_audio falls back to the command line for encoders PyAV's build lacks
+    graph.add('convert_audio', 'pyav', AUDIO_FORMATS, AUDIO_FORMATS & set(PYAV_OUTPUT_CODECS), 0.8,
+              requires=('av',), audio_backend='pyav')
+    graph.add('extract_audio', 'ffmpeg', VIDEO_FORMATS, AUDIO_FORMATS, 0.5, requires=('ffmpeg',))
+    # Audio → video makes an audio-only file in a video container
+    graph.add('convert_video', 'ffmpeg', VIDEO_FORMATS | AUDIO_FORMATS, VIDEO_FORMATS, 2.0, requires=('ffmpeg',))
+    return graph
+
+
+@functools.lru_cache(maxsize=None)
+def get_graph() -> ConversionGraph:
+    """The conversion graph, with the costs of the last calibration run if there was one."""
+    graph = build_graph()
+    graph.calibrate(load_costs(COSTS_FILE))
+    return graph
+
+
+def step_allowed(step: Step, options: dict) -> bool:
+    """
+    Whether a step respects the backend choice in the conversion options.
+    
+    PyAV steps are opt-in (audio_backend='pyav'); with that choice, FFmpeg
+    only converts audio to formats PyAV cannot write.
+    """
+    pyav = options.get('audio_backend') == 'pyav'
+    if step.backend == 'pyav':
+        return pyav
+    return not (pyav and step.converter == 'convert_audio' and step.target in PYAV_OUTPUT_CODECS)
 
 
-def convert_file(input_path: str, output_path: str, **kwargs) -> None:
+def plan_route(input_format: str, output_format: str, options: dict = None) -> list:
+    """
+    Choose the cheapest chain of converters for a conversion.
+    
+    Args:
+        input_format: Input extension
+        output_format: Output extension
+        options: convert_file options; PyAV steps need --audio-backend pyav
+    
+    Returns:
+        List of conversion_graph.Step, first to last
+    """
+    return get_graph().plan(input_format, output_format,
+                            usable=lambda step: step_allowed(step, options or {}))
+
+
+def step_options(step: Step, options: dict) -> dict:
+    """The options of a conversion that a step's converter understands, plus the step's own."""
+    # Unset options are None or False; 0 is a real value, e.g. --track 0
+    selected = {option: options[option] for option in CONVERTERS[step.converter]
+                if options.get(option) is not None and options[option] is not False}
+    selected.update(step.options)
+    return selected
+
+
+@functools.lru_cache(maxsize=None)
+def get_tool_version(converter: str, backend: str = 'ffmpeg') -> str:
+    """Return the version of the library or tool behind a converter step (part of the cache key)."""
+    if backend == 'pyav':
+        import av
+        return f"PyAV {av.__version__}"
+    try:
+        result = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True)
+        return result.stdout.splitlines()[0] if result.stdout else 'ffmpeg'
+    except OSError:
+        return 'ffmpeg'
+
+
+def load_converter(name: str):
+    """
+    Import a converter module on first use and return its entry point.
+    
+    Modules stay loaded, so repeated conversions skip interpreter startup
+    and import time entirely.
+    """
+    module = importlib.import_module(name)
+    return getattr(module, name)
+
+
+def run_in_process(converter: str, input_file: Path, output_file: Path, options: dict) -> None:
+    """Call the converter function directly in the current interpreter."""
+    with stage('load_converter'):
+        convert = load_converter(converter)
+    keywords = CONVERTERS[converter]
+    with stage('convert'):
+        convert(str(input_file), str(output_file),
+                **{keywords[option]: value for option, value in options.items()})
+
+
+def run_in_subprocess(converter: str, input_file: Path, output_file: Path, options: dict) -> None:
+    """Run the converter script in a separate Python process."""
+    cmd = [sys.executable, str(SCRIPT_DIR / f'{converter}.py'), str(input_file), str(output_file)]
+    for option, value in options.items():
+        if value is True:
+            cmd.append(f"--{option.replace('_', '-')}")
+        else:
+            cmd.extend([f"--{option.replace('_', '-')}", str(value)])
+    
+    with stage('convert'):
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    
+    if result.returncode != 0:
+        raise RuntimeError(f"Conversion failed: {result.stderr}")
+    
+    # Print output from converter
+    if result.stdout:
+        print(result.stdout.strip())
+
+
+@instrument('universal_av_converter')
+def convert_file(input_path: str, output_path: str, isolate: bool = False,
+                 cache: ConversionCache = None, **kwargs) -> None:
     """
     Universal audio/video converter.
     
     Args:
         input_path: Path to input file
         output_path: Path to output file
+        isolate: Run the converter in a separate Python process instead of in-process
+        cache: Reuse outputs of identical earlier conversions from this cache
         **kwargs: Additional arguments passed to specific converters
     """
     input_file = Path(input_path)
@@ -50,59 +195,287 @@ def convert_file(input_path: str, output_path: str, **kwargs) -> None:
     if not input_format or not output_format:
         raise ValueError("Input and output files must have extensions")
     
-    # Get appropriate converter script
-    converter_script = get_converter_script(input_format, output_format)
+    # Plan the cheapest converter chain
+    route = plan_route(input_format, output_format, kwargs)
+    steps = [(step, step_options(step, kwargs)) for step in route]
+    converter = '+'.join(step.converter for step in route)
+    annotate(converter=converter, isolate=isolate)
     
-    # Build command
-    cmd = ['python3', converter_script, str(input_file), str(output_file)]
+    if cache is not None:
+        with stage('cache_lookup'):
+            # Single-step keys are unchanged from before routes had several steps
+            options = steps[0][1] if len(steps) == 1 else [options for _, options in steps]
+            versions = '; '.join(get_tool_version(step.converter, selected.get('audio_backend', step.backend))
+                                 for step, selected in steps)
+            key = cache.make_key(input_file, output_format, converter, options, versions)
+            hit = cache.fetch(key, output_file)
+        annotate(cache='hit' if hit else 'miss')
+        if hit:
+            print(f"✓ Converted (cached): {input_file.name} → {output_file.name}")
+            return
     
-    # Add optional arguments
-    if 'bitrate' in kwargs and kwargs['bitrate']:
-        cmd.extend(['--bitrate', kwargs['bitrate']])
-    if 'resolution' in kwargs and kwargs['resolution']:
-        cmd.extend(['--resolution', kwargs['resolution']])
-    if 'fps' in kwargs and kwargs['fps']:
-        cmd.extend(['--fps', str(kwargs['fps'])])
-    if 'codec' in kwargs and kwargs['codec']:
-        cmd.extend(['--codec', kwargs['codec']])
-    if 'sample_rate' in kwargs and kwargs['sample_rate']:
-        cmd.extend(['--sample-rate', str(kwargs['sample_rate'])])
+    # A previous cache hit may have hardlinked the output to a read-only
+    # cache entry (perhaps evicted since); unlink it so FFmpeg neither
+    # overwrites the entry in place nor fails on the read-only file
+    if output_file.exists() and (output_file.stat().st_nlink > 1 or not os.access(output_file, os.W_OK)):
+        output_file.unlink()
     
-    # Execute conversion
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    run_route(steps, input_file, output_file, isolate)
     
-    if result.returncode != 0:
-        raise RuntimeError(f"Conversion failed: {result.stderr}")
+    if cache is not None:
+        with stage('cache_store'):
+            cache.store(key, output_file)
+
+
+def run_route(steps: list, input_file: Path, output_file: Path, isolate: bool = False) -> None:
+    """
+    Run the (step, options) pairs of a planned route.
     
-    # Print output from converter
-    if result.stdout:
-        print(result.stdout.strip())
+    A single step converts straight to the output. Longer routes write each
+    intermediate file to a scratch directory on tmpfs and report a single
+    conversion.
+    """
+    run = run_in_subprocess if isolate else run_in_process
+    if len(steps) == 1:
+        step, options = steps[0]
+        run(step.converter, input_file, output_file, options)
+        return
+    
+    with scratch_dir() as scratch:
+        source = input_file
+        with capture_output():
+            for index, (step, options) in enumerate(steps):
+                last = index == len(steps) - 1
+                target = output_file if last else scratch / f"{input_file.stem}.{step.target}"
+                run(step.converter, source, target, options)
+                source = target
+    via = ', '.join(step.target for step, _ in steps[:-1])
+    print(f"✓ Converted: {input_file.name} → {output_file.name} (via {via})")
+
+
+def collect_inputs(source: str) -> list:
+    """
+    Expand a batch source into a list of input files.
+    
+    Args:
+        source: A directory, a glob pattern (e.g. 'videos/**/*.mkv'), or
+            '@manifest.txt' - a file listing one input path per line
+    """
+    if source.startswith('@'):
+        manifest = Path(source[1:])
+        if not manifest.exists():
+            raise FileNotFoundError(f"Manifest not found: {manifest}")
+        lines = (line.strip() for line in manifest.read_text().splitlines())
+        return [Path(line) for line in lines if line and not line.startswith('#')]
+    
+    source_path = Path(source)
+    if source_path.is_dir():
+        return sorted(path for path in source_path.iterdir() if path.is_file())
+    
+    if glob.has_magic(source):
+        return sorted(Path(path) for path in glob.glob(source, recursive=True) if Path(path).is_file())
+    
+    raise FileNotFoundError(f"No directory, glob matches or manifest for: {source}")
+
+
+def plan_batch(inputs: list, target_format: str, output_dir: str = None) -> list:
+    """
+    Pair each input with its output path.
+    
+    Args:
+        inputs: Input file paths
+        target_format: Output extension (e.g. 'mp3', 'mp4')
+        output_dir: Directory for outputs (default: next to each input)
+    
+    Pairs that would overwrite an input or share an output are kept here;
+    convert_batch() fails them without converting (see batch_jobs.find_conflicts).
+    """
+    target_format = target_format.lower().lstrip('.')
+    jobs = []
+    for input_file in inputs:
+        destination = Path(output_dir) if output_dir else input_file.parent
+        jobs.append((input_file, destination / f"{input_file.stem}.{target_format}"))
+    return jobs
+
+
+def _convert_job(input_path: str, output_path: str, kwargs: dict) -> str:
+    """Batch worker: convert one file and return the converter's message."""
+    with capture_output() as captured:
+        convert_file(input_path, output_path, **kwargs)
+    return captured.getvalue().strip()
+
+
+def convert_batch(jobs: list, workers: int = None, **kwargs) -> list:
+    """
+    Convert many files concurrently.
+    
+    Every job runs FFmpeg as a child process, so a bounded thread pool is
+    enough to keep ``workers`` FFmpeg processes busy at once.
+    
+    Args:
+        jobs: (input_path, output_path) pairs, e.g. from plan_batch()
+        workers: Maximum concurrent conversions (default: CPU count)
+        **kwargs: Options passed to convert_file() for every job
+    
+    Returns:
+        List of (input_path, output_path, error) tuples in job order;
+        error is None for successful conversions. Jobs that would overwrite
+        an input or another job's output are not run and get an error.
+    """
+    workers = workers or os.cpu_count() or 1
+    conflicts = find_conflicts(jobs)
+    results = []
+    
+    with ThreadPoolExecutor(max_workers=workers) as threads:
+        futures = [
+            (Path(input_file), Path(output_file),
+             conflicts[index] if index in conflicts
+             else threads.submit(_convert_job, str(input_file), str(output_file), kwargs))
+            for index, (input_file, output_file) in enumerate(jobs)
+        ]
+        
+        for input_file, output_file, future in futures:
+            if isinstance(future, str):
+                results.append((input_file, output_file, future))
+                continue
+            try:
+                future.result()
+                results.append((input_file, output_file, None))
+            except Exception as e:
+                results.append((input_file, output_file, str(e).strip()))
+    
+    return results
+
+
+def run_batch(source: str, target_format: str, output_dir: str = None,
+              workers: int = None, **kwargs) -> bool:
+    """
+    Convert a directory, glob or manifest and print a per-file summary.
+    
+    Returns:
+        True if every file converted successfully
+    """
+    if output_dir:
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+    
+    jobs = plan_batch(collect_inputs(source), target_format, output_dir)
+    results = convert_batch(jobs, workers, **kwargs)
+    
+    failed = 0
+    for input_file, output_file, error in results:
+        if error is None:
+            print(f"✓ Converted: {input_file} → {output_file}")
+        else:
+            failed += 1
+            print(f"✗ Failed: {input_file} → {output_file}: {error}", file=sys.stderr)
+    
+    print(f"Batch complete: {len(results) - failed} succeeded, {failed} failed")
+    return failed == 0
+
+
+def explain(source: str, output: str = None, target_format: str = None, options: dict = None) -> None:
+    """Print the route convert_file would take for a file, or for each input format of a batch."""
+    if target_format:
+        pairs = sorted({(path.suffix.lower().lstrip('.'), target_format.lower().lstrip('.'))
+                        for path in collect_inputs(source)})
+    else:
+        pairs = [(Path(source).suffix.lower().lstrip('.'), Path(output).suffix.lower().lstrip('.'))]
+    
+    graph = get_graph()
+    if graph.measured:
+        print(f"Step costs: measured ({COSTS_FILE})")
+    else:
+        print("Step costs: built-in estimates (run benchmarks/bench_routes.py to calibrate)")
+    for input_format, output_format in pairs:
+        try:
+            print(graph.explain(plan_route(input_format, output_format, options)))
+        except ValueError as e:
+            print(f"{input_format} → {output_format}: {e}")
 
 
 def main():
     parser = argparse.ArgumentParser(
         description='Universal audio/video converter - automatically detects formats'
     )
-    parser.add_argument('input', help='Input file')
-    parser.add_argument('output', help='Output file')
+    parser.add_argument('input',
+                       help='Input file (batch mode: directory, glob or @manifest)')
+    parser.add_argument('output', nargs='?',
+                       help='Output file (batch mode: optional output directory)')
     parser.add_argument('--bitrate', help='Audio/video bitrate (e.g., 192k, 2M)')
     parser.add_argument('--resolution', help='Video resolution (e.g., 1920x1080)')
     parser.add_argument('--fps', type=int, help='Video frames per second')
     parser.add_argument('--codec', help='Video codec (e.g., libx264, libx265)')
     parser.add_argument('--sample-rate', type=int, help='Audio sample rate (Hz)')
+    parser.add_argument('--segments', type=int,
+                       help='Transcode long videos in N parallel keyframe-aligned segments')
+    parser.add_argument('--track', type=int,
+                       help='Audio track to extract from a video, starting at 0')
+    parser.add_argument('--force-transcode', action='store_true',
+                       help='Re-encode video streams even when they could be copied')
+    parser.add_argument('--audio-backend', choices=['ffmpeg', 'pyav'],
+                       help="Audio conversions: 'ffmpeg' (a process per file, default) or 'pyav' "
+                            "(in-process, for batches of short clips; needs pip install av)")
+    parser.add_argument('--isolate', action='store_true',
+                       help='Run the converter in a separate Python process')
+    parser.add_argument('--cache', nargs='?', const='', metavar='DIR',
+                       help='Reuse outputs of identical conversions (default dir: ~/.cache/av-converter)')
+    parser.add_argument('--cache-max-mb', type=int, default=DEFAULT_MAX_BYTES // 1024 ** 2,
+                       help='Cache size limit in MB before LRU eviction (default: 2048)')
+    parser.add_argument('--cache-stats', action='store_true',
+                       help='Print cache hit/miss statistics when done')
+    parser.add_argument('--to', metavar='EXT',
+                       help='Batch mode: convert every input to this format')
+    parser.add_argument('--workers', type=int,
+                       help='Batch mode: maximum concurrent conversions (default: CPU count)')
+    parser.add_argument('--metrics', metavar='PATH',
+                       help="Append per-stage timing records as JSON lines to PATH ('-' for stdout); "
+                            "batch runs also print an aggregate report")
+    parser.add_argument('--explain', action='store_true',
+                       help='Show the planned converter route and its estimated cost instead of converting')
     
     args = parser.parse_args()
     
+    if not args.to and not args.output:
+        parser.error('output is required unless --to is given')
+    
+    cache = None
+    if args.cache is not None:
+        cache = ConversionCache(args.cache or None, args.cache_max_mb * 1024 ** 2)
+    
+    options = dict(
+        isolate=args.isolate,
+        cache=cache,
+        bitrate=args.bitrate,
+        resolution=args.resolution,
+        fps=args.fps,
+        codec=args.codec,
+        sample_rate=args.sample_rate,
+        track=args.track,
+        segments=args.segments,
+        force_transcode=args.force_transcode,
+        audio_backend=args.audio_backend
+    )
+    
+    metrics.configure(args.metrics)
+    
     try:
-        convert_file(
-            args.input,
-            args.output,
-            bitrate=args.bitrate,
-            resolution=args.resolution,
-            fps=args.fps,
-            codec=args.codec,
-            sample_rate=args.sample_rate
-        )
+        if args.explain:
+            explain(args.input, args.output, args.to, options)
+            return
+        if args.to:
+            batch_started = datetime.now(timezone.utc).isoformat()
+            succeeded = run_batch(args.input, args.to, args.output, workers=args.workers, **options)
+            if args.metrics and args.metrics != '-':
+                print(metrics.format_report(metrics.aggregate(
+                    metrics.read_records([args.metrics], since=batch_started))))
+        else:
+            convert_file(args.input, args.output, **options)
+            succeeded = True
+        
+        if cache is not None and args.cache_stats:
+            print(json.dumps(cache.stats()))
+        if not succeeded:
+            sys.exit(1)
     except Exception as e:
         print(f"✗ Error: {e}", file=sys.stderr)
         sys.exit(1)
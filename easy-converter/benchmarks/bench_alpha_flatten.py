@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark flattening transparent images for JPEG output.
+Compares the previous split()-mask paste with flatten_alpha() on large
+synthetic RGBA, LA and palette PNGs, reporting latency and extra peak RSS.
+"""
+
+import sys
+import time
+import resource
+import tempfile
+import subprocess
+from pathlib import Path
+import argparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+from PIL import Image
+from convert_image import flatten_alpha
+
+
+def legacy_flatten(img: Image.Image) -> Image.Image:
+    """Flattening as save_image did it before flatten_alpha()."""
+    background = Image.new('RGB', img.size, (255, 255, 255))
+    if img.mode == 'P':
+        img = img.convert('RGBA')
+    background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
+    return background
+
+
+METHODS = {'legacy': legacy_flatten, 'flatten_alpha': flatten_alpha}
+
+
+def make_image(path: Path, mode: str, size: int) -> None:
+    """Write a PNG with a horizontal gradient and a diagonal alpha ramp."""
+    gradient = Image.linear_gradient('L').resize((size, size))
+    alpha = gradient.rotate(45)
+    if mode == 'RGBA':
+        img = Image.merge('RGBA', (gradient, gradient.transpose(Image.Transpose.ROTATE_90),
+                                   Image.new('L', (size, size), 128), alpha))
+    elif mode == 'LA':
+        img = Image.merge('LA', (gradient, alpha))
+    else:
+        img = gradient.convert('RGB').quantize(64)
+        img.info['transparency'] = 0
+    img.save(path, compress_level=1)
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    divisor = 1024 ** 2 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor
+
+
+def run_child(method: str, path: str) -> None:
+    """Decode, then flatten once; print seconds and the peak RSS added by flattening."""
+    img = Image.open(path)
+    img.load()
+    before = peak_rss_mb()
+    start = time.perf_counter()
+    METHODS[method](img)
+    elapsed = time.perf_counter() - start
+    print(f"{elapsed} {peak_rss_mb() - before}")
+
+
+def measure(method: str, path: Path) -> tuple:
+    """Run one flatten in a fresh interpreter so peak RSS is not shared between methods."""
+    result = subprocess.run([sys.executable, __file__, '--child', method, str(path)],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{method} failed: {result.stderr}")
+    seconds, extra_mb = result.stdout.split()
+    return float(seconds), float(extra_mb)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measure latency and memory of alpha flattening for JPEG output'
+    )
+    parser.add_argument('--size', type=int, default=8000,
+                       help='Width and height of the synthetic images (default: 8000)')
+    parser.add_argument('--repeat', type=int, default=3,
+                       help='Runs per method; the fastest is reported (default: 3)')
+    parser.add_argument('--child', nargs=2, metavar=('METHOD', 'PATH'), help=argparse.SUPPRESS)
+    
+    args = parser.parse_args()
+    
+    if args.child:
+        run_child(*args.child)
+        return
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'mode':<6} {'method':<14} {'seconds':>9} {'extra RSS':>11}")
+        for mode in ('RGBA', 'LA', 'P'):
+            path = Path(tmp) / f'{mode}.png'
+            make_image(path, mode, args.size)
+            for method in METHODS:
+                runs = [measure(method, path) for _ in range(args.repeat)]
+                seconds = min(run[0] for run in runs)
+                extra_mb = min(run[1] for run in runs)
+                print(f"{mode:<6} {method:<14} {seconds:>9.3f} {extra_mb:>9.0f}MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark the asyncio API with hundreds of concurrent conversions.
+Converts many small PNG images to JPEG at once through async_converter,
+compares the wall time with the synchronous converter called in a loop,
+and checks that timeouts and cancellation kill external tool processes.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import tempfile
+import contextlib
+import io
+from pathlib import Path
+import argparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+import async_converter  # noqa: E402
+from universal_converter import convert_file  # noqa: E402
+
+
+def make_image(work_dir: Path, size: int) -> Path:
+    """Write a size x size gradient PNG."""
+    from PIL import Image
+    path = work_dir / 'source.png'
+    gradient = Image.linear_gradient('L').resize((size, size))
+    Image.merge('RGB', (gradient, gradient.transpose(Image.Transpose.ROTATE_90), gradient)).save(path)
+    return path
+
+
+def child_processes() -> list:
+    """PIDs of this process's children other than pool workers (Linux /proc; empty elsewhere)."""
+    executor = async_converter._executor
+    workers = set(executor._processes) if executor is not None else set()
+    children = []
+    for entry in Path('/proc').glob('[0-9]*'):
+        try:
+            fields = (entry / 'stat').read_text().rpartition(')')[2].split()
+        except OSError:
+            continue
+        if int(fields[1]) == os.getpid() and int(entry.name) not in workers:
+            children.append(int(entry.name))
+    return children
+
+
+async def run_concurrent(jobs: list, quality: int) -> tuple:
+    start = time.perf_counter()
+    results = await async_converter.convert_many(jobs, quality=quality)
+    failed = [error for _, _, error in results if error is not None]
+    return time.perf_counter() - start, failed
+
+
+async def check_abort() -> list:
+    """Time out one long-running child and cancel another; return leftover child PIDs."""
+    # A stand-in for a stuck pandoc or LibreOffice run
+    sleeper = [sys.executable, '-c', 'import time; time.sleep(30)']
+    try:
+        await async_converter.run_process(sleeper, timeout=0.5)
+        raise RuntimeError('expected the child to time out')
+    except TimeoutError:
+        pass
+    
+    task = asyncio.ensure_future(async_converter.run_process(sleeper))
+    await asyncio.sleep(0.5)
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
+    return child_processes()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Run hundreds of concurrent conversions through the asyncio API'
+    )
+    parser.add_argument('--jobs', type=int, default=300, help='Number of conversions (default: 300)')
+    parser.add_argument('--size', type=int, default=256, help='Image width and height (default: 256)')
+    parser.add_argument('--quality', type=int, default=85, help='JPEG quality (default: 85)')
+    parser.add_argument('--workers', type=int, help='Pool processes (default: CPU count)')
+    parser.add_argument('--skip-sync', action='store_true',
+                       help='Do not time the synchronous converter for comparison')
+    
+    args = parser.parse_args()
+    
+    if args.workers:
+        async_converter.set_limits(python=args.workers)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        source = make_image(work_dir, args.size)
+        jobs = [(source, work_dir / f'async_{i}.jpg') for i in range(args.jobs)]
+        
+        async def run_all():
+            return await run_concurrent(jobs, args.quality), await check_abort()
+        
+        (seconds, failed), leftovers = asyncio.run(run_all())
+        produced = sum(1 for _, output_file in jobs if output_file.exists())
+        print(f"{'async':<6} jobs={args.jobs:<5} workers={async_converter.BACKEND_LIMITS['python']:<3} "
+              f"{seconds:7.2f}s  {args.jobs / seconds:7.1f} jobs/s  outputs={produced}  failed={len(failed)}")
+        
+        if not args.skip_sync:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                for i in range(args.jobs):
+                    convert_file(str(source), str(work_dir / f'sync_{i}.jpg'), quality=args.quality)
+            seconds = time.perf_counter() - start
+            print(f"{'sync':<6} jobs={args.jobs:<5} {'':<11} {seconds:7.2f}s  {args.jobs / seconds:7.1f} jobs/s")
+        
+        print(f"timeout and cancellation: {len(leftovers)} child processes left")
+        
+        if failed or produced != args.jobs or leftovers:
+            print(f"✗ {len(failed)} failures, {args.jobs - produced} missing outputs, "
+                  f"{len(leftovers)} leftover processes", file=sys.stderr)
+            sys.exit(1)
+        print("✓ All conversions succeeded; aborted jobs left no child processes")
+
+
+if __name__ == '__main__':
+    main()
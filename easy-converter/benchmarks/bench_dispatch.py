@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-file latency of in-process vs subprocess dispatch.
+Generates small PNG and CSV inputs and converts them through universal_converter.
+"""
+
+import sys
+import time
+import tempfile
+import statistics
+import contextlib
+import io
+from pathlib import Path
+import argparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+from universal_converter import convert_file  # noqa: E402
+
+
+def make_corpus(work_dir: Path, count: int) -> list:
+    """Create small PNG and CSV files and return (input, output) pairs."""
+    from PIL import Image
+    
+    jobs = []
+    for i in range(count):
+        png = work_dir / f'image_{i}.png'
+        Image.new('RGBA', (64, 64), (i % 256, 80, 160, 128)).save(png)
+        jobs.append((png, work_dir / f'image_{i}.jpg'))
+        
+        csv = work_dir / f'table_{i}.csv'
+        csv.write_text('id,name,value\n' + ''.join(f'{r},row{r},{r * 1.5}\n' for r in range(50)))
+        jobs.append((csv, work_dir / f'table_{i}.tsv'))
+    return jobs
+
+
+def time_jobs(jobs: list, isolate: bool) -> list:
+    """Convert every job and return per-file latencies in milliseconds."""
+    latencies = []
+    for input_file, output_file in jobs:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            convert_file(str(input_file), str(output_file), isolate=isolate)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(label: str, latencies: list) -> None:
+    print(f"{label:<12} files={len(latencies):<5} "
+          f"mean={statistics.mean(latencies):8.2f}ms  "
+          f"median={statistics.median(latencies):8.2f}ms  "
+          f"max={max(latencies):8.2f}ms  "
+          f"total={sum(latencies) / 1000:6.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare per-file latency of in-process and subprocess dispatch'
+    )
+    parser.add_argument('--files', type=int, default=20,
+                       help='Number of PNG and CSV inputs each (default: 20)')
+    
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        jobs = make_corpus(Path(tmp), args.files)
+        report('subprocess', time_jobs(jobs, isolate=True))
+        report('in-process', time_jobs(jobs, isolate=False))
+
+
+if __name__ == '__main__':
+    main()
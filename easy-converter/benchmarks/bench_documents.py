@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmark batch document conversion engines on many small documents.
+Generates a synthetic set of short Markdown, HTML and text documents and
+converts each set with every engine of convert_document:
+
+- pandoc: the per-file path, one pandoc process per document
+- server: persistent pandoc servers, one request per document
+- server-batch: persistent pandoc servers fed through /batch (pandoc_server.py)
+- python: the in-process fast path (document_fastpath.py)
+
+and reports documents per second and the speedup over the per-file path.
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+from pathlib import Path
+import argparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+from universal_converter import convert_batch  # noqa: E402
+from document_fastpath import supports, markdown_to_html, html_to_text  # noqa: E402
+
+WORDS = ('convert format pipeline batch document render table value quarter report '
+         'metric server process python latency throughput sample output input').split()
+
+ROUTES = [('md', 'html'), ('html', 'txt'), ('txt', 'md')]
+ENGINES = ['pandoc', 'server', 'server-batch', 'python']
+
+
+def sentence(rng: random.Random) -> str:
+    words = rng.choices(WORDS, k=rng.randint(6, 16))
+    return ' '.join(words).capitalize() + '.'
+
+
+def make_markdown(rng: random.Random, index: int) -> str:
+    """A short document with headings, emphasis, a list, a table and code."""
+    parts = [f"# Document {index}", '', ' '.join(sentence(rng) for _ in range(3)), '',
+             f"Some *emphasis*, **bold** and a [link](https://example.org/{index}).", '',
+             '## Items', '']
+    parts += [f"- {sentence(rng)}" for _ in range(rng.randint(2, 5))]
+    parts += ['', '| name | value |', '|------|-------|']
+    parts += [f"| {rng.choice(WORDS)} | {rng.randint(0, 999)} |" for _ in range(3)]
+    parts += ['', '```', f"result = convert({index})", '```', '', sentence(rng)]
+    return '\n'.join(parts) + '\n'
+
+
+def make_corpus(directory: Path, count: int) -> dict:
+    """Write count documents of each input format; return {input_format: [paths]}."""
+    rng = random.Random(42)
+    corpus = {'md': [], 'html': [], 'txt': []}
+    for index in range(count):
+        markdown = make_markdown(rng, index)
+        page = markdown_to_html(markdown, f'doc{index}') if supports('md', 'html') else \
+            f"<html><body><p>{markdown}</p></body></html>"
+        for input_format, text in (('md', markdown), ('html', page), ('txt', html_to_text(page))):
+            path = directory / input_format / f"doc{index:05d}.{input_format}"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text, encoding='utf-8')
+            corpus[input_format].append(path)
+    return corpus
+
+
+def run_engine(engine: str, jobs: list, workers: int, batch_size: int) -> list:
+    """Convert jobs with an engine; return (input, output, error) tuples."""
+    if engine == 'server-batch':
+        from pandoc_server import PandocServerPool
+        with PandocServerPool(workers, batch_size=batch_size) as pool:
+            return pool.convert_many(jobs)
+    return convert_batch(jobs, workers=workers, document_engine=engine)
+
+
+def engine_available(engine: str, route: tuple) -> str:
+    """Return why an engine cannot run a route here, or None."""
+    if engine == 'python':
+        return None if supports(*route) else 'needs markdown-it-py'
+    if shutil.which('pandoc') is None:
+        return 'pandoc not installed'
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare document conversion throughput of the pandoc, server and python engines'
+    )
+    parser.add_argument('--docs', type=int, default=300,
+                       help='Documents per input format (default: 300)')
+    parser.add_argument('--workers', type=int,
+                       help='Concurrent conversions / pandoc servers (default: CPU count)')
+    parser.add_argument('--batch-size', type=int, default=50,
+                       help='Documents per /batch request for server-batch (default: 50)')
+    parser.add_argument('--engines', nargs='+', choices=ENGINES, default=ENGINES,
+                       help='Engines to run (default: all)')
+    
+    args = parser.parse_args()
+    
+    workers = args.workers or os.cpu_count() or 1
+    
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        corpus = make_corpus(work_dir / 'in', args.docs)
+        
+        print(f"{'route':<12} {'engine':<13} {'docs':>5} {'seconds':>8} {'docs/s':>8} {'speedup':>8}")
+        for route in ROUTES:
+            baseline = None
+            for engine in args.engines:
+                name = f"{route[0]}→{route[1]}"
+                reason = engine_available(engine, route)
+                if reason:
+                    print(f"{name:<12} {engine:<13} skipped: {reason}")
+                    continue
+                output_dir = work_dir / 'out' / f"{route[0]}_{route[1]}_{engine}"
+                output_dir.mkdir(parents=True)
+                jobs = [(path, output_dir / f"{path.stem}.{route[1]}") for path in corpus[route[0]]]
+                
+                start = time.perf_counter()
+                results = run_engine(engine, jobs, workers, args.batch_size)
+                seconds = time.perf_counter() - start
+                
+                errors = [error for _, _, error in results if error is not None]
+                if errors:
+                    # e.g. pandoc has no plain-text reader for TXT inputs
+                    print(f"{name:<12} {engine:<13} failed: {len(errors)} errors, first: "
+                          f"{errors[0].splitlines()[0]}")
+                    failed = failed or engine == 'python'
+                    continue
+                if engine == 'pandoc':
+                    baseline = seconds
+                speedup = f"{baseline / seconds:7.1f}x" if baseline else '-'
+                print(f"{name:<12} {engine:<13} {len(jobs):>5} {seconds:>8.2f} "
+                      f"{len(jobs) / seconds:>8.1f} {speedup:>8}")
+    
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
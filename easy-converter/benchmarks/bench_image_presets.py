@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark encoder effort presets.
+Reports encode time and output bytes per preset and format over a fixed corpus.
+"""
+
+import sys
+import time
+import tempfile
+from pathlib import Path
+import argparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+from PIL import Image, features  # noqa: E402
+from convert_image import PRESETS, save_image  # noqa: E402
+
+
+def make_corpus(size: int) -> dict:
+    """Build a deterministic corpus: photo-like, flat graphic with alpha, text-like."""
+    gradient = Image.linear_gradient('L').resize((size, size))
+    noise = Image.effect_noise((size, size), 48)
+    photo = Image.merge('RGB', (gradient, noise, gradient.rotate(90)))
+    
+    graphic = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+    for i in range(0, size, max(1, size // 16)):
+        graphic.paste((i % 256, 120, 255 - i % 256, 200), (i, i, min(size, i + size // 8), size))
+    
+    text = Image.radial_gradient('L').resize((size, size)).point(lambda v: 255 if v > 128 else 0)
+    
+    return {'photo': photo, 'graphic': graphic, 'lineart': text.convert('RGB')}
+
+
+def load_corpus(directory: Path) -> dict:
+    """Load every image in a directory as the corpus."""
+    corpus = {}
+    for path in sorted(directory.iterdir()):
+        try:
+            with Image.open(path) as img:
+                img.load()
+                corpus[path.name] = img.copy()
+        except OSError:
+            continue
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare encode time and output size of image encoder presets'
+    )
+    parser.add_argument('--corpus', help='Directory of images (default: synthetic corpus)')
+    parser.add_argument('--size', type=int, default=1024,
+                       help='Edge length of synthetic corpus images (default: 1024)')
+    parser.add_argument('--repeat', type=int, default=3,
+                       help='Encodes per image, best time is kept (default: 3)')
+    parser.add_argument('--quality', type=int, default=85,
+                       help='Quality for lossy formats (default: 85)')
+    
+    args = parser.parse_args()
+    
+    corpus = load_corpus(Path(args.corpus)) if args.corpus else make_corpus(args.size)
+    
+    cases = [('jpg', False), ('png', False), ('webp', False), ('webp', True)]
+    if features.check('avif'):
+        cases += [('avif', False)]
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        
+        print(f"{'format':<14} {'preset':<9} {'encode ms':>10} {'bytes':>12} {'vs smallest':>12}")
+        for fmt, lossless in cases:
+            label = f"{fmt}{' lossless' if lossless else ''}"
+            results = {}
+            for preset in PRESETS:
+                times, sizes = [], []
+                for img in corpus.values():
+                    output_file = work_dir / f'bench.{fmt}'
+                    best = None
+                    for _ in range(args.repeat):
+                        start = time.perf_counter()
+                        save_image(img, output_file, args.quality, preset, lossless)
+                        elapsed = time.perf_counter() - start
+                        best = elapsed if best is None else min(best, elapsed)
+                    times.append(best * 1000)
+                    sizes.append(output_file.stat().st_size)
+                results[preset] = (sum(times), sum(sizes))
+            
+            smallest_bytes = results['smallest'][1]
+            for preset, (ms, size) in results.items():
+                print(f"{label:<14} {preset:<9} {ms:>10.1f} {size:>12,} {size / smallest_bytes:>11.2f}x")
+
+
+if __name__ == '__main__':
+    main()
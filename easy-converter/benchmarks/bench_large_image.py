@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark memory-bounded conversion of very large images.
+Writes a synthetic uncompressed RGB TIFF (30000x30000 by default, 2.7 GB of
+pixels) strip by strip, then converts it with convert_image.py --large to a
+tiled TIFF, a PNG and a downscaled JPEG in a fresh process each, reporting
+the child's peak RSS. Banded conversion keeps peak memory near the band
+budget; the optional baseline decodes the whole image with Pillow first.
+"""
+
+import os
+import sys
+import time
+import subprocess
+import tempfile
+import multiprocessing
+from pathlib import Path
+import argparse
+
+SCRIPTS = Path(__file__).resolve().parent.parent / 'scripts'
+
+# (output name, extra convert_image.py arguments)
+RUNS = [
+    ('tiled.tif', []),
+    ('strips.tif', ['--tile-size', '0']),
+    ('large.png', ['--preset', 'fast']),
+    ('preview.jpg', ['--fit', '2000x2000']),
+]
+
+# Baseline: decode everything, then save
+BASELINE = '''
+import sys
+from PIL import Image
+Image.MAX_IMAGE_PIXELS = None
+img = Image.open(sys.argv[1])
+img.load()
+img.save(sys.argv[2], compression='tiff_adobe_deflate', tiled=True)
+'''
+
+
+def write_source(path: str, size: int, strip: int) -> None:
+    """Write a size x size raw RGB TIFF of a repeating gradient, strip rows at a time."""
+    sys.path.insert(0, str(SCRIPTS))
+    from PIL import Image
+    from large_image import TiffWriter
+    gradient = Image.linear_gradient('L').resize((size, strip))
+    band = Image.merge('RGB', (gradient, gradient.transpose(Image.Transpose.FLIP_LEFT_RIGHT),
+                               gradient.point(lambda value: value // 2)))
+    writer = TiffWriter(Path(path), (size, size), 'RGB', level=0, tile_size=0)
+    for top in range(0, size, strip):
+        writer.write(band.crop((0, 0, size, min(strip, size - top))))
+    writer.close()
+
+
+def peak_rss(cmd: list) -> tuple:
+    """
+    Run cmd; return (seconds, peak RSS in MB) of that child.
+    
+    Linux carries the parent's peak RSS over fork/exec into the child's
+    ru_maxrss, which is why this process never imports Pillow itself.
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    _, status, usage = os.wait4(process.pid, 0)
+    seconds = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    error = process.stderr.read().decode().strip()
+    process.stderr.close()
+    if process.returncode != 0:
+        raise RuntimeError(f"{' '.join(cmd[:3])} failed: {error}")
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    scale = 1024 ** 2 if sys.platform == 'darwin' else 1024
+    return seconds, usage.ru_maxrss / scale
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measure peak memory of banded conversion of a very large image'
+    )
+    parser.add_argument('--size', type=int, default=30000,
+                       help='Width and height of the generated image (default: 30000)')
+    parser.add_argument('--band-mb', type=int, nargs='+', default=[16, 64],
+                       help='Band budgets to measure (default: 16 64)')
+    parser.add_argument('--dir', help='Work directory (default: a temporary directory; needs ~2x '
+                                      'the raw image size free)')
+    parser.add_argument('--baseline', action='store_true',
+                       help='Also decode the whole image with Pillow (needs RAM for every pixel)')
+    
+    args = parser.parse_args()
+    
+    convert = [sys.executable, str(SCRIPTS / 'convert_image.py')]
+    
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        work_dir = Path(tmp)
+        source = work_dir / 'source.tif'
+        start = time.perf_counter()
+        # Generated in a fresh interpreter to keep this process small
+        generator = multiprocessing.get_context('spawn').Process(
+            target=write_source, args=(str(source), args.size, 256))
+        generator.start()
+        generator.join()
+        if generator.exitcode != 0:
+            sys.exit(1)
+        print(f"source: {args.size}x{args.size} RGB, {source.stat().st_size / 1024 ** 3:.2f} GB raw TIFF "
+              f"written in {time.perf_counter() - start:.1f}s")
+        
+        print(f"{'output':<12} {'method':<10} {'seconds':>8} {'peak MB':>8} {'MB':>8}")
+        for name, extra in RUNS:
+            output_file = work_dir / name
+            for band_mb in args.band_mb:
+                seconds, rss = peak_rss(convert + [str(source), str(output_file), '--large',
+                                                   '--band-mb', str(band_mb)] + extra)
+                print(f"{name:<12} {f'band {band_mb}':<10} {seconds:>8.1f} {rss:>8.1f} "
+                      f"{output_file.stat().st_size / 1024 ** 2:>8.1f}")
+                output_file.unlink()
+        
+        if args.baseline:
+            output_file = work_dir / 'baseline.tif'
+            seconds, rss = peak_rss([sys.executable, '-c', BASELINE, str(source), str(output_file)])
+            print(f"{'tiled.tif':<12} {'baseline':<10} {seconds:>8.1f} {rss:>8.1f} "
+                  f"{output_file.stat().st_size / 1024 ** 2:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
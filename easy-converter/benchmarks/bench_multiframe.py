@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark multi-frame image conversion memory and throughput.
+Generates animated GIFs with increasing frame counts and converts each to
+WebP, TIFF, PDF and GIF with convert_image.py in a fresh process, reporting
+the child's peak RSS. Streaming keeps peak memory flat as the frame count
+grows; the baseline (all frames copied into a list, then one save_all call)
+grows with it. Also times exploding frames to PNG with 1 and N workers.
+"""
+
+import os
+import sys
+import time
+import subprocess
+import tempfile
+import multiprocessing
+from pathlib import Path
+import argparse
+
+SCRIPTS = Path(__file__).resolve().parent.parent / 'scripts'
+
+FORMATS = ['webp', 'tif', 'pdf', 'gif']
+
+# Baseline: what a naive converter does with Pillow's save_all
+BASELINE = '''
+import sys
+from PIL import Image, ImageSequence
+img = Image.open(sys.argv[1])
+frames = [frame.copy() for frame in ImageSequence.Iterator(img)]
+frames[0].save(sys.argv[2], save_all=True, append_images=frames[1:])
+'''
+
+
+def make_frames(count: int, size: int):
+    """Yield count RGB frames of a gradient scrolling under a moving disc."""
+    from PIL import Image, ImageChops, ImageDraw
+    gradient = Image.linear_gradient('L').resize((size, size))
+    base = Image.merge('RGB', (gradient, gradient.transpose(Image.Transpose.ROTATE_90),
+                               gradient.transpose(Image.Transpose.ROTATE_180)))
+    for index in range(count):
+        frame = ImageChops.offset(base, index * 3, index)
+        x = index * 7 % size
+        ImageDraw.Draw(frame).ellipse((x - 20, size // 2 - 20, x + 20, size // 2 + 20), fill=(255, 255, 0))
+        frame.info['duration'] = 40
+        yield frame
+
+
+def write_source(path: str, count: int, size: int) -> None:
+    sys.path.insert(0, str(SCRIPTS))
+    from convert_image import save_gif
+    save_gif(make_frames(count, size), Path(path), loop=0)
+
+
+def peak_rss(cmd: list) -> tuple:
+    """
+    Run cmd; return (seconds, peak RSS in MB) of that child.
+    
+    Linux carries the parent's peak RSS over fork/exec into the child's
+    ru_maxrss, which is why this process never imports Pillow itself.
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    _, status, usage = os.wait4(process.pid, 0)
+    seconds = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    error = process.stderr.read().decode().strip()
+    process.stderr.close()
+    if process.returncode != 0:
+        raise RuntimeError(f"{' '.join(cmd[:3])} failed: {error}")
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    scale = 1024 ** 2 if sys.platform == 'darwin' else 1024
+    return seconds, usage.ru_maxrss / scale
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measure peak memory of multi-frame image conversion against frame count'
+    )
+    parser.add_argument('--frames', type=int, nargs='+', default=[25, 100, 400],
+                       help='Frame counts of the generated GIFs (default: 25 100 400)')
+    parser.add_argument('--size', type=int, default=512,
+                       help='Frame width and height (default: 512)')
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=FORMATS,
+                       help='Output formats (default: all)')
+    parser.add_argument('--workers', type=int,
+                       help='Processes for the explode run (default: CPU count)')
+    parser.add_argument('--skip-baseline', action='store_true',
+                       help="Do not measure Pillow's load-everything save_all for comparison")
+    
+    args = parser.parse_args()
+    
+    workers = args.workers or os.cpu_count() or 1
+    convert = [sys.executable, str(SCRIPTS / 'convert_image.py')]
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        print(f"{'frames':>6} {'output':<7} {'method':<9} {'seconds':>8} {'peak MB':>8}")
+        for count in args.frames:
+            source = work_dir / f'anim_{count}.gif'
+            # Generated in a fresh interpreter to keep this process small
+            generator = multiprocessing.get_context('spawn').Process(
+                target=write_source, args=(str(source), count, args.size))
+            generator.start()
+            generator.join()
+            if generator.exitcode != 0:
+                sys.exit(1)
+            
+            for output_format in args.formats:
+                output_file = work_dir / f'out_{count}.{output_format}'
+                seconds, rss = peak_rss(convert + [str(source), str(output_file), '--preset', 'fast'])
+                print(f"{count:>6} {output_format:<7} {'stream':<9} {seconds:>8.2f} {rss:>8.1f}")
+                if not args.skip_baseline:
+                    seconds, rss = peak_rss([sys.executable, '-c', BASELINE, str(source), str(output_file)])
+                    print(f"{count:>6} {output_format:<7} {'baseline':<9} {seconds:>8.2f} {rss:>8.1f}")
+            
+            for jobs in sorted({1, workers}):
+                pattern = work_dir / f'frames_{count}_{jobs}' / 'frame.png'
+                pattern.parent.mkdir()
+                seconds, rss = peak_rss(convert + [str(source), str(pattern), '--frames', 'explode',
+                                                   '--workers', str(jobs), '--preset', 'fast'])
+                print(f"{count:>6} {'png':<7} {f'explode{jobs}':<9} {seconds:>8.2f} {rss:>8.1f}"
+                      f"  ({count / seconds:.0f} frames/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Benchmark HTML/Markdown → PDF throughput.
+Generates synthetic invoices (HTML with a shared stylesheet) and short
+Markdown reports, and renders each set with:
+
+- pandoc: the per-file path, pandoc starting WeasyPrint for every document
+- cold: WeasyPrint in-process, but fonts and stylesheets loaded per document
+- warm: one in-process PdfRenderer reused for every document
+- pool: PdfRenderPool, a warm renderer in each worker process
+
+and reports documents per second and the speedup over the per-file path.
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+from pathlib import Path
+import argparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from universal_converter import convert_batch  # noqa: E402
+from pdf_renderer import PdfRenderer, PdfRenderPool, supports  # noqa: E402
+from bench_documents import WORDS, make_markdown  # noqa: E402
+
+ENGINES = ['pandoc', 'cold', 'warm', 'pool']
+
+STYLESHEET = """
+@page { size: A4; margin: 1.5cm; @bottom-right { content: "Page " counter(page); } }
+body { font-family: sans-serif; font-size: 10pt; }
+.invoice-header { display: flex; justify-content: space-between; border-bottom: 2px solid #234; }
+table.items { width: 100%; }
+table.items td.amount, table.items th.amount { text-align: right; }
+.total { font-weight: bold; font-size: 12pt; text-align: right; }
+"""
+
+
+def make_invoice(rng: random.Random, index: int) -> str:
+    """An invoice page with a header, a table of line items and a total."""
+    items = [(rng.choice(WORDS).capitalize(), rng.randint(1, 20), rng.randint(100, 99999) / 100)
+             for _ in range(rng.randint(5, 30))]
+    rows = '\n'.join(f"<tr><td>{name}</td><td class=\"amount\">{quantity}</td>"
+                     f"<td class=\"amount\">{price:.2f}</td><td class=\"amount\">{quantity * price:.2f}</td></tr>"
+                     for name, quantity, price in items)
+    total = sum(quantity * price for _, quantity, price in items)
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="utf-8" /><title>Invoice {index:06d}</title></head>
+<body>
+<div class="invoice-header"><h1>Invoice {index:06d}</h1><p>Customer {rng.randint(1000, 9999)}</p></div>
+<table class="items">
+<thead><tr><th>Item</th><th class="amount">Qty</th><th class="amount">Price</th><th class="amount">Amount</th></tr></thead>
+<tbody>
+{rows}
+</tbody>
+</table>
+<p class="total">Total: {total:.2f}</p>
+</body>
+</html>
+"""
+
+
+def make_corpus(directory: Path, count: int) -> dict:
+    """Write count invoices and count reports; return {input_format: [paths]}."""
+    rng = random.Random(42)
+    corpus = {'html': [], 'md': []}
+    for index in range(count):
+        for input_format, text in (('html', make_invoice(rng, index)), ('md', make_markdown(rng, index))):
+            path = directory / input_format / f"doc{index:05d}.{input_format}"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text, encoding='utf-8')
+            corpus[input_format].append(path)
+    return corpus
+
+
+def render_each(jobs: list, renderer=None, stylesheets: tuple = ()) -> list:
+    """Render jobs one after another, with one renderer or a fresh one per document."""
+    results = []
+    for input_file, output_file in jobs:
+        try:
+            (renderer or PdfRenderer(stylesheets)).render(str(input_file), str(output_file))
+            results.append((input_file, output_file, None))
+        except Exception as e:
+            results.append((input_file, output_file, str(e).strip()))
+    return results
+
+
+def run_engine(engine: str, jobs: list, workers: int, stylesheets: tuple) -> list:
+    """Render jobs with an engine; return (input, output, error) tuples."""
+    if engine == 'pandoc':
+        return convert_batch(jobs, workers=workers, document_engine='pandoc', stylesheet=list(stylesheets))
+    if engine == 'cold':
+        return render_each(jobs, stylesheets=stylesheets)
+    if engine == 'warm':
+        return render_each(jobs, PdfRenderer(stylesheets))
+    with PdfRenderPool(workers, stylesheets) as pool:
+        return pool.convert_many(jobs)
+
+
+def engine_available(engine: str, input_format: str) -> str:
+    """Return why an engine cannot run here, or None."""
+    if engine == 'pandoc':
+        if shutil.which('pandoc') is None:
+            return 'pandoc not installed'
+        return None if shutil.which('weasyprint') else 'weasyprint command not installed'
+    return None if supports(input_format, 'pdf') else 'needs weasyprint (and markdown-it-py for Markdown)'
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare HTML/Markdown → PDF throughput of pandoc and the warm WeasyPrint renderer'
+    )
+    parser.add_argument('--docs', type=int, default=100,
+                       help='Documents per input format (default: 100)')
+    parser.add_argument('--workers', type=int,
+                       help='Concurrent pandoc processes / renderer processes (default: CPU count)')
+    parser.add_argument('--engines', nargs='+', choices=ENGINES, default=ENGINES,
+                       help='Engines to run (default: all)')
+    
+    args = parser.parse_args()
+    
+    workers = args.workers or os.cpu_count() or 1
+    
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        corpus = make_corpus(work_dir / 'in', args.docs)
+        stylesheet = work_dir / 'invoice.css'
+        stylesheet.write_text(STYLESHEET)
+        
+        print(f"{'input':<6} {'engine':<8} {'docs':>5} {'seconds':>8} {'docs/s':>8} {'speedup':>8}")
+        for input_format, paths in corpus.items():
+            # Only the invoices use the shared stylesheet
+            stylesheets = (str(stylesheet),) if input_format == 'html' else ()
+            baseline = None
+            for engine in args.engines:
+                reason = engine_available(engine, input_format)
+                if reason:
+                    print(f"{input_format:<6} {engine:<8} skipped: {reason}")
+                    continue
+                output_dir = work_dir / 'out' / f"{input_format}_{engine}"
+                output_dir.mkdir(parents=True)
+                jobs = [(path, output_dir / f"{path.stem}.pdf") for path in paths]
+                
+                start = time.perf_counter()
+                results = run_engine(engine, jobs, workers, stylesheets)
+                seconds = time.perf_counter() - start
+                
+                errors = [error for _, _, error in results if error is not None]
+                if errors:
+                    print(f"{input_format:<6} {engine:<8} failed: {len(errors)} errors, first: "
+                          f"{errors[0].splitlines()[0]}")
+                    failed = True
+                    continue
+                if engine == 'pandoc':
+                    baseline = seconds
+                speedup = f"{baseline / seconds:7.1f}x" if baseline else '-'
+                print(f"{input_format:<6} {engine:<8} {len(jobs):>5} {seconds:>8.2f} "
+                      f"{len(jobs) / seconds:>8.1f} {speedup:>8}")
+    
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
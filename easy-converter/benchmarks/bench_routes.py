@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Calibrate the conversion planner's step costs on this machine.
+Generates a small sample in every format the installed converters read,
+times every step of the conversion graph (universal_converter.build_graph)
+and saves the median seconds per step, which plan_route() then uses instead
+of its built-in estimates. Steps whose tool is not installed are skipped.
+
+    python benchmarks/bench_routes.py                 # measure and save
+    python benchmarks/bench_routes.py --only pandoc --no-save
+    python scripts/universal_converter.py deck.pptx deck.webp --explain
+"""
+
+import sys
+import time
+import statistics
+import tempfile
+from pathlib import Path
+import argparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+from conversion_graph import installed, save_costs  # noqa: E402
+from universal_converter import build_graph, plan_route, step_options, run_route, COSTS_FILE  # noqa: E402
+from batch_jobs import capture_output  # noqa: E402
+from run_benchmarks import (synthetic_image, synthetic_table, synthetic_markdown,  # noqa: E402
+                            markdown_to_html, write_presentation)
+
+
+def make_seeds(sample_dir: Path) -> dict:
+    """Write one small sample per seed format; return {format: path}."""
+    markdown = synthetic_markdown(5)
+    seeds = {
+        'png': lambda path: synthetic_image(256, 'RGB').save(path),
+        'csv': lambda path: synthetic_table(500).to_csv(path, index=False),
+        'md': lambda path: path.write_text(markdown),
+        'html': lambda path: path.write_text(markdown_to_html(markdown)),
+        'txt': lambda path: path.write_text(markdown.replace('#', '').replace('`', '')),
+        'odp': lambda path: write_presentation(path, 3),
+    }
+    samples = {}
+    for input_format, write in seeds.items():
+        path = sample_dir / f'sample.{input_format}'
+        write(path)
+        samples[input_format] = path
+    return samples
+
+
+def sample_for(input_format: str, samples: dict, sample_dir: Path) -> Path:
+    """Return a sample in input_format, converting one from a seed if needed (None if impossible)."""
+    if input_format in samples:
+        return samples[input_format]
+    path = sample_dir / f'sample.{input_format}'
+    for seed_format, seed in list(samples.items()):
+        try:
+            route = plan_route(seed_format, input_format)
+            with capture_output():
+                run_route([(step, step_options(step, {})) for step in route], seed, path)
+        except Exception:
+            continue
+        if path.exists():
+            samples[input_format] = path
+            return path
+    samples[input_format] = None
+    return None
+
+
+def time_step(step, input_file: Path, output_file: Path, repeat: int) -> float:
+    """Median seconds of one step, after a warm-up run that loads the converter."""
+    steps = [(step, step_options(step, {}))]
+    seconds = []
+    for _ in range(repeat + 1):
+        start = time.perf_counter()
+        with capture_output():
+            run_route(steps, input_file, output_file)
+        seconds.append(time.perf_counter() - start)
+    return statistics.median(seconds[1:])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure every conversion step and save the costs used by the route planner"
+    )
+    parser.add_argument('--repeat', type=int, default=3,
+                       help='Timed runs per step after a warm-up; the median is kept (default: 3)')
+    parser.add_argument('--only', action='append', metavar='TEXT',
+                       help="Only measure steps whose key (e.g. 'pandoc:md>docx') contains TEXT (repeatable)")
+    parser.add_argument('--save', metavar='PATH', default=str(COSTS_FILE),
+                       help=f'Where to write the costs (default: {COSTS_FILE})')
+    parser.add_argument('--no-save', action='store_true', help='Only print the measurements')
+    
+    args = parser.parse_args()
+    
+    graph = build_graph()
+    costs = {}
+    failed = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        sample_dir = Path(tmp) / 'samples'
+        sample_dir.mkdir()
+        samples = make_seeds(sample_dir)
+        
+        print(f"{'step':<32} {'default':>9} {'measured':>9}")
+        for step in sorted(graph.steps(), key=lambda step: step.key):
+            if args.only and not any(text in step.key for text in args.only):
+                continue
+            missing = [name for name in step.requires if not installed(name)]
+            if missing:
+                continue
+            input_file = sample_for(step.source, samples, sample_dir)
+            if input_file is None:
+                print(f"{step.key:<32} skipped: no {step.source.upper()} sample")
+                continue
+            output_file = Path(tmp) / 'out' / step.backend / f'output.{step.target}'
+            output_file.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                costs[step.key] = time_step(step, input_file, output_file, args.repeat)
+            except Exception as e:
+                failed += 1
+                lines = str(e).strip().splitlines()
+                print(f"{step.key:<32} failed: {lines[0] if lines else type(e).__name__}")
+                continue
+            print(f"{step.key:<32} {step.cost:>8.3f}s {costs[step.key]:>8.3f}s")
+    
+    print(f"Measured {len(costs)} steps, {failed} failed")
+    if costs and not args.no_save:
+        save_costs(Path(args.save), costs)
+        print(f"✓ Saved step costs: {args.save}")
+
+
+if __name__ == '__main__':
+    main()
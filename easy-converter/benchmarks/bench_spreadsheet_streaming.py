@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark streaming vs whole-table spreadsheet conversion.
+Generates a synthetic CSV and reports throughput and peak RSS per conversion.
+"""
+
+import os
+import sys
+import time
+import tempfile
+import subprocess
+from pathlib import Path
+import argparse
+
+SCRIPT = Path(__file__).resolve().parent.parent / 'scripts' / 'convert_spreadsheet.py'
+
+
+def make_csv(path: Path, rows: int) -> None:
+    """Write a CSV with mixed integer, float, text and empty columns."""
+    block = 100_000
+    with open(path, 'w') as f:
+        f.write('id,category,amount,ratio,label,note\n')
+        for start in range(0, rows, block):
+            f.write(''.join(
+                f'{i},cat{i % 17},{i * 3 % 100_000},{(i % 1000) / 997:.6f},item-{i:09d},'
+                f'{"" if i % 5 else "flagged"}\n'
+                for i in range(start, min(start + block, rows))
+            ))
+
+
+def run_conversion(input_file: Path, output_file: Path, chunksize: int) -> tuple:
+    """Run one conversion in a child process; return (seconds, peak RSS in MB)."""
+    cmd = [sys.executable, str(SCRIPT), str(input_file), str(output_file),
+           '--chunksize', str(chunksize)]
+    start = time.perf_counter()
+    process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    _, status, usage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - start
+    if os.waitstatus_to_exitcode(status) != 0:
+        raise RuntimeError(f"Conversion failed: {process.stderr.read().decode()}")
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    divisor = 1024 ** 2 if sys.platform == 'darwin' else 1024
+    return elapsed, usage.ru_maxrss / divisor
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measure throughput and peak memory of streaming spreadsheet conversion'
+    )
+    parser.add_argument('--rows', type=int, default=10_000_000,
+                       help='Rows in the synthetic CSV (default: 10,000,000)')
+    parser.add_argument('--xlsx-rows', type=int, default=1_000_000,
+                       help='Rows used for the CSV → XLSX case (Excel limit: 1,048,575)')
+    parser.add_argument('--chunksize', type=int, default=100_000,
+                       help='Rows per chunk for the streaming runs (default: 100,000)')
+    parser.add_argument('--skip-full', action='store_true',
+                       help='Skip the whole-table runs (they may exhaust memory)')
+    
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        big_csv = work_dir / 'big.csv'
+        xlsx_csv = work_dir / 'xlsx_source.csv'
+        make_csv(big_csv, args.rows)
+        make_csv(xlsx_csv, min(args.xlsx_rows, args.rows))
+        
+        cases = [
+            ('csv → tsv', big_csv, work_dir / 'out.tsv', args.rows),
+            ('tsv → csv', work_dir / 'out.tsv', work_dir / 'roundtrip.csv', args.rows),
+            ('csv → xlsx', xlsx_csv, work_dir / 'out.xlsx', min(args.xlsx_rows, args.rows)),
+        ]
+        modes = [('stream', args.chunksize)] + ([] if args.skip_full else [('full', 0)])
+        
+        print(f"{'case':<12} {'mode':<7} {'rows':>12} {'seconds':>9} {'rows/s':>12} {'MB/s':>8} {'peak RSS':>10}")
+        # Cases run in order: tsv → csv reads the TSV written by csv → tsv
+        for label, input_file, output_file, rows in cases:
+            size_mb = input_file.stat().st_size / 1024 ** 2
+            for mode, chunksize in modes:
+                seconds, peak_mb = run_conversion(input_file, output_file, chunksize)
+                print(f"{label:<12} {mode:<7} {rows:>12,} {seconds:>9.2f} {rows / seconds:>12,.0f} "
+                      f"{size_mb / seconds:>8.1f} {peak_mb:>8.0f}MB")
+
+
+if __name__ == '__main__':
+    main()
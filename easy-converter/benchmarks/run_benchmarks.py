@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite covering the conversion routes of references/conversion_matrix.md.
+Generates a reproducible synthetic corpus (images, spreadsheets, documents and
+a presentation), runs every route through universal_converter in a fresh
+process and reports latency, throughput and peak memory.
+
+Save a run as a baseline and compare later runs against it:
+    python benchmarks/run_benchmarks.py --save baseline.json
+    python benchmarks/run_benchmarks.py --baseline baseline.json --threshold 0.15
+
+Routes whose tool is not installed (pandoc, LibreOffice, pyarrow, odfpy)
+are reported as skipped.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import zipfile
+import platform
+import tempfile
+import statistics
+import subprocess
+import contextlib
+import io
+import importlib.util
+from datetime import datetime, timezone
+from pathlib import Path
+import argparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+from metrics import peak_rss_mb  # noqa: E402
+
+# Bump when the generated corpus changes; baselines of another version are not comparable
+CORPUS_VERSION = 1
+
+# Slowdowns smaller than this are noise, whatever the ratio
+LATENCY_FLOOR_SECONDS = 0.005
+MEMORY_FLOOR_MB = 5.0
+
+IMAGE_SIZES = {'small': 256, 'medium': 1024, 'large': 3000}
+
+WORDS = ('conversion throughput latency format document table image column value '
+         'stream encoder sheet pixel render batch quality memory layout paragraph').split()
+
+
+def scaled(value: int, scale: float) -> int:
+    return max(1, int(value * scale))
+
+
+def synthetic_image(size: int, mode: str):
+    """Deterministic test image: a Mandelbrot channel plus two gradients."""
+    from PIL import Image
+    
+    fractal = Image.effect_mandelbrot((size, size), (-2.0, -1.25, 0.75, 1.25), 100)
+    horizontal = Image.linear_gradient('L').resize((size, size))
+    vertical = horizontal.transpose(Image.Transpose.ROTATE_90)
+    if mode == 'L':
+        return fractal
+    image = Image.merge('RGB', (fractal, horizontal, vertical))
+    if mode == 'RGBA':
+        image.putalpha(Image.radial_gradient('L').resize((size, size)))
+    elif mode == 'P':
+        image = image.quantize(64)
+    return image
+
+
+def synthetic_table(rows: int, columns: int = 0, seed: int = 0):
+    """Deterministic DataFrame: mixed-type columns, or `columns` float columns."""
+    import numpy as np
+    import pandas as pd
+    
+    rng = np.random.default_rng(seed)
+    if columns:
+        return pd.DataFrame(rng.normal(size=(rows, columns)).round(4),
+                            columns=[f'c{i}' for i in range(columns)])
+    return pd.DataFrame({
+        'id': np.arange(rows),
+        'amount': rng.normal(100, 25, rows).round(2),
+        'category': rng.choice(WORDS[:12], rows),
+        'date': pd.date_range('2020-01-01', periods=rows, freq='min').strftime('%Y-%m-%d %H:%M'),
+        'flag': rng.integers(0, 2, rows).astype(bool),
+        'note': [' '.join(rng.choice(WORDS, 6)) for _ in range(rows)],
+    })
+
+
+def synthetic_markdown(sections: int, seed: int = 0) -> str:
+    """Deterministic Markdown with headings, paragraphs, lists, code and a table."""
+    rng = random.Random(seed)
+    
+    def sentence():
+        return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(8, 16))).capitalize() + '.'
+    
+    parts = ['# Benchmark Document\n']
+    for i in range(sections):
+        parts.append(f"## Section {i + 1}\n")
+        parts.append(' '.join(sentence() for _ in range(5)) + '\n')
+        parts.append(''.join(f"- {sentence()}\n" for _ in range(3)))
+        parts.append(f"```python\nvalue_{i} = convert('{rng.choice(WORDS)}')\n```\n")
+        parts.append('| name | value |\n|------|-------|\n'
+                     + ''.join(f"| {rng.choice(WORDS)} | {rng.randint(0, 999)} |\n" for _ in range(3)))
+    return '\n'.join(parts)
+
+
+def markdown_to_html(markdown: str) -> str:
+    """Rough HTML rendering of synthetic_markdown output (no pandoc needed)."""
+    body = []
+    for block in markdown.split('\n\n'):
+        block = block.strip()
+        if block.startswith('## '):
+            body.append(f"<h2>{block[3:]}</h2>")
+        elif block.startswith('# '):
+            body.append(f"<h1>{block[2:]}</h1>")
+        elif block.startswith('- '):
+            body.append('<ul>' + ''.join(f"<li>{line[2:]}</li>" for line in block.splitlines()) + '</ul>')
+        elif block.startswith('```'):
+            body.append(f"<pre><code>{block.splitlines()[1]}</code></pre>")
+        elif block.startswith('|'):
+            rows = [line.strip('|').split('|') for line in block.splitlines() if '---' not in line]
+            body.append('<table>' + ''.join('<tr>' + ''.join(f"<td>{cell.strip()}</td>" for cell in row)
+                                            + '</tr>' for row in rows) + '</table>')
+        elif block:
+            body.append(f"<p>{block}</p>")
+    return '<!DOCTYPE html>\n<html><head><title>Benchmark</title></head><body>\n' + '\n'.join(body) + '\n</body></html>\n'
+
+
+def write_presentation(path: Path, slides: int) -> None:
+    """Write a minimal OpenDocument presentation with one text frame per slide."""
+    pages = ''.join(
+        f'<draw:page draw:name="Slide {i + 1}"><draw:frame svg:x="2cm" svg:y="2cm" svg:width="24cm" '
+        f'svg:height="4cm"><draw:text-box><text:p>Slide {i + 1}: {WORDS[i % len(WORDS)]}</text:p>'
+        f'</draw:text-box></draw:frame></draw:page>' for i in range(slides))
+    content = (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" '
+        'xmlns:draw="urn:oasis:names:tc:opendocument:xmlns:drawing:1.0" '
+        'xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0" '
+        'xmlns:svg="urn:oasis:names:tc:opendocument:xmlns:svg-compatible:1.0" office:version="1.2">'
+        f'<office:body><office:presentation>{pages}</office:presentation></office:body>'
+        '</office:document-content>')
+    manifest = (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<manifest:manifest xmlns:manifest="urn:oasis:names:tc:opendocument:xmlns:manifest:1.0" '
+        'manifest:version="1.2">'
+        '<manifest:file-entry manifest:full-path="/" '
+        'manifest:media-type="application/vnd.oasis.opendocument.presentation"/>'
+        '<manifest:file-entry manifest:full-path="content.xml" manifest:media-type="text/xml"/>'
+        '</manifest:manifest>')
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        # The mimetype entry must come first and be stored uncompressed
+        archive.writestr('mimetype', 'application/vnd.oasis.opendocument.presentation',
+                         compress_type=zipfile.ZIP_STORED)
+        archive.writestr('META-INF/manifest.xml', manifest)
+        archive.writestr('content.xml', content)
+
+
+def make_corpus(corpus_dir: Path, scale: float = 1.0) -> None:
+    """Generate every corpus file that does not exist yet."""
+    corpus_dir.mkdir(parents=True, exist_ok=True)
+    
+    def needed(name):
+        return not (corpus_dir / name).exists()
+    
+    for label, size in IMAGE_SIZES.items():
+        if needed(f'rgb_{label}.png'):
+            synthetic_image(scaled(size, scale ** 0.5), 'RGB').save(corpus_dir / f'rgb_{label}.png')
+    medium = scaled(IMAGE_SIZES['medium'], scale ** 0.5)
+    for name, mode in [('rgba_medium.png', 'RGBA'), ('rgb_medium.jpg', 'RGB'), ('rgb_medium.bmp', 'RGB'),
+                       ('gray_medium.tiff', 'L'), ('palette_medium.gif', 'P')]:
+        if needed(name):
+            synthetic_image(medium, mode).save(corpus_dir / name)
+    
+    if needed('long.csv'):
+        synthetic_table(scaled(200_000, scale)).to_csv(corpus_dir / 'long.csv', index=False)
+    if needed('wide.csv'):
+        synthetic_table(scaled(2_000, scale), columns=200, seed=1).to_csv(corpus_dir / 'wide.csv', index=False)
+    if needed('medium.csv'):
+        synthetic_table(scaled(20_000, scale), seed=2).to_csv(corpus_dir / 'medium.csv', index=False)
+    if needed('medium.xlsx'):
+        synthetic_table(scaled(20_000, scale), seed=2).to_excel(corpus_dir / 'medium.xlsx', index=False)
+    if needed('long.parquet') and importlib.util.find_spec('pyarrow'):
+        synthetic_table(scaled(200_000, scale)).to_parquet(corpus_dir / 'long.parquet', index=False)
+    
+    markdown = synthetic_markdown(scaled(200, scale))
+    if needed('document.md'):
+        (corpus_dir / 'document.md').write_text(markdown)
+    if needed('document.html'):
+        (corpus_dir / 'document.html').write_text(markdown_to_html(markdown))
+    if needed('document.txt'):
+        (corpus_dir / 'document.txt').write_text(markdown.replace('#', '').replace('`', ''))
+    if needed('slides.odp'):
+        write_presentation(corpus_dir / 'slides.odp', scaled(20, scale))
+
+
+def define_cases(corpus_dir: Path) -> list:
+    """
+    Benchmark cases: one per conversion route.
+    
+    Returns:
+        Dicts with 'name', 'input', 'output', 'options' (convert_file keywords)
+        and 'requires' (executables or Python modules that must be available)
+    """
+    out = corpus_dir / 'out'
+    cases = []
+    
+    def case(name, input_name, output_name, requires=(), **options):
+        cases.append({'name': name, 'input': corpus_dir / input_name, 'output': out / output_name,
+                      'options': options, 'requires': requires})
+    
+    for label in IMAGE_SIZES:
+        case(f'image:png-jpg:rgb-{label}', f'rgb_{label}.png', f'rgb_{label}.jpg')
+    case('image:png-webp:rgb-medium', 'rgb_medium.png', 'rgb_medium.webp')
+    case('image:png-jpg:rgba-medium', 'rgba_medium.png', 'rgba_medium.jpg')
+    case('image:png-webp:rgba-medium', 'rgba_medium.png', 'rgba_medium.webp')
+    case('image:jpg-png:rgb-medium', 'rgb_medium.jpg', 'rgb_medium_from_jpg.png')
+    case('image:jpg-webp:fit-small', 'rgb_medium.jpg', 'rgb_fit.webp', fit='256x256')
+    case('image:bmp-png:rgb-medium', 'rgb_medium.bmp', 'rgb_medium_from_bmp.png')
+    case('image:tiff-jpg:gray-medium', 'gray_medium.tiff', 'gray_medium.jpg')
+    case('image:gif-png:palette-medium', 'palette_medium.gif', 'palette_medium.png')
+    case('image:png-gif:rgb-medium', 'rgb_medium.png', 'rgb_medium.gif')
+    case('image:png-ico:rgb-small', 'rgb_small.png', 'rgb_small.ico')
+    
+    case('sheet:csv-tsv:long', 'long.csv', 'long.tsv')
+    case('sheet:csv-xlsx:medium', 'medium.csv', 'medium.xlsx')
+    case('sheet:xlsx-csv:medium', 'medium.xlsx', 'medium_from_xlsx.csv')
+    case('sheet:csv-ods:medium', 'medium.csv', 'medium.ods', requires=('odf',))
+    case('sheet:csv-parquet:long', 'long.csv', 'long.parquet', requires=('pyarrow',))
+    case('sheet:parquet-csv:long', 'long.parquet', 'long_from_parquet.csv', requires=('pyarrow',))
+    case('sheet:csv-feather:wide', 'wide.csv', 'wide.feather', requires=('pyarrow',))
+    
+    case('document:md-html', 'document.md', 'document.html', requires=('pandoc',))
+    case('document:html-md', 'document.html', 'document_from_html.md', requires=('pandoc',))
+    case('document:html-txt', 'document.html', 'document_from_html.txt', requires=('pandoc',))
+    case('document:md-docx', 'document.md', 'document.docx', requires=('pandoc',))
+    case('document:txt-docx', 'document.txt', 'document_from_txt.docx', requires=('pandoc',))
+    case('document:md-pdf', 'document.md', 'document.pdf', requires=('pandoc',))
+    
+    case('presentation:odp-pdf', 'slides.odp', 'slides.pdf', requires=('libreoffice',))
+    return cases
+
+
+def missing_requirements(case: dict) -> list:
+    """Executables or modules a case needs that are not installed."""
+    return [name for name in case['requires']
+            if not shutil.which(name) and not importlib.util.find_spec(name)]
+
+
+def run_child(case: dict, repeat: int) -> None:
+    """Run one case `repeat` times in this process and print its measurements as JSON."""
+    from universal_converter import convert_file
+    
+    case['output'].parent.mkdir(parents=True, exist_ok=True)
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            convert_file(str(case['input']), str(case['output']), **case['options'])
+        seconds.append(time.perf_counter() - start)
+    print(json.dumps({'seconds': seconds, 'peak_rss_mb': peak_rss_mb(),
+                      'tool_peak_rss_mb': peak_rss_mb(children=True)}))
+
+
+def run_case(case: dict, corpus_dir: Path, repeat: int) -> dict:
+    """
+    Measure one case in a fresh interpreter, so peak memory is its own.
+    
+    Returns:
+        {'status': 'ok', 'median', 'first', 'mb_per_s', 'peak_mb', ...},
+        or {'status': 'skipped'|'error', 'reason'}
+    """
+    missing = missing_requirements(case)
+    if missing:
+        return {'status': 'skipped', 'reason': f"missing {', '.join(missing)}"}
+    
+    cmd = [sys.executable, str(Path(__file__).resolve()), '--child', case['name'],
+           '--corpus', str(corpus_dir), '--repeat', str(repeat)]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        return {'status': 'error', 'reason': lines[-1] if lines else f"exit code {result.returncode}"}
+    
+    measured = json.loads(result.stdout.strip().splitlines()[-1])
+    seconds = measured['seconds']
+    median = statistics.median(seconds)
+    input_mb = case['input'].stat().st_size / 1024 ** 2
+    return {
+        'status': 'ok',
+        'median': median,
+        'first': seconds[0],
+        'mb_per_s': input_mb / median if median else None,
+        'peak_mb': max(measured['peak_rss_mb'] or 0, measured['tool_peak_rss_mb'] or 0),
+        'python_peak_rss_mb': measured['peak_rss_mb'],
+        'tool_peak_rss_mb': measured['tool_peak_rss_mb'],
+        'input_bytes': case['input'].stat().st_size,
+        'output_bytes': case['output'].stat().st_size if case['output'].exists() else None,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> dict:
+    """
+    Compare results against a baseline run.
+    
+    Returns:
+        {case name: {'latency': ratio, 'memory': ratio, 'regressed': bool}}
+        for cases measured in both runs
+    """
+    comparison = {}
+    for name, current in results.items():
+        previous = baseline['results'].get(name)
+        if current['status'] != 'ok' or not previous or previous['status'] != 'ok':
+            continue
+        latency = current['median'] / previous['median'] if previous['median'] else 1.0
+        memory = current['peak_mb'] / previous['peak_mb'] if previous['peak_mb'] else 1.0
+        slower = (latency > 1 + threshold
+                  and current['median'] - previous['median'] > LATENCY_FLOOR_SECONDS)
+        bigger = (memory > 1 + threshold
+                  and current['peak_mb'] - previous['peak_mb'] > MEMORY_FLOOR_MB)
+        comparison[name] = {'latency': latency, 'memory': memory, 'regressed': slower or bigger}
+    return comparison
+
+
+def format_row(name: str, result: dict, change: dict = None) -> str:
+    if result['status'] != 'ok':
+        return f"{name:<34} {result['status']}: {result['reason']}"
+    throughput = f"{result['mb_per_s']:.1f}" if result['mb_per_s'] is not None else '-'
+    row = (f"{name:<34} {result['median'] * 1000:>9.1f}ms {result['first'] * 1000:>9.1f}ms "
+           f"{throughput:>8} {result['peak_mb']:>8.0f}MB")
+    if change:
+        flag = '  ✗ REGRESSION' if change['regressed'] else ''
+        row += f"  {(change['latency'] - 1) * 100:+6.1f}% {(change['memory'] - 1) * 100:+6.1f}%{flag}"
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark every conversion route on a synthetic corpus'
+    )
+    parser.add_argument('--corpus', metavar='DIR',
+                       help='Keep the generated corpus here and reuse it (default: temporary)')
+    parser.add_argument('--scale', type=float, default=1.0,
+                       help='Corpus size factor: rows, pixels and sections (default: 1.0)')
+    parser.add_argument('--repeat', type=int, default=3,
+                       help='Runs per case; the median is reported (default: 3)')
+    parser.add_argument('--only', action='append', metavar='TEXT',
+                       help='Only run cases whose name contains TEXT (repeatable)')
+    parser.add_argument('--save', metavar='PATH', help='Write the results as JSON (e.g. a new baseline)')
+    parser.add_argument('--baseline', metavar='PATH', help='Compare against results saved with --save')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                       help='Relative slowdown or memory growth counted as a regression (default: 0.2)')
+    parser.add_argument('--child', metavar='CASE', help=argparse.SUPPRESS)
+    
+    args = parser.parse_args()
+    
+    try:
+        if args.child:
+            cases = {case['name']: case for case in define_cases(Path(args.corpus))}
+            run_child(cases[args.child], args.repeat)
+            return
+        
+        baseline = None
+        if args.baseline:
+            baseline = json.loads(Path(args.baseline).read_text())
+            if baseline['corpus_version'] != CORPUS_VERSION or baseline['scale'] != args.scale:
+                raise ValueError(f"Baseline was recorded with corpus version {baseline['corpus_version']} "
+                                 f"at --scale {baseline['scale']}; rerun with the same scale "
+                                 f"or save a new baseline")
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            corpus_dir = Path(args.corpus or tmp).resolve()
+            start = time.perf_counter()
+            make_corpus(corpus_dir, args.scale)
+            print(f"Corpus ready in {time.perf_counter() - start:.1f}s: {corpus_dir}")
+            
+            cases = [case for case in define_cases(corpus_dir)
+                     if not args.only or any(text in case['name'] for text in args.only)]
+            header = f"{'case':<34} {'median':>11} {'first':>11} {'MB/s':>8} {'peak':>10}"
+            print(header + ('  latency  memory' if baseline else ''))
+            
+            results = {}
+            comparison = {}
+            for case in cases:
+                results[case['name']] = run_case(case, corpus_dir, args.repeat)
+                if baseline:
+                    comparison.update(compare({case['name']: results[case['name']]}, baseline, args.threshold))
+                print(format_row(case['name'], results[case['name']], comparison.get(case['name'])))
+        
+        if args.save:
+            Path(args.save).write_text(json.dumps({
+                'corpus_version': CORPUS_VERSION,
+                'scale': args.scale,
+                'repeat': args.repeat,
+                'created': datetime.now(timezone.utc).isoformat(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpus': os.cpu_count(),
+                'results': results,
+            }, indent=2))
+            print(f"✓ Saved results: {args.save}")
+        
+        regressions = [name for name, change in comparison.items() if change['regressed']]
+        if regressions:
+            print(f"✗ {len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}",
+                  file=sys.stderr)
+            sys.exit(1)
+        if baseline:
+            print(f"✓ No regressions beyond {args.threshold:.0%} ({len(comparison)} cases compared)")
+    except Exception as e:
+        print(f"✗ Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Asyncio API for the converters.
+Coroutine versions of convert_document, convert_presentation and the
+universal convert_file for embedding in an asyncio service.
+
+- pandoc and LibreOffice run through asyncio.create_subprocess_exec, so no
+  thread is held while they work
+- PIL and pandas conversions, and the in-process document engine, run in
+  a shared process pool (get_executor())
+- timeout=: seconds a job may run once it has a slot (time spent waiting
+  for a slot does not count); the job is then aborted and TimeoutError raised
+- Cancelling the awaiting task kills the pandoc/LibreOffice process before
+  CancelledError propagates
+- Concurrent jobs are limited per backend by semaphores (BACKEND_LIMITS,
+  or set_limits() at runtime)
+
+A process-pool job cannot be interrupted: on timeout or cancellation the
+caller stops waiting, but the worker finishes the file in the background
+and keeps its 'python' slot until then. Pooled LibreOffice conversions
+(pooled=True) are bounded by the office pool's size and timeout instead.
+
+Unlike the synchronous converters, these functions print nothing.
+"""
+
+import os
+import sys
+import signal
+import asyncio
+import atexit
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import argparse
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import metrics  # noqa: E402
+from metrics import instrument, stage, annotate  # noqa: E402
+import document_fastpath  # noqa: E402
+import pdf_renderer  # noqa: E402
+import pandoc_server  # noqa: E402
+from convert_document import pandoc_command, ENGINES, OFFICE_INPUT_FORMATS, OFFICE_OUTPUT_FORMATS  # noqa: E402
+from convert_presentation import libreoffice_command, move_libreoffice_output, OUTPUT_FORMATS  # noqa: E402
+from universal_converter import (plan_route, step_options, runs_external_tool,  # noqa: E402
+                                 CONVERTERS, _convert_job)
+
+
+# Maximum concurrent jobs per backend. LibreOffice instances started with
+# the same user profile hand their work to each other or fail, so command-line
+# LibreOffice runs one at a time; use pooled=True for parallel office work.
+BACKEND_LIMITS = {
+    'pandoc': os.cpu_count() or 1,
+    'libreoffice': 1,
+    'python': os.cpu_count() or 1,
+}
+
+# Event loop -> {backend: semaphore}; semaphores cannot be shared between loops
+_semaphores = weakref.WeakKeyDictionary()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def set_limits(**limits: int) -> None:
+    """Change backend limits (e.g. pandoc=8); jobs started afterwards use them."""
+    global _executor
+    for backend, limit in limits.items():
+        if backend not in BACKEND_LIMITS:
+            raise ValueError(f"Unknown backend: {backend} (choose from {', '.join(BACKEND_LIMITS)})")
+        BACKEND_LIMITS[backend] = limit
+    _semaphores.clear()
+    if 'python' in limits:
+        # Resize the pool on next use; running jobs finish in the old one
+        with _executor_lock:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+                _executor = None
+
+
+def backend_slot(backend: str) -> asyncio.Semaphore:
+    """Return the semaphore limiting a backend on the running event loop."""
+    semaphores = _semaphores.setdefault(asyncio.get_running_loop(), {})
+    if backend not in semaphores:
+        semaphores[backend] = asyncio.Semaphore(BACKEND_LIMITS[backend])
+    return semaphores[backend]
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Return the process pool for PIL and pandas conversions, starting it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=BACKEND_LIMITS['python'])
+            atexit.register(_executor.shutdown)
+        return _executor
+
+
+def kill_process_group(process) -> None:
+    """Kill a child started with start_new_session=True and anything it spawned."""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (AttributeError, OSError):  # Windows, or already gone
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+
+
+async def run_process(cmd: list, timeout: float = None, error: str = 'Command failed') -> str:
+    """
+    Run a command without blocking the event loop and return its stdout.
+    
+    The child runs in its own process group, which is killed on timeout
+    (TimeoutError) or cancellation.
+    """
+    process = await asyncio.create_subprocess_exec(
+        *cmd, stdin=asyncio.subprocess.DEVNULL, stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE, start_new_session=True)
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        kill_process_group(process)
+        await process.wait()
+        raise TimeoutError(f"{error}: timed out after {timeout:g}s")
+    except asyncio.CancelledError:
+        kill_process_group(process)
+        await process.wait()
+        raise
+    
+    if process.returncode != 0:
+        raise RuntimeError(f"{error}: {stderr.decode(errors='replace')}")
+    return stdout.decode(errors='replace')
+
+
+async def run_pooled(get_pool, input_file: Path, output_file: Path, timeout: float = None) -> None:
+    """Convert through a shared pool (office_pool or pandoc_server) on a worker thread."""
+    with stage('pool_start'):
+        pool = await asyncio.to_thread(get_pool)
+    with stage('convert'):
+        await asyncio.wait_for(asyncio.to_thread(pool.convert, str(input_file), str(output_file)), timeout)
+
+
+def check_input(input_path: str) -> Path:
+    input_file = Path(input_path)
+    if not input_file.exists():
+        raise FileNotFoundError(f"Input file not found: {input_path}")
+    return input_file
+
+
+@instrument('async_converter', tool='pandoc')
+async def convert_document(input_path: str, output_path: str, pooled: bool = False,
+                           engine: str = 'pandoc', stylesheets: list = None,
+                           timeout: float = None) -> None:
+    """
+    Convert document from one format to another (see convert_document.convert_document).
+    
+    Args:
+        input_path: Path to input document file
+        output_path: Path to output document file
+        pooled: Send DOC/ODT/RTF inputs to the persistent LibreOffice pool
+            (office_pool.py) instead of pandoc
+        engine: 'pandoc', 'server' or 'python' (see convert_document.ENGINES);
+            the python fast path and PDF renderer run in the process pool
+        stylesheets: CSS files applied to PDF output
+        timeout: Seconds the job may run before pandoc is killed
+    """
+    input_file = check_input(input_path)
+    output_file = Path(output_path)
+    input_format = input_file.suffix.lower().lstrip('.')
+    output_format = output_file.suffix.lower().lstrip('.')
+    
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine} (choose from {', '.join(ENGINES)})")
+    
+    if pooled and input_format in OFFICE_INPUT_FORMATS and output_format in OFFICE_OUTPUT_FORMATS:
+        from office_pool import get_pool
+        annotate(tool='libreoffice (pooled)')
+        await run_pooled(get_pool, input_file, output_file, timeout)
+        return
+    
+    if engine == 'python' and document_fastpath.supports(input_format, output_format):
+        annotate(tool='python')
+        await run_in_executor(input_file, output_file, {'document_engine': 'python'}, timeout)
+        return
+    
+    if engine == 'python' and pdf_renderer.supports(input_format, output_format):
+        annotate(tool='weasyprint')
+        await run_in_executor(input_file, output_file,
+                              {'document_engine': 'python', 'stylesheet': stylesheets}, timeout)
+        return
+    
+    if engine == 'server' and pandoc_server.supports(output_format):
+        annotate(tool='pandoc (server)')
+        await run_pooled(pandoc_server.get_pool, input_file, output_file, timeout)
+        return
+    
+    async with backend_slot('pandoc'):
+        with stage('convert'):
+            await run_process(pandoc_command(input_file, output_file, stylesheets), timeout,
+                              'Pandoc conversion failed')
+
+
+@instrument('async_converter', tool='libreoffice')
+async def convert_presentation(input_path: str, output_path: str, pooled: bool = False,
+                               timeout: float = None) -> None:
+    """
+    Convert a presentation to PDF or PNG (see convert_presentation.convert_presentation).
+    
+    Args:
+        input_path: Path to input presentation file
+        output_path: Path to output PDF or PNG file
+        pooled: Use the persistent LibreOffice pool (office_pool.py) instead
+            of starting a new LibreOffice process
+        timeout: Seconds the job may run before LibreOffice is killed
+    """
+    input_file = check_input(input_path)
+    output_file = Path(output_path)
+    input_format = input_file.suffix.lower().lstrip('.')
+    output_format = output_file.suffix.lower().lstrip('.')
+    
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported conversion: {input_format} → {output_format}")
+    
+    if pooled:
+        from office_pool import get_pool
+        annotate(tool='libreoffice (pooled)')
+        await run_pooled(get_pool, input_file, output_file, timeout)
+        return
+    
+    async with backend_slot('libreoffice'):
+        with stage('convert'):
+            await run_process(libreoffice_command(input_file, output_file), timeout,
+                              'LibreOffice conversion failed')
+    move_libreoffice_output(input_file, output_file)
+
+
+ASYNC_CONVERTERS = {
+    'convert_document': convert_document,
+    'convert_presentation': convert_presentation,
+}
+
+
+async def run_in_executor(input_file: Path, output_file: Path, options: dict, timeout: float = None) -> None:
+    """Run a PIL, pandas or fast-path document conversion in the process pool ('python' limit)."""
+    slot = backend_slot('python')
+    await slot.acquire()
+    try:
+        future = asyncio.get_running_loop().run_in_executor(
+            get_executor(), _convert_job, str(input_file), str(output_file), options)
+    except BaseException:
+        slot.release()
+        raise
+    # The worker cannot be interrupted, so its slot is freed when it actually finishes
+    future.add_done_callback(lambda _: slot.release())
+    
+    with stage('convert'):
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Conversion timed out after {timeout:g}s "
+                               "(the worker finishes it in the background)")
+
+
+@instrument('async_converter')
+async def convert_file(input_path: str, output_path: str, timeout: float = None, **kwargs) -> None:
+    """
+    Convert any supported file along the route universal_converter.plan_route() picks.
+    
+    Args:
+        input_path: Path to input file
+        output_path: Path to output file
+        timeout: Seconds the job may run (see the module docstring for pool jobs)
+        **kwargs: Options as for universal_converter.convert_file (quality,
+            resize, preset, sheet, engine, pooled, ...); options the chosen
+            converter does not take are ignored
+    """
+    input_file = check_input(input_path)
+    output_file = Path(output_path)
+    input_format = input_file.suffix.lower().lstrip('.')
+    output_format = output_file.suffix.lower().lstrip('.')
+    
+    if not input_format or not output_format:
+        raise ValueError("Input and output files must have extensions")
+    
+    route = plan_route(input_format, output_format, kwargs)
+    annotate(converter='+'.join(step.converter for step in route))
+    
+    if len(route) == 1 and runs_external_tool(route):
+        # Same option filtering as the synchronous convert_file
+        step = route[0]
+        keywords = CONVERTERS[step.converter]
+        await ASYNC_CONVERTERS[step.converter](input_path, output_path, timeout=timeout,
+                                               **{keywords[option]: value
+                                                  for option, value in step_options(step, kwargs).items()})
+    elif len(route) == 1:
+        await run_in_executor(input_file, output_file, step_options(route[0], kwargs), timeout)
+    else:
+        # A multi-step route runs whole in one worker, intermediate files included
+        options = {option: value for option, value in kwargs.items()
+                   if value and any(option in CONVERTERS[step.converter] for step in route)}
+        await run_in_executor(input_file, output_file, options, timeout)
+
+
+async def convert_many(jobs: list, timeout: float = None, **kwargs) -> list:
+    """
+    Convert (input, output) pairs concurrently within the backend limits.
+    
+    Returns:
+        (input_path, output_path, error) tuples in job order; error is None on success
+    """
+    results = await asyncio.gather(*(convert_file(str(input_path), str(output_path), timeout, **kwargs)
+                                     for input_path, output_path in jobs), return_exceptions=True)
+    return [(input_path, output_path, str(result).strip() if isinstance(result, BaseException) else None)
+            for (input_path, output_path), result in zip(jobs, results)]
+
+
+def parse_limit(value: str) -> tuple:
+    """Parse a --limit BACKEND=N argument."""
+    backend, _, limit = value.partition('=')
+    if backend not in BACKEND_LIMITS or not limit.isdigit() or int(limit) < 1:
+        raise argparse.ArgumentTypeError(
+            f"expected BACKEND=N with BACKEND one of {', '.join(BACKEND_LIMITS)}: {value}")
+    return backend, int(limit)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Convert many files concurrently with the asyncio API'
+    )
+    parser.add_argument('inputs', nargs='+', help='Input files')
+    parser.add_argument('--to', required=True, metavar='EXT', help='Output format (e.g., pdf, jpg, csv)')
+    parser.add_argument('--output-dir', help='Output directory (default: next to each input)')
+    parser.add_argument('--timeout', type=float, help='Seconds each job may run')
+    parser.add_argument('--limit', type=parse_limit, action='append', default=[], metavar='BACKEND=N',
+                       help='Concurrent jobs for a backend (pandoc, libreoffice, python); repeatable')
+    parser.add_argument('--quality', type=int, help='Image quality (1-100)')
+    parser.add_argument('--pooled', action='store_true',
+                       help='Use the persistent LibreOffice pool for office conversions')
+    parser.add_argument('--document-engine', choices=ENGINES,
+                       help="Documents: 'server' (persistent pandoc servers) or 'python' (in-process "
+                            "MD→HTML, HTML→TXT, TXT→MD and MD/HTML→PDF); default: pandoc")
+    parser.add_argument('--stylesheet', action='append', metavar='CSS',
+                       help='CSS file applied to PDF output (repeatable)')
+    parser.add_argument('--metrics', metavar='PATH',
+                       help="Append per-stage timing records as JSON lines to PATH ('-' for stdout)")
+    
+    args = parser.parse_args()
+    
+    try:
+        metrics.configure(args.metrics)
+        set_limits(**dict(args.limit))
+        target = args.to.lower().lstrip('.')
+        if args.output_dir:
+            Path(args.output_dir).mkdir(parents=True, exist_ok=True)
+        jobs = [(Path(path), Path(args.output_dir or Path(path).parent) / f"{Path(path).stem}.{target}")
+                for path in args.inputs]
+        
+        failed = 0
+        results = asyncio.run(convert_many(jobs, args.timeout, quality=args.quality, pooled=args.pooled,
+                                               document_engine=args.document_engine,
+                                               stylesheet=args.stylesheet))
+        for input_file, output_file, error in results:
+            if error is None:
+                print(f"✓ Converted: {input_file} → {output_file}")
+            else:
+                failed += 1
+                print(f"✗ Failed: {input_file} → {output_file}: {error}", file=sys.stderr)
+        print(f"Batch complete: {len(jobs) - failed} succeeded, {failed} failed")
+        if failed:
+            sys.exit(1)
+    except Exception as e:
+        print(f"✗ Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Conversion graph and route planner.
+Formats are nodes and converter capabilities are edges weighted by their
+estimated cost (seconds per file). The planner picks the cheapest converter
+that goes straight from the input format to the output format. Only when
+no single converter can do the job does it chain converters through
+intermediate formats: every hop re-encodes the content, so a chain is never
+preferred to a direct step just for speed. Intermediate files live in a
+scratch directory on tmpfs.
+
+Edge costs start as built-in estimates; a calibration run (see
+benchmarks/bench_routes.py) measures the installed tools on this machine
+and saves the results, which replace the estimates.
+"""
+
+import os
+import json
+import heapq
+import shutil
+import tempfile
+import functools
+import contextlib
+import statistics
+import importlib.util
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import NamedTuple
+
+
+# Cost of writing an intermediate file and reading it back in the next step
+HOP_COST = 0.01
+
+# Each further step also multiplies the route's cost, so a longer chain has
+# to be clearly cheaper than a shorter one (not just within measurement
+# noise) to be chosen
+HOP_FACTOR = 1.5
+
+# Longest chain of converters the planner considers
+MAX_STEPS = 3
+
+# Bump when the calibration file layout changes; older files are ignored
+COSTS_VERSION = 1
+
+# Memory-backed filesystem for intermediate files, where available
+SCRATCH_ROOT = Path('/dev/shm')
+
+
+class Step(NamedTuple):
+    """One edge of the graph: a converter taking source format to target format."""
+    source: str
+    target: str
+    converter: str
+    backend: str
+    cost: float
+    requires: tuple = ()
+    options: tuple = ()
+    
+    @property
+    def key(self) -> str:
+        """Calibration key, e.g. 'pandoc:md>html'."""
+        return f"{self.backend}:{self.source}>{self.target}"
+
+
+@functools.lru_cache(maxsize=None)
+def installed(name: str) -> bool:
+    """Whether an executable or importable Python module of this name exists."""
+    return shutil.which(name) is not None or importlib.util.find_spec(name) is not None
+
+
+class ConversionGraph:
+    """
+    Directed graph of conversion steps between formats.
+    
+    Args:
+        intermediates: Formats a route may pass through (default: any);
+            keeps lossy formats out of the middle of a chain
+    """
+    
+    def __init__(self, intermediates: set = None):
+        self.intermediates = intermediates
+        self.edges = {}
+        self.measured = {}
+        self.fallback = {}
+    
+    def add(self, converter: str, backend: str, sources: set, targets: set, cost: float,
+            requires: tuple = (), **options) -> None:
+        """
+        Register a converter for every (source, target) pair.
+        
+        Args:
+            converter: Converter module doing the step
+            backend: Tool or library behind it (part of the calibration key)
+            sources: Input formats
+            targets: Output formats
+            cost: Estimated seconds per file until calibrated
+            requires: Executables or Python modules the step needs
+            **options: convert_file options fixed for this step
+        """
+        for source in sources:
+            for target in targets:
+                self.edges.setdefault(source, []).append(
+                    Step(source, target, converter, backend, cost, tuple(requires),
+                         tuple(sorted(options.items()))))
+    
+    def calibrate(self, measured: dict) -> None:
+        """
+        Replace estimated costs with measured seconds, keyed like Step.key.
+        
+        Steps that were not measured take the median of the measured steps
+        of the same backend and target format, or else of the backend.
+        """
+        self.measured = dict(measured)
+        groups = {}
+        for key, seconds in measured.items():
+            backend, _, pair = key.partition(':')
+            groups.setdefault(f"{backend}:*>{pair.partition('>')[2]}", []).append(seconds)
+            groups.setdefault(backend, []).append(seconds)
+        self.fallback = {key: statistics.median(values) for key, values in groups.items()}
+    
+    def cost(self, step: Step) -> tuple:
+        """Return (seconds, origin) of a step; origin is 'measured', 'estimated' or 'default'."""
+        if step.key in self.measured:
+            return self.measured[step.key], 'measured'
+        for key in (f"{step.backend}:*>{step.target}", step.backend):
+            if key in self.fallback:
+                return self.fallback[key], 'estimated'
+        return step.cost, 'default'
+    
+    def steps(self) -> list:
+        """Every edge of the graph."""
+        return [step for edges in self.edges.values() for step in edges]
+    
+    def plan(self, source: str, target: str, usable=None, max_steps: int = MAX_STEPS) -> list:
+        """
+        Find the cheapest route from source to target format.
+        
+        A direct step, when one is usable, always wins over a chain.
+        
+        Args:
+            source: Input format
+            target: Output format
+            usable: Optional predicate; steps it rejects are not used
+            max_steps: Longest chain considered
+        
+        Returns:
+            List of Steps, first to last
+        
+        Raises:
+            ValueError: No route exists (naming missing tools when installing
+                them would make one)
+        """
+        def allowed(step):
+            return usable is None or usable(step)
+        
+        def available(step):
+            return allowed(step) and all(map(installed, step.requires))
+        
+        direct = [step for step in self.edges.get(source, ()) if step.target == target and available(step)]
+        if direct:
+            return [min(direct, key=lambda step: self.cost(step)[0])]
+        
+        route = self._search(source, target, available, max_steps)
+        if route is not None:
+            return route
+        
+        blocked = self._search(source, target, allowed, max_steps)
+        if blocked is not None:
+            missing = sorted({name for step in blocked for name in step.requires if not installed(name)})
+            raise ValueError(f"Unsupported conversion: {source} → {target} "
+                             f"(needs {', '.join(missing)} to be installed)")
+        raise ValueError(f"Unsupported conversion: {source} → {target}")
+    
+    def extend(self, total: float, step: Step, after: bool) -> float:
+        """Cost of a route of cost total extended by step (after: the route already has steps)."""
+        if not after:
+            return total + self.cost(step)[0]
+        return (total + HOP_COST + self.cost(step)[0]) * HOP_FACTOR
+    
+    def route_cost(self, route: list) -> float:
+        """Estimated cost of a whole route, as the planner compares them."""
+        total = 0.0
+        for index, step in enumerate(route):
+            total = self.extend(total, step, index > 0)
+        return total
+    
+    def _search(self, source: str, target: str, usable, max_steps: int):
+        """Dijkstra over (format, steps taken); returns the cheapest route or None."""
+        queue = [(0.0, 0, 0, source, ())]
+        settled = set()
+        counter = 1
+        while queue:
+            total, count, _, node, route = heapq.heappop(queue)
+            if node == target and route:
+                return list(route)
+            if (node, count) in settled or count == max_steps:
+                continue
+            settled.add((node, count))
+            if route and self.intermediates is not None and node not in self.intermediates:
+                continue
+            for step in self.edges.get(node, ()):
+                if not usable(step):
+                    continue
+                # A step that does not reach the target leaves an intermediate file
+                if step.target != target and step.target == step.source:
+                    continue
+                cost = self.extend(total, step, bool(route))
+                heapq.heappush(queue, (cost, count + 1, counter, step.target, route + (step,)))
+                counter += 1
+        return None
+    
+    def explain(self, route: list) -> str:
+        """Render a route as a table of steps with their costs."""
+        seconds = sum(self.cost(step)[0] for step in route) + HOP_COST * (len(route) - 1)
+        path = ' → '.join([route[0].source] + [step.target for step in route])
+        lines = [f"{path}: {len(route)} step{'s' if len(route) > 1 else ''}, estimated {seconds:.3f}s"
+                 + (f" (planner cost {self.route_cost(route):.3f} with the per-step margin)" if len(route) > 1 else '')]
+        for index, step in enumerate(route, 1):
+            seconds, origin = self.cost(step)
+            options = ', '.join(f"{name}={value}" for name, value in step.options)
+            lines.append(f"  {index}. {step.source + ' → ' + step.target:<16} {step.converter:<22} "
+                         f"{step.backend:<12} {seconds:>8.3f}s  {origin}" + (f"  ({options})" if options else ''))
+        if len(route) > 1:
+            lines.append(f"  intermediate files in {scratch_root()}")
+        return '\n'.join(lines)
+
+
+def load_costs(path: Path) -> dict:
+    """Read measured step costs saved by save_costs(); empty if missing or outdated."""
+    try:
+        data = json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get('version') != COSTS_VERSION:
+        return {}
+    return data.get('costs', {})
+
+
+def save_costs(path: Path, costs: dict) -> None:
+    """Write measured step costs (seconds, keyed like Step.key)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp = path.with_name(f".{path.name}.{os.getpid()}")
+    temp.write_text(json.dumps({
+        'version': COSTS_VERSION,
+        'created': datetime.now(timezone.utc).isoformat(),
+        'costs': dict(sorted(costs.items())),
+    }, indent=2))
+    temp.replace(path)
+
+
+def scratch_root() -> Path:
+    """Directory for intermediate files: tmpfs if writable, else the system temp dir."""
+    if SCRATCH_ROOT.is_dir() and os.access(SCRATCH_ROOT, os.W_OK | os.X_OK):
+        return SCRATCH_ROOT
+    return Path(tempfile.gettempdir())
+
+
+@contextlib.contextmanager
+def scratch_dir():
+    """Temporary directory for the intermediate files of one route, removed afterwards."""
+    path = Path(tempfile.mkdtemp(prefix='route_', dir=scratch_root()))
+    try:
+        yield path
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
@@ -9,14 +9,72 @@ import subprocess
 from pathlib import Path
 import argparse
 
+from metrics import instrument, stage, annotate, configure as configure_metrics
 
-def convert_document(input_path: str, output_path: str) -> None:
+
+# Inputs pandoc reads poorly (or not at all) that LibreOffice handles natively
+OFFICE_INPUT_FORMATS = {'doc', 'odt', 'rtf'}
+OFFICE_OUTPUT_FORMATS = {'pdf', 'docx', 'doc', 'odt', 'rtf', 'txt', 'html', 'htm', 'epub'}
+
+# pandoc: one pandoc process per document
+# server: a persistent pandoc server (pandoc_server.py); PDF output still uses the command line
+# python: in-process MD→HTML, HTML→TXT and TXT→MD (document_fastpath.py) and MD/HTML→PDF
+#         with a warm WeasyPrint (pdf_renderer.py); pandoc for the rest
+ENGINES = ('pandoc', 'server', 'python')
+
+# Map extensions to pandoc format names
+PANDOC_FORMATS = {
+    'md': 'markdown',
+    'markdown': 'markdown',
+    'txt': 'plain',
+    'html': 'html',
+    'htm': 'html',
+    'docx': 'docx',
+    'doc': 'doc',
+    'rtf': 'rtf',
+    'odt': 'odt',
+    'epub': 'epub',
+    'pdf': 'pdf'
+}
+
+
+def pandoc_command(input_file: Path, output_file: Path, stylesheets: list = None) -> list:
+    """Build the pandoc command line converting input_file to output_file."""
+    input_format = input_file.suffix.lower().lstrip('.')
+    output_format = output_file.suffix.lower().lstrip('.')
+    
+    cmd = [
+        'pandoc',
+        str(input_file),
+        '-f', PANDOC_FORMATS.get(input_format, input_format),
+        '-t', PANDOC_FORMATS.get(output_format, output_format),
+        '-o', str(output_file),
+        '--standalone'
+    ]
+    
+    # Add PDF-specific options
+    if output_format == 'pdf':
+        cmd.extend(['--pdf-engine=weasyprint'])
+        for stylesheet in stylesheets or ():
+            cmd.extend(['--css', str(stylesheet)])
+    return cmd
+
+
+@instrument('convert_document', tool='pandoc')
+def convert_document(input_path: str, output_path: str, pooled: bool = False,
+                     engine: str = 'pandoc', stylesheets: list = None) -> None:
     """
     Convert document from one format to another using pandoc.
     
     Args:
         input_path: Path to input document file
         output_path: Path to output document file
+        pooled: Send DOC/ODT/RTF inputs to the persistent LibreOffice pool
+            (office_pool.py) instead of pandoc
+        engine: 'pandoc' (a process per document), 'server' (persistent
+            pandoc server) or 'python' (in-process fast path for trivial
+            conversions, warm WeasyPrint for PDF); see ENGINES
+        stylesheets: CSS files applied to PDF output
     """
     input_file = Path(input_path)
     output_file = Path(output_path)
@@ -28,40 +86,54 @@ def convert_document(input_path: str, output_path: str) -> None:
     input_format = input_file.suffix.lower().lstrip('.')
     output_format = output_file.suffix.lower().lstrip('.')
     
-    # Map extensions to pandoc format names
-    format_map = {
-        'md': 'markdown',
-        'markdown': 'markdown',
-        'txt': 'plain',
-        'html': 'html',
-        'htm': 'html',
-        'docx': 'docx',
-        'doc': 'doc',
-        'rtf': 'rtf',
-        'odt': 'odt',
-        'epub': 'epub',
-        'pdf': 'pdf'
-    }
-    
-    pandoc_input_format = format_map.get(input_format, input_format)
-    pandoc_output_format = format_map.get(output_format, output_format)
-    
-    # Build pandoc command
-    cmd = [
-        'pandoc',
-        str(input_file),
-        '-f', pandoc_input_format,
-        '-t', pandoc_output_format,
-        '-o', str(output_file),
-        '--standalone'
-    ]
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine} (choose from {', '.join(ENGINES)})")
     
-    # Add PDF-specific options
-    if output_format == 'pdf':
-        cmd.extend(['--pdf-engine=weasyprint'])
+    if pooled and input_format in OFFICE_INPUT_FORMATS and output_format in OFFICE_OUTPUT_FORMATS:
+        from office_pool import get_pool
+        annotate(tool='libreoffice (pooled)')
+        with stage('pool_start'):
+            pool = get_pool()
+        with stage('convert'):
+            pool.convert(str(input_file), str(output_file))
+        print(f"✓ Converted: {input_file.name} → {output_file.name}")
+        return
+    
+    if engine == 'python':
+        from document_fastpath import supports, convert_fast
+        if supports(input_format, output_format):
+            annotate(tool='python')
+            with stage('convert'):
+                convert_fast(input_file, output_file)
+            print(f"✓ Converted: {input_file.name} → {output_file.name}")
+            return
+        
+        import pdf_renderer
+        if pdf_renderer.supports(input_format, output_format):
+            annotate(tool='weasyprint')
+            with stage('renderer_start'):
+                renderer = pdf_renderer.get_renderer(stylesheets or ())
+            with stage('convert'):
+                renderer.render(str(input_file), str(output_file))
+            print(f"✓ Converted: {input_file.name} → {output_file.name}")
+            return
+    
+    if engine == 'server':
+        from pandoc_server import get_pool, supports
+        if supports(output_format):
+            annotate(tool='pandoc (server)')
+            with stage('pool_start'):
+                pool = get_pool()
+            with stage('convert'):
+                pool.convert(str(input_file), str(output_file))
+            print(f"✓ Converted: {input_file.name} → {output_file.name}")
+            return
+    
+    cmd = pandoc_command(input_file, output_file, stylesheets)
     
     # Execute conversion
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    with stage('convert'):
+        result = subprocess.run(cmd, capture_output=True, text=True)
     
     if result.returncode != 0:
         raise RuntimeError(f"Pandoc conversion failed: {result.stderr}")
@@ -75,11 +147,22 @@ def main():
     )
     parser.add_argument('input', help='Input document file')
     parser.add_argument('output', help='Output document file')
+    parser.add_argument('--pooled', action='store_true',
+                       help='Convert DOC/ODT/RTF inputs through a persistent LibreOffice instance')
+    parser.add_argument('--engine', '--document-engine', choices=ENGINES, default='pandoc',
+                       help="'server': persistent pandoc server; 'python': in-process "
+                            "MD→HTML, HTML→TXT, TXT→MD and MD/HTML→PDF (default: pandoc)")
+    parser.add_argument('--stylesheet', action='append', metavar='CSS',
+                       help='CSS file applied to PDF output (repeatable)')
+    parser.add_argument('--metrics', metavar='PATH',
+                       help="Append per-stage timing records as JSON lines to PATH ('-' for stdout)")
     
     args = parser.parse_args()
     
+    configure_metrics(args.metrics)
+    
     try:
-        convert_document(args.input, args.output)
+        convert_document(args.input, args.output, args.pooled, args.engine, args.stylesheet)
     except Exception as e:
         print(f"✗ Error: {e}", file=sys.stderr)
         sys.exit(1)
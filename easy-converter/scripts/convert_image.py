@@ -1,76 +1,705 @@
 #!/usr/bin/env python3
 """
 Image format converter supporting all major image formats.
-Supports: PNG, JPEG, GIF, BMP, TIFF, WebP, ICO, and more.
+Supports: PNG, JPEG, GIF, BMP, TIFF, WebP, AVIF, ICO, and more.
+
+Multi-frame sources (animated GIF/WebP/PNG, multi-page TIFF) keep every
+frame when written to GIF, WebP, TIFF or PDF, or can be exploded into one
+file per frame. Frames are decoded and encoded one at a time, so memory
+does not grow with the number of frames.
 """
 
+import os
 import sys
 from pathlib import Path
-from PIL import Image
+from concurrent.futures import ProcessPoolExecutor
+from metrics import instrument, stage, outputs, configure as configure_metrics
+from large_image import convert_large, open_unchecked, BAND_BYTES, TILE_SIZE
+import PIL
+from PIL import Image, ImageChops, ImageColor, ImageSequence, GifImagePlugin, TiffImagePlugin
 import argparse
 
 
-def convert_image(input_path: str, output_path: str, quality: int = 95) -> None:
+RESIZE_MODES = ('resize', 'fit', 'thumbnail')
+
+# Encoder effort presets: output format -> save() options.
+# 'fast' favours encode speed, 'smallest' favours output size. The default
+# 'balanced' keeps JPEG output baseline; only 'smallest' writes progressive JPEG.
+PRESETS = {
+    'fast': {
+        'jpeg': {'optimize': False, 'progressive': False, 'subsampling': '4:2:0'},
+        'png': {'compress_level': 1, 'optimize': False},
+        'webp': {'method': 0},
+        'webp_lossless': {'method': 0, 'quality': 0},
+        'avif': {'speed': 10},
+    },
+    'balanced': {
+        'jpeg': {'optimize': True, 'progressive': False, 'subsampling': '4:2:0'},
+        'png': {'compress_level': 6, 'optimize': False},
+        'webp': {'method': 4},
+        'webp_lossless': {'method': 4, 'quality': 50},
+        'avif': {'speed': 6},
+    },
+    'smallest': {
+        'jpeg': {'optimize': True, 'progressive': True, 'subsampling': '4:2:0'},
+        'png': {'compress_level': 9, 'optimize': True},
+        'webp': {'method': 6},
+        'webp_lossless': {'method': 6, 'quality': 100},
+        'avif': {'speed': 2},
+    },
+}
+DEFAULT_PRESET = 'balanced'
+
+# Output formats that hold every frame of a multi-frame source
+MULTI_FRAME_FORMATS = {'gif', 'webp', 'tiff', 'tif', 'pdf'}
+
+# What to do with the frames of a multi-frame source:
+# 'all' keeps them (multi-frame outputs only), 'first' keeps frame one,
+# 'explode' writes one file per frame
+FRAME_MODES = ('all', 'first', 'explode')
+
+# Output formats without an alpha channel; transparent images are flattened
+OPAQUE_FORMATS = {'jpg', 'jpeg', 'pdf'}
+
+
+def parse_size(size: str) -> tuple:
+    """Parse 'WIDTHxHEIGHT' into a (width, height) tuple."""
+    try:
+        width, height = (int(part) for part in size.lower().split('x'))
+    except ValueError:
+        raise ValueError(f"Invalid size (expected WIDTHxHEIGHT): {size}") from None
+    if width <= 0 or height <= 0:
+        raise ValueError(f"Invalid size (must be positive): {size}")
+    return width, height
+
+
+def target_size(source: tuple, box: tuple, mode: str) -> tuple:
     """
-    Convert image from one format to another.
+    Compute the output size for a resize mode.
     
     Args:
-        input_path: Path to input image file
-        output_path: Path to output image file
-        quality: Quality for JPEG/WebP (1-100, default 95)
+        source: (width, height) of the source image
+        box: (width, height) requested
+        mode: 'resize' (exact box), 'fit' (largest size inside the box,
+            keeping aspect ratio) or 'thumbnail' (like fit, never enlarges)
     """
-    input_file = Path(input_path)
-    output_file = Path(output_path)
+    if mode == 'resize':
+        return box
+    scale = min(box[0] / source[0], box[1] / source[1])
+    if mode == 'thumbnail':
+        scale = min(scale, 1.0)
+    return max(1, round(source[0] * scale)), max(1, round(source[1] * scale))
+
+
+def draft_for_size(img: Image.Image, size: tuple) -> Image.Image:
+    """
+    Let JPEG decoding skip resolution the output does not need.
     
-    if not input_file.exists():
-        raise FileNotFoundError(f"Input file not found: {input_path}")
+    For JPEG sources, Image.draft() makes libjpeg scale by 1/2, 1/4 or 1/8
+    in the DCT domain while decoding, so a 50-megapixel photo bound for a
+    web rendition is never fully decoded. Must be called before the image
+    data is loaded.
     
-    # Open and convert image
-    img = Image.open(input_file)
+    Args:
+        img: Freshly opened image
+        size: Smallest (width, height) the caller still needs
+    """
+    if img.format == 'JPEG' and (size[0] < img.width or size[1] < img.height):
+        img.draft(img.mode, size)
+    return img
+
+
+def resize_image(img: Image.Image, size: tuple) -> Image.Image:
+    """
+    Resize with a cheap integer reduce() before the final Lanczos resample.
     
-    # Handle transparency for formats that don't support it
-    output_format = output_file.suffix.lower().lstrip('.')
-    if output_format in ['jpg', 'jpeg'] and img.mode in ['RGBA', 'LA', 'P']:
-        # Convert RGBA to RGB with white background
-        background = Image.new('RGB', img.size, (255, 255, 255))
-        if img.mode == 'P':
-            img = img.convert('RGBA')
-        background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-        img = background
-    
-    # Save with appropriate parameters
+    reduce() box-averages whole pixel blocks, which is much faster than
+    resampling the full-resolution image; Lanczos then only covers the
+    remaining factor below 2x.
+    """
+    if img.size == size:
+        return img
+    if img.mode in ('P', '1'):
+        img = img.convert('RGBA' if 'transparency' in img.info else 'RGB')
+    
+    factor = min(img.width // size[0], img.height // size[1])
+    if factor >= 2:
+        img = img.reduce(factor)
+    return img.resize(size, Image.LANCZOS)
+
+
+def flatten_alpha(img: Image.Image, background: str = 'white') -> Image.Image:
+    """
+    Composite a transparent image onto a solid background colour.
+    
+    paste() blends RGBA and LA sources directly into the background using
+    the source's own alpha band as the mask, so no band is split out and
+    only the output image is allocated. LA images on a grey background
+    stay single-channel.
+    
+    Args:
+        img: Image in RGBA, LA, P or PA mode
+        background: Colour name or '#rrggbb'
+    
+    Returns:
+        RGB image (L for LA sources on a grey background)
+    """
+    if img.mode == 'P' and 'transparency' not in img.info:
+        return img.convert('RGB')
+    if img.mode in ('P', 'PA'):
+        img = img.convert('RGBA')
+    
+    color = ImageColor.getrgb(background)[:3]
+    if img.mode == 'LA' and color[0] == color[1] == color[2]:
+        flattened = Image.new('L', img.size, color[0])
+    else:
+        flattened = Image.new('RGB', img.size, color)
+    flattened.paste(img, mask=img)
+    return flattened
+
+
+def encoder_options(output_format: str, quality: int = 95, preset: str = DEFAULT_PRESET,
+                    lossless: bool = False) -> dict:
+    """
+    Return save() options for an output format.
+    
+    Args:
+        output_format: Output extension without the dot
+        quality: Quality for JPEG/WebP/AVIF (1-100)
+        preset: Encoder effort preset (see PRESETS)
+        lossless: Lossless WebP/AVIF
+    """
+    if preset not in PRESETS:
+        raise ValueError(f"Unknown preset: {preset} (choose from {', '.join(PRESETS)})")
+    
+    options = PRESETS[preset]
     save_kwargs = {}
     if output_format in ['jpg', 'jpeg']:
         save_kwargs['quality'] = quality
-        save_kwargs['optimize'] = True
+        save_kwargs.update(options['jpeg'])
+    elif output_format == 'webp' and lossless:
+        # For lossless WebP, quality sets compression effort instead
+        save_kwargs['lossless'] = True
+        save_kwargs.update(options['webp_lossless'])
     elif output_format == 'webp':
         save_kwargs['quality'] = quality
-        save_kwargs['method'] = 6  # Best compression
+        save_kwargs.update(options['webp'])
+    elif output_format == 'avif':
+        save_kwargs['quality'] = quality
+        save_kwargs.update(options['avif'])
+        if lossless:
+            # libavif is lossless at quality 100 without chroma subsampling
+            save_kwargs.update(quality=100, subsampling='4:4:4')
     elif output_format == 'png':
-        save_kwargs['optimize'] = True
-    elif output_format == 'ico':
+        save_kwargs.update(options['png'])
+    return save_kwargs
+
+
+def save_image(img: Image.Image, output_file: Path, quality: int = 95,
+               preset: str = DEFAULT_PRESET, lossless: bool = False,
+               background: str = 'white') -> None:
+    """
+    Save an image, picking encoder options from the output extension.
+    
+    Args:
+        img: Image to save
+        output_file: Output path; the extension selects the format
+        quality: Quality for JPEG/WebP/AVIF (1-100)
+        preset: Encoder effort preset (see PRESETS)
+        lossless: Lossless WebP/AVIF
+        background: Colour behind transparent pixels when saving to JPEG or PDF
+    """
+    output_format = output_file.suffix.lower().lstrip('.')
+    save_kwargs = encoder_options(output_format, quality, preset, lossless)
+    
+    # Handle transparency for formats that don't support it
+    if output_format in OPAQUE_FORMATS and img.mode in ['RGBA', 'LA', 'P', 'PA']:
+        img = flatten_alpha(img, background)
+    
+    if output_format == 'ico':
         # ICO files support multiple sizes
         img.save(output_file, format='ICO', sizes=[(256, 256)])
-        print(f"✓ Converted: {input_file.name} → {output_file.name}")
         return
     
     img.save(output_file, **save_kwargs)
+
+
+def frame_count(img: Image.Image) -> int:
+    return getattr(img, 'n_frames', 1)
+
+
+def iter_frames(img: Image.Image):
+    """Yield img decoded at each of its frames in turn (WebP durations are only known after load())."""
+    for frame in ImageSequence.Iterator(img):
+        frame.load()
+        yield frame
+
+
+def prepare_frame(frame: Image.Image, size: tuple, output_format: str,
+                  background: str = 'white') -> Image.Image:
+    """
+    Resize one decoded frame and bring it into a mode the output format can hold.
+    
+    Args:
+        frame: Current frame of a source image
+        size: Output (width, height); the frame's own size keeps it unscaled
+        output_format: Output extension without the dot
+        background: Colour behind transparent pixels for opaque formats
+    """
+    img = resize_image(frame, size)
+    if output_format in OPAQUE_FORMATS and img.mode in ('RGBA', 'LA', 'P', 'PA'):
+        img = flatten_alpha(img, background)
+    elif output_format == 'webp' and img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGBA' if img.has_transparency_data else 'RGB')
+    return img
+
+
+class FrameStream(Image.Image):
+    """
+    A multi-frame image whose frames are produced on demand.
+    
+    Pillow's WebP and PDF writers walk a save_all image with seek(),
+    encoding one frame before moving to the next. A FrameStream answers
+    each seek() by seeking the source and preparing that single frame, so
+    only the current frame is ever decoded.
+    
+    Args:
+        source: Opened multi-frame image
+        size: Output (width, height)
+        output_format: Output extension without the dot
+        background: Colour behind transparent pixels for opaque formats
+    """
+    
+    def __init__(self, source: Image.Image, size: tuple, output_format: str,
+                 background: str = 'white'):
+        super().__init__()
+        self.source = source
+        self.target = (size, output_format, background)
+        self.n_frames = frame_count(source)
+        self.is_animated = self.n_frames > 1
+        # Filled in as frames are visited; the WebP writer reads it frame by frame
+        self.durations = []
+        self.frame = None
+        self.seek(0)
+    
+    def seek(self, frame: int) -> None:
+        if frame == self.frame:
+            return
+        self.source.seek(frame)
+        self.source.load()
+        img = prepare_frame(self.source, *self.target)
+        
+        self.im = img.im
+        self._mode = img.mode
+        self._size = img.size
+        self.palette = img.palette
+        # A GIF background is a palette index, meaningless once frames are RGB
+        self.info = {key: value for key, value in img.info.items() if key != 'background'}
+        self.frame = frame
+        
+        duration = self.source.info.get('duration', 0)
+        if frame < len(self.durations):
+            self.durations[frame] = duration
+        else:
+            self.durations.append(duration)
+    
+    def tell(self) -> int:
+        return self.frame
+
+
+def gif_frame(img: Image.Image) -> tuple:
+    """Convert a prepared frame to a palette image; return (image, transparent index or None)."""
+    if img.mode in ('1', 'L', 'P'):
+        return img, img.info.get('transparency') if img.mode == 'P' else None
+    if img.mode in ('LA', 'PA'):
+        img = img.convert('RGBA')
+    elif img.mode != 'RGBA':
+        img = img.convert('RGB')
+    
+    paletted = img.convert('P', palette=Image.Palette.ADAPTIVE)
+    transparency = None
+    if paletted.palette.mode == 'RGBA':
+        # Like Pillow's GIF writer: the first fully transparent entry becomes the transparent index
+        for color, index in paletted.palette.colors.items():
+            if color[3] == 0:
+                transparency = index
+                break
+        paletted.putpalette(paletted.getpalette('RGB'))
+    return paletted, transparency
+
+
+def save_gif(frames, output_file: Path, loop: int = None) -> int:
+    """
+    Write an animated GIF one frame at a time.
+    
+    Pillow's own GIF writer keeps every frame in memory until the end, so
+    frames are encoded here with its public getheader()/getdata() helpers
+    instead. Opaque frames after the first are cropped to the region that
+    changed since the previous frame; frames with transparency are written
+    whole and cleared to the background before the next one.
+    
+    Args:
+        frames: Iterable of prepared frames; info['duration'] is kept
+        output_file: Output path
+        loop: Loop count (0 = forever, None = play once)
+    
+    Returns:
+        Number of frames written
+    """
+    count = 0
+    previous = None
+    with open(output_file, 'wb') as fp:
+        for frame in frames:
+            duration = frame.info.get('duration', 0)
+            paletted, transparency = gif_frame(frame)
+            params = {'duration': duration, 'include_color_table': True}
+            if transparency is not None:
+                params['transparency'] = transparency
+            
+            if count == 0:
+                paletted.info['version'] = b'89a'
+                header, _ = GifImagePlugin.getheader(paletted, info={} if loop is None else {'loop': loop})
+                fp.write(b''.join(header))
+            
+            opaque = transparency is None and frame.mode in ('1', 'L', 'RGB')
+            offset = (0, 0)
+            if opaque and previous is not None and previous.mode == frame.mode:
+                # Leave the previous frame in place and only draw what changed
+                bbox = ImageChops.difference(previous, frame).getbbox() or (0, 0, 1, 1)
+                paletted = paletted.crop(bbox)
+                offset = bbox[:2]
+            params['disposal'] = 1 if opaque else 2
+            
+            fp.write(b''.join(GifImagePlugin.getdata(paletted, offset, **params)))
+            previous = frame.copy() if opaque else None
+            count += 1
+        fp.write(b';')
+    return count
+
+
+def save_frames(img: Image.Image, output_file: Path, size: tuple, quality: int = 95,
+                preset: str = DEFAULT_PRESET, lossless: bool = False,
+                background: str = 'white') -> int:
+    """
+    Write every frame of a multi-frame image to a GIF, WebP, TIFF or PDF file.
+    
+    Frames are decoded, resized and encoded one at a time: GIF through
+    save_gif(), TIFF by appending pages to the file, WebP and PDF by
+    handing Pillow a FrameStream. Durations and the loop count carry over
+    to animated outputs.
+    
+    Args:
+        img: Opened multi-frame image
+        output_file: Output path; the extension selects the format
+        size: Output (width, height) of every frame
+        quality: Quality for WebP (1-100)
+        preset: Encoder effort preset (see PRESETS)
+        lossless: Lossless WebP
+        background: Colour behind transparent pixels for PDF output
+    
+    Returns:
+        Number of frames written
+    """
+    output_format = output_file.suffix.lower().lstrip('.')
+    save_kwargs = encoder_options(output_format, quality, preset, lossless)
+    loop = img.info.get('loop')
+    
+    if output_format == 'gif':
+        frames = (prepare_frame(frame, size, output_format, background)
+                  for frame in iter_frames(img))
+        return save_gif(frames, output_file, loop)
+    
+    if output_format in ('tif', 'tiff'):
+        count = 0
+        with TiffImagePlugin.AppendingTiffWriter(output_file, True) as tiff:
+            for frame in iter_frames(img):
+                page = prepare_frame(frame, size, output_format, background)
+                if page.mode != frame.mode:
+                    page.info.pop('compression', None)
+                page.save(tiff, format='TIFF', **save_kwargs)
+                tiff.newFrame()
+                count += 1
+        return count
+    
+    stream = FrameStream(img, size, output_format, background)
+    if output_format == 'webp':
+        save_kwargs.update(duration=stream.durations, loop=loop or 0, background=(0, 0, 0, 0))
+    stream.save(output_file, save_all=True, **save_kwargs)
+    return stream.n_frames
+
+
+def frame_path(output_file: Path, index: int) -> Path:
+    """Output path of frame index (0-based) when exploding: name_0001.ext, name_0002.ext, ..."""
+    return output_file.with_name(f"{output_file.stem}_{index + 1:04d}{output_file.suffix}")
+
+
+def _explode_range(input_path: str, output_path: str, start: int, stop: int, size: tuple,
+                   quality: int, preset: str, lossless: bool, background: str) -> int:
+    """Explode worker: write frames start..stop-1, seeking the source once to start."""
+    output_file = Path(output_path)
+    with Image.open(input_path) as img:
+        for index in range(start, stop):
+            img.seek(index)
+            img.load()
+            frame = resize_image(img, size)
+            save_image(frame, frame_path(output_file, index), quality, preset, lossless, background)
+    return stop - start
+
+
+def explode_frames(input_file: Path, output_file: Path, count: int, size: tuple,
+                   quality: int = 95, preset: str = DEFAULT_PRESET, lossless: bool = False,
+                   background: str = 'white', workers: int = None) -> list:
+    """
+    Write each frame of a multi-frame image to its own file, in parallel.
+    
+    The frames are split into one contiguous range per worker process; each
+    worker opens the source itself and walks its range with seek(), so GIF
+    and WebP sources are not re-decoded from the start for every frame.
+    
+    Args:
+        input_file: Multi-frame source image
+        output_file: Name template; frames go to frame_path(output_file, index)
+        count: Number of frames in the source
+        size: Output (width, height) of every frame
+        quality, preset, lossless, background: As for save_image()
+        workers: Worker processes (default: CPU count)
+    
+    Returns:
+        Paths of the written frames in order
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, count))
+    bounds = [count * i // workers for i in range(workers + 1)]
+    args = (quality, preset, lossless, background)
+    
+    if workers == 1:
+        _explode_range(str(input_file), str(output_file), 0, count, size, *args)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_explode_range, str(input_file), str(output_file), start, stop,
+                                   size, *args)
+                       for start, stop in zip(bounds, bounds[1:])]
+            for future in futures:
+                future.result()
+    return [frame_path(output_file, index) for index in range(count)]
+
+
+@instrument('convert_image', tool=f'Pillow {PIL.__version__}')
+def convert_image(input_path: str, output_path: str, quality: int = 95,
+                  resize: str = None, fit: str = None, thumbnail: str = None,
+                  preset: str = DEFAULT_PRESET, lossless: bool = False,
+                  background: str = 'white', frames: str = 'all', workers: int = None,
+                  large: bool = False, band_mb: int = BAND_BYTES // 1024 ** 2,
+                  tile_size: int = TILE_SIZE) -> None:
+    """
+    Convert image from one format to another.
+    
+    Args:
+        input_path: Path to input image file
+        output_path: Path to output image file
+        quality: Quality for JPEG/WebP (1-100, default 95)
+        resize: Scale to exactly 'WIDTHxHEIGHT'
+        fit: Scale to fit inside 'WIDTHxHEIGHT', keeping aspect ratio
+        thumbnail: Like fit, but never enlarges the image
+        preset: Encoder effort preset: 'fast', 'balanced' or 'smallest'
+        lossless: Lossless WebP/AVIF output
+        background: Colour behind transparent pixels for JPEG output
+        frames: Frames of a multi-frame source: 'all' (kept for GIF, WebP,
+            TIFF and PDF outputs; other formats get the first frame),
+            'first', or 'explode' (one file per frame, name_0001.ext, ...)
+        workers: Processes writing frames in parallel for 'explode'
+            (default: CPU count)
+        large: Convert in horizontal bands with memory bounded by band_mb
+            (see large_image.py); TIFF and PNG outputs are streamed, other
+            formats only for outputs small enough to hold in memory
+        band_mb: Memory budget of one band in MB for large
+        tile_size: Tile edge length of large TIFF outputs (0 writes strips)
+    """
+    input_file = Path(input_path)
+    output_file = Path(output_path)
+    
+    if not input_file.exists():
+        raise FileNotFoundError(f"Input file not found: {input_path}")
+    if frames not in FRAME_MODES:
+        raise ValueError(f"Unknown frames mode: {frames} (choose from {', '.join(FRAME_MODES)})")
+    
+    requested = {mode: box for mode, box in zip(RESIZE_MODES, (resize, fit, thumbnail)) if box}
+    if len(requested) > 1:
+        raise ValueError("Use only one of resize, fit and thumbnail")
+    
+    if large:
+        size = None
+        if requested:
+            [(mode, box)] = requested.items()
+            with open_unchecked(input_file) as img:
+                size = target_size(img.size, parse_size(box), mode)
+        source, size = convert_large(
+            input_file, output_file, size, PRESETS[preset]['png']['compress_level'], tile_size,
+            band_mb * 1024 ** 2,
+            save=lambda img, path: save_image(img, path, quality, preset, lossless, background))
+        print(f"✓ Converted: {input_file.name} → {output_file.name} "
+              f"({source[0]}x{source[1]} → {size[0]}x{size[1]} in bands)")
+        return
+    
+    # Only the header is read here; pixel data is decoded below
+    try:
+        img = Image.open(input_file)
+    except Image.DecompressionBombError as e:
+        raise ValueError(f"{e} Use large=True (--large) to convert it in memory-bounded bands.") from None
+    size = img.size
+    if requested:
+        [(mode, box)] = requested.items()
+        size = target_size(img.size, parse_size(box), mode)
+    count = frame_count(img)
+    output_format = output_file.suffix.lower().lstrip('.')
+    
+    if count > 1 and frames == 'explode':
+        img.close()
+        with stage('encode'):
+            written = explode_frames(input_file, output_file, count, size, quality, preset,
+                                     lossless, background, workers)
+        outputs(written)
+        print(f"✓ Converted: {input_file.name} → {written[0].name} … {written[-1].name} ({count} frames)")
+        return
+    
+    if count > 1 and frames == 'all' and output_format in MULTI_FRAME_FORMATS:
+        # Each frame is decoded, resized and encoded before the next is read
+        with stage('encode'):
+            save_frames(img, output_file, size, quality, preset, lossless, background)
+        print(f"✓ Converted: {input_file.name} → {output_file.name} ({count} frames)")
+        return
+    
+    # Open and convert image
+    with stage('decode'):
+        if requested:
+            img = draft_for_size(img, size)
+        img.load()
+    
+    if requested:
+        with stage('resize'):
+            img = resize_image(img, size)
+    
+    with stage('encode'):
+        save_image(img, output_file, quality, preset, lossless, background)
     print(f"✓ Converted: {input_file.name} → {output_file.name}")
 
 
+@instrument('convert_image', tool=f'Pillow {PIL.__version__}')
+def convert_renditions(input_path: str, renditions: list, quality: int = 95,
+                       preset: str = DEFAULT_PRESET, lossless: bool = False,
+                       background: str = 'white') -> None:
+    """
+    Write several sizes/formats from a single decode of the input.
+    
+    The source is decoded once, at the smallest resolution that still
+    covers the largest rendition, and every rendition is resized from
+    that decoded image.
+    
+    Args:
+        input_path: Path to input image file
+        renditions: (output_path, 'WIDTHxHEIGHT' or None, mode) tuples;
+            mode is one of 'resize', 'fit', 'thumbnail'
+        quality: Quality for JPEG/WebP (1-100, default 95)
+        preset: Encoder effort preset: 'fast', 'balanced' or 'smallest'
+        lossless: Lossless WebP/AVIF output
+        background: Colour behind transparent pixels for JPEG output
+    """
+    input_file = Path(input_path)
+    
+    if not input_file.exists():
+        raise FileNotFoundError(f"Input file not found: {input_path}")
+    
+    img = Image.open(input_file)
+    
+    targets = []
+    for output_path, box, mode in renditions:
+        if mode not in RESIZE_MODES:
+            raise ValueError(f"Unknown resize mode: {mode}")
+        size = target_size(img.size, parse_size(box), mode) if box else img.size
+        targets.append((Path(output_path), size))
+    
+    # Decode once, large enough for the biggest rendition
+    largest = (max(size[0] for _, size in targets), max(size[1] for _, size in targets))
+    with stage('decode'):
+        img = draft_for_size(img, largest)
+        img.load()
+    outputs([output_file for output_file, _ in targets])
+    
+    for output_file, size in targets:
+        with stage('resize'):
+            resized = resize_image(img, size)
+        with stage('encode'):
+            save_image(resized, output_file, quality, preset, lossless, background)
+        print(f"✓ Converted: {input_file.name} → {output_file.name}")
+
+
+def parse_rendition(spec: str) -> tuple:
+    """Parse 'PATH[:WIDTHxHEIGHT[:MODE]]' into (path, box, mode)."""
+    path, _, rest = spec.partition(':')
+    box, _, mode = rest.partition(':')
+    return path, box or None, mode or 'thumbnail'
+
+
 def main():
     parser = argparse.ArgumentParser(
-        description='Convert images between formats (PNG, JPEG, GIF, BMP, TIFF, WebP, ICO)'
+        description='Convert images between formats (PNG, JPEG, GIF, BMP, TIFF, WebP, ICO, PDF)'
     )
     parser.add_argument('input', help='Input image file')
-    parser.add_argument('output', help='Output image file')
+    parser.add_argument('output', nargs='?', help='Output image file')
     parser.add_argument('--quality', type=int, default=95,
                        help='Quality for JPEG/WebP (1-100, default: 95)')
+    parser.add_argument('--resize', metavar='WxH',
+                       help='Scale to exactly WIDTHxHEIGHT')
+    parser.add_argument('--fit', metavar='WxH',
+                       help='Scale to fit inside WIDTHxHEIGHT, keeping aspect ratio')
+    parser.add_argument('--thumbnail', metavar='WxH',
+                       help='Like --fit, but never enlarges the image')
+    parser.add_argument('--preset', choices=list(PRESETS), default=DEFAULT_PRESET,
+                       help=f'Encoder effort: fast, balanced or smallest (default: {DEFAULT_PRESET})')
+    parser.add_argument('--lossless', action='store_true',
+                       help='Lossless WebP/AVIF output')
+    parser.add_argument('--background', default='white',
+                       help='Colour behind transparent pixels for JPEG output (name or #rrggbb, default: white)')
+    parser.add_argument('--frames', choices=FRAME_MODES, default='all',
+                       help="Multi-frame sources (animated GIF/WebP, multi-page TIFF): 'all' keeps every "
+                            "frame in GIF/WebP/TIFF/PDF outputs, 'first' keeps one, 'explode' writes "
+                            "NAME_0001.EXT, NAME_0002.EXT, ... (default: all)")
+    parser.add_argument('--workers', type=int,
+                       help='Processes writing exploded frames in parallel (default: CPU count)')
+    parser.add_argument('--large', action='store_true',
+                       help='Convert very large images in memory-bounded bands (TIFF/PNG output is '
+                            'streamed; skips the decompression-bomb check)')
+    parser.add_argument('--band-mb', type=int, default=BAND_BYTES // 1024 ** 2,
+                       help=f'Memory per band with --large (default: {BAND_BYTES // 1024 ** 2})')
+    parser.add_argument('--tile-size', type=int, default=TILE_SIZE,
+                       help=f'Tile size of --large TIFF outputs, 0 for strips (default: {TILE_SIZE})')
+    parser.add_argument('--rendition', action='append', metavar='PATH[:WxH[:MODE]]',
+                       help='Extra output decoded from the same image (repeatable; '
+                            'MODE is resize, fit or thumbnail, default thumbnail)')
+    parser.add_argument('--metrics', metavar='PATH',
+                       help="Append per-stage timing records as JSON lines to PATH ('-' for stdout)")
     
     args = parser.parse_args()
     
+    if not args.output and not args.rendition:
+        parser.error('output is required unless --rendition is given')
+    
+    configure_metrics(args.metrics)
+    
     try:
-        convert_image(args.input, args.output, args.quality)
+        if args.rendition:
+            renditions = [parse_rendition(spec) for spec in args.rendition]
+            if args.output:
+                requested = [(mode, box) for mode, box in
+                             zip(RESIZE_MODES, (args.resize, args.fit, args.thumbnail)) if box]
+                mode, box = requested[0] if requested else ('thumbnail', None)
+                renditions.insert(0, (args.output, box, mode))
+            convert_renditions(args.input, renditions, args.quality, args.preset, args.lossless,
+                               args.background)
+        else:
+            convert_image(args.input, args.output, args.quality,
+                          args.resize, args.fit, args.thumbnail, args.preset, args.lossless,
+                          args.background, args.frames, args.workers, args.large, args.band_mb,
+                          args.tile_size)
     except Exception as e:
         print(f"✗ Error: {e}", file=sys.stderr)
         sys.exit(1)
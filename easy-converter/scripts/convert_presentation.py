@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 Presentation format converter.
-Supports: PPTX to PDF conversion
+Supports: PPTX/PPT/ODP to PDF, or the first slide to PNG
 """
 
 import sys
@@ -9,15 +9,42 @@ import subprocess
 from pathlib import Path
 import argparse
 
+from metrics import instrument, stage, annotate, configure as configure_metrics
 
-def convert_presentation(input_path: str, output_path: str) -> None:
+
+# Formats LibreOffice exports presentations to (PNG renders the first slide)
+OUTPUT_FORMATS = {'pdf', 'png'}
+
+
+def libreoffice_command(input_file: Path, output_file: Path) -> list:
+    """Build the headless LibreOffice command converting input_file to output_file's format in its directory."""
+    return [
+        'libreoffice',
+        '--headless',
+        '--convert-to', output_file.suffix.lower().lstrip('.'),
+        '--outdir', str(output_file.parent),
+        str(input_file)
+    ]
+
+
+def move_libreoffice_output(input_file: Path, output_file: Path) -> None:
+    """Rename LibreOffice's output (named after the input) to the requested output path."""
+    temp_output = output_file.parent / f"{input_file.stem}{output_file.suffix.lower()}"
+    if temp_output != output_file and temp_output.exists():
+        temp_output.rename(output_file)
+
+
+@instrument('convert_presentation', tool='libreoffice')
+def convert_presentation(input_path: str, output_path: str, pooled: bool = False) -> None:
     """
     Convert presentation from one format to another.
-    Currently supports PPTX to PDF using LibreOffice.
+    Supports PPTX/PPT/ODP to PDF, or the first slide to PNG, using LibreOffice.
     
     Args:
         input_path: Path to input presentation file
-        output_path: Path to output presentation file
+        output_path: Path to output PDF or PNG file
+        pooled: Use the persistent LibreOffice pool (office_pool.py) instead
+            of starting a new LibreOffice process
     """
     input_file = Path(input_path)
     output_file = Path(output_path)
@@ -28,45 +55,50 @@ def convert_presentation(input_path: str, output_path: str) -> None:
     input_format = input_file.suffix.lower().lstrip('.')
     output_format = output_file.suffix.lower().lstrip('.')
     
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported conversion: {input_format} → {output_format}")
+    
     # Use LibreOffice for conversion
-    if output_format == 'pdf':
-        # Convert to PDF using LibreOffice in headless mode
-        output_dir = output_file.parent
-        
-        cmd = [
-            'libreoffice',
-            '--headless',
-            '--convert-to', 'pdf',
-            '--outdir', str(output_dir),
-            str(input_file)
-        ]
+    if pooled:
+        from office_pool import get_pool
+        annotate(tool='libreoffice (pooled)')
+        with stage('pool_start'):
+            pool = get_pool()
+        with stage('convert'):
+            pool.convert(str(input_file), str(output_file))
+        print(f"✓ Converted: {input_file.name} → {output_file.name}")
+    else:
+        # Convert using LibreOffice in headless mode
+        cmd = libreoffice_command(input_file, output_file)
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        with stage('convert'):
+            result = subprocess.run(cmd, capture_output=True, text=True)
         
         if result.returncode != 0:
             raise RuntimeError(f"LibreOffice conversion failed: {result.stderr}")
         
-        # LibreOffice creates file with same name but .pdf extension
-        temp_output = output_dir / f"{input_file.stem}.pdf"
-        if temp_output != output_file and temp_output.exists():
-            temp_output.rename(output_file)
+        move_libreoffice_output(input_file, output_file)
         
         print(f"✓ Converted: {input_file.name} → {output_file.name}")
-    else:
-        raise ValueError(f"Unsupported conversion: {input_format} → {output_format}")
 
 
 def main():
     parser = argparse.ArgumentParser(
-        description='Convert presentations (PPTX to PDF)'
+        description='Convert presentations (PPTX/PPT/ODP to PDF, or the first slide to PNG)'
     )
     parser.add_argument('input', help='Input presentation file')
     parser.add_argument('output', help='Output presentation file')
+    parser.add_argument('--pooled', action='store_true',
+                       help='Convert through a persistent LibreOffice instance')
+    parser.add_argument('--metrics', metavar='PATH',
+                       help="Append per-stage timing records as JSON lines to PATH ('-' for stdout)")
     
     args = parser.parse_args()
     
+    configure_metrics(args.metrics)
+    
     try:
-        convert_presentation(args.input, args.output)
+        convert_presentation(args.input, args.output, args.pooled)
     except Exception as e:
         print(f"✗ Error: {e}", file=sys.stderr)
         sys.exit(1)
@@ -1,23 +1,239 @@
 #!/usr/bin/env python3
 """
 Spreadsheet format converter.
-Supports: XLSX, XLS, CSV, TSV, ODS
+Supports: XLSX, XLS, CSV, TSV, ODS, Parquet, Feather/Arrow; HTML tables (output only)
 """
 
+import os
+import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from metrics import instrument, stage, outputs, configure as configure_metrics
 import pandas as pd
 import argparse
 
 
-def convert_spreadsheet(input_path: str, output_path: str, sheet_name: str = None) -> None:
+# Text formats that can be read and written in bounded chunks
+TEXT_SEPARATORS = {'csv': ',', 'tsv': '\t'}
+STREAMING_OUTPUTS = {'csv', 'tsv', 'xlsx'}
+DEFAULT_CHUNKSIZE = 100_000
+
+# Maximum rows in an Excel worksheet, header included
+XLSX_MAX_ROWS = 1_048_576
+
+# Formats that hold several sheets in one file
+WORKBOOK_FORMATS = {'xlsx', 'xls', 'ods'}
+
+# Columnar formats (require pyarrow); Feather v2 is the Arrow IPC file format
+COLUMNAR_FORMATS = {'parquet', 'feather', 'arrow'}
+
+# String columns with at most this share of distinct values get dictionary encoded
+DICTIONARY_MAX_RATIO = 0.5
+
+
+def read_arrow_table(input_file: Path, input_format: str):
+    """
+    Read CSV/TSV/Parquet/Feather straight into a pyarrow Table.
+    
+    CSV parsing uses pyarrow's multithreaded reader and keeps its
+    inferred column types.
+    """
+    if input_format in TEXT_SEPARATORS:
+        import pyarrow.csv as pa_csv
+        parse_options = pa_csv.ParseOptions(delimiter=TEXT_SEPARATORS[input_format])
+        return pa_csv.read_csv(input_file, parse_options=parse_options)
+    if input_format == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.read_table(input_file)
+    import pyarrow.feather as feather
+    return feather.read_table(input_file)
+
+
+def dictionary_encode_table(table, max_ratio: float = DICTIONARY_MAX_RATIO):
+    """Dictionary-encode low-cardinality string columns of a pyarrow Table."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    
+    for i, field in enumerate(table.schema):
+        if not (pa.types.is_string(field.type) or pa.types.is_large_string(field.type)):
+            continue
+        column = table.column(i)
+        if len(column) and pc.count_distinct(column).as_py() <= max_ratio * len(column):
+            table = table.set_column(i, field.name, column.dictionary_encode())
+    return table
+
+
+def write_columnar(table, output_file: Path, output_format: str, dictionary_encode: bool = False) -> None:
+    """Write a pyarrow Table (or DataFrame) as Parquet or Feather/Arrow."""
+    import pyarrow as pa
+    
+    if isinstance(table, pd.DataFrame):
+        table = pa.Table.from_pandas(table, preserve_index=False)
+    if dictionary_encode:
+        table = dictionary_encode_table(table)
+    
+    if output_format == 'parquet':
+        import pyarrow.parquet as pq
+        pq.write_table(table, output_file)
+    else:
+        import pyarrow.feather as feather
+        feather.write_feather(table, output_file)
+
+
+def stream_text_table(input_file: Path, output_file: Path, chunksize: int = DEFAULT_CHUNKSIZE) -> None:
+    """
+    Convert CSV/TSV to CSV/TSV/XLSX without loading the whole table.
+    
+    Rows are read ``chunksize`` at a time and appended to the output, so
+    peak memory depends on the chunk size rather than the row count.
+    Text-to-text conversions copy cell values verbatim; XLSX output uses
+    openpyxl's write-only mode.
+    
+    Args:
+        input_file: CSV or TSV input
+        output_file: CSV, TSV or XLSX output
+        chunksize: Rows per chunk
+    """
+    input_format = input_file.suffix.lower().lstrip('.')
+    output_format = output_file.suffix.lower().lstrip('.')
+    
+    if output_format == 'xlsx':
+        from openpyxl import Workbook
+        
+        chunks = pd.read_csv(input_file, sep=TEXT_SEPARATORS[input_format], chunksize=chunksize)
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet()
+        rows_written = 0
+        for chunk in chunks:
+            if rows_written == 0:
+                worksheet.append(list(chunk.columns))
+                rows_written = 1
+            rows_written += len(chunk)
+            if rows_written > XLSX_MAX_ROWS:
+                raise ValueError(f"Too many rows for XLSX (limit {XLSX_MAX_ROWS:,} including header)")
+            # NaN -> empty cell
+            chunk = chunk.astype(object).where(chunk.notna(), None)
+            for row in chunk.itertuples(index=False, name=None):
+                worksheet.append(row)
+        workbook.save(output_file)
+    else:
+        # Read every cell as text so values pass through unchanged
+        chunks = pd.read_csv(input_file, sep=TEXT_SEPARATORS[input_format], chunksize=chunksize,
+                             dtype=str, keep_default_na=False)
+        with open(output_file, 'w', newline='') as f:
+            for i, chunk in enumerate(chunks):
+                chunk.to_csv(f, sep=TEXT_SEPARATORS[output_format], index=False, header=(i == 0))
+
+
+def write_frame(df: pd.DataFrame, output_file: Path, output_format: str,
+                dictionary_encode: bool = False) -> None:
+    """Write a DataFrame in the given output format."""
+    if output_format in ['xlsx', 'xls']:
+        df.to_excel(output_file, index=False, engine='openpyxl')
+    elif output_format == 'csv':
+        df.to_csv(output_file, index=False)
+    elif output_format == 'tsv':
+        df.to_csv(output_file, sep='\t', index=False)
+    elif output_format == 'ods':
+        df.to_excel(output_file, index=False, engine='odf')
+    elif output_format in COLUMNAR_FORMATS:
+        write_columnar(df, output_file, output_format, dictionary_encode)
+    elif output_format == 'html':
+        # A plain table, e.g. for pandoc to render as PDF or DOCX
+        df.to_html(output_file, index=False, na_rep='')
+    else:
+        raise ValueError(f"Unsupported output format: {output_format}")
+
+
+def sheet_output_path(output_file: Path, sheet: str) -> Path:
+    """Per-sheet output path: out.csv + 'Q1 Sales' -> out_Q1_Sales.csv"""
+    safe_name = re.sub(r'[^\w.-]+', '_', str(sheet)).strip('_') or 'sheet'
+    return output_file.with_name(f"{output_file.stem}_{safe_name}{output_file.suffix}")
+
+
+def sheet_output_paths(output_file: Path, sheets) -> dict:
+    """
+    Distinct per-sheet output paths, in sheet order.
+    
+    Sheet names that map to the same file name ('Q1 Sales' and 'Q1_Sales',
+    or names differing only in case) get _2, _3, ... appended.
+    """
+    paths, taken = {}, set()
+    for sheet in sheets:
+        path = base = sheet_output_path(output_file, sheet)
+        number = 1
+        while path.name.casefold() in taken:
+            number += 1
+            path = base.with_name(f"{base.stem}_{number}{base.suffix}")
+        taken.add(path.name.casefold())
+        paths[sheet] = path
+    return paths
+
+
+def convert_all_sheets(input_file: Path, output_file: Path, dictionary_encode: bool = False) -> list:
+    """
+    Convert every sheet of a workbook after parsing it only once.
+    
+    Workbook outputs (XLSX/ODS) receive all sheets in a single write. Other
+    outputs get one file per sheet, named <output stem>_<sheet>.<ext> (made
+    unique when sheet names clash), and those files are written concurrently.
+    
+    Returns:
+        List of output paths written
+    """
+    input_format = input_file.suffix.lower().lstrip('.')
+    output_format = output_file.suffix.lower().lstrip('.')
+    
+    if input_format not in WORKBOOK_FORMATS:
+        raise ValueError(f"All-sheets mode needs a workbook input (XLSX, XLS, ODS), got: {input_format}")
+    
+    read_engine = 'odf' if input_format == 'ods' else None
+    with stage('read'):
+        sheets = pd.read_excel(input_file, sheet_name=None, engine=read_engine)
+    
+    if output_format in WORKBOOK_FORMATS:
+        write_engine = 'odf' if output_format == 'ods' else 'openpyxl'
+        with stage('write'), pd.ExcelWriter(output_file, engine=write_engine) as writer:
+            for sheet, df in sheets.items():
+                df.to_excel(writer, sheet_name=sheet, index=False)
+        return [output_file]
+    
+    sheet_files = sheet_output_paths(output_file, sheets)
+    workers = min(len(sheets), os.cpu_count() or 1) or 1
+    with stage('write'), ThreadPoolExecutor(max_workers=workers) as threads:
+        futures = [
+            threads.submit(write_frame, df, sheet_files[sheet], output_format, dictionary_encode)
+            for sheet, df in sheets.items()
+        ]
+        for future in futures:
+            future.result()
+    return list(sheet_files.values())
+
+
+@instrument('convert_spreadsheet', tool=lambda: f'pandas {pd.__version__}')
+def convert_spreadsheet(input_path: str, output_path: str, sheet_name: str = None,
+                        chunksize: int = None, engine: str = None,
+                        dictionary_encode: bool = False, all_sheets: bool = False) -> None:
     """
     Convert spreadsheet from one format to another.
     
+    CSV/TSV inputs converted to CSV, TSV or XLSX are streamed in chunks
+    (see stream_text_table) so memory stays flat for very large files.
+    Conversions between CSV/TSV and Parquet/Feather go through pyarrow
+    directly without a pandas round trip.
+    
     Args:
         input_path: Path to input spreadsheet file
         output_path: Path to output spreadsheet file
         sheet_name: Name of sheet to convert (for multi-sheet files)
+        chunksize: Rows per chunk when streaming (default 100,000; 0 loads
+            the whole table into memory instead)
+        engine: pandas CSV parser when the whole table is loaded ('c' or
+            'pyarrow' for multithreaded parsing)
+        dictionary_encode: Dictionary-encode low-cardinality string columns
+            in Parquet/Feather output
+        all_sheets: Convert every sheet of a workbook (see convert_all_sheets)
     """
     input_file = Path(input_path)
     output_file = Path(output_path)
@@ -29,49 +245,81 @@ def convert_spreadsheet(input_path: str, output_path: str, sheet_name: str = Non
     input_format = input_file.suffix.lower().lstrip('.')
     output_format = output_file.suffix.lower().lstrip('.')
     
+    if all_sheets:
+        sheet_outputs = convert_all_sheets(input_file, output_file, dictionary_encode)
+        outputs(sheet_outputs)
+        for sheet_output in sheet_outputs:
+            print(f"✓ Converted: {input_file.name} → {sheet_output.name}")
+        return
+    
+    if chunksize is None:
+        chunksize = DEFAULT_CHUNKSIZE
+    if chunksize and input_format in TEXT_SEPARATORS and output_format in STREAMING_OUTPUTS:
+        with stage('stream'):
+            stream_text_table(input_file, output_file, chunksize)
+        print(f"✓ Converted: {input_file.name} → {output_file.name}")
+        return
+    
+    if output_format in COLUMNAR_FORMATS and (input_format in TEXT_SEPARATORS or input_format in COLUMNAR_FORMATS):
+        with stage('read'):
+            table = read_arrow_table(input_file, input_format)
+        with stage('write'):
+            write_columnar(table, output_file, output_format, dictionary_encode)
+        print(f"✓ Converted: {input_file.name} → {output_file.name}")
+        return
+    
     # Read input file
     read_kwargs = {}
     if sheet_name:
         read_kwargs['sheet_name'] = sheet_name
     
-    if input_format in ['xlsx', 'xls']:
-        df = pd.read_excel(input_file, **read_kwargs)
-    elif input_format == 'csv':
-        df = pd.read_csv(input_file)
-    elif input_format == 'tsv':
-        df = pd.read_csv(input_file, sep='\t')
-    elif input_format == 'ods':
-        df = pd.read_excel(input_file, engine='odf', **read_kwargs)
-    else:
-        raise ValueError(f"Unsupported input format: {input_format}")
+    with stage('read'):
+        if input_format in ['xlsx', 'xls']:
+            df = pd.read_excel(input_file, **read_kwargs)
+        elif input_format == 'csv':
+            df = pd.read_csv(input_file, engine=engine)
+        elif input_format == 'tsv':
+            df = pd.read_csv(input_file, sep='\t', engine=engine)
+        elif input_format == 'ods':
+            df = pd.read_excel(input_file, engine='odf', **read_kwargs)
+        elif input_format == 'parquet':
+            df = pd.read_parquet(input_file)
+        elif input_format in ['feather', 'arrow']:
+            df = pd.read_feather(input_file)
+        else:
+            raise ValueError(f"Unsupported input format: {input_format}")
     
-    # Write output file
-    if output_format in ['xlsx', 'xls']:
-        df.to_excel(output_file, index=False, engine='openpyxl')
-    elif output_format == 'csv':
-        df.to_csv(output_file, index=False)
-    elif output_format == 'tsv':
-        df.to_csv(output_file, sep='\t', index=False)
-    elif output_format == 'ods':
-        df.to_excel(output_file, index=False, engine='odf')
-    else:
-        raise ValueError(f"Unsupported output format: {output_format}")
+    with stage('write'):
+        write_frame(df, output_file, output_format, dictionary_encode)
     
     print(f"✓ Converted: {input_file.name} → {output_file.name}")
 
 
 def main():
     parser = argparse.ArgumentParser(
-        description='Convert spreadsheets between formats (XLSX, XLS, CSV, TSV, ODS)'
+        description='Convert spreadsheets between formats (XLSX, XLS, CSV, TSV, ODS, Parquet, Feather)'
     )
     parser.add_argument('input', help='Input spreadsheet file')
     parser.add_argument('output', help='Output spreadsheet file')
     parser.add_argument('--sheet', help='Sheet name to convert (for multi-sheet files)')
+    parser.add_argument('--all-sheets', action='store_true',
+                       help='Convert every sheet: one file per sheet, or one workbook for XLSX/ODS output')
+    parser.add_argument('--chunksize', type=int,
+                       help=f'Rows per chunk when streaming CSV/TSV (default: {DEFAULT_CHUNKSIZE}, 0 disables streaming)')
+    parser.add_argument('--engine', choices=['c', 'pyarrow'],
+                       help='CSV parser when loading the whole table (pyarrow is multithreaded)')
+    parser.add_argument('--dictionary-encode', action='store_true',
+                       help='Dictionary-encode low-cardinality text columns in Parquet/Feather output')
+    parser.add_argument('--metrics', metavar='PATH',
+                       help="Append per-stage timing records as JSON lines to PATH ('-' for stdout)")
     
     args = parser.parse_args()
     
+    configure_metrics(args.metrics)
+    
     try:
-        convert_spreadsheet(args.input, args.output, args.sheet)
+        convert_spreadsheet(args.input, args.output, args.sheet, args.chunksize,
+                            args.engine, args.dictionary_encode, args.all_sheets)
     except Exception as e:
         print(f"✗ Error: {e}", file=sys.stderr)
         sys.exit(1)
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+In-process fast path for trivial document conversions.
+Converts MD → HTML, HTML → TXT and TXT → MD without starting pandoc, for
+batches of many small documents where process startup dominates.
+
+- MD → HTML uses markdown-it-py (CommonMark plus tables and strikethrough)
+  and wraps the result in a minimal standalone page; the title comes from
+  a YAML ``title:`` field, else the file name
+- HTML → TXT is a stdlib HTML parser writing paragraphs wrapped at 72
+  columns, '-   ' bullets and indented code, like pandoc's plain writer
+- TXT → MD escapes Markdown syntax so the text renders literally
+
+Output is close to, but not byte-identical with, pandoc's. Requires
+markdown-it-py for MD → HTML:
+    pip install markdown-it-py
+"""
+
+import re
+import html
+import textwrap
+from html.parser import HTMLParser
+from pathlib import Path
+
+
+WRAP_COLUMNS = 72
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="utf-8" />
+  <meta name="viewport" content="width=device-width, initial-scale=1.0, user-scalable=yes" />
+  <title>{title}</title>
+</head>
+<body>
+{header}{body}</body>
+</html>
+"""
+
+_markdown = None
+
+
+def markdown_available() -> bool:
+    try:
+        import markdown_it  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def split_front_matter(text: str) -> tuple:
+    """Split a leading YAML block off Markdown text; return (title or None, body)."""
+    match = re.match(r'---[ \t]*\n(.*?)\n(?:---|\.\.\.)[ \t]*(?:\n|$)', text, re.DOTALL)
+    if not match:
+        return None, text
+    title = re.search(r'^title:[ \t]*(.+?)[ \t]*$', match.group(1), re.MULTILINE)
+    return (title.group(1).strip('\'"') if title else None), text[match.end():]
+
+
+def markdown_to_html(text: str, fallback_title: str) -> str:
+    """Render Markdown as a standalone HTML page."""
+    global _markdown
+    if _markdown is None:
+        from markdown_it import MarkdownIt
+        _markdown = MarkdownIt('commonmark', {'html': True}).enable(['table', 'strikethrough'])
+    
+    title, body = split_front_matter(text)
+    header = (f'<header id="title-block-header">\n<h1 class="title">{html.escape(title)}</h1>\n</header>\n'
+              if title else '')
+    return HTML_TEMPLATE.format(title=html.escape(title or fallback_title), header=header,
+                                body=_markdown.render(body))
+
+
+class PlainTextWriter(HTMLParser):
+    """Collect the text of an HTML document as plain-text blocks."""
+    
+    SKIP = {'script', 'style', 'template', 'noscript'}
+    BLOCKS = {'p', 'div', 'section', 'article', 'header', 'footer', 'main', 'nav', 'aside',
+              'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote', 'figure', 'figcaption',
+              'ul', 'ol', 'li', 'table', 'dl', 'dt', 'dd', 'address', 'form', 'details', 'summary'}
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks = []  # (kind, text) with kind 'para', 'item', 'row' or 'pre'
+        self.buffer = []
+        self.lists = []  # one counter per open list; None for unordered
+        self.marker = None  # bullet of a list item whose text has not started yet
+        self.row = None
+        self.skip_depth = 0
+        self.pre_depth = 0
+        self.in_title = False
+        self.title = []
+    
+    def flush(self) -> None:
+        """End the current block of text."""
+        text = ''.join(self.buffer)
+        self.buffer = []
+        if self.pre_depth:
+            kind = 'pre'
+        else:
+            # Source whitespace is already collapsed; newlines come from <br>
+            text = '\n'.join(' '.join(line.split()) for line in text.split('\n')).strip('\n')
+            kind = 'item' if self.marker else 'para'
+        if text.strip():
+            self.blocks.append((kind, self.marker + text if kind == 'item' else text))
+            self.marker = None
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self.skip_depth += 1
+        elif tag == 'title':
+            self.in_title = True
+        elif tag == 'br':
+            self.buffer.append('\n')
+        elif tag == 'img':
+            self.buffer.append(dict(attrs).get('alt') or '')
+        elif tag == 'hr':
+            self.flush()
+            self.blocks.append(('para', '-' * WRAP_COLUMNS))
+        elif tag == 'pre':
+            self.flush()
+            self.pre_depth += 1
+        elif tag == 'tr':
+            self.flush()
+            self.row = []
+        elif tag in ('td', 'th'):
+            self.buffer = []
+        elif tag in self.BLOCKS:
+            self.flush()
+            if tag in ('ul', 'ol'):
+                self.lists.append(0 if tag == 'ol' else None)
+            elif tag == 'li':
+                if self.lists and self.lists[-1] is not None:
+                    self.lists[-1] += 1
+                    self.marker = f"{self.lists[-1]}.".ljust(4)
+                else:
+                    self.marker = '-   '
+    
+    def handle_endtag(self, tag):
+        if tag in self.SKIP:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag == 'title':
+            self.in_title = False
+        elif tag == 'pre':
+            self.flush()
+            self.pre_depth = max(0, self.pre_depth - 1)
+        elif tag in ('td', 'th') and self.row is not None:
+            self.row.append(' '.join(''.join(self.buffer).split()))
+            self.buffer = []
+        elif tag == 'tr' and self.row is not None:
+            if any(self.row):
+                self.blocks.append(('row', '  '.join(self.row)))
+            self.row = None
+        elif tag in self.BLOCKS:
+            self.flush()
+            if tag in ('ul', 'ol') and self.lists:
+                self.lists.pop()
+            elif tag == 'li':
+                self.marker = None
+    
+    def handle_data(self, data):
+        if self.skip_depth:
+            return
+        if self.in_title:
+            self.title.append(data)
+        else:
+            self.buffer.append(data if self.pre_depth else re.sub(r'\s+', ' ', data))
+    
+    def render(self) -> str:
+        """Return the collected blocks as plain text wrapped at WRAP_COLUMNS."""
+        self.flush()
+        parts = []
+        title = ' '.join(''.join(self.title).split())
+        if title:
+            parts.append(title)
+        previous = None
+        for kind, text in self.blocks:
+            if kind == 'pre':
+                text = textwrap.indent(text.strip('\n'), '    ')
+            elif kind != 'row':
+                indent = '    ' if kind == 'item' else ''
+                text = '\n'.join(textwrap.fill(line, WRAP_COLUMNS, initial_indent=indent if i else '',
+                                               subsequent_indent=indent)
+                                 for i, line in enumerate(text.split('\n')))
+            # Consecutive list items and table rows are not separated by blank lines
+            tight = kind == previous and kind in ('item', 'row')
+            parts.append(('\n' if tight else '\n\n' if parts else '') + text)
+            previous = kind
+        return ''.join(parts) + '\n'
+
+
+def html_to_text(text: str) -> str:
+    """Extract readable plain text from an HTML document."""
+    writer = PlainTextWriter()
+    writer.feed(text)
+    writer.close()
+    return writer.render()
+
+
+# Markdown syntax characters that can change the meaning of plain text
+_INLINE_SPECIAL = re.compile(r'([\\`*_\[\]<>#|~&])')
+_LINE_START_SPECIAL = re.compile(r'^(\s{0,3})([-+=]+|\d+[.)])(?=\s|$)')
+
+
+def text_to_markdown(text: str) -> str:
+    """Escape plain text so that it renders literally as Markdown; indented blocks stay code."""
+    lines = []
+    for line in text.splitlines():
+        if line.startswith(('    ', '\t')):
+            lines.append(line)
+            continue
+        line = _INLINE_SPECIAL.sub(r'\\\1', line)
+        # List markers, thematic breaks and setext underlines at the start of a line
+        lines.append(_LINE_START_SPECIAL.sub(lambda m: m.group(1) + re.sub(r'([-+=.)])', r'\\\1', m.group(2)),
+                                             line))
+    return '\n'.join(lines) + '\n'
+
+
+# (input format, output format) -> (function, whether it needs markdown-it)
+FAST_CONVERSIONS = {
+    ('md', 'html'): (markdown_to_html, True),
+    ('markdown', 'html'): (markdown_to_html, True),
+    ('md', 'htm'): (markdown_to_html, True),
+    ('markdown', 'htm'): (markdown_to_html, True),
+    ('html', 'txt'): (html_to_text, False),
+    ('htm', 'txt'): (html_to_text, False),
+    ('txt', 'md'): (text_to_markdown, False),
+    ('txt', 'markdown'): (text_to_markdown, False),
+}
+
+
+def supports(input_format: str, output_format: str) -> bool:
+    """Whether the fast path can handle this pair here (MD → HTML needs markdown-it-py)."""
+    entry = FAST_CONVERSIONS.get((input_format, output_format))
+    return entry is not None and (not entry[1] or markdown_available())
+
+
+def convert_fast(input_file: Path, output_file: Path) -> None:
+    """Convert one document in-process; the pair must pass supports()."""
+    function, _ = FAST_CONVERSIONS[(input_file.suffix.lower().lstrip('.'),
+                                    output_file.suffix.lower().lstrip('.'))]
+    text = input_file.read_text(encoding='utf-8', errors='replace')
+    if function is markdown_to_html:
+        result = markdown_to_html(text, input_file.stem)
+    else:
+        result = function(text)
+    output_file.write_text(result, encoding='utf-8')
@@ -0,0 +1,706 @@
+#!/usr/bin/env python3
+"""
+Memory-bounded conversion of very large images.
+Reads, resizes and writes the raster in horizontal bands, so converting a
+gigapixel scan needs memory for a band rather than for the whole image.
+
+Inputs:
+- Uncompressed BMP, PPM/PGM/PBM and TIFF are memory-mapped; each band is
+  unpacked straight from the mapping and the pages are released again
+- Deflate or PackBits TIFF (striped or tiled) is decoded strip by strip
+  or tile row by tile row
+- Anything else (PNG, JPEG, LZW TIFF, ...) is decoded once by Pillow and
+  then processed band by band without further full-size copies
+
+Outputs:
+- TIFF is written strip by strip, or as a tiled TIFF, with deflate
+  compression (BigTIFF when the raster may exceed 4 GB)
+- PNG is written as a single streamed zlib stream
+- Other formats are assembled in memory, which is only allowed when the
+  output is small enough (e.g. a downscaled preview)
+
+The decompression-bomb check is skipped for large-mode inputs: it guards
+against decoding huge rasters at once, which this module avoids.
+"""
+
+import io
+import math
+import mmap
+import struct
+import zlib
+from pathlib import Path
+from metrics import stage
+from PIL import Image, ImageChops
+
+
+# Default memory budget for one band of decoded pixels
+BAND_BYTES = 64 * 1024 ** 2
+
+# Pages the kernel may map around a faulting page of a memory-mapped file
+FAULT_AROUND = 64 * 1024
+
+# Target uncompressed size of one TIFF strip
+STRIP_BYTES = 256 * 1024
+
+# Default edge length of TIFF tiles (must be a multiple of 16); 0 writes strips
+TILE_SIZE = 512
+
+# Output formats written band by band
+STREAM_FORMATS = {'tif', 'tiff', 'png'}
+
+# Bits per pixel of the raw modes found in uncompressed BMP, PPM and TIFF files
+RAW_BITS = {
+    '1': 1, '1;I': 1, '1;R': 1, '1;IR': 1, 'P;1': 1, 'P;2': 2, 'P;4': 4,
+    'L': 8, 'L;I': 8, 'P': 8, 'LA': 16, 'PA': 16, 'I;16': 16, 'I;16B': 16, 'I;16L': 16,
+    'RGB': 24, 'BGR': 24, 'RGBA': 32, 'BGRA': 32, 'BGRX': 32, 'RGBX': 32, 'RGBa': 32,
+    'CMYK': 32, 'RGB;16B': 48, 'RGBA;16B': 64,
+}
+
+# Compressed TIFF layouts decoded here strip by strip (Pillow names)
+TIFF_CODECS = {'tiff_adobe_deflate', 'tiff_deflate', 'packbits'}
+
+# Output mode -> (TIFF BitsPerSample, Photometric, ExtraSamples, raw mode)
+TIFF_MODES = {
+    '1': ((1,), 1, None, '1'),
+    'L': ((8,), 1, None, 'L'),
+    'LA': ((8, 8), 1, 2, 'LA'),
+    'I;16': ((16,), 1, None, 'I;16'),
+    'RGB': ((8, 8, 8), 2, None, 'RGB'),
+    'RGBA': ((8, 8, 8, 8), 2, 2, 'RGBA'),
+    'CMYK': ((8, 8, 8, 8), 5, None, 'CMYK'),
+}
+
+# Output mode -> (PNG bit depth, colour type, raw mode)
+PNG_MODES = {
+    '1': (1, 0, '1'),
+    'L': (8, 0, 'L'),
+    'LA': (8, 4, 'LA'),
+    'I;16': (16, 0, 'I;16B'),
+    'P': (8, 3, 'P'),
+    'RGB': (8, 2, 'RGB'),
+    'RGBA': (8, 6, 'RGBA'),
+}
+
+
+def open_unchecked(path: Path) -> Image.Image:
+    """Image.open without the decompression-bomb check (the raster is never decoded at once)."""
+    limit = Image.MAX_IMAGE_PIXELS
+    Image.MAX_IMAGE_PIXELS = None
+    try:
+        return Image.open(path)
+    finally:
+        Image.MAX_IMAGE_PIXELS = limit
+
+
+def pixel_bytes(mode: str) -> int:
+    """Bytes Pillow uses per pixel in memory."""
+    return 1 if mode in ('1', 'L', 'P') else 2 if mode.startswith('I;16') else 4
+
+
+def band_height(row_bytes: float, band_bytes: int) -> int:
+    """Rows per band when each row costs row_bytes (at least one)."""
+    return max(1, int(band_bytes // max(1, row_bytes)))
+
+
+class BandReader:
+    """
+    Reads horizontal bands of an opened image.
+    
+    Subclasses implement read(); this base decodes the whole image once
+    with Pillow and crops bands from it, for formats that cannot be read
+    piecewise.
+    """
+    
+    def __init__(self, img: Image.Image):
+        self.img = img
+        self.size = img.size
+        self.mode = img.mode
+        self.info = img.info
+        self.palette = img.palette
+    
+    def read(self, top: int, bottom: int) -> Image.Image:
+        """Return rows top..bottom-1 as an image."""
+        self.img.load()
+        return self.img.crop((0, top, self.size[0], bottom))
+    
+    def new_band(self, rows: int) -> Image.Image:
+        band = Image.new(self.mode, (self.size[0], rows))
+        if self.palette is not None:
+            band.putpalette(self.palette.palette, self.palette.rawmode or self.palette.mode)
+        return band
+    
+    def close(self) -> None:
+        self.img.close()
+
+
+class MappedReader(BandReader):
+    """
+    Memory-maps an uncompressed image and unpacks bands from the mapping.
+    
+    Pillow describes the pixel data as 'raw' tiles (one per BMP or PPM file,
+    one per TIFF strip or tile); each band unpacks the rows it covers from
+    every tile it overlaps. Pages are dropped from the mapping once a band
+    has been read, so resident memory stays at about one band.
+    """
+    
+    def __init__(self, img: Image.Image, path: Path):
+        super().__init__(img)
+        self.tiles = []
+        for tile in img.tile:
+            rawmode, stride, orientation = (tile.args, 0, 1) if isinstance(tile.args, str) else tile.args[:3]
+            x0, y0, x1, y1 = tile.extents
+            stride = stride or (RAW_BITS[rawmode] * (x1 - x0) + 7) // 8
+            self.tiles.append((tile.extents, tile.offset, rawmode, stride, orientation))
+        with open(path, 'rb') as fp:
+            self.map = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+    
+    @classmethod
+    def supports(cls, img: Image.Image) -> bool:
+        """Whether every tile of img is uncompressed data in a known raw mode."""
+        if not getattr(img, 'filename', None) or not img.tile or getattr(img, 'n_frames', 1) > 1:
+            return False
+        for tile in img.tile:
+            args = (tile.args,) if isinstance(tile.args, str) else tile.args
+            if tile.codec_name != 'raw' or args[0] not in RAW_BITS or (len(args) > 2 and args[2] not in (1, -1)):
+                return False
+        return True
+    
+    def read(self, top: int, bottom: int) -> Image.Image:
+        band = self.new_band(bottom - top)
+        low, high = len(self.map), 0
+        for (x0, y0, x1, y1), offset, rawmode, stride, orientation in self.tiles:
+            first, last = max(top, y0), min(bottom, y1)
+            if first >= last:
+                continue
+            # Bottom-up tiles (BMP) store the last row first
+            row = first - y0 if orientation == 1 else y1 - last
+            start = offset + row * stride
+            end = start + (last - first) * stride
+            if end > len(self.map):
+                raise ValueError("Image data is truncated")
+            piece = Image.frombuffer(self.mode, (x1 - x0, last - first), self.map[start:end], 'raw',
+                                     rawmode, stride, orientation)
+            band.paste(piece, (x0, first - top))
+            low, high = min(low, start), max(high, end)
+        if low < high:
+            self.release(low, high)
+        return band
+    
+    def release(self, start: int, end: int) -> None:
+        """
+        Drop the mapped pages around a byte range that has been read.
+        
+        A page fault maps a whole window of neighbouring cached pages
+        (fault-around), so the range is widened by that window; pages
+        still needed are simply faulted in again. No-op where madvise is
+        unsupported.
+        """
+        if hasattr(mmap, 'MADV_DONTNEED'):
+            start = max(0, start - FAULT_AROUND)
+            start -= start % mmap.PAGESIZE
+            end = min(len(self.map), end + FAULT_AROUND)
+            self.map.madvise(mmap.MADV_DONTNEED, start, end - start)
+    
+    def close(self) -> None:
+        self.map.close()
+        super().close()
+
+
+class TiffStripReader(BandReader):
+    """
+    Decodes a deflate or PackBits TIFF one strip (or row of tiles) at a time.
+    
+    The most recently decoded strip or tile row is kept, since bands rarely
+    line up with strip boundaries.
+    """
+    
+    def __init__(self, img: Image.Image, path: Path):
+        super().__init__(img)
+        tags = img.tag_v2
+        width, height = img.size
+        if 324 in tags:  # TileOffsets
+            self.block = (tags[322], tags[323])
+            self.offsets, self.counts = tags[324], tags[325]
+        else:
+            self.block = (width, tags.get(278, height))
+            self.offsets, self.counts = tags[273], tags[279]
+        self.across = -(-width // self.block[0])
+        self.rawmode = img.tile[0].args[0]
+        self.codec = img.info['compression']
+        self.fp = open(path, 'rb')
+        self.cached = (None, None)
+    
+    @classmethod
+    def supports(cls, img: Image.Image, band_bytes: int) -> bool:
+        """Whether img is a single-image deflate/PackBits TIFF with 8-bit or bilevel samples."""
+        if img.format != 'TIFF' or img.info.get('compression') not in TIFF_CODECS:
+            return False
+        if getattr(img, 'n_frames', 1) > 1 or not img.tile:
+            return False
+        tags = img.tag_v2
+        bits = set(tags.get(258, (1,)))
+        block_rows = tags.get(323) if 324 in tags else tags.get(278, img.height)
+        return (tags.get(317, 1) == 1 and tags.get(284, 1) == 1 and tags.get(266, 1) == 1
+                and bits in ({1}, {8}) and img.width * min(block_rows, img.height) * pixel_bytes(img.mode) <= band_bytes)
+    
+    def decode_block(self, index: int, rows: int) -> Image.Image:
+        self.fp.seek(self.offsets[index])
+        data = self.fp.read(self.counts[index])
+        if self.codec == 'packbits':
+            return Image.frombytes(self.mode, (self.block[0], rows), data, 'packbits', self.rawmode)
+        return Image.frombytes(self.mode, (self.block[0], rows), zlib.decompress(data), 'raw', self.rawmode)
+    
+    def block_row(self, index: int) -> Image.Image:
+        """Decode the strip, or the row of tiles, number index."""
+        if self.cached[0] != index:
+            rows = min(self.block[1], self.size[1] - index * self.block[1])
+            # Tiles are stored at full size; the last strip holds only the remaining rows
+            stored = self.block[1] if self.across > 1 or self.block[0] != self.size[0] else rows
+            band = self.new_band(rows)
+            for column in range(self.across):
+                band.paste(self.decode_block(index * self.across + column, stored),
+                           (column * self.block[0], 0))
+            self.cached = (index, band)
+        return self.cached[1]
+    
+    def read(self, top: int, bottom: int) -> Image.Image:
+        band = self.new_band(bottom - top)
+        height = self.block[1]
+        for index in range(top // height, (bottom - 1) // height + 1):
+            row = self.block_row(index)
+            y0 = index * height
+            first, last = max(top, y0), min(bottom, y0 + row.height)
+            band.paste(row.crop((0, first - y0, self.size[0], last - y0)), (0, first - top))
+        return band
+    
+    def close(self) -> None:
+        self.fp.close()
+        super().close()
+
+
+def open_reader(path: Path, band_bytes: int = BAND_BYTES, draft_size: tuple = None) -> BandReader:
+    """
+    Open an image for band-wise reading with the cheapest reader its layout allows.
+    
+    Args:
+        path: Input image
+        band_bytes: Memory budget of one band
+        draft_size: Smallest size the caller needs; lets JPEG decoding
+            scale down while decoding (see convert_image.draft_for_size)
+    """
+    img = open_unchecked(path)
+    if MappedReader.supports(img):
+        return MappedReader(img, path)
+    if TiffStripReader.supports(img, band_bytes):
+        return TiffStripReader(img, path)
+    if draft_size and img.format == 'JPEG':
+        img.draft(img.mode, draft_size)
+    return BandReader(img)
+
+
+def source_bands(reader: BandReader, band_bytes: int):
+    """Yield the image unchanged in bands within band_bytes."""
+    width, height = reader.size
+    rows = band_height(width * pixel_bytes(reader.mode), band_bytes)
+    for top in range(0, height, rows):
+        with stage('decode'):
+            band = reader.read(top, min(height, top + rows))
+        yield band
+
+
+def resized_mode(mode: str, info: dict) -> str:
+    """Mode of a resized image: palette and bilevel images are resampled in RGB(A)."""
+    if mode in ('P', '1'):
+        return 'RGBA' if 'transparency' in info else 'RGB'
+    return mode
+
+
+def keyed_mode(mode: str, info: dict) -> str:
+    """
+    Mode that keeps a transparent palette entry or colour key as alpha.
+    
+    The streaming writers do not write tRNS chunks or palettes with alpha,
+    so such images are streamed with an alpha channel instead.
+    """
+    if 'transparency' not in info:
+        return mode
+    if mode in ('1', 'L'):
+        return 'LA'
+    return 'RGBA' if mode in ('P', 'RGB') else mode
+
+
+def resized_bands(reader: BandReader, size: tuple, band_bytes: int):
+    """
+    Yield the image resized to size, in bands whose source rows fit band_bytes.
+    
+    Matches convert_image.resize_image(): an integer reduce() followed by
+    a Lanczos resample. Each band reads enough source rows around it for
+    the filter, so band edges are seamless.
+    """
+    source_width, source_height = reader.size
+    factor = min(source_width // size[0], source_height // size[1])
+    factor = factor if factor >= 2 else 1
+    reduced = (-(-source_width // factor), -(-source_height // factor))
+    scale = reduced[1] / size[1]
+    # Lanczos reaches 3 source pixels each way, stretched when downscaling
+    margin = 3 * max(scale, 1.0) + 1
+    # Every output row needs scale * factor source rows
+    rows = band_height(source_width * pixel_bytes(reader.mode) * max(1.0, scale * factor), band_bytes)
+    
+    for top in range(0, size[1], rows):
+        bottom = min(size[1], top + rows)
+        y0, y1 = top * scale, bottom * scale
+        first = max(0, math.floor(y0 - margin))
+        last = min(reduced[1], math.ceil(y1 + margin))
+        
+        with stage('decode'):
+            source = reader.read(first * factor, min(source_height, last * factor))
+        with stage('resize'):
+            if source.mode in ('P', '1'):
+                source = source.convert(resized_mode(source.mode, reader.info))
+            if factor > 1:
+                source = source.reduce(factor)
+            band = source.resize((size[0], bottom - top), Image.LANCZOS,
+                                 box=(0, y0 - first, reduced[0], y1 - first))
+        yield band
+
+
+def stream_mode(mode: str, output_format: str) -> str:
+    """Mode a band must have for the streaming writer of output_format."""
+    supported = PNG_MODES if output_format == 'png' else TIFF_MODES
+    if mode in supported:
+        return mode
+    if mode in ('PA', 'RGBa'):
+        return 'RGBA'
+    return 'L' if mode in ('I', 'F', 'L;I') else 'RGB'
+
+
+class TiffWriter:
+    """
+    Write a TIFF band by band: deflate-compressed strips, or square tiles.
+    
+    Bands of any height are collected into whole strips or rows of tiles,
+    which are compressed and written out as soon as they are complete; the
+    directory (IFD) is written at the end and the header patched to point
+    at it.
+    
+    Args:
+        path: Output file
+        size: (width, height) of the image
+        mode: One of TIFF_MODES
+        level: zlib compression level (0 stores the data uncompressed)
+        tile_size: Tile edge length (multiple of 16), or 0 for strips
+        dpi: (x, y) resolution to record
+        icc_profile: ICC profile bytes to embed
+    """
+    
+    def __init__(self, path: Path, size: tuple, mode: str, level: int = 6, tile_size: int = TILE_SIZE,
+                 dpi: tuple = None, icc_profile: bytes = None):
+        if tile_size % 16:
+            raise ValueError(f"TIFF tile size must be a multiple of 16: {tile_size}")
+        self.size = size
+        self.mode = mode
+        self.bits, self.photometric, self.extra, self.rawmode = TIFF_MODES[mode]
+        self.level = level
+        self.tile_size = tile_size
+        self.dpi = dpi
+        self.icc_profile = icc_profile
+        
+        row_bytes = (sum(self.bits) * size[0] + 7) // 8
+        self.block_rows = tile_size or max(1, min(size[1], STRIP_BYTES // row_bytes))
+        # Deflate may expand incompressible data slightly; leave headroom below 4 GB
+        self.big = row_bytes * size[1] * 1.01 > 2 ** 32 - 2 ** 26
+        self.offsets = []
+        self.counts = []
+        self.pending = Image.new(mode, (size[0], self.block_rows))
+        self.filled = 0
+        
+        self.fp = open(path, 'wb')
+        if self.big:
+            self.fp.write(b'II+\x00' + struct.pack('<HHQ', 8, 0, 0))
+        else:
+            self.fp.write(b'II*\x00' + struct.pack('<I', 0))
+    
+    def write_block(self, block: Image.Image) -> None:
+        data = block.tobytes('raw', self.rawmode)
+        if self.level:
+            data = zlib.compress(data, self.level)
+        self.offsets.append(self.fp.tell())
+        self.counts.append(len(data))
+        self.fp.write(data)
+    
+    def flush(self) -> None:
+        """Write the collected rows as one strip or one row of tiles."""
+        if not self.tile_size:
+            self.write_block(self.pending.crop((0, 0, self.size[0], self.filled)))
+        else:
+            # Edge tiles are padded to full size, as TIFF requires
+            for x in range(0, self.size[0], self.tile_size):
+                self.write_block(self.pending.crop((x, 0, x + self.tile_size, self.tile_size)))
+        self.pending = Image.new(self.mode, self.pending.size)
+        self.filled = 0
+    
+    def write(self, band: Image.Image) -> None:
+        y = 0
+        while y < band.height:
+            rows = min(band.height - y, self.block_rows - self.filled)
+            self.pending.paste(band.crop((0, y, self.size[0], y + rows)), (0, self.filled))
+            self.filled += rows
+            y += rows
+            if self.filled == self.block_rows:
+                self.flush()
+    
+    def close(self) -> None:
+        """Write the last rows and the image directory, and close the file."""
+        try:
+            if self.filled:
+                self.flush()
+            self.write_directory()
+        finally:
+            self.fp.close()
+    
+    def write_directory(self) -> None:
+        long_type = 16 if self.big else 4  # LONG8 : LONG
+        entries = [
+            (256, 4, [self.size[0]]),
+            (257, 4, [self.size[1]]),
+            (258, 3, list(self.bits)),
+            (259, 3, [8 if self.level else 1]),
+            (262, 3, [self.photometric]),
+            (277, 3, [len(self.bits)]),
+            (284, 3, [1]),
+        ]
+        if self.tile_size:
+            entries += [(322, 4, [self.tile_size]), (323, 4, [self.tile_size]),
+                        (324, long_type, self.offsets), (325, long_type, self.counts)]
+        else:
+            entries += [(273, long_type, self.offsets), (278, 4, [self.block_rows]),
+                        (279, long_type, self.counts)]
+        if self.extra is not None:
+            entries.append((338, 3, [self.extra]))
+        if self.dpi:
+            entries += [(282, 5, [(round(self.dpi[0] * 1000), 1000)]),
+                        (283, 5, [(round(self.dpi[1] * 1000), 1000)]), (296, 3, [2])]
+        if self.icc_profile:
+            entries.append((34675, 7, self.icc_profile))
+        entries.sort()
+        
+        # Directory layout: count, entries, next-IFD offset, then values too big to inline
+        if self.big:
+            count_format, entry_format, offset_format, inline = '<Q', '<HHQ', '<Q', 8
+        else:
+            count_format, entry_format, offset_format, inline = '<H', '<HHI', '<I', 4
+        formats = {3: 'H', 4: 'I', 16: 'Q'}
+        
+        self.fp.seek(0, io.SEEK_END)
+        if self.fp.tell() % 2:
+            self.fp.write(b'\x00')
+        ifd_offset = self.fp.tell()
+        entry_size = struct.calcsize(entry_format) + inline
+        values_offset = (ifd_offset + struct.calcsize(count_format) + len(entries) * entry_size
+                         + struct.calcsize(offset_format))
+        
+        directory, values = [struct.pack(count_format, len(entries))], []
+        for tag, kind, data in entries:
+            if kind == 5:
+                payload = b''.join(struct.pack('<II', *rational) for rational in data)
+            elif kind == 7:
+                payload = bytes(data)
+            else:
+                payload = struct.pack(f'<{len(data)}{formats[kind]}', *data)
+            directory.append(struct.pack(entry_format, tag, kind, len(data) if kind != 7 else len(payload)))
+            if len(payload) <= inline:
+                directory.append(payload.ljust(inline, b'\x00'))
+            else:
+                directory.append(struct.pack(offset_format, values_offset).ljust(inline, b'\x00'))
+                values.append(payload)
+                values_offset += len(payload) + len(payload) % 2
+                if len(payload) % 2:
+                    values.append(b'\x00')
+        directory.append(struct.pack(offset_format, 0))
+        self.fp.write(b''.join(directory + values))
+        
+        # Point the header at the directory
+        self.fp.seek(8 if self.big else 4)
+        self.fp.write(struct.pack(offset_format, ifd_offset))
+
+
+class PngWriter:
+    """
+    Write a PNG band by band as one streamed zlib stream.
+    
+    Rows of 8-bit images use the 'Up' filter (difference to the row
+    above, computed for a whole band with ImageChops.subtract_modulo);
+    other bit depths and palette images are stored unfiltered.
+    
+    Args:
+        path: Output file
+        size: (width, height) of the image
+        mode: One of PNG_MODES
+        level: zlib compression level
+        dpi: (x, y) resolution to record
+        icc_profile: ICC profile bytes to embed
+    """
+    
+    CHUNK_BYTES = 1024 ** 2
+    
+    def __init__(self, path: Path, size: tuple, mode: str, level: int = 6, dpi: tuple = None,
+                 icc_profile: bytes = None):
+        self.size = size
+        self.mode = mode
+        self.depth, self.color_type, self.rawmode = PNG_MODES[mode]
+        self.filtered = self.depth == 8 and mode != 'P'
+        self.dpi = dpi
+        self.icc_profile = icc_profile
+        self.compressor = zlib.compressobj(level)
+        self.pending = []
+        self.previous = None
+        self.fp = open(path, 'wb')
+        self.fp.write(b'\x89PNG\r\n\x1a\n')
+        self.header_written = False
+    
+    def chunk(self, kind: bytes, data: bytes) -> None:
+        self.fp.write(struct.pack('>I', len(data)) + kind + data)
+        self.fp.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(kind))))
+    
+    def write_header(self, band: Image.Image) -> None:
+        self.chunk(b'IHDR', struct.pack('>IIBBBBB', *self.size, self.depth, self.color_type, 0, 0, 0))
+        if self.icc_profile:
+            self.chunk(b'iCCP', b'ICC Profile\x00\x00' + zlib.compress(self.icc_profile))
+        if self.dpi:
+            # Pixels per metre
+            self.chunk(b'pHYs', struct.pack('>IIB', round(self.dpi[0] / 0.0254),
+                                            round(self.dpi[1] / 0.0254), 1))
+        if self.mode == 'P':
+            self.chunk(b'PLTE', bytes(band.getpalette('RGB')))
+        self.header_written = True
+    
+    def emit(self, data: bytes, final: bool = False) -> None:
+        """Collect compressed output and write it as IDAT chunks of about CHUNK_BYTES."""
+        if data:
+            self.pending.append(data)
+        if self.pending and (final or sum(map(len, self.pending)) >= self.CHUNK_BYTES):
+            self.chunk(b'IDAT', b''.join(self.pending))
+            self.pending = []
+    
+    def write(self, band: Image.Image) -> None:
+        if not self.header_written:
+            self.write_header(band)
+        # Filter and compress a few rows at a time so the copies stay small
+        width, height = band.size
+        rows = band_height(width * pixel_bytes(band.mode), STRIP_BYTES)
+        for top in range(0, height, rows):
+            self.write_rows(band.crop((0, top, width, min(height, top + rows))) if rows < height else band)
+    
+    def write_rows(self, band: Image.Image) -> None:
+        width, rows = band.size
+        if self.filtered:
+            above = Image.new(band.mode, band.size)
+            if self.previous is not None:
+                above.paste(self.previous, (0, 0))
+            above.paste(band.crop((0, 0, width, rows - 1)), (0, 1))
+            self.previous = band.crop((0, rows - 1, width, rows))
+            band = ImageChops.subtract_modulo(band, above)
+        
+        data = band.tobytes('raw', self.rawmode)
+        stride = len(data) // rows
+        marker = b'\x02' if self.filtered else b'\x00'
+        scanlines = b''.join(marker + data[row * stride:(row + 1) * stride] for row in range(rows))
+        self.emit(self.compressor.compress(scanlines))
+    
+    def close(self) -> None:
+        try:
+            self.emit(self.compressor.flush(), final=True)
+            self.chunk(b'IEND', b'')
+        finally:
+            self.fp.close()
+
+
+def open_writer(output_file: Path, size: tuple, mode: str, level: int = 6, tile_size: int = TILE_SIZE,
+                dpi: tuple = None, icc_profile: bytes = None):
+    """Return a band writer for a TIFF or PNG output (mode from stream_mode())."""
+    if output_file.suffix.lower() == '.png':
+        return PngWriter(output_file, size, mode, level, dpi, icc_profile)
+    return TiffWriter(output_file, size, mode, level, tile_size, dpi, icc_profile)
+
+
+def convert_large(input_file: Path, output_file: Path, size: tuple = None, level: int = 6,
+                  tile_size: int = TILE_SIZE, band_bytes: int = BAND_BYTES, save=None) -> tuple:
+    """
+    Convert an image band by band.
+    
+    Args:
+        input_file: Input image
+        output_file: Output path; TIFF and PNG are streamed
+        size: Output (width, height), or None to keep the input size
+        level: zlib level for TIFF/PNG output
+        tile_size: TIFF tile edge length, or 0 for strips
+        band_bytes: Memory budget of one band of decoded pixels
+        save: save(image, output_file) for formats that cannot be streamed;
+            the output is assembled in memory and must not exceed
+            Image.MAX_IMAGE_PIXELS
+    
+    Returns:
+        (input size, output size)
+    """
+    output_format = output_file.suffix.lower().lstrip('.')
+    reader = open_reader(input_file, band_bytes, size)
+    try:
+        source_size = reader.size
+        size = size or source_size
+        resizing = size != source_size
+        
+        dpi = reader.info.get('dpi')
+        if dpi and resizing:
+            dpi = (dpi[0] * size[0] / source_size[0], dpi[1] * size[1] / source_size[1])
+        
+        if output_format not in STREAM_FORMATS and (
+                save is None or size[0] * size[1] > (Image.MAX_IMAGE_PIXELS or math.inf)):
+            raise ValueError(f"Large images are streamed to TIFF or PNG only; "
+                             f"{size[0]}x{size[1]} is too big to assemble as {output_format.upper()}")
+        
+        if resizing:
+            bands = resized_bands(reader, size, band_bytes)
+        else:
+            bands = source_bands(reader, band_bytes)
+        
+        if output_format not in STREAM_FORMATS:
+            canvas, top = None, 0
+            for band in bands:
+                if canvas is None:
+                    canvas = Image.new(band.mode, size)
+                    if band.mode == 'P':
+                        canvas.putpalette(band.getpalette())
+                    if 'transparency' in band.info:
+                        canvas.info['transparency'] = band.info['transparency']
+                canvas.paste(band, (0, top))
+                top += band.height
+            with stage('encode'):
+                save(canvas, output_file)
+            return source_size, size
+        
+        if resizing:
+            mode = stream_mode(resized_mode(reader.mode, reader.info), output_format)
+        else:
+            mode = stream_mode(keyed_mode(reader.mode, reader.info), output_format)
+        transparency = reader.info.get('transparency')
+        writer = open_writer(output_file, size, mode, level, tile_size, dpi, reader.info.get('icc_profile'))
+        try:
+            for band in bands:
+                with stage('encode'):
+                    if band.mode != mode:
+                        # convert() turns the transparent entry into alpha
+                        if transparency is not None and band.mode == reader.mode:
+                            band.info['transparency'] = transparency
+                        band = band.convert(mode)
+                    writer.write(band)
+            with stage('encode'):
+                writer.close()
+        except BaseException:
+            # Leave no truncated output behind
+            writer.fp.close()
+            output_file.unlink(missing_ok=True)
+            raise
+    finally:
+        reader.close()
+    return source_size, size
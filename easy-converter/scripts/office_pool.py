@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Persistent LibreOffice worker pool.
+Keeps long-lived headless soffice instances and converts documents over UNO.
+
+Each instance gets its own user profile (-env:UserInstallation) and its own
+UNO pipe, so concurrent conversions never fight over a shared profile and
+never pay soffice startup per file. Instances that hang or crash are killed
+and restarted.
+
+Requires the LibreOffice Python bridge (``uno``), e.g.:
+    apt-get install python3-uno
+"""
+
+import os
+import sys
+import time
+import queue
+import shutil
+import atexit
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import argparse
+
+
+# Input formats handled by each LibreOffice application
+IMPRESS_FORMATS = {'pptx', 'ppt', 'odp'}
+WRITER_FORMATS = {'docx', 'doc', 'odt', 'rtf', 'txt', 'html', 'htm'}
+
+# Export filter names: (application, output format) -> LibreOffice filter
+EXPORT_FILTERS = {
+    ('impress', 'pdf'): 'impress_pdf_Export',
+    ('impress', 'png'): 'impress_png_Export',
+    ('impress', 'pptx'): 'Impress MS PowerPoint 2007 XML',
+    ('impress', 'ppt'): 'MS PowerPoint 97',
+    ('impress', 'odp'): 'impress8',
+    ('writer', 'pdf'): 'writer_pdf_Export',
+    ('writer', 'docx'): 'MS Word 2007 XML',
+    ('writer', 'doc'): 'MS Word 97',
+    ('writer', 'odt'): 'writer8',
+    ('writer', 'rtf'): 'Rich Text Format',
+    ('writer', 'txt'): 'Text',
+    ('writer', 'html'): 'HTML (StarWriter)',
+    ('writer', 'htm'): 'HTML (StarWriter)',
+    ('writer', 'epub'): 'EPUB',
+}
+
+
+def get_export_filter(input_format: str, output_format: str) -> str:
+    """Return the LibreOffice export filter for a conversion."""
+    if input_format in IMPRESS_FORMATS:
+        application = 'impress'
+    elif input_format in WRITER_FORMATS:
+        application = 'writer'
+    else:
+        raise ValueError(f"Unsupported LibreOffice input format: {input_format}")
+    
+    try:
+        return EXPORT_FILTERS[(application, output_format)]
+    except KeyError:
+        raise ValueError(f"Unsupported conversion: {input_format} → {output_format}") from None
+
+
+def _property(name: str, value):
+    """Build a com.sun.star.beans.PropertyValue."""
+    import uno
+    prop = uno.createUnoStruct('com.sun.star.beans.PropertyValue')
+    prop.Name = name
+    prop.Value = value
+    return prop
+
+
+class OfficeInstance:
+    """A single headless soffice process listening on a private UNO pipe."""
+    
+    def __init__(self, index: int, work_dir: Path, binary: str = 'soffice',
+                 startup_timeout: float = 60):
+        self.index = index
+        self.binary = binary
+        self.startup_timeout = startup_timeout
+        self.pipe_name = f"easy_converter_{os.getpid()}_{index}"
+        self.profile_dir = work_dir / f"profile_{index}"
+        self.process = None
+        self.desktop = None
+        self.conversions = 0
+    
+    def start(self) -> None:
+        """Launch soffice and wait until its UNO bridge accepts connections."""
+        cmd = [
+            self.binary,
+            '--headless',
+            '--invisible',
+            '--nologo',
+            '--norestore',
+            '--nodefault',
+            f'-env:UserInstallation={self.profile_dir.as_uri()}',
+            f'--accept=pipe,name={self.pipe_name};urp;StarOffice.ComponentContext',
+        ]
+        self.process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.conversions = 0
+        self.desktop = self._connect()
+    
+    def _connect(self):
+        import uno
+        from com.sun.star.connection import NoConnectException
+        
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            'com.sun.star.bridge.UnoUrlResolver', local_context)
+        url = f'uno:pipe,name={self.pipe_name};urp;StarOffice.ComponentContext'
+        
+        deadline = time.monotonic() + self.startup_timeout
+        while True:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"soffice exited during startup (code {self.process.returncode})")
+            try:
+                context = resolver.resolve(url)
+                return context.ServiceManager.createInstanceWithContext(
+                    'com.sun.star.frame.Desktop', context)
+            except NoConnectException:
+                if time.monotonic() > deadline:
+                    self.kill()
+                    raise RuntimeError(f"soffice did not accept connections within {self.startup_timeout}s")
+                time.sleep(0.25)
+    
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+    
+    def convert(self, input_file: Path, output_file: Path, export_filter: str) -> None:
+        """Load a document hidden, export it with the given filter and close it."""
+        document = self.desktop.loadComponentFromURL(
+            input_file.resolve().as_uri(), '_blank', 0, (_property('Hidden', True),))
+        if document is None:
+            raise RuntimeError(f"LibreOffice could not open: {input_file.name}")
+        try:
+            document.storeToURL(output_file.resolve().as_uri(),
+                                (_property('FilterName', export_filter),))
+        finally:
+            document.close(True)
+        self.conversions += 1
+    
+    def kill(self) -> None:
+        """Terminate the soffice process without waiting for a clean shutdown."""
+        if self.process is not None and self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+        self.desktop = None
+    
+    def stop(self) -> None:
+        """Ask soffice to exit, falling back to kill."""
+        if self.desktop is not None and self.is_alive():
+            try:
+                self.desktop.terminate()
+                self.process.wait(timeout=10)
+            except Exception:
+                pass
+        self.kill()
+    
+    def reset(self) -> None:
+        """Discard the profile of a crashed or hung instance and start fresh."""
+        self.kill()
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+        self.start()
+
+
+class OfficePool:
+    """
+    Pool of long-lived LibreOffice instances.
+    
+    Conversions are dispatched to whichever instance is idle; callers block
+    while all instances are busy. Safe to use from multiple threads.
+    
+    Args:
+        size: Number of soffice instances to keep running
+        binary: soffice executable
+        timeout: Seconds a single conversion may take before the instance
+            is considered hung, killed and restarted
+        max_conversions: Restart an instance after this many conversions
+            to bound memory growth inside soffice
+    """
+    
+    def __init__(self, size: int = 2, binary: str = 'soffice', timeout: float = 120,
+                 max_conversions: int = 200):
+        self.timeout = timeout
+        self.max_conversions = max_conversions
+        self.work_dir = Path(tempfile.mkdtemp(prefix='office_pool_'))
+        self.instances = [OfficeInstance(i, self.work_dir, binary) for i in range(size)]
+        self.idle = queue.Queue()
+        
+        try:
+            for instance in self.instances:
+                instance.start()
+                self.idle.put(instance)
+        except BaseException:
+            # Don't leave the instances started so far (or their profiles) behind
+            self.close()
+            raise
+    
+    def convert(self, input_path: str, output_path: str) -> None:
+        """
+        Convert a document on the next idle instance.
+        
+        Args:
+            input_path: Path to input document or presentation
+            output_path: Path to output file; the extension selects the export filter
+        """
+        input_file = Path(input_path)
+        output_file = Path(output_path)
+        
+        if not input_file.exists():
+            raise FileNotFoundError(f"Input file not found: {input_path}")
+        
+        export_filter = get_export_filter(input_file.suffix.lower().lstrip('.'),
+                                          output_file.suffix.lower().lstrip('.'))
+        
+        instance = self.idle.get()
+        try:
+            if not instance.is_alive() or instance.conversions >= self.max_conversions:
+                instance.reset()
+            
+            # Kill the instance if the conversion outlives the timeout; the
+            # pending UNO call then fails and the instance is recycled below.
+            # The call can fail before the watchdog thread has finished, so
+            # the watchdog flags the timeout before it kills.
+            expired = threading.Event()
+            
+            def expire():
+                expired.set()
+                instance.kill()
+            
+            watchdog = threading.Timer(self.timeout, expire)
+            watchdog.start()
+            try:
+                instance.convert(input_file, output_file, export_filter)
+            except Exception as e:
+                hung = expired.is_set()
+                if hung or not instance.is_alive():
+                    instance.reset()
+                if hung:
+                    raise RuntimeError(f"LibreOffice timed out after {self.timeout}s: {input_file.name}") from None
+                raise RuntimeError(f"LibreOffice conversion failed: {e}") from None
+            finally:
+                watchdog.cancel()
+        finally:
+            self.idle.put(instance)
+    
+    def close(self) -> None:
+        """Stop every instance and remove the profile directories."""
+        for instance in self.instances:
+            instance.stop()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_pool(size: int = None) -> OfficePool:
+    """
+    Return the process-wide pool, starting it on first use.
+    
+    Args:
+        size: Number of instances if the pool is created now
+            (default: CPU count, at most 4)
+    """
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = OfficePool(size or min(4, os.cpu_count() or 1))
+            atexit.register(_shared_pool.close)
+        return _shared_pool
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Convert documents and presentations with a pool of persistent LibreOffice instances'
+    )
+    parser.add_argument('inputs', nargs='+', help='Input files')
+    parser.add_argument('--to', required=True, metavar='EXT',
+                       help='Output format (e.g., pdf, docx, odt)')
+    parser.add_argument('--output-dir', help='Output directory (default: next to each input)')
+    parser.add_argument('--size', type=int, default=2,
+                       help='Number of LibreOffice instances (default: 2)')
+    parser.add_argument('--timeout', type=float, default=120,
+                       help='Seconds before a conversion is considered hung (default: 120)')
+    
+    args = parser.parse_args()
+    
+    failed = False
+    try:
+        with OfficePool(args.size, timeout=args.timeout) as pool:
+            def convert(input_path):
+                input_file = Path(input_path)
+                output_dir = Path(args.output_dir) if args.output_dir else input_file.parent
+                output_file = output_dir / f"{input_file.stem}.{args.to.lstrip('.')}"
+                pool.convert(input_file, output_file)
+                return input_file, output_file
+            
+            with ThreadPoolExecutor(max_workers=args.size) as threads:
+                futures = [threads.submit(convert, path) for path in args.inputs]
+                for path, future in zip(args.inputs, futures):
+                    try:
+                        input_file, output_file = future.result()
+                        print(f"✓ Converted: {input_file.name} → {output_file.name}")
+                    except Exception as e:
+                        failed = True
+                        print(f"✗ Error: {path}: {e}", file=sys.stderr)
+    except Exception as e:
+        print(f"✗ Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
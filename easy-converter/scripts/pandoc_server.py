@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Persistent pandoc server pool.
+Keeps long-lived ``pandoc server`` processes and converts documents over
+their local HTTP API, so a batch of many small documents does not pay
+pandoc startup per file.
+
+Documents are sent in batches through the server's /batch endpoint; each
+server is a separate process, so batches run in parallel on several
+cores. Servers that hang or crash are killed and restarted.
+
+PDF output needs a PDF engine and an output file, which the server
+cannot provide; convert those with the pandoc command line instead.
+
+Requires pandoc 3.0 or later (``pandoc server``), or pandoc 2.18+ with the
+separate ``pandoc-server`` executable (pass binary='pandoc-server').
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import base64
+import socket
+import atexit
+import threading
+import subprocess
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import argparse
+
+from convert_document import PANDOC_FORMATS
+from document_fastpath import split_front_matter
+
+
+# Formats pandoc reads and writes as binary; the server exchanges them base64-encoded
+BINARY_FORMATS = {'docx', 'odt', 'epub'}
+
+# Output formats the server cannot produce
+UNSUPPORTED_OUTPUTS = {'pdf'}
+
+
+def supports(output_format: str) -> bool:
+    return output_format not in UNSUPPORTED_OUTPUTS
+
+
+def build_request(input_file: Path, output_file: Path) -> dict:
+    """Build the server parameters converting input_file to output_file's format."""
+    input_format = input_file.suffix.lower().lstrip('.')
+    output_format = output_file.suffix.lower().lstrip('.')
+    if input_format in BINARY_FORMATS:
+        text = base64.b64encode(input_file.read_bytes()).decode('ascii')
+    else:
+        text = input_file.read_text(encoding='utf-8', errors='replace')
+    params = {
+        'text': text,
+        'from': PANDOC_FORMATS.get(input_format, input_format),
+        'to': PANDOC_FORMATS.get(output_format, output_format),
+        'standalone': True,
+    }
+    # Like the command line, title untitled Markdown documents after the file
+    # (a pagetitle variable would override a title the document sets itself)
+    if input_format in ('md', 'markdown') and split_front_matter(text)[0] is None:
+        params['variables'] = {'pagetitle': input_file.stem}
+    return params
+
+
+def write_result(result: dict, output_file: Path) -> None:
+    """Write one /batch result to output_file, raising RuntimeError for a failed document."""
+    if 'error' in result:
+        raise RuntimeError(f"Pandoc conversion failed: {result['error']}")
+    if result.get('base64'):
+        output_file.write_bytes(base64.b64decode(result['output']))
+    else:
+        output_file.write_text(result['output'], encoding='utf-8')
+
+
+def free_port() -> int:
+    """Ask the OS for an unused local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class PandocServer:
+    """A single pandoc server process listening on a private local port."""
+    
+    def __init__(self, binary: str = 'pandoc', timeout: float = 120, startup_timeout: float = 30):
+        self.binary = binary
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self.process = None
+        self.port = None
+        self.conversions = 0
+    
+    def start(self) -> None:
+        """Launch the server and wait until it answers requests."""
+        self.port = free_port()
+        cmd = [self.binary] if Path(self.binary).name.startswith('pandoc-server') else [self.binary, 'server']
+        # --timeout bounds each request inside the server; pandoc's default of 2s is too short for batches
+        cmd += ['--port', str(self.port), '--timeout', str(max(1, int(self.timeout)))]
+        self.process = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                        stderr=subprocess.DEVNULL)
+        self.conversions = 0
+        
+        deadline = time.monotonic() + self.startup_timeout
+        while True:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"pandoc server exited during startup (code {self.process.returncode})")
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{self.port}/version', timeout=1):
+                    return
+            except OSError:
+                if time.monotonic() > deadline:
+                    self.kill()
+                    raise RuntimeError(f"pandoc server did not accept connections within {self.startup_timeout}s")
+                time.sleep(0.05)
+    
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+    
+    def convert_batch(self, requests: list) -> list:
+        """Send build_request() parameters to /batch and return one result per document."""
+        request = urllib.request.Request(
+            f'http://127.0.0.1:{self.port}/batch', data=json.dumps(requests).encode('utf-8'),
+            headers={'Content-Type': 'application/json', 'Accept': 'application/json'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            results = json.load(response)
+        self.conversions += len(requests)
+        return results
+    
+    def kill(self) -> None:
+        if self.process is not None and self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+    
+    def reset(self) -> None:
+        self.kill()
+        self.start()
+
+
+class PandocServerPool:
+    """
+    Pool of long-lived pandoc servers.
+    
+    Batches are dispatched to whichever server is idle; callers block while
+    all servers are busy. Safe to use from multiple threads.
+    
+    Args:
+        size: Number of server processes to keep running
+        binary: pandoc executable ('pandoc', or 'pandoc-server' for pandoc 2.x)
+        timeout: Seconds a batch may take before the server is considered
+            hung, killed and restarted
+        batch_size: Documents sent per request by convert_many()
+        max_conversions: Restart a server after this many documents to bound
+            memory growth
+    """
+    
+    def __init__(self, size: int = 2, binary: str = 'pandoc', timeout: float = 120,
+                 batch_size: int = 50, max_conversions: int = 10000):
+        self.batch_size = batch_size
+        self.max_conversions = max_conversions
+        self.servers = [PandocServer(binary, timeout) for _ in range(size)]
+        self.idle = queue.Queue()
+        
+        for server in self.servers:
+            server.start()
+            self.idle.put(server)
+    
+    def run_batch(self, requests: list) -> list:
+        """Convert build_request() parameters on the next idle server."""
+        server = self.idle.get()
+        try:
+            if not server.is_alive() or server.conversions >= self.max_conversions:
+                server.reset()
+            try:
+                results = server.convert_batch(requests)
+            except (OSError, ValueError) as e:
+                # Timed out, crashed or answered garbage: start afresh for the next batch
+                server.reset()
+                if isinstance(e, TimeoutError) or isinstance(getattr(e, 'reason', None), TimeoutError):
+                    raise RuntimeError(f"pandoc server timed out after {server.timeout}s") from None
+                raise RuntimeError(f"pandoc server failed: {e}") from None
+        finally:
+            self.idle.put(server)
+        
+        if len(results) != len(requests):
+            raise RuntimeError(f"pandoc server returned {len(results)} results for {len(requests)} documents")
+        return results
+    
+    def convert(self, input_path: str, output_path: str) -> None:
+        """
+        Convert a single document.
+        
+        Args:
+            input_path: Path to input document
+            output_path: Path to output file; the extension selects the pandoc writer
+        """
+        input_file = Path(input_path)
+        output_file = Path(output_path)
+        
+        if not input_file.exists():
+            raise FileNotFoundError(f"Input file not found: {input_path}")
+        if not supports(output_file.suffix.lower().lstrip('.')):
+            raise ValueError(f"pandoc server cannot write {output_file.suffix}")
+        
+        write_result(self.run_batch([build_request(input_file, output_file)])[0], output_file)
+    
+    def convert_many(self, jobs: list) -> list:
+        """
+        Convert (input, output) pairs in batches of batch_size, one batch per idle server.
+        
+        Returns:
+            List of (input_path, output_path, error) tuples in job order;
+            error is None for successful conversions.
+        """
+        errors = {}
+        batches = []
+        for index, (input_path, output_path) in enumerate(jobs):
+            input_file, output_file = Path(input_path), Path(output_path)
+            try:
+                if not input_file.exists():
+                    raise FileNotFoundError(f"Input file not found: {input_path}")
+                if not supports(output_file.suffix.lower().lstrip('.')):
+                    raise ValueError(f"pandoc server cannot write {output_file.suffix}")
+            except (OSError, ValueError) as e:
+                errors[index] = str(e)
+                continue
+            if not batches or len(batches[-1]) >= self.batch_size:
+                batches.append([])
+            batches[-1].append(index)
+        
+        def run(batch):
+            # Inputs are read in the worker thread so batches overlap with I/O
+            requests = []
+            for index in batch:
+                try:
+                    requests.append(build_request(Path(jobs[index][0]), Path(jobs[index][1])))
+                except OSError as e:
+                    errors[index] = str(e)
+            batch = [index for index in batch if index not in errors]
+            try:
+                results = self.run_batch(requests) if requests else []
+            except RuntimeError as e:
+                errors.update((index, str(e)) for index in batch)
+                return
+            for index, result in zip(batch, results):
+                try:
+                    write_result(result, Path(jobs[index][1]))
+                except (OSError, RuntimeError) as e:
+                    errors[index] = str(e).strip()
+        
+        if batches:
+            with ThreadPoolExecutor(max_workers=len(self.servers)) as threads:
+                list(threads.map(run, batches))
+        
+        return [(input_path, output_path, errors.get(index))
+                for index, (input_path, output_path) in enumerate(jobs)]
+    
+    def close(self) -> None:
+        for server in self.servers:
+            server.kill()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_pool(size: int = None) -> PandocServerPool:
+    """
+    Return the process-wide pool, starting it on first use.
+    
+    Args:
+        size: Number of servers if the pool is created now
+            (default: CPU count, at most 4)
+    """
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = PandocServerPool(size or min(4, os.cpu_count() or 1))
+            atexit.register(_shared_pool.close)
+        return _shared_pool
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Convert many documents through a pool of persistent pandoc servers'
+    )
+    parser.add_argument('inputs', nargs='+', help='Input files')
+    parser.add_argument('--to', required=True, metavar='EXT',
+                       help='Output format (e.g., html, docx, txt; not pdf)')
+    parser.add_argument('--output-dir', help='Output directory (default: next to each input)')
+    parser.add_argument('--size', type=int, default=2,
+                       help='Number of pandoc servers (default: 2)')
+    parser.add_argument('--batch-size', type=int, default=50,
+                       help='Documents per request (default: 50)')
+    parser.add_argument('--timeout', type=float, default=120,
+                       help='Seconds before a batch is considered hung (default: 120)')
+    
+    args = parser.parse_args()
+    
+    try:
+        target = args.to.lower().lstrip('.')
+        if args.output_dir:
+            Path(args.output_dir).mkdir(parents=True, exist_ok=True)
+        jobs = [(Path(path), Path(args.output_dir or Path(path).parent) / f"{Path(path).stem}.{target}")
+                for path in args.inputs]
+        
+        with PandocServerPool(args.size, timeout=args.timeout, batch_size=args.batch_size) as pool:
+            results = pool.convert_many(jobs)
+    except Exception as e:
+        print(f"✗ Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    
+    failed = False
+    for input_file, output_file, error in results:
+        if error is None:
+            print(f"✓ Converted: {input_file.name} → {output_file.name}")
+        else:
+            failed = True
+            print(f"✗ Error: {input_file}: {error}", file=sys.stderr)
+    
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
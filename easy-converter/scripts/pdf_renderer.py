@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Warm in-process HTML/Markdown → PDF rendering with WeasyPrint.
+The per-file path runs pandoc, which in turn starts WeasyPrint: two cold
+starts per document, and fonts and stylesheets are loaded afresh each time.
+A PdfRenderer keeps WeasyPrint imported and reuses one FontConfiguration,
+the parsed stylesheets and fetched images across documents. PdfRenderPool
+gives every worker process its own renderer, warmed up before the first
+document, so batches render in parallel without cold starts.
+
+Markdown is rendered to HTML with markdown-it-py (document_fastpath.py),
+so the output follows CommonMark rather than pandoc's Markdown.
+
+Requires WeasyPrint (and the Pango library it uses), plus markdown-it-py
+for Markdown inputs:
+    pip install weasyprint markdown-it-py
+"""
+
+import os
+import sys
+import atexit
+import threading
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import argparse
+
+from document_fastpath import markdown_available, markdown_to_html
+
+
+MARKDOWN_FORMATS = {'md', 'markdown'}
+INPUT_FORMATS = MARKDOWN_FORMATS | {'html', 'htm'}
+
+# Print defaults close to pandoc's standalone HTML, applied before any user stylesheet
+DEFAULT_STYLESHEET = """
+@page { size: A4; margin: 2cm; }
+body { font-family: serif; font-size: 11pt; line-height: 1.4; color: #1a1a1a; }
+h1, h2, h3, h4, h5, h6 { line-height: 1.2; margin-top: 1.4em; break-after: avoid; }
+header#title-block-header h1.title { text-align: center; }
+table { border-collapse: collapse; margin: 1em 0; }
+th, td { padding: 0.25em 0.5em; border-bottom: 1px solid #aaa; text-align: left; }
+thead th { border-bottom: 1.5px solid #1a1a1a; }
+tr { break-inside: avoid; }
+pre, code { font-family: monospace; font-size: 0.9em; }
+pre { margin: 1em 0; white-space: pre-wrap; break-inside: avoid; }
+img { max-width: 100%; }
+blockquote { margin: 1em 0 1em 1.5em; padding-left: 1em; border-left: 2px solid #ccc; color: #555; }
+"""
+
+
+def weasyprint_available() -> bool:
+    return importlib.util.find_spec('weasyprint') is not None
+
+
+def supports(input_format: str, output_format: str) -> bool:
+    """Whether this pair can be rendered in-process here (Markdown also needs markdown-it-py)."""
+    if output_format != 'pdf' or input_format not in INPUT_FORMATS or not weasyprint_available():
+        return False
+    return input_format not in MARKDOWN_FORMATS or markdown_available()
+
+
+class PdfRenderer:
+    """
+    WeasyPrint renderer reused across documents.
+    
+    Safe to use from multiple threads; documents are rendered one at a time.
+    
+    Args:
+        stylesheets: CSS files applied to every document after the default
+            stylesheet; parsed once
+        default_style: Apply DEFAULT_STYLESHEET
+        max_documents: Start with fresh font and image caches after this many
+            documents to bound memory growth
+    """
+    
+    def __init__(self, stylesheets: tuple = (), default_style: bool = True, max_documents: int = 1000):
+        self.stylesheet_paths = tuple(str(path) for path in stylesheets)
+        self.default_style = default_style
+        self.max_documents = max_documents
+        self.lock = threading.Lock()
+        self.reset()
+    
+    def reset(self) -> None:
+        """Load fonts and parse the stylesheets (again)."""
+        from weasyprint import CSS
+        from weasyprint.text.fonts import FontConfiguration
+        
+        for path in self.stylesheet_paths:
+            if not Path(path).exists():
+                raise FileNotFoundError(f"Stylesheet not found: {path}")
+        # @font-face rules of every stylesheet register with the same configuration
+        self.font_config = FontConfiguration()
+        self.stylesheets = [CSS(string=DEFAULT_STYLESHEET, font_config=self.font_config)] if self.default_style else []
+        self.stylesheets += [CSS(filename=path, font_config=self.font_config) for path in self.stylesheet_paths]
+        self.stylesheet_stamps = stylesheet_stamps(self.stylesheet_paths)
+        # Images fetched by URL (logos, letterheads), shared by all documents
+        self.cache = {}
+        self.documents = 0
+    
+    def render(self, input_path: str, output_path: str) -> None:
+        """
+        Render one HTML or Markdown document to PDF.
+        
+        Args:
+            input_path: Path to an HTML or Markdown file; relative links
+                resolve against its directory
+            output_path: Path to the PDF file
+        """
+        from weasyprint import HTML
+        
+        input_file = Path(input_path)
+        output_file = Path(output_path)
+        
+        if not input_file.exists():
+            raise FileNotFoundError(f"Input file not found: {input_path}")
+        input_format = input_file.suffix.lower().lstrip('.')
+        if input_format not in INPUT_FORMATS or output_file.suffix.lower() != '.pdf':
+            raise ValueError(f"Unsupported conversion: {input_format} → "
+                             f"{output_file.suffix.lower().lstrip('.')}")
+        
+        base_url = str(input_file.resolve())
+        if input_format in MARKDOWN_FORMATS:
+            text = input_file.read_text(encoding='utf-8', errors='replace')
+            document = HTML(string=markdown_to_html(text, input_file.stem), base_url=base_url)
+        else:
+            document = HTML(filename=base_url)
+        
+        with self.lock:
+            if self.documents >= self.max_documents:
+                self.reset()
+            document.write_pdf(str(output_file), font_config=self.font_config,
+                               stylesheets=self.stylesheets, cache=self.cache)
+            self.documents += 1
+
+
+def stylesheet_stamps(paths: tuple) -> tuple:
+    """(mtime, size) of each stylesheet, to notice edits; None for a missing file."""
+    stamps = []
+    for path in paths:
+        try:
+            info = os.stat(path)
+        except OSError:
+            stamps.append(None)
+        else:
+            stamps.append((info.st_mtime_ns, info.st_size))
+    return tuple(stamps)
+
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+
+def get_renderer(stylesheets: tuple = ()) -> PdfRenderer:
+    """Return this process's renderer, creating it on first use or when the stylesheets change or are edited."""
+    global _renderer
+    stylesheets = tuple(str(path) for path in stylesheets)
+    with _renderer_lock:
+        if (_renderer is None or _renderer.stylesheet_paths != stylesheets
+                or _renderer.stylesheet_stamps != stylesheet_stamps(stylesheets)):
+            _renderer = PdfRenderer(stylesheets)
+        return _renderer
+
+
+def render_pdf(input_path: str, output_path: str, stylesheets: tuple = ()) -> None:
+    """Render one document with this process's warm renderer."""
+    get_renderer(stylesheets).render(input_path, output_path)
+
+
+def _warm_up(stylesheets: tuple) -> None:
+    """Pool initializer: import WeasyPrint, load fonts and parse stylesheets before the first job."""
+    try:
+        get_renderer(stylesheets)
+    except Exception:
+        # A failing initializer breaks the whole pool; let each job report the error instead
+        pass
+
+
+def _render_job(job: tuple) -> str:
+    """Pool worker: render one (input, output, stylesheets) job; return the error or None."""
+    input_path, output_path, stylesheets = job
+    try:
+        render_pdf(input_path, output_path, stylesheets)
+    except Exception as e:
+        return str(e).strip() or type(e).__name__
+    return None
+
+
+class PdfRenderPool:
+    """
+    Pool of worker processes, each holding a warm PdfRenderer.
+    
+    Args:
+        size: Number of worker processes
+        stylesheets: CSS files applied to every document
+        chunk_size: Documents handed to a worker at a time by convert_many()
+    """
+    
+    def __init__(self, size: int = 2, stylesheets: tuple = (), chunk_size: int = 8):
+        self.stylesheets = tuple(str(path) for path in stylesheets)
+        for path in self.stylesheets:
+            if not Path(path).exists():
+                raise FileNotFoundError(f"Stylesheet not found: {path}")
+        self.chunk_size = chunk_size
+        self.executor = ProcessPoolExecutor(max_workers=size, initializer=_warm_up,
+                                            initargs=(self.stylesheets,))
+    
+    def convert(self, input_path: str, output_path: str) -> None:
+        """Render a single document on the next idle worker."""
+        error = self.executor.submit(_render_job, (str(input_path), str(output_path), self.stylesheets)).result()
+        if error is not None:
+            raise RuntimeError(f"PDF rendering failed: {error}")
+    
+    def convert_many(self, jobs: list) -> list:
+        """
+        Render (input, output) pairs, chunk_size documents per worker task.
+        
+        Returns:
+            List of (input_path, output_path, error) tuples in job order;
+            error is None for successful conversions.
+        """
+        errors = self.executor.map(_render_job, [(str(input_path), str(output_path), self.stylesheets)
+                                                 for input_path, output_path in jobs],
+                                   chunksize=max(1, self.chunk_size))
+        return [(input_path, output_path, error) for (input_path, output_path), error in zip(jobs, errors)]
+    
+    def close(self) -> None:
+        self.executor.shutdown()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_pool(size: int = None) -> PdfRenderPool:
+    """
+    Return the process-wide pool, starting it on first use.
+    
+    Args:
+        size: Number of workers if the pool is created now (default: CPU count)
+    """
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = PdfRenderPool(size or os.cpu_count() or 1)
+            atexit.register(_shared_pool.close)
+        return _shared_pool
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Render many HTML/Markdown documents to PDF with warm WeasyPrint workers'
+    )
+    parser.add_argument('inputs', nargs='+', help='Input HTML or Markdown files')
+    parser.add_argument('--output-dir', help='Output directory (default: next to each input)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                       help='Number of worker processes (default: CPU count)')
+    parser.add_argument('--stylesheet', action='append', default=[], metavar='CSS',
+                       help='CSS file applied to every document (repeatable)')
+    parser.add_argument('--chunk-size', type=int, default=8,
+                       help='Documents handed to a worker at a time (default: 8)')
+    
+    args = parser.parse_args()
+    
+    try:
+        if not weasyprint_available():
+            raise RuntimeError("WeasyPrint is not installed (pip install weasyprint)")
+        if args.output_dir:
+            Path(args.output_dir).mkdir(parents=True, exist_ok=True)
+        jobs = [(Path(path), Path(args.output_dir or Path(path).parent) / f"{Path(path).stem}.pdf")
+                for path in args.inputs]
+        
+        with PdfRenderPool(args.workers, args.stylesheet, args.chunk_size) as pool:
+            results = pool.convert_many(jobs)
+    except Exception as e:
+        print(f"✗ Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    
+    failed = False
+    for input_file, output_file, error in results:
+        if error is None:
+            print(f"✓ Converted: {input_file.name} → {output_file.name}")
+        else:
+            failed = True
+            print(f"✗ Error: {input_file}: {error}", file=sys.stderr)
+    
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -7,39 +7,253 @@ Supports images, documents, spreadsheets, and presentations.
 import sys
 from pathlib import Path
 import argparse
+import functools
+import glob
+import importlib
+import json
+import os
 import subprocess
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from conversion_cache import ConversionCache, DEFAULT_MAX_BYTES, DEFAULT_CACHE_DIR  # noqa: E402
+import conversion_graph  # noqa: E402
+from conversion_graph import ConversionGraph, Step, load_costs, scratch_dir  # noqa: E402
+from batch_jobs import find_conflicts, capture_output  # noqa: E402
+import metrics  # noqa: E402
+from metrics import instrument, stage, annotate  # noqa: E402
 
 
 # Format categories
-IMAGE_FORMATS = {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'tiff', 'tif', 'webp', 'ico'}
+IMAGE_FORMATS = {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'tiff', 'tif', 'webp', 'avif', 'ico'}
 DOCUMENT_FORMATS = {'pdf', 'docx', 'doc', 'txt', 'md', 'markdown', 'html', 'htm', 'rtf', 'odt', 'epub'}
-SPREADSHEET_FORMATS = {'xlsx', 'xls', 'csv', 'tsv', 'ods'}
+SPREADSHEET_FORMATS = {'xlsx', 'xls', 'csv', 'tsv', 'ods', 'parquet', 'feather', 'arrow'}
 PRESENTATION_FORMATS = {'pptx', 'ppt', 'odp'}
 
+# Converter registry: module name -> {convert_file option: converter keyword}.
+# Each module exposes a function with the same name as the module.
+CONVERTERS = {
+    'convert_image': {'quality': 'quality', 'resize': 'resize', 'fit': 'fit',
+                      'thumbnail': 'thumbnail', 'preset': 'preset', 'lossless': 'lossless',
+                      'background': 'background', 'frames': 'frames', 'large': 'large'},
+    'convert_document': {'pooled': 'pooled', 'document_engine': 'engine', 'stylesheet': 'stylesheets'},
+    'convert_spreadsheet': {'sheet': 'sheet_name', 'engine': 'engine',
+                            'dictionary_encode': 'dictionary_encode', 'all_sheets': 'all_sheets'},
+    'convert_presentation': {'pooled': 'pooled'},
+}
+
+# Converters that hand the work to an external tool (pandoc, LibreOffice).
+# In batch mode these run on threads that each wait on a child process;
+# PIL and pandas converters run in a process pool instead.
+EXTERNAL_CONVERTERS = {'convert_document', 'convert_presentation'}
+
+# Backends of those converters that work in-process instead. They render
+# plain Markdown only (no footnotes, citations or other pandoc extensions),
+# so they are opt-in (--document-engine python) wherever pandoc can convert
+IN_PROCESS_BACKENDS = {'python', 'weasyprint'}
+
+# Formats a multi-step route may pass through when no converter goes straight
+# to the output. Markdown keeps only what plain text has, so in practice it is
+# an intermediate for TXT sources; richer documents have direct PDF, HTML and
+# office steps, which the planner always prefers to a chain
+INTERMEDIATE_FORMATS = {'png', 'tiff', 'html', 'md', 'csv', 'parquet', 'docx', 'odt'}
+
+# Documents pandoc reads and writes (it has no plain-text or DOC reader)
+PANDOC_INPUTS = {'md', 'markdown', 'html', 'htm', 'docx', 'odt', 'rtf', 'epub'}
+PANDOC_OUTPUTS = {'md', 'markdown', 'txt', 'html', 'htm', 'docx', 'odt', 'rtf', 'epub'}
+
+# Python modules pandas needs to read or write these spreadsheet formats
+SHEET_READERS = {'xlsx': 'openpyxl', 'xls': 'xlrd', 'ods': 'odf',
+                 'parquet': 'pyarrow', 'feather': 'pyarrow', 'arrow': 'pyarrow'}
+SHEET_WRITERS = {'xlsx': 'openpyxl', 'xls': 'openpyxl', 'ods': 'odf',
+                 'parquet': 'pyarrow', 'feather': 'pyarrow', 'arrow': 'pyarrow'}
+
+# Measured step costs written by benchmarks/bench_routes.py
+COSTS_FILE = DEFAULT_CACHE_DIR / 'route_costs.json'
 
-def get_converter_script(input_format: str, output_format: str) -> str:
-    """Determine which converter script to use."""
-    script_dir = Path(__file__).parent
+SCRIPT_DIR = Path(__file__).parent
+
+
+def build_graph() -> ConversionGraph:
+    """
+    Describe what every converter can do as a conversion graph.
     
-    if input_format in IMAGE_FORMATS and output_format in IMAGE_FORMATS:
-        return str(script_dir / 'convert_image.py')
-    elif input_format in DOCUMENT_FORMATS or output_format in DOCUMENT_FORMATS:
-        return str(script_dir / 'convert_document.py')
-    elif input_format in SPREADSHEET_FORMATS and output_format in SPREADSHEET_FORMATS:
-        return str(script_dir / 'convert_spreadsheet.py')
-    elif input_format in PRESENTATION_FORMATS or (input_format in PRESENTATION_FORMATS and output_format == 'pdf'):
-        return str(script_dir / 'convert_presentation.py')
-    else:
-        raise ValueError(f"Unsupported conversion: {input_format} → {output_format}")
+    Default costs are rough seconds per small file on a typical machine;
+    they only need to rank the alternatives until calibrated.
+    """
+    from convert_document import OFFICE_INPUT_FORMATS, OFFICE_OUTPUT_FORMATS
+    from convert_presentation import OUTPUT_FORMATS as SLIDE_OUTPUTS
+    from document_fastpath import FAST_CONVERSIONS
+    from pdf_renderer import MARKDOWN_FORMATS, INPUT_FORMATS as RENDERER_INPUTS
+    
+    graph = ConversionGraph(INTERMEDIATE_FORMATS)
+    # Image → PDF is one page per frame (multi-page TIFF scans), written by Pillow
+    graph.add('convert_image', 'pillow', IMAGE_FORMATS, IMAGE_FORMATS | {'pdf'}, 0.05, requires=('PIL',))
+    
+    for source in SPREADSHEET_FORMATS:
+        for target in SPREADSHEET_FORMATS | {'html'}:
+            modules = {'pandas', SHEET_READERS.get(source, 'pandas'), SHEET_WRITERS.get(target, 'pandas')}
+            graph.add('convert_spreadsheet', 'pandas', {source}, {target}, 0.2, requires=tuple(sorted(modules)))
+    
+    graph.add('convert_document', 'pandoc', PANDOC_INPUTS, PANDOC_OUTPUTS, 0.3, requires=('pandoc',))
+    graph.add('convert_document', 'pandoc', PANDOC_INPUTS, {'pdf'}, 1.5, requires=('pandoc', 'weasyprint'))
+    for (source, target), (_, needs_markdown) in FAST_CONVERSIONS.items():
+        graph.add('convert_document', 'python', {source}, {target}, 0.01,
+                  requires=('markdown_it',) if needs_markdown else (), document_engine='python')
+    # Warm in-process WeasyPrint: no pandoc or WeasyPrint startup per document
+    graph.add('convert_document', 'weasyprint', MARKDOWN_FORMATS, {'pdf'}, 0.3,
+              requires=('weasyprint', 'markdown_it'), document_engine='python')
+    graph.add('convert_document', 'weasyprint', RENDERER_INPUTS - MARKDOWN_FORMATS, {'pdf'}, 0.3,
+              requires=('weasyprint',), document_engine='python')
+    # LibreOffice only takes DOC/ODT/RTF through the pool
+    graph.add('convert_document', 'libreoffice', OFFICE_INPUT_FORMATS, OFFICE_OUTPUT_FORMATS, 3.0,
+              requires=('soffice', 'uno'), pooled=True)
+    graph.add('convert_presentation', 'libreoffice', PRESENTATION_FORMATS, SLIDE_OUTPUTS, 3.0,
+              requires=('libreoffice',))
+    return graph
+
+
+@functools.lru_cache(maxsize=None)
+def get_graph() -> ConversionGraph:
+    """The conversion graph, with the costs of the last calibration run if there was one."""
+    graph = build_graph()
+    graph.calibrate(load_costs(COSTS_FILE))
+    return graph
+
+
+def pandoc_converts(source: str, target: str) -> bool:
+    """Whether an installed pandoc step converts source straight to target."""
+    return any(step.backend == 'pandoc' and step.target == target
+               and all(map(conversion_graph.installed, step.requires))
+               for step in get_graph().edges.get(source, ()))
+
+
+def step_allowed(step: Step, options: dict) -> bool:
+    """
+    Whether a step respects the engine choices in the conversion options.
+    
+    Without a document engine, pandoc converts what it can and in-process
+    steps only cover the rest (TXT → MD, or no pandoc installed).
+    """
+    engine = options.get('document_engine')
+    if step.backend in IN_PROCESS_BACKENDS:
+        if engine in ('pandoc', 'server'):
+            return False
+        if engine is None and pandoc_converts(step.source, step.target):
+            return False
+    # --pooled sends DOC/ODT/RTF inputs to LibreOffice rather than pandoc
+    if options.get('pooled') and step.backend == 'pandoc' and step.source in {'doc', 'odt', 'rtf'}:
+        return False
+    return True
+
+
+def plan_route(input_format: str, output_format: str, options: dict = None) -> list:
+    """
+    Choose the cheapest chain of converters for a conversion.
+    
+    Args:
+        input_format: Input extension
+        output_format: Output extension
+        options: convert_file options; engine choices restrict the steps
+    
+    Returns:
+        List of conversion_graph.Step, first to last
+    """
+    return get_graph().plan(input_format, output_format,
+                            usable=functools.partial(step_allowed, options=options or {}))
+
 
+def step_options(step: Step, options: dict) -> dict:
+    """The options of a conversion that a step's converter understands, plus the step's own."""
+    selected = {option: options[option] for option in CONVERTERS[step.converter] if options.get(option)}
+    selected.update(step.options)
+    return selected
+
+
+@functools.lru_cache(maxsize=None)
+def get_tool_version(converter: str) -> str:
+    """Return the version of the library or tool behind a converter (part of the cache key)."""
+    if converter == 'convert_image':
+        import PIL
+        return f"Pillow {PIL.__version__}"
+    if converter == 'convert_spreadsheet':
+        import pandas
+        try:
+            import pyarrow
+            return f"pandas {pandas.__version__}, pyarrow {pyarrow.__version__}"
+        except ImportError:
+            return f"pandas {pandas.__version__}"
+    
+    tool = 'pandoc' if converter == 'convert_document' else 'libreoffice'
+    try:
+        result = subprocess.run([tool, '--version'], capture_output=True, text=True)
+        return result.stdout.splitlines()[0] if result.stdout else tool
+    except OSError:
+        return tool
 
-def convert_file(input_path: str, output_path: str, **kwargs) -> None:
+
+def runs_external_tool(route: list) -> bool:
+    """True if every step of a route mostly waits on pandoc or LibreOffice (run it on a thread, not a process)."""
+    return all(step.converter in EXTERNAL_CONVERTERS and step.backend not in IN_PROCESS_BACKENDS for step in route)
+
+
+def load_converter(name: str):
+    """
+    Import a converter module on first use and return its entry point.
+    
+    Heavy dependencies (PIL, pandas) are only imported when a conversion
+    actually needs them, and stay loaded for subsequent calls.
+    """
+    module = importlib.import_module(name)
+    return getattr(module, name)
+
+
+def run_in_process(converter: str, input_file: Path, output_file: Path, options: dict) -> None:
+    """Call the converter function directly in the current interpreter."""
+    with stage('load_converter'):
+        convert = load_converter(converter)
+    keywords = CONVERTERS[converter]
+    with stage('convert'):
+        convert(str(input_file), str(output_file),
+                **{keywords[option]: value for option, value in options.items()})
+
+
+def run_in_subprocess(converter: str, input_file: Path, output_file: Path, options: dict) -> None:
+    """Run the converter script in a separate Python process."""
+    cmd = [sys.executable, str(SCRIPT_DIR / f'{converter}.py'), str(input_file), str(output_file)]
+    for option, value in options.items():
+        if value is True:
+            cmd.append(f"--{option.replace('_', '-')}")
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                cmd.extend([f"--{option.replace('_', '-')}", str(item)])
+        else:
+            cmd.extend([f"--{option.replace('_', '-')}", str(value)])
+    
+    with stage('convert'):
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    
+    if result.returncode != 0:
+        raise RuntimeError(f"Conversion failed: {result.stderr}")
+    
+    # Print output from converter
+    if result.stdout:
+        print(result.stdout.strip())
+
+
+@instrument('universal_converter')
+def convert_file(input_path: str, output_path: str, isolate: bool = False,
+                 cache: ConversionCache = None, **kwargs) -> None:
     """
     Universal file converter.
     
     Args:
         input_path: Path to input file
         output_path: Path to output file
+        isolate: Run the converter in a separate Python process instead of in-process
+        cache: Reuse outputs of identical earlier conversions from this cache
         **kwargs: Additional arguments passed to specific converters
     """
     input_file = Path(input_path)
@@ -55,47 +269,341 @@ def convert_file(input_path: str, output_path: str, **kwargs) -> None:
     if not input_format or not output_format:
         raise ValueError("Input and output files must have extensions")
     
-    # Get appropriate converter script
-    converter_script = get_converter_script(input_format, output_format)
+    # Plan the cheapest converter chain
+    route = plan_route(input_format, output_format, kwargs)
+    steps = [(step, step_options(step, kwargs)) for step in route]
+    converter = '+'.join(step.converter for step in route)
+    annotate(converter=converter, isolate=isolate)
+    if len(route) > 1:
+        annotate(route=' → '.join([input_format] + [step.target for step in route]))
     
-    # Build command
-    cmd = ['python3', converter_script, str(input_file), str(output_file)]
+    if cache is not None:
+        with stage('cache_lookup'):
+            # Single-step keys are unchanged from before routes had several steps
+            options = steps[0][1] if len(steps) == 1 else [options for _, options in steps]
+            # The PDF depends on the stylesheets' contents, not just their paths
+            stylesheets = {path for _, selected in steps for path in selected.get('stylesheet') or ()}
+            key = cache.make_key(input_file, output_format, converter, options,
+                                 '; '.join(get_tool_version(step.converter) for step in route),
+                                 tuple(sorted(stylesheets)))
+            hit = cache.fetch(key, output_file)
+        annotate(cache='hit' if hit else 'miss')
+        if hit:
+            print(f"✓ Converted (cached): {input_file.name} → {output_file.name}")
+            return
     
-    # Add optional arguments
-    if 'quality' in kwargs and kwargs['quality']:
-        cmd.extend(['--quality', str(kwargs['quality'])])
-    if 'sheet' in kwargs and kwargs['sheet']:
-        cmd.extend(['--sheet', kwargs['sheet']])
+    # A previous cache hit may have hardlinked the output to a read-only
+    # cache entry (perhaps evicted since); unlink it so the converter neither
+    # overwrites the entry in place nor fails on the read-only file
+    if output_file.exists() and (output_file.stat().st_nlink > 1 or not os.access(output_file, os.W_OK)):
+        output_file.unlink()
+    before = output_file.stat() if output_file.exists() else None
     
-    # Execute conversion
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    run_route(steps, input_file, output_file, isolate)
     
-    if result.returncode != 0:
-        raise RuntimeError(f"Conversion failed: {result.stderr}")
+    # Multi-file outputs (one CSV per sheet, one image per frame) leave
+    # output_file alone, so a stale file there must not be cached
+    if cache is not None and written_since(output_file, before):
+        with stage('cache_store'):
+            cache.store(key, output_file)
+
+
+def written_since(path: Path, before) -> bool:
+    """Whether path exists and was written after before, its earlier os.stat() or None."""
+    try:
+        after = path.stat()
+    except FileNotFoundError:
+        return False
+    return before is None or ((after.st_ino, after.st_mtime_ns, after.st_size)
+                              != (before.st_ino, before.st_mtime_ns, before.st_size))
+
+
+def run_route(steps: list, input_file: Path, output_file: Path, isolate: bool = False) -> None:
+    """
+    Run the (step, options) pairs of a planned route.
     
-    # Print output from converter
-    if result.stdout:
-        print(result.stdout.strip())
+    A single step converts straight to the output. Longer routes write each
+    intermediate file to a scratch directory on tmpfs and report a single
+    conversion.
+    """
+    run = run_in_subprocess if isolate else run_in_process
+    if len(steps) == 1:
+        step, options = steps[0]
+        run(step.converter, input_file, output_file, options)
+        return
+    
+    with scratch_dir() as scratch:
+        source = input_file
+        with capture_output():
+            for index, (step, options) in enumerate(steps):
+                last = index == len(steps) - 1
+                target = output_file if last else scratch / f"{input_file.stem}.{step.target}"
+                run(step.converter, source, target, options)
+                if not target.exists():
+                    raise RuntimeError(f"{step.converter} produced no {step.target.upper()} file "
+                                       f"to continue the conversion from")
+                source = target
+    via = ', '.join(step.target for step, _ in steps[:-1])
+    print(f"✓ Converted: {input_file.name} → {output_file.name} (via {via})")
+
+
+def collect_inputs(source: str) -> list:
+    """
+    Expand a batch source into a list of input files.
+    
+    Args:
+        source: A directory, a glob pattern (e.g. 'photos/**/*.png'), or
+            '@manifest.txt' - a file listing one input path per line
+    """
+    if source.startswith('@'):
+        manifest = Path(source[1:])
+        if not manifest.exists():
+            raise FileNotFoundError(f"Manifest not found: {manifest}")
+        lines = (line.strip() for line in manifest.read_text().splitlines())
+        return [Path(line) for line in lines if line and not line.startswith('#')]
+    
+    source_path = Path(source)
+    if source_path.is_dir():
+        return sorted(path for path in source_path.iterdir() if path.is_file())
+    
+    if glob.has_magic(source):
+        return sorted(Path(path) for path in glob.glob(source, recursive=True) if Path(path).is_file())
+    
+    raise FileNotFoundError(f"No directory, glob matches or manifest for: {source}")
+
+
+def plan_batch(inputs: list, target_format: str, output_dir: str = None) -> list:
+    """
+    Pair each input with its output path.
+    
+    Args:
+        inputs: Input file paths
+        target_format: Output extension (e.g. 'webp', 'csv')
+        output_dir: Directory for outputs (default: next to each input)
+    
+    Pairs that would overwrite an input or share an output are kept here;
+    convert_batch() fails them without converting (see batch_jobs.find_conflicts).
+    """
+    target_format = target_format.lower().lstrip('.')
+    jobs = []
+    for input_file in inputs:
+        destination = Path(output_dir) if output_dir else input_file.parent
+        jobs.append((input_file, destination / f"{input_file.stem}.{target_format}"))
+    return jobs
+
+
+def _convert_job(input_path: str, output_path: str, kwargs: dict) -> str:
+    """Batch worker: convert one file and return the converter's message."""
+    with capture_output() as captured:
+        convert_file(input_path, output_path, **kwargs)
+    return captured.getvalue().strip()
+
+
+def convert_batch(jobs: list, workers: int = None, **kwargs) -> list:
+    """
+    Convert many files concurrently.
+    
+    PIL and pandas conversions are spread over a process pool; pandoc and
+    LibreOffice conversions run as concurrent child processes driven from
+    a thread pool. Both pools are bounded by ``workers``.
+    
+    Args:
+        jobs: (input_path, output_path) pairs, e.g. from plan_batch()
+        workers: Maximum concurrent conversions per pool (default: CPU count)
+        **kwargs: Options passed to convert_file() for every job
+    
+    Returns:
+        List of (input_path, output_path, error) tuples in job order;
+        error is None for successful conversions. Jobs that would overwrite
+        an input or another job's output are not run and get an error.
+    """
+    workers = workers or os.cpu_count() or 1
+    conflicts = find_conflicts(jobs)
+    results = []
+    
+    with ProcessPoolExecutor(max_workers=workers) as processes, \
+            ThreadPoolExecutor(max_workers=workers) as threads:
+        futures = []
+        for index, (input_file, output_file) in enumerate(jobs):
+            input_file, output_file = Path(input_file), Path(output_file)
+            if index in conflicts:
+                futures.append((input_file, output_file, conflicts[index]))
+                continue
+            try:
+                route = plan_route(input_file.suffix.lower().lstrip('.'),
+                                   output_file.suffix.lower().lstrip('.'), kwargs)
+            except ValueError:
+                route = []
+            pool = threads if route and runs_external_tool(route) else processes
+            futures.append((input_file, output_file,
+                            pool.submit(_convert_job, str(input_file), str(output_file), kwargs)))
+        
+        for input_file, output_file, future in futures:
+            if isinstance(future, str):
+                results.append((input_file, output_file, future))
+                continue
+            try:
+                future.result()
+                results.append((input_file, output_file, None))
+            except Exception as e:
+                results.append((input_file, output_file, str(e).strip()))
+    
+    return results
+
+
+def run_batch(source: str, target_format: str, output_dir: str = None,
+              workers: int = None, **kwargs) -> bool:
+    """
+    Convert a directory, glob or manifest and print a per-file summary.
+    
+    Returns:
+        True if every file converted successfully
+    """
+    if output_dir:
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+    
+    jobs = plan_batch(collect_inputs(source), target_format, output_dir)
+    results = convert_batch(jobs, workers, **kwargs)
+    
+    failed = 0
+    for input_file, output_file, error in results:
+        if error is None:
+            print(f"✓ Converted: {input_file} → {output_file}")
+        else:
+            failed += 1
+            print(f"✗ Failed: {input_file} → {output_file}: {error}", file=sys.stderr)
+    
+    print(f"Batch complete: {len(results) - failed} succeeded, {failed} failed")
+    return failed == 0
+
+
+def explain(source: str, output: str = None, target_format: str = None, options: dict = None) -> None:
+    """Print the route convert_file would take for a file, or for each input format of a batch."""
+    if target_format:
+        pairs = sorted({(path.suffix.lower().lstrip('.'), target_format.lower().lstrip('.'))
+                        for path in collect_inputs(source)})
+    else:
+        pairs = [(Path(source).suffix.lower().lstrip('.'), Path(output).suffix.lower().lstrip('.'))]
+    
+    graph = get_graph()
+    if graph.measured:
+        print(f"Step costs: measured ({COSTS_FILE})")
+    else:
+        print("Step costs: built-in estimates (run benchmarks/bench_routes.py to calibrate)")
+    for input_format, output_format in pairs:
+        try:
+            print(graph.explain(plan_route(input_format, output_format, options)))
+        except ValueError as e:
+            print(f"{input_format} → {output_format}: {e}")
 
 
 def main():
     parser = argparse.ArgumentParser(
         description='Universal file converter - automatically detects and converts between formats'
     )
-    parser.add_argument('input', help='Input file')
-    parser.add_argument('output', help='Output file')
+    parser.add_argument('input',
+                       help='Input file (batch mode: directory, glob or @manifest)')
+    parser.add_argument('output', nargs='?',
+                       help='Output file (batch mode: optional output directory)')
     parser.add_argument('--quality', type=int, help='Quality for image conversion (1-100)')
+    parser.add_argument('--resize', metavar='WxH', help='Scale images to exactly WIDTHxHEIGHT')
+    parser.add_argument('--fit', metavar='WxH',
+                       help='Scale images to fit inside WIDTHxHEIGHT, keeping aspect ratio')
+    parser.add_argument('--thumbnail', metavar='WxH',
+                       help='Like --fit, but never enlarges the image')
+    parser.add_argument('--preset', choices=['fast', 'balanced', 'smallest'],
+                       help='Image encoder effort (default: balanced)')
+    parser.add_argument('--lossless', action='store_true', help='Lossless WebP/AVIF output')
+    parser.add_argument('--background',
+                       help='Colour behind transparent pixels for JPEG output (default: white)')
+    parser.add_argument('--frames', choices=['all', 'first', 'explode'],
+                       help="Multi-frame images: 'all' keeps every frame in GIF/WebP/TIFF/PDF outputs, "
+                            "'first' keeps one, 'explode' writes NAME_0001.EXT, ... (default: all)")
+    parser.add_argument('--large', action='store_true',
+                       help='Convert very large images in memory-bounded bands (TIFF/PNG output is streamed)')
     parser.add_argument('--sheet', help='Sheet name for spreadsheet conversion')
+    parser.add_argument('--all-sheets', action='store_true',
+                       help='Convert every sheet of a workbook in one pass')
+    parser.add_argument('--engine', choices=['c', 'pyarrow'],
+                       help='CSV parser for spreadsheet conversion (pyarrow is multithreaded)')
+    parser.add_argument('--dictionary-encode', action='store_true',
+                       help='Dictionary-encode low-cardinality text columns in Parquet/Feather output')
+    parser.add_argument('--isolate', action='store_true',
+                       help='Run the converter in a separate Python process')
+    parser.add_argument('--pooled', action='store_true',
+                       help='Use persistent LibreOffice instances for presentations and DOC/ODT/RTF')
+    parser.add_argument('--document-engine', choices=['pandoc', 'server', 'python'],
+                       help="Documents: 'server' reuses persistent pandoc servers, 'python' converts "
+                            "MD→HTML, HTML→TXT, TXT→MD and MD/HTML→PDF in-process "
+                            "(default: pandoc, in-process only where pandoc cannot convert)")
+    parser.add_argument('--stylesheet', action='append', metavar='CSS',
+                       help='CSS file applied to PDF documents (repeatable)')
+    parser.add_argument('--cache', nargs='?', const='', metavar='DIR',
+                       help='Reuse outputs of identical conversions (default dir: ~/.cache/easy-converter)')
+    parser.add_argument('--cache-max-mb', type=int, default=DEFAULT_MAX_BYTES // 1024 ** 2,
+                       help='Cache size limit in MB before LRU eviction (default: 2048)')
+    parser.add_argument('--cache-stats', action='store_true',
+                       help='Print cache hit/miss statistics when done')
+    parser.add_argument('--to', metavar='EXT',
+                       help='Batch mode: convert every input to this format')
+    parser.add_argument('--workers', type=int,
+                       help='Batch mode: maximum concurrent conversions (default: CPU count)')
+    parser.add_argument('--metrics', metavar='PATH',
+                       help="Append per-stage timing records as JSON lines to PATH ('-' for stdout); "
+                            "batch runs also print an aggregate report")
+    parser.add_argument('--explain', action='store_true',
+                       help='Show the planned converter route and its estimated cost instead of converting')
     
     args = parser.parse_args()
     
+    if not args.to and not args.output:
+        parser.error('output is required unless --to is given')
+    
+    cache = None
+    if args.cache is not None:
+        cache = ConversionCache(args.cache or None, args.cache_max_mb * 1024 ** 2)
+    
+    options = dict(
+        isolate=args.isolate,
+        cache=cache,
+        quality=args.quality,
+        resize=args.resize,
+        fit=args.fit,
+        thumbnail=args.thumbnail,
+        preset=args.preset,
+        lossless=args.lossless,
+        background=args.background,
+        frames=args.frames,
+        large=args.large,
+        sheet=args.sheet,
+        all_sheets=args.all_sheets,
+        engine=args.engine,
+        dictionary_encode=args.dictionary_encode,
+        pooled=args.pooled,
+        document_engine=args.document_engine,
+        stylesheet=args.stylesheet
+    )
+    
+    metrics.configure(args.metrics)
+    
     try:
-        convert_file(
-            args.input,
-            args.output,
-            quality=args.quality,
-            sheet=args.sheet
-        )
+        if args.explain:
+            explain(args.input, args.output, args.to, options)
+            return
+        if args.to:
+            batch_started = datetime.now(timezone.utc).isoformat()
+            succeeded = run_batch(args.input, args.to, args.output, workers=args.workers, **options)
+            if args.metrics and args.metrics != '-':
+                print(metrics.format_report(metrics.aggregate(
+                    metrics.read_records([args.metrics], since=batch_started))))
+        else:
+            convert_file(args.input, args.output, **options)
+            succeeded = True
+        
+        if cache is not None and args.cache_stats:
+            print(json.dumps(cache.stats()))
+        if not succeeded:
+            sys.exit(1)
     except Exception as e:
         print(f"✗ Error: {e}", file=sys.stderr)
         sys.exit(1)
@@ -0,0 +1,550 @@
+#!/usr/bin/env python3
+"""
+Watch-folder converter.
+Converts files as they arrive in an inbox directory, using inotify on Linux
+and directory polling elsewhere.
+
+A file is converted once its size and modification time have stopped
+changing for --settle seconds, so half-copied uploads are never picked up.
+Rules map input patterns to output formats and options. A state index
+(size, mtime and SHA-256 per input) records what has been converted, so
+restarts and touched-but-unchanged files do not cause duplicate work.
+PIL and pandas conversions run in long-lived worker processes that import
+their libraries once; pandoc and LibreOffice conversions run on threads.
+"""
+
+import os
+import sys
+import json
+import time
+import fnmatch
+import hashlib
+import select
+import signal
+import struct
+import ctypes
+import ctypes.util
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from pathlib import Path
+import argparse
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import metrics  # noqa: E402
+from universal_converter import (plan_route, load_converter, _convert_job,  # noqa: E402
+                                 runs_external_tool)
+
+
+# Options a rule may set: convert_file keyword -> type
+RULE_OPTIONS = {
+    'quality': int,
+    'resize': str,
+    'fit': str,
+    'thumbnail': str,
+    'preset': str,
+    'lossless': bool,
+    'background': str,
+    'frames': str,
+    'large': bool,
+    'sheet': str,
+    'all_sheets': bool,
+    'engine': str,
+    'dictionary_encode': bool,
+    'pooled': bool,
+    'document_engine': str,
+}
+
+# Partial downloads and editor/temporary files are never converted
+IGNORED_SUFFIXES = ('.part', '.partial', '.tmp', '.crdownload', '.download', '~')
+
+STATE_VERSION = 1
+
+# inotify constants (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+EVENT_HEADER = struct.Struct('iIII')
+
+
+def parse_rule(spec: str) -> dict:
+    """
+    Parse a rule 'PATTERN=FORMAT[:KEY=VALUE,...]'.
+    
+    Examples: '*.png=webp', '*.jpg=webp:quality=80,fit=1920x1080',
+    'reports/*.xlsx=csv:all_sheets=true'
+    
+    Returns:
+        {'pattern': ..., 'format': ..., 'options': {...}}
+    """
+    pattern, _, target = spec.partition('=')
+    target_format, _, options = target.partition(':')
+    if not pattern or not target_format:
+        raise ValueError(f"Invalid rule '{spec}' (expected PATTERN=FORMAT[:KEY=VALUE,...])")
+    
+    rule = {'pattern': pattern.strip(), 'format': target_format.strip().lower().lstrip('.'), 'options': {}}
+    for item in filter(None, options.split(',')):
+        key, _, value = item.partition('=')
+        key = key.strip().replace('-', '_')
+        if key not in RULE_OPTIONS or not value:
+            raise ValueError(f"Invalid rule option '{item}' (choose from {', '.join(RULE_OPTIONS)})")
+        if RULE_OPTIONS[key] is bool:
+            rule['options'][key] = value.strip().lower() in ('1', 'true', 'yes', 'on')
+        else:
+            rule['options'][key] = RULE_OPTIONS[key](value.strip())
+    return rule
+
+
+def match_rule(rules: list, relative_path: Path) -> dict:
+    """Return the first rule matching the file name or inbox-relative path (None if none)."""
+    name = relative_path.name.lower()
+    path = relative_path.as_posix().lower()
+    for rule in rules:
+        pattern = rule['pattern'].lower()
+        if fnmatch.fnmatchcase(name, pattern) or fnmatch.fnmatchcase(path, pattern):
+            return rule
+    return None
+
+
+def is_ignored(path: Path) -> bool:
+    """Hidden files and partially written downloads."""
+    return path.name.startswith('.') or path.name.lower().endswith(IGNORED_SUFFIXES)
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def scan_tree(root: Path, recursive: bool, exclude: Path = None) -> list:
+    """List the files under root, skipping hidden directories and the excluded one."""
+    files = []
+    for directory, subdirs, names in os.walk(root):
+        subdirs[:] = [] if not recursive else sorted(
+            name for name in subdirs
+            if not name.startswith('.') and (exclude is None or Path(directory, name) != exclude))
+        files.extend(Path(directory, name) for name in sorted(names))
+    return files
+
+
+class StateIndex:
+    """
+    Inputs already converted, keyed by path relative to the inbox.
+    
+    An input is current when its size and mtime match the index, or when they
+    changed but its SHA-256 did not (e.g. a touched or re-copied file), and
+    its output still exists.
+    """
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self.files = {}
+        if path.exists():
+            data = json.loads(path.read_text())
+            if data.get('version') == STATE_VERSION:
+                self.files = data['files']
+    
+    def is_current(self, key: str, input_file: Path, output_file: Path, stat: os.stat_result) -> bool:
+        """Whether this version of the input has already been converted to output_file."""
+        entry = self.files.get(key)
+        if entry is None or entry['output'] != str(output_file):
+            return False
+        # Exploded multi-frame images produce NAME_0001.EXT, ... instead of the output itself
+        first_frame = output_file.with_name(f"{output_file.stem}_0001{output_file.suffix}")
+        if entry['status'] == 'ok' and not (output_file.exists() or first_frame.exists()):
+            return False
+        if entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return True
+        if entry['size'] == stat.st_size and entry['sha256'] == file_digest(input_file):
+            # Same content under a new mtime: remember the new signature
+            entry['mtime_ns'] = stat.st_mtime_ns
+            self.save()
+            return True
+        return False
+    
+    def record(self, key: str, output_file: Path, stat: os.stat_result, digest: str,
+               error: str = None) -> None:
+        """Store the outcome for the input version with this stat and digest."""
+        self.files[key] = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': digest,
+            'output': str(output_file),
+            'status': 'error' if error else 'ok',
+            'error': error,
+            'converted_at': datetime.now(timezone.utc).isoformat(),
+        }
+        self.save()
+    
+    def save(self) -> None:
+        """Write the index atomically, so a crash never leaves it half-written."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_name(self.path.name + '.tmp')
+        temporary.write_text(json.dumps({'version': STATE_VERSION, 'files': self.files}, indent=1))
+        os.replace(temporary, self.path)
+
+
+class PollingWatcher:
+    """Reports files whose size or mtime changed between directory scans."""
+    
+    name = 'polling'
+    
+    def __init__(self, root: Path, recursive: bool, exclude: Path = None, interval: float = 2.0):
+        self.root = root
+        self.recursive = recursive
+        self.exclude = exclude
+        self.interval = interval
+        self.snapshot = self.scan()
+    
+    def scan(self) -> dict:
+        snapshot = {}
+        for path in scan_tree(self.root, self.recursive, self.exclude):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+    
+    def changes(self, timeout: float) -> set:
+        time.sleep(max(timeout, self.interval))
+        snapshot = self.scan()
+        changed = {path for path, signature in snapshot.items() if self.snapshot.get(path) != signature}
+        self.snapshot = snapshot
+        return changed
+    
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """
+    Reports files touched by inotify events (Linux only).
+    
+    Raises OSError if inotify is unavailable, e.g. on other platforms or
+    when the watch limit is exhausted; callers fall back to polling.
+    """
+    
+    name = 'inotify'
+    
+    def __init__(self, root: Path, recursive: bool, exclude: Path = None):
+        if not sys.platform.startswith('linux'):
+            raise OSError('inotify is only available on Linux')
+        self.root = root
+        self.recursive = recursive
+        self.exclude = exclude
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.directories = {}
+        self.add_tree(root)
+    
+    def add_watch(self, directory: Path) -> None:
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            self.close()
+            raise OSError(error, f'inotify_add_watch failed for {directory}')
+        self.directories[wd] = directory
+    
+    def add_tree(self, directory: Path) -> None:
+        self.add_watch(directory)
+        if self.recursive:
+            for parent, subdirs, _ in os.walk(directory):
+                subdirs[:] = [name for name in subdirs
+                              if not name.startswith('.') and Path(parent, name) != self.exclude]
+                for name in subdirs:
+                    self.add_watch(Path(parent, name))
+    
+    def changes(self, timeout: float) -> set:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        
+        data = os.read(self.fd, 256 * 1024)
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b'\0')
+            offset += EVENT_HEADER.size + length
+            
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost: report everything and let the state index sort it out
+                return set(scan_tree(self.root, self.recursive, self.exclude))
+            directory = self.directories.get(wd)
+            if directory is None or not name:
+                continue
+            path = directory / os.fsdecode(name)
+            if mask & IN_ISDIR:
+                if self.recursive and mask & (IN_CREATE | IN_MOVED_TO) and not path.name.startswith('.') \
+                        and path != self.exclude:
+                    # Files may land in a new directory before its watch exists
+                    self.add_tree(path)
+                    changed.update(scan_tree(path, True, self.exclude))
+            else:
+                changed.add(path)
+        return changed
+    
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def warm_up() -> None:
+    """Worker initializer: import the PIL and pandas converters once per process."""
+    for converter in ('convert_image', 'convert_spreadsheet'):
+        try:
+            load_converter(converter)
+        except ImportError:
+            pass
+
+
+class WatchConverter:
+    """
+    Converts inbox files that match a rule once they have settled.
+    
+    Args:
+        inbox: Directory to watch
+        output_dir: Directory for outputs (mirrors the inbox layout); may be
+            inside the inbox, but not the inbox itself
+        rules: Parsed rules (see parse_rule); the first match wins
+        state_path: State index file
+        workers: Maximum concurrent conversions per pool (default: CPU count)
+        settle: Seconds a file's size and mtime must stay unchanged
+        recursive: Also watch subdirectories
+    """
+    
+    def __init__(self, inbox: Path, output_dir: Path, rules: list, state_path: Path,
+                 workers: int = None, settle: float = 2.0, recursive: bool = False):
+        self.inbox = inbox.resolve()
+        self.output_dir = output_dir.resolve()
+        if self.output_dir == self.inbox:
+            raise ValueError("Output directory must not be the inbox; use a subdirectory, e.g. "
+                             f"{self.inbox / 'converted'}")
+        self.rules = rules
+        self.state = StateIndex(state_path)
+        self.settle = settle
+        self.recursive = recursive
+        self.workers = workers or os.cpu_count() or 1
+        # Outputs inside the inbox must not trigger conversions of their own
+        self.exclude = self.output_dir if self.output_dir.is_relative_to(self.inbox) else None
+        self.pending = {}
+        self.running = {}
+        self.stopped = False
+        self.processes = None
+        self.threads = None
+    
+    def plan(self, path: Path) -> tuple:
+        """Return (state key, output file, rule) for an input, or None if it is not converted."""
+        path = path.resolve() if not path.is_absolute() else path
+        if is_ignored(path) or (self.exclude and path.is_relative_to(self.exclude)):
+            return None
+        relative = path.relative_to(self.inbox)
+        if not self.recursive and len(relative.parts) > 1:
+            return None
+        rule = match_rule(self.rules, relative)
+        if rule is None:
+            return None
+        output_file = self.output_dir / relative.parent / f"{path.stem}.{rule['format']}"
+        return relative.as_posix(), output_file, rule
+    
+    def observe(self, path: Path) -> None:
+        """Note a new or changed file; it is converted once it has settled."""
+        if path in self.running or self.plan(path) is None:
+            return
+        try:
+            stat = path.stat()
+        except OSError:
+            self.pending.pop(path, None)  # deleted or renamed away
+            return
+        signature = (stat.st_size, stat.st_mtime_ns)
+        if self.pending.get(path, (None,))[0] != signature:
+            self.pending[path] = (signature, time.monotonic())
+    
+    def dispatch_ready(self) -> None:
+        """Submit pending files whose size and mtime have been stable for the settle time."""
+        now = time.monotonic()
+        for path, (signature, since) in list(self.pending.items()):
+            try:
+                stat = path.stat()
+            except OSError:
+                del self.pending[path]
+                continue
+            if (stat.st_size, stat.st_mtime_ns) != signature:
+                self.pending[path] = ((stat.st_size, stat.st_mtime_ns), now)
+                continue
+            if now - since < self.settle:
+                continue
+            
+            del self.pending[path]
+            key, output_file, rule = self.plan(path)
+            if self.state.is_current(key, path, output_file, stat):
+                continue
+            self.submit(path, key, output_file, rule, stat)
+    
+    def submit(self, path: Path, key: str, output_file: Path, rule: dict, stat: os.stat_result) -> None:
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        # Hash before converting: if the file changes meanwhile, the new version is not marked done
+        digest = file_digest(path)
+        try:
+            route = plan_route(path.suffix.lower().lstrip('.'), rule['format'], rule['options'])
+        except ValueError as e:
+            print(f"✗ Failed: {path} → {output_file}: {e}", file=sys.stderr)
+            self.state.record(key, output_file, stat, digest, str(e))
+            return
+        pool = self.threads if runs_external_tool(route) else self.processes
+        try:
+            future = pool.submit(_convert_job, str(path), str(output_file), rule['options'])
+        except BrokenProcessPool:
+            pool = self.start_processes()
+            future = pool.submit(_convert_job, str(path), str(output_file), rule['options'])
+        self.running[path] = (future, pool, key, output_file, stat, digest)
+    
+    def start_processes(self) -> ProcessPoolExecutor:
+        """Start the worker processes, replacing a pool broken by a worker that died (e.g. out of memory)."""
+        broken = self.processes
+        self.processes = ProcessPoolExecutor(max_workers=self.workers, initializer=warm_up)
+        if broken is not None:
+            broken.shutdown(wait=False, cancel_futures=True)
+        return self.processes
+    
+    def collect_finished(self) -> None:
+        """Report finished conversions and record them in the state index."""
+        for path, (future, pool, key, output_file, stat, digest) in list(self.running.items()):
+            if not future.done():
+                continue
+            del self.running[path]
+            try:
+                message = future.result()
+                print(message or f"✓ Converted: {path} → {output_file}", flush=True)
+                self.state.record(key, output_file, stat, digest)
+            except BrokenProcessPool:
+                # Every job of the pool fails with it; the next ones go to a new pool
+                if pool is self.processes:
+                    self.start_processes()
+                error = 'A worker process died during the conversion (out of memory?)'
+                print(f"✗ Failed: {path} → {output_file}: {error}", file=sys.stderr, flush=True)
+                self.state.record(key, output_file, stat, digest, error)
+            except Exception as e:
+                print(f"✗ Failed: {path} → {output_file}: {str(e).strip()}", file=sys.stderr, flush=True)
+                self.state.record(key, output_file, stat, digest, str(e).strip())
+            # Changed again while converting: convert the new version too
+            self.observe(path)
+    
+    def stop(self, *_) -> None:
+        self.stopped = True
+    
+    def run(self, watch: bool = True, poll_interval: float = 2.0, force_polling: bool = False) -> None:
+        """
+        Convert existing files, then (if watch) keep converting new ones until stopped.
+        
+        Args:
+            watch: Keep watching; otherwise return once existing files are done
+            poll_interval: Seconds between scans for the polling watcher
+            force_polling: Poll even where inotify is available (e.g. network shares)
+        """
+        if not self.inbox.is_dir():
+            raise FileNotFoundError(f"Inbox not found: {self.inbox}")
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        
+        watcher = None
+        if watch:
+            try:
+                if force_polling:
+                    raise OSError('polling requested')
+                watcher = InotifyWatcher(self.inbox, self.recursive, self.exclude)
+            except OSError:
+                watcher = PollingWatcher(self.inbox, self.recursive, self.exclude, poll_interval)
+            print(f"Watching {self.inbox} ({watcher.name}, {len(self.rules)} rules, "
+                  f"{self.workers} workers) → {self.output_dir}", flush=True)
+        
+        signal.signal(signal.SIGTERM, self.stop)
+        tick = min(0.5, self.settle / 2) if self.settle else 0.1
+        try:
+            self.start_processes()
+            with ThreadPoolExecutor(max_workers=self.workers) as self.threads:
+                # Catch up on files that arrived while the daemon was not running
+                for path in scan_tree(self.inbox, self.recursive, self.exclude):
+                    self.observe(path)
+                
+                while not self.stopped:
+                    if watcher is not None:
+                        for path in watcher.changes(tick if self.pending or self.running else 1.0):
+                            self.observe(path)
+                    elif not self.pending and not self.running:
+                        break
+                    else:
+                        time.sleep(tick)
+                    self.dispatch_ready()
+                    self.collect_finished()
+                
+                # Let conversions in progress finish so their results are recorded
+                while self.running:
+                    time.sleep(0.1)
+                    self.collect_finished()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if self.processes is not None:
+                self.processes.shutdown()
+            if watcher is not None:
+                watcher.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Convert files as they arrive in a watched directory'
+    )
+    parser.add_argument('inbox', help='Directory to watch')
+    parser.add_argument('output', help='Output directory (may be inside the inbox, but not the inbox itself)')
+    parser.add_argument('--rule', action='append', required=True, metavar='PATTERN=FORMAT[:KEY=VALUE,...]',
+                       help="Conversion rule, first match wins (repeatable), e.g. '*.png=webp', "
+                            "'*.jpg=webp:quality=80,fit=1920x1080', '*.csv=parquet'")
+    parser.add_argument('--state', metavar='PATH',
+                       help='State index file (default: OUTPUT/.watch_state.json)')
+    parser.add_argument('--workers', type=int,
+                       help='Maximum concurrent conversions (default: CPU count)')
+    parser.add_argument('--settle', type=float, default=2.0,
+                       help='Seconds a file must stay unchanged before it is converted (default: 2)')
+    parser.add_argument('--recursive', action='store_true', help='Also watch subdirectories')
+    parser.add_argument('--poll', action='store_true',
+                       help='Poll the directory instead of using inotify (e.g. network shares)')
+    parser.add_argument('--poll-interval', type=float, default=2.0,
+                       help='Seconds between directory scans when polling (default: 2)')
+    parser.add_argument('--once', action='store_true',
+                       help='Convert the files already in the inbox, then exit')
+    parser.add_argument('--metrics', metavar='PATH',
+                       help="Append per-stage timing records as JSON lines to PATH ('-' for stdout)")
+    
+    args = parser.parse_args()
+    
+    try:
+        rules = [parse_rule(spec) for spec in args.rule]
+        metrics.configure(args.metrics)
+        output_dir = Path(args.output)
+        state_path = Path(args.state) if args.state else output_dir / '.watch_state.json'
+        daemon = WatchConverter(Path(args.inbox), output_dir, rules, state_path,
+                                args.workers, args.settle, args.recursive)
+        daemon.run(watch=not args.once, poll_interval=args.poll_interval, force_polling=args.poll)
+    except Exception as e:
+        print(f"✗ Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
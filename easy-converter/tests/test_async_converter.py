@@ -0,0 +1,182 @@
+"""Asyncio API under load: hundreds of concurrent jobs stay within the backend limits, aborts kill children."""
+
+import asyncio
+import contextlib
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+import async_converter  # noqa: E402
+
+
+class CountingSemaphore(asyncio.Semaphore):
+    """Semaphore that records how many slots are held, and the most ever held at once."""
+    
+    def __init__(self, value: int):
+        super().__init__(value)
+        self.held = 0
+        self.peak = 0
+    
+    async def acquire(self):
+        await super().acquire()
+        self.held += 1
+        self.peak = max(self.peak, self.held)
+        return True
+    
+    def release(self):
+        self.held -= 1
+        super().release()
+
+
+@pytest.fixture
+def slots(monkeypatch):
+    """Backend semaphores of the test, replacing async_converter's per-loop ones."""
+    original = dict(async_converter.BACKEND_LIMITS)
+    semaphores = {}
+    
+    def backend_slot(backend):
+        if backend not in semaphores:
+            semaphores[backend] = CountingSemaphore(async_converter.BACKEND_LIMITS[backend])
+        return semaphores[backend]
+    
+    monkeypatch.setattr(async_converter, 'backend_slot', backend_slot)
+    yield semaphores
+    async_converter.set_limits(**original)
+
+
+@pytest.fixture
+def fake_pandoc(tmp_path, monkeypatch):
+    """
+    A stand-in pandoc on PATH: logs its PID and that of a child it waits on,
+    sleeps FAKE_PANDOC_SECONDS, then copies its input to the -o output.
+    """
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    pandoc = bin_dir / 'pandoc'
+    # Arguments: input -f FROM -t TO -o OUTPUT --standalone
+    pandoc.write_text('#!/bin/sh\n'
+                      'echo $$ >> "$FAKE_PANDOC_PIDS"\n'
+                      'sleep "$FAKE_PANDOC_SECONDS" &\n'
+                      'echo $! >> "$FAKE_PANDOC_PIDS"\n'
+                      'wait\n'
+                      'cp "$1" "$7"\n')
+    pandoc.chmod(0o755)
+    pids = tmp_path / 'pandoc.pids'
+    pids.touch()
+    monkeypatch.setenv('PATH', f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv('FAKE_PANDOC_PIDS', str(pids))
+    monkeypatch.setenv('FAKE_PANDOC_SECONDS', '0.2')
+    return pids
+
+
+def logged_pids(path: Path) -> list:
+    return [int(line) for line in path.read_text().split()]
+
+
+def running(pid: int) -> bool:
+    """Whether a process exists and is not a zombie awaiting its parent."""
+    try:
+        stat = Path(f'/proc/{pid}/stat').read_text()
+    except FileNotFoundError:
+        return False
+    except OSError:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        return True
+    return stat.rpartition(')')[2].split()[0] != 'Z'
+
+
+def test_hundreds_of_concurrent_image_and_text_jobs(tmp_path, slots):
+    async_converter.set_limits(python=4)
+    jobs = []
+    for index in range(200):
+        source = tmp_path / f"image{index:03d}.png"
+        Image.new('RGB', (64, 48), (index, 255 - index, 128)).save(source)
+        jobs.append((source, tmp_path / 'out' / f"image{index:03d}.jpg"))
+    for index in range(100):
+        source = tmp_path / f"note{index:03d}.txt"
+        source.write_text(f"Note {index}\n\nSome *text* & more.\n")
+        jobs.append((source, tmp_path / 'out' / f"note{index:03d}.md"))
+    (tmp_path / 'out').mkdir()
+    
+    results = asyncio.run(async_converter.convert_many(jobs, quality=80))
+    
+    assert [error for _, _, error in results if error is not None] == []
+    assert all(output.exists() for _, output in jobs)
+    assert slots['python'].peak == 4
+    assert slots['python'].held == 0
+
+
+def test_pandoc_jobs_stay_within_their_limit(tmp_path, slots, fake_pandoc):
+    async_converter.set_limits(pandoc=3)
+    jobs = []
+    for index in range(12):
+        source = tmp_path / f"doc{index:02d}.md"
+        source.write_text(f"# Document {index}\n")
+        jobs.append((source, tmp_path / f"doc{index:02d}.html"))
+    
+    results = asyncio.run(async_converter.convert_many(jobs))
+    
+    assert [error for _, _, error in results if error is not None] == []
+    assert all(output.read_text() == source.read_text() for source, output in jobs)
+    assert slots['pandoc'].peak == 3
+    assert slots['pandoc'].held == 0
+
+
+def test_timeout_kills_pandoc_and_its_children(tmp_path, slots, fake_pandoc, monkeypatch):
+    monkeypatch.setenv('FAKE_PANDOC_SECONDS', '30')
+    source = tmp_path / 'slow.md'
+    source.write_text('# Slow\n')
+    
+    with pytest.raises(TimeoutError, match='timed out after 1s'):
+        asyncio.run(async_converter.convert_document(str(source), str(tmp_path / 'slow.html'), timeout=1))
+    
+    pids = logged_pids(fake_pandoc)
+    assert len(pids) == 2
+    assert not any(map(running, pids))
+    assert slots['pandoc'].held == 0
+
+
+def test_cancellation_kills_pandoc_and_its_children(tmp_path, slots, fake_pandoc, monkeypatch):
+    monkeypatch.setenv('FAKE_PANDOC_SECONDS', '30')
+    source = tmp_path / 'slow.md'
+    source.write_text('# Slow\n')
+    
+    async def start_and_cancel():
+        task = asyncio.ensure_future(async_converter.convert_document(str(source), str(tmp_path / 'slow.html')))
+        while len(logged_pids(fake_pandoc)) < 2:
+            await asyncio.sleep(0.05)
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+        return task.cancelled()
+    
+    assert asyncio.run(start_and_cancel())
+    assert not any(map(running, logged_pids(fake_pandoc)))
+    assert slots['pandoc'].held == 0
+
+
+def test_timed_out_pool_job_keeps_its_slot_until_done(tmp_path, slots):
+    async_converter.set_limits(python=1)
+    source = tmp_path / 'big.png'
+    Image.effect_noise((2000, 2000), 64).save(source)
+    
+    async def time_out_then_wait():
+        with pytest.raises(TimeoutError, match='finishes it in the background'):
+            await async_converter.convert_file(str(source), str(tmp_path / 'big.webp'), timeout=0.01, preset='fast')
+        # The worker is still converting: its slot is not free yet
+        held_after_timeout = slots['python'].held
+        async with slots['python']:
+            pass
+        return held_after_timeout
+    
+    assert asyncio.run(time_out_then_wait()) == 1
+    assert (tmp_path / 'big.webp').exists()
+    assert slots['python'].held == 0
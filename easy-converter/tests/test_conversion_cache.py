@@ -0,0 +1,72 @@
+"""Conversion cache: only outputs a run actually wrote are cached, and entries stay intact."""
+
+import contextlib
+import io
+import stat
+import sys
+from pathlib import Path
+
+import pandas as pd
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+from conversion_cache import ConversionCache  # noqa: E402
+from universal_converter import convert_file  # noqa: E402
+
+
+def convert_quietly(*args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        convert_file(*args, **kwargs)
+
+
+def test_multi_sheet_output_is_not_cached(tmp_path):
+    workbook = tmp_path / 'book.xlsx'
+    with pd.ExcelWriter(workbook, engine='openpyxl') as writer:
+        for sheet in ('one', 'two'):
+            pd.DataFrame({'sheet': [sheet]}).to_excel(writer, sheet_name=sheet, index=False)
+    stale = tmp_path / 'out.csv'
+    stale.write_text('stale\n')
+    cache = ConversionCache(tmp_path / 'cache')
+    
+    convert_quietly(str(workbook), str(stale), cache=cache, all_sheets=True)
+    
+    assert sorted(path.name for path in tmp_path.glob('out_*.csv')) == ['out_one.csv', 'out_two.csv']
+    assert cache.entries() == []
+
+
+def test_cache_entries_are_read_only(tmp_path):
+    source = tmp_path / 'in.png'
+    Image.linear_gradient('L').save(source)
+    output = tmp_path / 'out.jpg'
+    cache = ConversionCache(tmp_path / 'cache')
+    
+    convert_quietly(str(source), str(output), cache=cache)
+    convert_quietly(str(source), str(output), cache=cache)
+    
+    [(entry, _, _)] = cache.entries()
+    cached = entry.read_bytes()
+    assert cache.stats()['hits'] == 1
+    assert stat.S_IMODE(entry.stat().st_mode) & 0o222 == 0
+    # Converting over the (possibly hardlinked) output leaves the entry alone
+    convert_quietly(str(source), str(output), cache=cache, quality=20)
+    assert output.read_bytes() != cached
+    assert entry.read_bytes() == cached
+
+
+def test_key_covers_extra_file_contents(tmp_path):
+    source = tmp_path / 'in.md'
+    source.write_text('# Invoice\n')
+    stylesheet = tmp_path / 'style.css'
+    stylesheet.write_text('body { color: black; }\n')
+    cache = ConversionCache(tmp_path / 'cache')
+    
+    def key():
+        return cache.make_key(source, 'pdf', 'convert_document', {'stylesheet': [str(stylesheet)]},
+                              'weasyprint', (str(stylesheet),))
+    
+    before = key()
+    assert key() == before
+    stylesheet.write_text('body { color: red; }\n')
+    assert key() != before
+    assert cache.make_key(source, 'pdf', 'convert_document', {}, 'weasyprint') != before
@@ -0,0 +1,64 @@
+"""Route planner checks: documents go straight to PDF rather than through lossy intermediates."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+import conversion_graph  # noqa: E402
+import universal_converter  # noqa: E402
+
+
+@pytest.fixture
+def graph(monkeypatch):
+    """The built-in graph with every tool treated as installed and no calibration."""
+    monkeypatch.setattr(conversion_graph, 'installed', lambda name: True)
+    return universal_converter.build_graph()
+
+
+def plan(graph, source, target, **options):
+    return graph.plan(source, target, usable=lambda step: universal_converter.step_allowed(step, options))
+
+
+@pytest.mark.parametrize('source', ['docx', 'odt', 'epub', 'rtf'])
+def test_documents_convert_to_pdf_in_one_step(graph, source):
+    route = plan(graph, source, 'pdf')
+    assert [(step.source, step.target) for step in route] == [(source, 'pdf')]
+
+
+def test_pooled_docx_to_pdf_is_one_step(graph):
+    assert len(plan(graph, 'docx', 'pdf', pooled=True)) == 1
+
+
+def test_direct_step_beats_cheaper_chain(graph):
+    # Default estimates make docx → md → pdf through the in-process renderer
+    # cheaper than pandoc's direct PDF step
+    chain = plan(graph, 'docx', 'md') + plan(graph, 'md', 'pdf', document_engine='python')
+    direct = plan(graph, 'docx', 'pdf', document_engine='python')
+    assert graph.route_cost(chain) < graph.route_cost(direct)
+    assert direct[0].backend == 'pandoc'
+
+
+def test_plain_text_still_chains_through_markdown(graph):
+    route = plan(graph, 'txt', 'pdf')
+    assert [step.target for step in route] == ['md', 'pdf']
+
+
+@pytest.mark.parametrize('source, target', [('md', 'html'), ('html', 'txt'), ('md', 'pdf'), ('html', 'pdf')])
+def test_pandoc_is_the_default_document_engine(graph, source, target):
+    assert [step.backend for step in plan(graph, source, target)] == ['pandoc']
+
+
+@pytest.mark.parametrize('source, target', [('md', 'html'), ('html', 'txt'), ('md', 'pdf')])
+def test_python_engine_is_opt_in(graph, source, target):
+    route = plan(graph, source, target, document_engine='python')
+    assert [step.backend for step in route] in (['python'], ['weasyprint'])
+
+
+def test_in_process_engine_covers_what_pandoc_cannot(graph, monkeypatch):
+    # pandoc has no plain-text reader
+    assert [step.backend for step in plan(graph, 'txt', 'md')] == ['python']
+    monkeypatch.setattr(conversion_graph, 'installed', lambda name: name != 'pandoc')
+    assert [step.backend for step in plan(graph, 'md', 'html')] == ['python']
@@ -0,0 +1,38 @@
+"""Encoder presets: the default writes baseline JPEG, and the presets produce different JPEGs."""
+
+import sys
+from pathlib import Path
+
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+from convert_image import DEFAULT_PRESET, PRESETS, convert_image  # noqa: E402
+
+
+def photo(directory: Path) -> Path:
+    gradient = Image.linear_gradient('L').resize((128, 96))
+    source = directory / 'photo.png'
+    Image.merge('RGB', (gradient, Image.effect_noise((128, 96), 32), gradient)).save(source)
+    return source
+
+
+def test_default_preset_writes_baseline_jpeg(tmp_path):
+    output = tmp_path / 'photo.jpg'
+    convert_image(str(photo(tmp_path)), str(output))
+    
+    assert DEFAULT_PRESET == 'balanced'
+    with Image.open(output) as img:
+        assert not img.info.get('progressive')
+
+
+def test_jpeg_presets_differ(tmp_path):
+    source = photo(tmp_path)
+    outputs = {}
+    for preset in PRESETS:
+        outputs[preset] = tmp_path / f"{preset}.jpg"
+        convert_image(str(source), str(outputs[preset]), preset=preset)
+    
+    with Image.open(outputs['smallest']) as img:
+        assert img.info.get('progressive')
+    assert len({output.read_bytes() for output in outputs.values()}) == len(PRESETS)
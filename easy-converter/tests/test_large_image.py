@@ -0,0 +1,54 @@
+"""Streaming (--large) conversions match the in-memory path pixel for pixel."""
+
+import contextlib
+import io
+import sys
+from pathlib import Path
+
+import pytest
+from PIL import Image, ImageChops
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+from convert_image import convert_image  # noqa: E402
+
+
+def keyed_sources(directory: Path) -> dict:
+    """Palette, L and RGB PNGs with a transparent entry or colour key (tRNS)."""
+    gray = Image.linear_gradient('L').resize((40, 30))
+    palette = Image.new('P', gray.size)
+    palette.putpalette([value for index in range(256) for value in (index, 255 - index, index // 2)])
+    palette.putdata([(x * 7 + y) % 256 for y in range(30) for x in range(40)])
+    rgb = Image.merge('RGB', [gray, gray.transpose(Image.FLIP_LEFT_RIGHT), gray])
+    
+    sources = {}
+    for name, img, transparency in (('palette', palette, 3), ('gray', gray, gray.getpixel((5, 5))),
+                                    ('rgb', rgb, rgb.getpixel((5, 5)))):
+        sources[name] = directory / f"{name}.png"
+        img.save(sources[name], transparency=transparency)
+    return sources
+
+
+def convert_quietly(*args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        convert_image(*args, **kwargs)
+
+
+def rgba_pixels_equal(first: Path, second: Path) -> bool:
+    with Image.open(first) as a, Image.open(second) as b:
+        return ImageChops.difference(a.convert('RGBA'), b.convert('RGBA')).getbbox() is None
+
+
+@pytest.mark.parametrize('name', ['palette', 'gray', 'rgb'])
+@pytest.mark.parametrize('output_format', ['png', 'tif'])
+def test_streamed_output_keeps_transparency(tmp_path, name, output_format):
+    source = keyed_sources(tmp_path)[name]
+    expected = tmp_path / 'expected.png'
+    streamed = tmp_path / f"streamed.{output_format}"
+    convert_quietly(str(source), str(expected))
+    # One row per band
+    convert_quietly(str(source), str(streamed), large=True, band_mb=0)
+    
+    with Image.open(expected) as img:
+        assert img.convert('RGBA').getextrema()[3][0] == 0
+    assert rgba_pixels_equal(expected, streamed)
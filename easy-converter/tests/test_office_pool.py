@@ -0,0 +1,105 @@
+"""OfficePool against a fake soffice: crashed and hung instances are restarted, failed startups cleaned up."""
+
+import shutil
+import sys
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+import office_pool  # noqa: E402
+
+
+class FakeInstance(office_pool.OfficeInstance):
+    """
+    Runs the fake soffice process but converts without UNO.
+    
+    The input's text selects the behaviour: 'crash' kills soffice mid-call,
+    'hang' blocks until the watchdog kills it, anything else is copied.
+    """
+    
+    started = []
+    fail_index = None
+    
+    def _connect(self):
+        FakeInstance.started.append(self.process)
+        if self.index == FakeInstance.fail_index:
+            raise RuntimeError("soffice did not accept connections")
+        return object()
+    
+    def convert(self, input_file, output_file, export_filter):
+        behaviour = input_file.read_text()
+        if behaviour == 'crash':
+            self.process.kill()
+            self.process.wait()
+            raise RuntimeError("Binary URP bridge disposed during call")
+        if behaviour == 'hang':
+            self.process.wait()
+            raise RuntimeError("Binary URP bridge disposed during call")
+        shutil.copyfile(input_file, output_file)
+        self.conversions += 1
+
+
+@pytest.fixture
+def fake_soffice(tmp_path, monkeypatch):
+    """Path of a stand-in soffice that ignores its arguments and stays up."""
+    binary = tmp_path / 'soffice'
+    binary.write_text('#!/bin/sh\nexec sleep 600\n')
+    binary.chmod(0o755)
+    monkeypatch.setattr(office_pool, 'OfficeInstance', FakeInstance)
+    monkeypatch.setattr(FakeInstance, 'started', [])
+    monkeypatch.setattr(FakeInstance, 'fail_index', None)
+    return str(binary)
+
+
+def document(directory: Path, name: str, text: str) -> Path:
+    path = directory / name
+    path.write_text(text)
+    return path
+
+
+def test_crashed_instance_is_restarted(tmp_path, fake_soffice):
+    with office_pool.OfficePool(size=1, binary=fake_soffice) as pool:
+        [instance] = pool.instances
+        first = instance.process
+        with pytest.raises(RuntimeError, match='conversion failed'):
+            pool.convert(document(tmp_path, 'crash.docx', 'crash'), tmp_path / 'crash.pdf')
+        
+        assert first.poll() is not None
+        assert instance.is_alive() and instance.process is not first
+        pool.convert(document(tmp_path, 'ok.docx', 'ok'), tmp_path / 'ok.pdf')
+        assert (tmp_path / 'ok.pdf').read_text() == 'ok'
+
+
+def test_hung_conversion_is_killed_by_the_watchdog(tmp_path, fake_soffice):
+    with office_pool.OfficePool(size=1, binary=fake_soffice, timeout=0.5) as pool:
+        [instance] = pool.instances
+        first = instance.process
+        with pytest.raises(RuntimeError, match='timed out after 0.5s'):
+            pool.convert(document(tmp_path, 'hang.docx', 'hang'), tmp_path / 'hang.pdf')
+        
+        assert first.poll() is not None
+        assert instance.is_alive() and instance.process is not first
+        pool.convert(document(tmp_path, 'ok.docx', 'ok'), tmp_path / 'ok.pdf')
+        assert (tmp_path / 'ok.pdf').read_text() == 'ok'
+
+
+def test_failed_startup_stops_started_instances(fake_soffice):
+    FakeInstance.fail_index = 2
+    with pytest.raises(RuntimeError, match='did not accept'):
+        office_pool.OfficePool(size=4, binary=fake_soffice)
+    
+    assert len(FakeInstance.started) == 3
+    assert all(process.poll() is not None for process in FakeInstance.started)
+    profiles = [unquote(urlparse(arg.split('=', 1)[1]).path) for process in FakeInstance.started
+                for arg in process.args if arg.startswith('-env:UserInstallation=')]
+    assert len(profiles) == 3
+    assert not Path(profiles[0]).parent.exists()
+
+
+def test_close_stops_every_instance(fake_soffice):
+    with office_pool.OfficePool(size=2, binary=fake_soffice):
+        pass
+    assert all(process.poll() is not None for process in FakeInstance.started)
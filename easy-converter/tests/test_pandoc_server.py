@@ -0,0 +1,20 @@
+"""PandocServerPool batches: invalid jobs fail on their own without stopping the batch."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+from pandoc_server import PandocServerPool  # noqa: E402
+
+
+def test_missing_and_unsupported_jobs_are_reported_per_job(tmp_path):
+    present = tmp_path / 'present.md'
+    present.write_text('# Title\n')
+    jobs = [(tmp_path / 'missing.md', tmp_path / 'missing.html'),
+            (present, tmp_path / 'present.pdf')]
+    with PandocServerPool(size=0) as pool:
+        results = pool.convert_many(jobs)
+    assert [(input_path, output_path) for input_path, output_path, _ in results] == jobs
+    assert 'not found' in results[0][2]
+    assert 'cannot write' in results[1][2]
@@ -0,0 +1,27 @@
+"""All-sheets conversion: one output per sheet, even when sheet names clash."""
+
+import contextlib
+import io
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+from convert_spreadsheet import convert_spreadsheet  # noqa: E402
+
+
+def test_clashing_sheet_names_get_distinct_outputs(tmp_path):
+    workbook = tmp_path / 'book.xlsx'
+    sheets = ['Q1 Sales', 'Q1_Sales', 'q1 sales', 'a&b', 'a_b']
+    with pd.ExcelWriter(workbook, engine='openpyxl') as writer:
+        for number, sheet in enumerate(sheets):
+            pd.DataFrame({'sheet': [number]}).to_excel(writer, sheet_name=sheet, index=False)
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        convert_spreadsheet(str(workbook), str(tmp_path / 'out.csv'), all_sheets=True)
+    
+    outputs = sorted(tmp_path.glob('out_*.csv'))
+    assert len({path.name.casefold() for path in outputs}) == len(sheets)
+    assert sorted(pd.read_csv(path)['sheet'][0] for path in outputs) == list(range(len(sheets)))